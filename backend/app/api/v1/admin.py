@@ -23,6 +23,8 @@ from app.core.schemas.admin import (
     BroadcastRequest,
     ActivityLogResponse,
     ActivityLogListResponse,
+    CollabRoomStatsResponse,
+    SnapshotRetentionResponse,
 )
 from app.repositories.course import Course
 from app.repositories.project import Project
@@ -310,6 +312,40 @@ async def get_system_stats(
     )
 
 
+@router.get("/collaboration/rooms", response_model=CollabRoomStatsResponse)
+async def get_collaboration_rooms(
+    current_user: User = Depends(get_current_user),
+) -> CollabRoomStatsResponse:
+    """Get collaborative rooms resident in this worker's memory (Admin only)."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    from app.services.collaboration.replication import replicator
+    from app.websocket.broadcast import coalescer
+    from app.websocket.yjs_server import rooms
+    return CollabRoomStatsResponse(
+        **rooms.stats(),
+        replication=replicator.summary(),
+        broadcast=coalescer.stats,
+    )
+
+
+@router.get("/collaboration/snapshot-retention", response_model=SnapshotRetentionResponse)
+async def get_snapshot_retention(
+    current_user: User = Depends(get_current_user),
+) -> SnapshotRetentionResponse:
+    """Get snapshot history thinned and bytes reclaimed by this worker (Admin only)."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    from app.services.collaboration.retention import snapshot_retention
+    return SnapshotRetentionResponse(
+        hourly_hours=snapshot_retention.hourly_hours,
+        daily_days=snapshot_retention.daily_days,
+        **snapshot_retention.stats,
+    )
+
+
 @router.post("/broadcast", status_code=204)
 async def broadcast_notification(
     data: BroadcastRequest,
@@ -18,14 +18,18 @@ async def get_snapshot(
 ) -> Dict[str, Any]:
     """Get the latest snapshot for a project/resource."""
     # Note: Currently project_id field in DB is used as generic resource ID.
-    snapshot = await CollaborationSnapshot.get_latest(project_id)
+    snapshot = await CollaborationSnapshot.get_latest(project_id, type)
     
     if not snapshot:
         return {"project_id": project_id, "snapshot": None}
         
+    snapshot_data = dict(snapshot.snapshot_data)
+    if snapshot_data.pop("codec", None):
+        snapshot_data["data"] = snapshot.get_state()
+
     return {
         "project_id": project_id,
-        "snapshot": snapshot.snapshot_data,
+        "snapshot": snapshot_data,
         "updated_at": snapshot.updated_at
     }
 
@@ -37,10 +41,6 @@ async def save_snapshot(
     current_user: User = Depends(get_current_user),
 ) -> SuccessResponse:
     """Save a snapshot."""
-    snapshot = CollaborationSnapshot(
-        project_id=project_id,
-        snapshot_data=snapshot_data
-    )
-    await snapshot.save()
+    await CollaborationSnapshot.save_in_bucket(project_id, type, snapshot_data)
     
     return SuccessResponse(message="Snapshot saved successfully")
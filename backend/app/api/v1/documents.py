@@ -10,6 +10,7 @@ from app.core.permissions import check_project_permission
 from app.repositories.document import Document, DocumentVersion
 from app.repositories.project import Project
 from app.repositories.user import User
+from app.services.rag_service import rag_service
 from app.core.schemas.document import (
     DocumentCreateRequest,
     DocumentDetailResponse,
@@ -126,6 +127,7 @@ async def create_document(
         last_modified_by=str(current_user.id),
     )
     await new_document.insert()
+    await rag_service.on_document_saved(new_document)
 
     # Log activity
     from app.services.activity_service import activity_service
@@ -247,6 +249,7 @@ async def update_document(
     document.updated_at = datetime.utcnow()
 
     await document.save()
+    await rag_service.on_document_saved(document)
 
     # Log activity
     from app.services.activity_service import activity_service
@@ -300,6 +303,7 @@ async def delete_document(
         )
 
     await document.delete()
+    await rag_service.on_document_deleted(document.project_id, str(document.id))
 
     # Log activity
     from app.services.activity_service import activity_service
@@ -364,7 +368,7 @@ async def get_document_versions(
                 id=str(v.id),
                 document_id=v.document_id,
                 version_number=v.version_number,
-                content_state=base64.b64encode(v.content_state).decode('utf-8'),
+                content_state=base64.b64encode(v.get_state()).decode('utf-8'),
                 created_by=v.created_by,
                 created_at=v.created_at,
             )
@@ -9,6 +9,7 @@ from app.core.config import settings
 from app.core.permissions import check_project_permission
 from app.repositories.project import Project
 from app.repositories.user import User
+from app.services.cache_service import cache_service
 from app.core.schemas.project import (
     ProjectCreateRequest,
     ProjectListResponse,
@@ -275,6 +276,7 @@ async def delete_project(
         )
 
     await project.delete()
+    await cache_service.invalidate_room_access_cache(project_id)
 
 
 @router.post("/{project_id}/members", status_code=status.HTTP_201_CREATED)
@@ -345,6 +347,7 @@ async def add_project_member(
         }
     )
     await project.save()
+    await cache_service.invalidate_room_access_cache(project_id, target_user_id)
 
     return {"message": "Member added successfully"}
 
@@ -376,6 +379,7 @@ async def remove_project_member(
     # Remove member
     project.members = [m for m in project.members if m.get("user_id") != user_id]
     await project.save()
+    await cache_service.invalidate_room_access_cache(project_id, user_id)
 
 
 @router.post("/{project_id}/archive", response_model=ProjectResponse)
@@ -515,6 +519,7 @@ async def update_member_role(
     # Update role
     member["role"] = new_role
     await project.save()
+    await cache_service.invalidate_room_access_cache(project_id, user_id)
 
     return {"message": "Member role updated successfully"}
 
@@ -566,6 +571,7 @@ async def transfer_ownership(
     project.owner_id = new_owner_id
     project.updated_at = datetime.utcnow()
     await project.save()
+    await cache_service.invalidate_room_access_cache(project_id)
 
     return ProjectResponse(
         id=str(project.id),
@@ -1,21 +1,19 @@
 """RAG Knowledge Base API routes."""
 
-import os
-import io
 from typing import Optional, List
 from datetime import datetime
 
-from pydantic import BaseModel, Field
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks, UploadFile, File
+from pydantic import BaseModel, Field, model_validator
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
 from fastapi.responses import JSONResponse
 
 from app.api.v1.auth import get_current_user
+from app.core.config import settings
 from app.repositories.user import User
 from app.repositories.resource import Resource
-from app.repositories.resource_embedding import ResourceEmbedding
+from app.services.rag.index_queue import index_queue
+from app.services.rag.manifest import manifest_store
 from app.services.rag_service import rag_service
-from app.services.storage_service import storage_service
-from app.core.config import settings
 
 router = APIRouter(prefix="/rag", tags=["rag"])
 
@@ -27,8 +25,19 @@ router = APIRouter(prefix="/rag", tags=["rag"])
 class RAGDocumentCreate(BaseModel):
     """Request to add a document to RAG knowledge base."""
     resource_id: str
-    chunk_size: int = Field(default=1000, ge=100, le=5000)
-    overlap: int = Field(default=100, ge=0, le=500)
+    # Chunk sizes are in embedding-model tokens; None uses the server defaults.
+    # Longer chunks would be truncated by the model's input window.
+    max_tokens: Optional[int] = Field(default=None, ge=32, le=settings.RAG_CHUNK_TOKENS)
+    overlap_tokens: Optional[int] = Field(default=None, ge=0, le=128)
+
+    @model_validator(mode="after")
+    def check_overlap(self) -> "RAGDocumentCreate":
+        """Reject an overlap the chunker would refuse, after applying defaults."""
+        max_tokens = self.max_tokens or settings.RAG_CHUNK_TOKENS
+        overlap_tokens = settings.RAG_CHUNK_OVERLAP_TOKENS if self.overlap_tokens is None else self.overlap_tokens
+        if overlap_tokens >= max_tokens:
+            raise ValueError(f"overlap_tokens ({overlap_tokens}) must be smaller than max_tokens ({max_tokens})")
+        return self
 
 
 class RAGDocumentResponse(BaseModel):
@@ -49,7 +58,9 @@ class RAGStatsResponse(BaseModel):
     total_chunks: int
     total_vectors: int
     projects_covered: int
+    total_bytes: int = 0  # Stored chunk text plus vectors
     last_updated: Optional[str] = None
+    queue: Optional[dict] = None  # Indexing queue depth by state and throughput
 
 
 class RAGQueryRequest(BaseModel):
@@ -78,99 +89,17 @@ class RAGQueryResponse(BaseModel):
 # Helper Functions
 # =============================================================================
 
-async def extract_text_from_file(file_key: str, mime_type: str) -> str:
-    """Extract text content from a file stored in MinIO/S3."""
-    try:
-        # Download file content
-        response = storage_service.client.get_object(
-            settings.MINIO_BUCKET_NAME,
-            file_key
-        )
-        content = response.read()
-        response.close()
-        response.release_conn()
-        
-        # Handle different file types
-        if mime_type in ['text/plain', 'text/markdown', 'text/csv']:
-            # Plain text files
-            return content.decode('utf-8', errors='ignore')
-        
-        elif mime_type == 'application/pdf':
-            # PDF - requires PyMuPDF or pdfplumber
-            try:
-                import fitz  # PyMuPDF
-                pdf = fitz.open(stream=content, filetype="pdf")
-                text = ""
-                for page in pdf:
-                    text += page.get_text()
-                pdf.close()
-                return text
-            except ImportError:
-                # Fallback: try pdfplumber
-                try:
-                    import pdfplumber
-                    with pdfplumber.open(io.BytesIO(content)) as pdf:
-                        text = ""
-                        for page in pdf.pages:
-                            text += page.extract_text() or ""
-                        return text
-                except ImportError:
-                    raise ValueError("PDF parsing library not installed. Install PyMuPDF or pdfplumber.")
-        
-        elif mime_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-            # Word documents - requires python-docx
-            try:
-                from docx import Document
-                doc = Document(io.BytesIO(content))
-                text = "\n".join([para.text for para in doc.paragraphs])
-                return text
-            except ImportError:
-                raise ValueError("python-docx not installed for Word document parsing.")
-        
-        elif mime_type == 'text/html':
-            # HTML - extract text using BeautifulSoup
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(content.decode('utf-8', errors='ignore'), 'html.parser')
-            return soup.get_text(separator='\n', strip=True)
-        
-        else:
-            # Try to decode as text for unknown types
-            return content.decode('utf-8', errors='ignore')
-            
-    except Exception as e:
-        raise ValueError(f"Failed to extract text: {str(e)}")
-
-
-async def process_resource_for_rag(resource_id: str, chunk_size: int = 1000, overlap: int = 100):
-    """Background task to process resource for RAG."""
-    try:
-        # Get resource
-        resource = await Resource.get(resource_id)
-        if not resource:
-            print(f"[RAG] Resource not found: {resource_id}")
-            return
-        
-        # Extract text
-        try:
-            text = await extract_text_from_file(resource.file_key, resource.mime_type)
-        except ValueError as e:
-            print(f"[RAG] Failed to extract text from {resource.filename}: {e}")
-            return
-        
-        if not text or len(text.strip()) < 50:
-            print(f"[RAG] Insufficient text content in {resource.filename}")
-            return
-        
-        # Delete existing embeddings for this resource
-        await ResourceEmbedding.find(ResourceEmbedding.resource_id == resource_id).delete()
-        
-        # Process with RAG service
-        await rag_service.process_resource(resource_id, text, chunk_size, overlap)
-        
-        print(f"[RAG] Successfully processed resource: {resource.filename}")
-        
-    except Exception as e:
-        print(f"[RAG] Error processing resource {resource_id}: {e}")
+def job_to_dict(job) -> dict:
+    """Serialize an indexing job for API responses."""
+    return {
+        "status": job.status,
+        "chunks_done": job.chunks_done,
+        "attempts": job.attempts,
+        "error": job.error,
+        "queued_at": job.queued_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
 
 
 # =============================================================================
@@ -189,43 +118,18 @@ async def get_rag_stats(
             detail="Permission denied"
         )
     
-    # Count total embeddings
-    total_chunks = await ResourceEmbedding.count()
-    
-    # Get unique resource IDs
-    pipeline = [
-        {"$group": {"_id": "$resource_id"}},
-        {"$count": "total"}
-    ]
-    result = await ResourceEmbedding.aggregate(pipeline).to_list()
-    total_documents = result[0]["total"] if result else 0
-    
-    # Get projects covered
-    indexed_resource_ids = await ResourceEmbedding.distinct("resource_id")
-    if indexed_resource_ids:
-        from bson import ObjectId
-        object_ids = []
-        for rid in indexed_resource_ids:
-            try:
-                object_ids.append(ObjectId(rid))
-            except:
-                pass
-        resources = await Resource.find({"_id": {"$in": object_ids}}).to_list()
-        project_ids = set(r.project_id for r in resources if r.project_id)
-        projects_covered = len(project_ids)
-    else:
-        projects_covered = 0
-    
-    # Get last updated
-    latest = await ResourceEmbedding.find_one(sort=[("created_at", -1)])
-    last_updated = latest.created_at.isoformat() if latest else None
+    # One aggregation over the per-resource manifest
+    summary = await manifest_store.summary()
+    last_updated = summary["last_updated"]
     
     return RAGStatsResponse(
-        total_documents=total_documents,
-        total_chunks=total_chunks,
-        total_vectors=total_chunks,  # Each chunk has one vector
-        projects_covered=projects_covered,
-        last_updated=last_updated
+        total_documents=summary["documents"],
+        total_chunks=summary["chunks"],
+        total_vectors=summary["chunks"],  # Each chunk has one vector
+        projects_covered=summary["projects"],
+        total_bytes=summary["bytes"],
+        last_updated=last_updated.isoformat() if last_updated else None,
+        queue=await index_queue.stats(),
     )
 
 
@@ -243,67 +147,51 @@ async def list_rag_documents(
             detail="Permission denied"
         )
     
-    # Get all indexed resource IDs
-    indexed_resource_ids = await ResourceEmbedding.distinct("resource_id")
-    
-    if not indexed_resource_ids:
-        return {"documents": [], "total": 0, "page": page, "page_size": page_size}
-    
-    # Convert string IDs to ObjectId for query
-    from bson import ObjectId
-    object_ids = []
-    for rid in indexed_resource_ids:
-        try:
-            object_ids.append(ObjectId(rid))
-        except:
-            pass
-    
-    # Build query for resources
-    query = {"_id": {"$in": object_ids}}
-    if project_id:
-        query["project_id"] = project_id
-    
-    # Get resources with pagination
+    # One page of the manifest, with project names, in a single aggregation
     skip = (page - 1) * page_size
-    resources = await Resource.find(query).skip(skip).limit(page_size).to_list()
-    total = await Resource.find(query).count()
+    manifests, total = await manifest_store.list_page(project_id, skip, page_size)
+    
+    jobs = await index_queue.get_jobs([m["resource_id"] for m in manifests])
     
-    # Get chunk counts for each resource
     documents = []
-    for resource in resources:
-        chunk_count = await ResourceEmbedding.find(
-            ResourceEmbedding.resource_id == str(resource.id)
-        ).count()
-        
-        # Get project name
-        from app.repositories.project import Project
-        project = await Project.get(resource.project_id) if resource.project_id else None
+    for manifest in manifests:
+        resource_id = manifest["resource_id"]
+        job = jobs.get(resource_id)
+        if job and job.status != "done":
+            doc_status = job.status
+        else:
+            doc_status = "indexed" if manifest["chunk_count"] > 0 else "pending"
         
+        uploaded_at = manifest.get("uploaded_at") or manifest["indexed_at"]
         documents.append({
-            "id": str(resource.id),
-            "resource_id": str(resource.id),
-            "filename": resource.filename,
-            "chunk_count": chunk_count,
-            "status": "indexed" if chunk_count > 0 else "pending",
-            "created_at": resource.uploaded_at.isoformat(),
-            "project_id": resource.project_id,
-            "project_name": project.name if project else None,
-            "mime_type": resource.mime_type,
-            "size": resource.size
+            "id": resource_id,
+            "resource_id": resource_id,
+            "filename": manifest.get("filename", ""),
+            "chunk_count": manifest["chunk_count"],
+            "bytes": manifest.get("bytes", 0),
+            "model": manifest.get("model"),
+            "status": doc_status,
+            "job": job_to_dict(job) if job else None,
+            "created_at": uploaded_at.isoformat(),
+            "indexed_at": manifest["indexed_at"].isoformat(),
+            "project_id": manifest.get("project_id"),
+            "project_name": manifest.get("project_name"),
+            "mime_type": manifest.get("mime_type"),
+            "size": manifest.get("size", 0)
         })
     
     return {
         "documents": documents,
         "total": total,
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "queue": await index_queue.stats(),
     }
 
 
 @router.post("/documents")
 async def add_document_to_rag(
     request: RAGDocumentCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ) -> dict:
     """Add a resource document to RAG knowledge base for vectorization."""
@@ -321,33 +209,45 @@ async def add_document_to_rag(
             detail="Resource not found"
         )
     
-    # Check if already indexed
-    existing_count = await ResourceEmbedding.find(
-        ResourceEmbedding.resource_id == request.resource_id
-    ).count()
-    
-    if existing_count > 0:
-        # Re-index - delete existing
-        await ResourceEmbedding.find(
-            ResourceEmbedding.resource_id == request.resource_id
-        ).delete()
-    
-    # Add background task for processing
-    background_tasks.add_task(
-        process_resource_for_rag,
+    # Re-indexing replaces existing chunks once the job runs
+    job, created = await index_queue.submit(
         request.resource_id,
-        request.chunk_size,
-        request.overlap
+        resource.project_id,
+        request.max_tokens,
+        request.overlap_tokens,
     )
     
     return {
-        "message": "Document queued for RAG indexing",
+        "message": "Document queued for RAG indexing" if created else "Document is already being indexed",
         "resource_id": request.resource_id,
         "filename": resource.filename,
-        "status": "processing"
+        "status": job.status,
+        "deduplicated": not created,
     }
 
 
+@router.get("/jobs/{resource_id}")
+async def get_index_job(
+    resource_id: str,
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """Get the indexing job state for a resource."""
+    if current_user.role not in ['teacher', 'admin', 'manager']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied"
+        )
+    
+    job = (await index_queue.get_jobs([resource_id])).get(resource_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No indexing job for this resource"
+        )
+    
+    return {"resource_id": resource_id, **job_to_dict(job)}
+
+
 @router.delete("/documents/{resource_id}")
 async def remove_document_from_rag(
     resource_id: str,
@@ -361,14 +261,12 @@ async def remove_document_from_rag(
         )
     
     # Delete all embeddings for this resource
-    delete_result = await ResourceEmbedding.find(
-        ResourceEmbedding.resource_id == resource_id
-    ).delete()
+    chunks_deleted = await rag_service.remove_resource(resource_id)
     
     return {
         "message": "Document removed from RAG knowledge base",
         "resource_id": resource_id,
-        "chunks_deleted": delete_result.deleted_count if delete_result else 0
+        "chunks_deleted": chunks_deleted
     }
 
 
@@ -413,7 +311,6 @@ async def query_rag(
 @router.post("/batch-index")
 async def batch_index_resources(
     project_id: Optional[str] = Query(None),
-    background_tasks: BackgroundTasks = None,
     current_user: User = Depends(get_current_user)
 ) -> dict:
     """Batch index all resources for a project or all projects."""
@@ -431,7 +328,7 @@ async def batch_index_resources(
     resources = await Resource.find(query).to_list()
     
     # Get already indexed resource IDs
-    indexed_ids = set(await ResourceEmbedding.distinct("resource_id"))
+    indexed_ids = await manifest_store.indexed_ids([str(r.id) for r in resources])
     
     # Filter to only unindexed resources
     to_index = [r for r in resources if str(r.id) not in indexed_ids]
@@ -446,13 +343,16 @@ async def batch_index_resources(
     
     to_index = [r for r in to_index if r.mime_type in supported_types]
     
-    # Queue background tasks
+    # Submit to the indexing queue; resources with an active job are not requeued
+    queued = 0
     for resource in to_index:
-        background_tasks.add_task(process_resource_for_rag, str(resource.id))
+        _, created = await index_queue.submit(str(resource.id), resource.project_id)
+        queued += created
     
     return {
-        "message": f"Queued {len(to_index)} resources for RAG indexing",
-        "resources_queued": len(to_index),
+        "message": f"Queued {queued} resources for RAG indexing",
+        "resources_queued": queued,
+        "skipped_already_queued": len(to_index) - queued,
         "skipped_already_indexed": len(resources) - len(to_index)
     }
 
@@ -477,7 +377,7 @@ async def get_unindexed_resources(
     resources = await Resource.find(query).to_list()
     
     # Get indexed resource IDs
-    indexed_ids = set(await ResourceEmbedding.distinct("resource_id"))
+    indexed_ids = await manifest_store.indexed_ids([str(r.id) for r in resources])
     
     # Supported mime types
     supported_types = [
@@ -260,6 +260,12 @@ async def delete_resource(
     except Exception as e:
         print(f"Warning: Failed to delete file from storage: {e}")
 
+    # Drop RAG embeddings so the project vector index stops returning them
+    try:
+        await rag_service.remove_resource(resource_id_str, project_id)
+    except Exception as e:
+        print(f"Warning: Failed to remove RAG embeddings: {e}")
+
     # Delete from database
     await resource.delete()
 
@@ -7,6 +7,7 @@ from app.api.v1.auth import get_current_user
 from app.repositories.user import User
 from app.core.schemas.user import UserCreateRequest, UserResponse, UserUpdateRequest, UserListResponse
 from app.services.auth_service import get_password_hash
+from app.services.cache_service import cache_service
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -88,6 +89,7 @@ async def update_current_user(
         current_user.settings.update(user_data.settings)
 
     await current_user.save()
+    await cache_service.invalidate_user_profile_cache(str(current_user.id))
 
     return UserResponse(
         id=str(current_user.id),
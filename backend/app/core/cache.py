@@ -12,6 +12,7 @@ from app.core.config import settings
 
 # Redis connection pool
 _redis_client: Optional[Redis] = None
+_binary_redis_client: Optional[Redis] = None
 
 F = TypeVar("F", bound=Callable[..., Any])
 
@@ -28,12 +29,23 @@ async def get_redis_client() -> Redis:
     return _redis_client
 
 
+async def get_binary_redis_client() -> Redis:
+    """Get or create a Redis client that returns raw bytes (Yjs updates, pub/sub frames)."""
+    global _binary_redis_client
+    if _binary_redis_client is None:
+        _binary_redis_client = await redis.from_url(settings.REDIS_URL, decode_responses=False)
+    return _binary_redis_client
+
+
 async def close_redis_client():
-    """Close Redis client connection."""
-    global _redis_client
+    """Close Redis client connections."""
+    global _redis_client, _binary_redis_client
     if _redis_client:
         await _redis_client.close()
         _redis_client = None
+    if _binary_redis_client:
+        await _binary_redis_client.close()
+        _binary_redis_client = None
 
 
 def cache_key(*args, **kwargs) -> str:
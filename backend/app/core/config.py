@@ -58,6 +58,61 @@ class Settings(BaseSettings):
     DEEPSEEK_MODEL: str = "deepseek-chat"
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
 
+    # RAG
+    RAG_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    RAG_EMBEDDING_BACKEND: str = "hf"  # hf | int8 | onnx (see scripts/bench_embedding_backends.py)
+    RAG_EMBEDDING_ONNX_DIR: Optional[str] = "/app/data/onnx_model"  # ONNX export reused across restarts
+    RAG_EMBEDDING_WARMUP: bool = True  # Load the model at startup instead of on the first request
+    RAG_EMBEDDING_CACHE_SIZE: int = 50000  # In-process LRU entries in front of Mongo
+    RAG_INDEX_DIR: str = "/app/data/rag_index"  # Persisted per-project vector indexes
+    RAG_IVF_MIN_VECTORS: int = 20000  # Below this a project index is searched exhaustively
+    RAG_IVF_NPROBE: int = 8  # Inverted lists scanned per query
+    RAG_EMBED_BATCH_SIZE: int = 64  # Chunks per embed_documents call
+    RAG_EMBED_WORKERS: int = 2  # Embedding threads (and max batches in flight)
+    RAG_EXTRACT_WORKERS: int = 2  # Threads for object reads and PDF/Word parsing
+    RAG_EXTRACT_READ_SIZE: int = 1024 * 1024  # Bytes per streamed object read
+    RAG_QUEUE_WORKERS: int = 2  # Indexing jobs run concurrently per process
+    RAG_QUEUE_POLL_INTERVAL: float = 2.0  # Seconds between idle queue polls
+    RAG_QUEUE_LEASE_SECONDS: int = 300  # A job not heartbeating this long is reclaimed
+    RAG_QUEUE_MAX_ATTEMPTS: int = 3
+    RAG_QUEUE_THROUGHPUT_WINDOW: int = 3600  # Seconds of finished jobs behind throughput stats
+    RAG_CHUNK_TOKENS: int = 254  # MiniLM reads 256 tokens including [CLS]/[SEP]
+    RAG_CHUNK_OVERLAP_TOKENS: int = 32  # Trailing sentences repeated in the next chunk
+    RAG_CHUNK_MIN_TOKENS: int = 64  # Smaller sections merge into the next chunk
+    RAG_INSERT_PAGE_SIZE: int = 256  # Chunks embedded and bulk-inserted per page
+    RAG_VECTOR_STORAGE: str = "float32"  # list | float32 | float16 | int8
+    RAG_RESULT_CACHE_TTL: int = 3600  # Bounds Redis memory only; 0 disables the retrieval cache
+    RAG_STRATEGY_TIMEOUT: float = 1.5  # Seconds before a slow retrieval strategy is dropped
+    RAG_INCREMENTAL_INDEXING: bool = True  # Embed project documents and chat into the vector store
+    RAG_DOCUMENT_DEBOUNCE: float = 30.0  # Quiet seconds after an edit before a document is re-embedded
+    RAG_DOCUMENT_MAX_DELAY: float = 300.0  # Re-embed at least this often while editing continues
+    RAG_CHAT_BATCH_SIZE: int = 32  # Chat messages embedded per micro-batch
+    RAG_CHAT_BATCH_INTERVAL: float = 2.0  # Max seconds a chat message waits for its batch
+
+    # Collaboration
+    COLLAB_LOG_FLUSH_MS: int = 250  # Max milliseconds a Yjs update waits in the room's log buffer
+    COLLAB_LOG_FLUSH_BYTES: int = 64 * 1024  # Buffered update bytes that trigger an immediate flush
+    COLLAB_COMPACT_BYTES: int = 1024 * 1024  # Log tail size that triggers a snapshot compaction
+    COLLAB_COMPACT_BATCHES: int = 200  # Log batches behind the snapshot that trigger a compaction
+    COLLAB_ROOM_IDLE_TIMEOUT: float = 300.0  # Seconds a room without clients stays in memory
+    COLLAB_MAX_ROOMS: int = 500  # Resident rooms before idle ones are evicted least recently used first
+    COLLAB_SNAPSHOT_HOURLY_RETENTION: int = 24  # Hours of history kept at one snapshot per hour
+    COLLAB_SNAPSHOT_DAILY_RETENTION: int = 30  # Days of history kept at one snapshot per day
+    COLLAB_SNAPSHOT_COMPACT_INTERVAL: float = 600.0  # Seconds between background retention passes
+    COLLAB_SNAPSHOT_COMPACT_BATCH: int = 200  # Resources thinned per retention pass
+    COLLAB_SNAPSHOT_CODEC: str = "zstd"  # none | zlib | zstd (see scripts/bench_snapshot_codecs.py)
+    COLLAB_ZSTD_LEVEL: int = 3
+    COLLAB_ZSTD_DICT_DIR: Optional[str] = "/app/data/zstd_dicts"  # Trained dictionaries; keep old ones for old frames
+    COLLAB_REPLICATION: bool = False  # Sync rooms across workers over Redis pub/sub (required with >1 worker)
+    COLLAB_LOG_COMPACT_GRACE_MS: int = 5000  # Recent log batches a compaction leaves for other workers' in-flight updates
+    COLLAB_BROADCAST_WINDOW_MS: int = 25  # Operations per room and sender batched into one emit (0 disables)
+    COLLAB_BROADCAST_MAX_OPS: int = 64  # Buffered operations in a room that flush before the window ends
+
+    # Socket.IO
+    SOCKETIO_REDIS: bool = False  # Route emits and presence through Redis (required with >1 worker)
+    SOCKETIO_PRESENCE_TTL: int = 60  # Seconds a connection stays present after its worker's last heartbeat
+    SOCKETIO_PRESENCE_HEARTBEAT: float = 20.0  # Seconds between presence refreshes
+
     # CORS
     CORS_ORIGINS: List[str] = Field(
         default=["http://localhost:5173", "http://localhost:3000"]
@@ -0,0 +1,32 @@
+"""Migration script to build the RAG resource manifest.
+
+Recomputes one ``rag_resource_manifests`` document per resource from the
+chunks in ``resource_embeddings``. Run once after upgrading, or any time the
+manifest is suspected to have drifted.
+
+Usage:
+    python -m app.core.db.migrations.build_rag_manifest
+"""
+
+import asyncio
+import time
+
+from app.core.db.mongodb import mongodb
+from app.services.rag.manifest import manifest_store
+
+
+async def build_rag_manifest() -> int:
+    """Rebuild every resource manifest."""
+    await mongodb.connect()
+    start = time.perf_counter()
+    try:
+        count = await manifest_store.rebuild()
+    finally:
+        await mongodb.disconnect()
+    print(f"Built manifests for {count} resources in {time.perf_counter() - start:.2f}s")
+    print("\nRAG manifest build completed!")
+    return count
+
+
+if __name__ == "__main__":
+    asyncio.run(build_rag_manifest())
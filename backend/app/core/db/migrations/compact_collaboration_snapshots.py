@@ -0,0 +1,36 @@
+"""Migration script to thin the collaborative snapshot history.
+
+Before snapshots were upserted per hour, every debounced save and every
+disconnect added a full-state document to ``collaboration_snapshots``. This
+runs one full retention sweep (the same one the background task spreads over
+many passes) and reports how much was reclaimed.
+
+Usage:
+    python -m app.core.db.migrations.compact_collaboration_snapshots
+"""
+
+import asyncio
+import time
+
+from app.core.db.mongodb import mongodb
+from app.services.collaboration.retention import snapshot_retention
+
+
+async def compact_collaboration_snapshots() -> dict:
+    """Apply snapshot retention to every resource."""
+    await mongodb.connect()
+    start = time.perf_counter()
+    try:
+        report = await snapshot_retention.run_sweep()
+    finally:
+        await mongodb.disconnect()
+    print(
+        f"Scanned {report['resources']} resources, deleted {report['deleted']} snapshots, "
+        f"reclaimed {report['bytes_reclaimed'] / 1024 / 1024:.1f} MB in {time.perf_counter() - start:.2f}s"
+    )
+    print("\nCollaboration snapshot compaction completed!")
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(compact_collaboration_snapshots())
@@ -0,0 +1,54 @@
+"""Migration script to embed existing project documents and chat history.
+
+New and edited documents and new chat messages are embedded incrementally;
+this backfills whatever was written before that was enabled. Documents whose
+text is already embedded are skipped, so the script can be re-run safely.
+
+Usage:
+    python -m app.core.db.migrations.embed_project_context [project_id]
+"""
+
+import asyncio
+import sys
+import time
+
+from app.core.db.mongodb import mongodb
+from app.services.rag.incremental import incremental_indexer, source_key
+
+
+async def embed_project_context(project_id: str = None) -> dict:
+    """Embed every document and not-yet-embedded chat message."""
+    from app.repositories.chat_log import ChatLog
+    from app.repositories.document import Document
+    from app.repositories.resource_embedding import ResourceEmbedding
+
+    await mongodb.connect()
+    start = time.perf_counter()
+    query = {"project_id": project_id} if project_id else {}
+    documents = 0
+    try:
+        async for document in Document.find(query):
+            documents += await incremental_indexer.embed_document_now(document)
+
+        embedded = set(
+            await ResourceEmbedding.find({"source_type": "chat", **query}).distinct("resource_id")
+        )
+        async for chat in ChatLog.find(query):
+            if source_key("chat", str(chat.id)) not in embedded:
+                # Micro-batches flush as they fill; stop() embeds the remainder
+                incremental_indexer.add_chat(chat)
+        await incremental_indexer.stop()
+    finally:
+        await mongodb.disconnect()
+
+    report = {
+        "documents_embedded": documents,
+        "chats_embedded": incremental_indexer.stats["chats_embedded"],
+    }
+    print(f"{report} in {time.perf_counter() - start:.1f}s")
+    print("\nProject context embedding completed!")
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(embed_project_context(sys.argv[1] if len(sys.argv) > 1 else None))
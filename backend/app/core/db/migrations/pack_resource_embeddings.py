@@ -0,0 +1,129 @@
+"""Migration script to pack ResourceEmbedding vectors into binary storage.
+
+Converts legacy ``vector`` float arrays into ``vector_data`` bytes in place and
+prints a report of the storage and load-time savings.
+
+Usage:
+    python -m app.core.db.migrations.pack_resource_embeddings [float32|float16|int8] [--dry-run]
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.utils.vector_codec import decode_vector, encode_vector
+
+BATCH_SIZE = 1000
+SAMPLE_SIZE = 2000
+
+
+async def measure_load(collection, query: dict, decode) -> dict:
+    """Time reading and decoding up to SAMPLE_SIZE embeddings."""
+    start = time.perf_counter()
+    count = 0
+    async for doc in collection.find(query).limit(SAMPLE_SIZE):
+        decode(doc)
+        count += 1
+    elapsed = time.perf_counter() - start
+    return {"documents": count, "seconds": round(elapsed, 4)}
+
+
+async def pack_resource_embeddings(dtype: str = "float32", dry_run: bool = False) -> dict:
+    """Pack legacy float-array vectors into ``dtype`` bytes."""
+    if dtype == "list":
+        raise ValueError("Target dtype must be float32, float16 or int8")
+
+    client = AsyncIOMotorClient(settings.MONGODB_URI)
+    db = client[settings.MONGODB_DB_NAME]
+    collection = db["resource_embeddings"]
+
+    legacy_query = {"vector": {"$type": "array"}}
+    before = await db.command("collStats", "resource_embeddings")
+    legacy_count = await collection.count_documents(legacy_query)
+    print(f"Found {legacy_count} embeddings with legacy float-array vectors")
+
+    load_before = await measure_load(
+        collection, legacy_query, lambda d: [float(x) for x in d["vector"]]
+    )
+
+    # Page by _id so in-place updates never disturb the cursor
+    array_bytes = 0
+    packed_bytes = 0
+    converted = 0
+    last_id = None
+
+    while True:
+        page_query = dict(legacy_query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+        docs = await collection.find(page_query, {"vector": 1}).sort("_id", 1).limit(BATCH_SIZE).to_list(None)
+        if not docs:
+            break
+
+        operations = []
+        for doc in docs:
+            vector = doc["vector"]
+            data, scale = encode_vector(vector, dtype)
+            array_bytes += len(vector) * 17  # type byte + index key + 8-byte double, avg
+            packed_bytes += len(data)
+            operations.append(
+                UpdateOne(
+                    {"_id": doc["_id"]},
+                    {
+                        "$set": {
+                            "vector_data": Binary(data),
+                            "vector_dtype": dtype,
+                            "vector_scale": scale,
+                        },
+                        "$unset": {"vector": ""},
+                    },
+                )
+            )
+        if not dry_run:
+            await collection.bulk_write(operations, ordered=False)
+        converted += len(operations)
+        last_id = docs[-1]["_id"]
+        print(f"Converted {converted}/{legacy_count}")
+
+    packed_query = {"vector_dtype": dtype}
+    load_after = await measure_load(
+        collection,
+        packed_query,
+        lambda d: decode_vector(d["vector_data"], d["vector_dtype"], d.get("vector_scale")),
+    )
+    after = await db.command("collStats", "resource_embeddings")
+
+    report = {
+        "dtype": dtype,
+        "dry_run": dry_run,
+        "converted": converted,
+        "vector_payload_bytes_before": array_bytes,
+        "vector_payload_bytes_after": packed_bytes,
+        "collection_size_before": before.get("size"),
+        "collection_size_after": after.get("size"),
+        "storage_size_before": before.get("storageSize"),
+        "storage_size_after": after.get("storageSize"),
+        "load_before": load_before,
+        "load_after": load_after,
+    }
+    print(json.dumps(report, indent=2))
+
+    client.close()
+    print("\nEmbedding packing completed!")
+    return report
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    asyncio.run(
+        pack_resource_embeddings(
+            dtype=args[0] if args else settings.RAG_VECTOR_STORAGE,
+            dry_run="--dry-run" in sys.argv,
+        )
+    )
@@ -25,6 +25,7 @@ class MongoDB:
         from app.repositories.refresh_token import RefreshToken
         from app.repositories.project import Project
         from app.repositories.collaboration_snapshot import CollaborationSnapshot
+        from app.repositories.collaboration_update import CollaborationUpdate
         from app.repositories.chat_log import ChatLog
         from app.repositories.task import Task
         from app.repositories.calendar_event import CalendarEvent
@@ -42,6 +43,9 @@ class MongoDB:
         from app.repositories.system_config import SystemConfig
         from app.repositories.system_log import SystemLog
         from app.repositories.resource_embedding import ResourceEmbedding
+        from app.repositories.embedding_cache import EmbeddingCacheEntry
+        from app.repositories.rag_index_job import RAGIndexJob
+        from app.repositories.rag_resource_manifest import RAGResourceManifest
         from app.repositories.dashboard_snapshot import DashboardSnapshot
         from app.repositories.inquiry_snapshot import InquirySnapshot
         from app.repositories.agent_config import AgentConfig
@@ -53,6 +57,7 @@ class MongoDB:
                 RefreshToken,
                 Project,
                 CollaborationSnapshot,
+                CollaborationUpdate,
                 ChatLog,
                 Task,
                 CalendarEvent,
@@ -71,6 +76,9 @@ class MongoDB:
                 SystemConfig,
                 SystemLog,
                 ResourceEmbedding,
+                EmbeddingCacheEntry,
+                RAGIndexJob,
+                RAGResourceManifest,
                 DashboardSnapshot,
                 InquirySnapshot,
                 AgentConfig,
@@ -1,7 +1,7 @@
 """Monitoring and metrics utilities."""
 
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from contextlib import asynccontextmanager
 
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
@@ -69,6 +69,54 @@ CACHE_MISSES = Counter(
     ['cache_type']
 )
 
+# RAG metrics
+RAG_STRATEGY_LATENCY = Histogram(
+    'rag_strategy_duration_seconds',
+    'RAG retrieval strategy duration in seconds',
+    ['strategy', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+# Collaboration metrics
+COLLAB_RESIDENT_ROOMS = Gauge(
+    'collab_resident_rooms',
+    'Number of collaborative rooms held in memory'
+)
+
+COLLAB_RESIDENT_BYTES = Gauge(
+    'collab_resident_bytes',
+    'Yjs bytes held by resident collaborative rooms'
+)
+
+COLLAB_ROOM_EVICTIONS = Counter(
+    'collab_room_evictions_total',
+    'Total number of collaborative rooms evicted from memory',
+    ['reason']
+)
+
+COLLAB_BROADCAST_OPS = Counter(
+    'collab_broadcast_ops_total',
+    'Total number of collaboration operations broadcast to rooms'
+)
+
+COLLAB_BROADCAST_FRAMES_SAVED = Counter(
+    'collab_broadcast_frames_saved_total',
+    'Total number of Socket.IO emits saved by batching collaboration operations'
+)
+
+COLLAB_JOIN_SYNC_BYTES = Counter(
+    'collab_join_sync_bytes_total',
+    'Room state bytes on join: sent, and what a base64 full state would have been',
+    ['module', 'payload']
+)
+
+COLLAB_JOIN_SYNC_BYTES_SAVED = Histogram(
+    'collab_join_sync_bytes_saved',
+    'Bytes saved per join by state-vector diffs and binary transfer',
+    ['module'],
+    buckets=(0, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+
 
 @asynccontextmanager
 async def measure_db_query(operation: str, collection: str):
@@ -128,14 +176,43 @@ class PerformanceMonitor:
         WEBSOCKET_CONNECTIONS.set(count)
 
     @staticmethod
-    async def track_cache_hit(cache_type: str):
+    async def track_cache_hit(cache_type: str, count: int = 1):
         """Track cache hit."""
-        CACHE_HITS.labels(cache_type=cache_type).inc()
+        CACHE_HITS.labels(cache_type=cache_type).inc(count)
 
     @staticmethod
-    async def track_cache_miss(cache_type: str):
+    async def track_cache_miss(cache_type: str, count: int = 1):
         """Track cache miss."""
-        CACHE_MISSES.labels(cache_type=cache_type).inc()
+        CACHE_MISSES.labels(cache_type=cache_type).inc(count)
+
+    @staticmethod
+    async def track_rag_strategy(strategy: str, duration: float, status: str = "success"):
+        """Track RAG retrieval strategy latency."""
+        RAG_STRATEGY_LATENCY.labels(strategy=strategy, status=status).observe(duration)
+
+    @staticmethod
+    async def update_collab_rooms(count: int, size: int):
+        """Update resident collaborative room gauges."""
+        COLLAB_RESIDENT_ROOMS.set(count)
+        COLLAB_RESIDENT_BYTES.set(size)
+
+    @staticmethod
+    async def track_room_eviction(reason: str):
+        """Track a collaborative room eviction."""
+        COLLAB_ROOM_EVICTIONS.labels(reason=reason).inc()
+
+    @staticmethod
+    async def track_broadcast_batch(ops: int):
+        """Track a batch of collaboration operations sent as one emit."""
+        COLLAB_BROADCAST_OPS.inc(ops)
+        COLLAB_BROADCAST_FRAMES_SAVED.inc(ops - 1)
+
+    @staticmethod
+    async def track_join_sync(module: str, baseline: int, sent: int):
+        """Track the room state sent to a joining client against the base64 full state."""
+        COLLAB_JOIN_SYNC_BYTES.labels(module=module, payload="baseline").inc(baseline)
+        COLLAB_JOIN_SYNC_BYTES.labels(module=module, payload="sent").inc(sent)
+        COLLAB_JOIN_SYNC_BYTES_SAVED.labels(module=module).observe(max(baseline - sent, 0))
 
     @staticmethod
     async def get_cache_stats() -> Dict[str, Any]:
@@ -145,6 +222,14 @@ class PerformanceMonitor:
             "cache_misses": CACHE_MISSES._value.sum(),
         }
 
+    @staticmethod
+    async def get_hit_rate(cache_types: List[str], miss_type: str) -> float:
+        """Hit rate across one or more hit labels against a miss label."""
+        hits = sum(CACHE_HITS.labels(cache_type=t)._value.get() for t in cache_types)
+        misses = CACHE_MISSES.labels(cache_type=miss_type)._value.get()
+        total = hits + misses
+        return hits / total if total else 0.0
+
 
 # Global monitor instance
 monitor = PerformanceMonitor()
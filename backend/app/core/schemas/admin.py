@@ -1,7 +1,7 @@
 """Admin schemas for API requests and responses."""
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -144,3 +144,39 @@ class ActivityLogListResponse(BaseModel):
 
     logs: List[ActivityLogResponse]
     total: int
+
+
+class CollabRoomResponse(BaseModel):
+    """Response schema for a resident collaborative room."""
+
+    name: str
+    clients: int
+    bytes: int
+    idle_seconds: float
+    resident_seconds: float
+
+
+class CollabRoomStatsResponse(BaseModel):
+    """Response schema for resident collaborative rooms on this worker."""
+
+    resident_rooms: int
+    resident_bytes: int
+    max_rooms: int
+    idle_timeout: float
+    evictions: Dict[str, int]
+    rooms: List[CollabRoomResponse]
+    replication: Dict[str, Any] = Field(default_factory=dict)
+    broadcast: Dict[str, int] = Field(default_factory=dict)
+
+
+class SnapshotRetentionResponse(BaseModel):
+    """Response schema for collaborative snapshot retention on this worker."""
+
+    hourly_hours: int
+    daily_days: int
+    passes: int
+    sweeps: int
+    resources_scanned: int
+    snapshots_deleted: int
+    bytes_reclaimed: int
+    last_run_at: Optional[datetime] = None
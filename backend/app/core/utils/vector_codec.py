@@ -0,0 +1,60 @@
+"""Compact binary encoding for embedding vectors.
+
+Vectors stored as BSON arrays of doubles cost 8 bytes per element plus a type
+byte and index key each, and Pydantic rebuilds a Python float list on every
+read. Packing them as float32/float16 bytes (or int8 with a per-vector scale)
+cuts that to 4/2/1 bytes per element and lets readers view the payload with
+``np.frombuffer`` without copying.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Storage modes accepted by encode_vector; "list" keeps the legacy float array
+VECTOR_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+
+def encode_vector(vector: Sequence[float], dtype: str) -> Tuple[bytes, Optional[float]]:
+    """Pack a vector into bytes.
+
+    Args:
+        vector: Embedding values
+        dtype: One of ``float32``, ``float16`` or ``int8``
+
+    Returns:
+        Tuple of (packed bytes, scale). ``scale`` is only set for int8, where
+        values are symmetric-quantized as ``round(v / scale)``.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+    array = np.asarray(vector, dtype=np.float32)
+    if dtype == "int8":
+        peak = float(np.max(np.abs(array))) if array.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(array / scale), -127, 127).astype(np.int8)
+        return quantized.tobytes(), scale
+
+    return array.astype(VECTOR_DTYPES[dtype]).tobytes(), None
+
+
+def decode_vector(data: bytes, dtype: str, scale: Optional[float] = None) -> np.ndarray:
+    """Unpack bytes produced by :func:`encode_vector`.
+
+    float32 payloads are returned as a read-only zero-copy view; float16 and
+    int8 are widened to float32.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+    array = np.frombuffer(data, dtype=VECTOR_DTYPES[dtype])
+    if dtype == "float32":
+        return array
+    if dtype == "int8":
+        return array.astype(np.float32) * np.float32(scale or 1.0)
+    return array.astype(np.float32)
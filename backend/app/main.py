@@ -35,7 +35,7 @@ from app.core.monitoring import metrics_endpoint, track_request_metrics
 from app.core.security import setup_rate_limiting, get_csp_header
 from app.core.db.mongodb import mongodb
 from app.websocket.socketio_server import socketio_app
-from app.websocket.yjs_server import websocket_endpoint
+from app.websocket.yjs_server import rooms as yjs_rooms, websocket_endpoint
 from app.core.tasks import run_periodic_updates
 import asyncio
 
@@ -54,15 +54,51 @@ async def lifespan(app: FastAPI):
     
     # Start background tasks
     update_task = asyncio.create_task(run_periodic_updates())
+
+    # Reload persisted RAG vector indexes
+    from app.services.rag.vector_index import vector_index_registry
+    index_warm_task = asyncio.create_task(vector_index_registry.warm_start())
+
+    # Load the embedding model now rather than on the first chat
+    from app.services.rag_service import rag_service
+    model_warm_task = (
+        asyncio.create_task(rag_service.warm_up()) if settings.RAG_EMBEDDING_WARMUP else None
+    )
+
+    # Thin collaborative snapshot history in the background
+    from app.services.collaboration.retention import snapshot_retention
+    retention_task = asyncio.create_task(
+        snapshot_retention.run_forever(settings.COLLAB_SNAPSHOT_COMPACT_INTERVAL)
+    )
+
+    # Start RAG indexing workers; queued jobs survive restarts in Mongo
+    from app.services.rag.index_queue import index_queue
+    index_queue.start()
     
     yield
     
     # Shutdown
-    update_task.cancel()
-    try:
-        await update_task
-    except asyncio.CancelledError:
-        pass
+    await index_queue.stop()
+    from app.services.rag.incremental import incremental_indexer
+    await incremental_indexer.stop()
+    await yjs_rooms.stop()
+    from app.services.collaboration.update_log import update_log
+    await update_log.stop()
+    from app.services.collaboration.replication import replicator
+    await replicator.stop()
+    from app.websocket.broadcast import coalescer
+    await coalescer.stop()
+    from app.websocket.presence import presence
+    await presence.stop()
+    background_tasks = [t for t in (update_task, index_warm_task, model_warm_task, retention_task) if t]
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await vector_index_registry.flush()
         
     await close_redis_client()
     await mongodb.disconnect()
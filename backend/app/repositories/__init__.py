@@ -9,6 +9,7 @@ from .project import Project, ProjectMember
 # Content models
 from .document import Document, DocumentVersion
 from .collaboration_snapshot import CollaborationSnapshot
+from .collaboration_update import CollaborationUpdate
 from .resource import Resource
 from .web_annotation import WebAnnotation
 
@@ -42,7 +43,7 @@ __all__ = [
     # Project management
     "Project", "ProjectMember",
     # Content
-    "Document", "DocumentVersion", "CollaborationSnapshot", "Resource", "WebAnnotation",
+    "Document", "DocumentVersion", "CollaborationSnapshot", "CollaborationUpdate", "Resource", "WebAnnotation",
     # Collaboration
     "Task", "CalendarEvent", "ChatLog", "DocComment",
     # AI
@@ -2,6 +2,16 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from beanie import Document, Indexed
 from pydantic import Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from app.core.utils.snapshot_codec import decode_snapshot
+
+
+def snapshot_bucket(when: datetime) -> datetime:
+    """Start of the hour slot a snapshot saved at ``when`` is written into."""
+    return when.replace(minute=0, second=0, microsecond=0)
+
 
 class CollaborationSnapshot(Document):
     """
@@ -10,15 +20,63 @@ class CollaborationSnapshot(Document):
     """
     project_id: Indexed(str)
     snapshot_data: Dict[str, Any]
+    snapshot_type: Optional[str] = None  # whiteboard, document, inquiry; None on legacy rows
+    log_seq: int = 0  # Last update-log batch folded into this snapshot
+    bucket: Optional[datetime] = None  # Hour slot; later saves in the same hour overwrite it
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "collaboration_snapshots" # Changed collection name to be generic
         use_revision = True
+        indexes = [
+            IndexModel(
+                [("project_id", ASCENDING), ("snapshot_type", ASCENDING), ("updated_at", DESCENDING)],
+                name="project_type_updated_index",
+            ),
+            IndexModel(
+                [("project_id", ASCENDING), ("snapshot_type", ASCENDING), ("bucket", ASCENDING)],
+                name="project_type_bucket_unique",
+                unique=True,
+                partialFilterExpression={"bucket": {"$type": "date"}},
+            ),
+        ]
+
+    def get_state(self) -> Optional[bytes]:
+        """Decompress the Yjs state; ``snapshot_data`` holds it as ``data`` tagged with ``codec``."""
+        data = (self.snapshot_data or {}).get("data")
+        if data is None:
+            return None
+        return decode_snapshot(data, self.snapshot_data.get("codec"))
+
+    @classmethod
+    async def get_latest(cls, project_id: str, snapshot_type: Optional[str] = None) -> Optional["CollaborationSnapshot"]:
+        query = {"project_id": project_id}
+        if snapshot_type:
+            # Legacy snapshots were saved without a type
+            query["snapshot_type"] = {"$in": [snapshot_type, None]}
+        return await cls.find_one(query, sort=[("updated_at", -1)])
 
     @classmethod
-    async def get_latest(cls, project_id: str) -> Optional["CollaborationSnapshot"]:
-        return await cls.find_one(
-            cls.project_id == project_id,
-            sort=[("updated_at", -1)]
-        )
+    async def save_in_bucket(
+        cls, project_id: str, snapshot_type: str, snapshot_data: Dict[str, Any], log_seq: int = 0
+    ) -> bool:
+        """Upsert the snapshot into the current hour's slot instead of adding a document per save.
+
+        A compaction (``log_seq`` > 0) only replaces a slot holding an earlier
+        point of the update log. Returns False if the slot already holds a
+        newer snapshot.
+        """
+        now = datetime.utcnow()
+        query = {"project_id": project_id, "snapshot_type": snapshot_type, "bucket": snapshot_bucket(now)}
+        if log_seq:
+            query["log_seq"] = {"$lte": log_seq}
+        update = {"$set": {"snapshot_data": snapshot_data, "log_seq": log_seq, "updated_at": now}}
+        collection = cls.get_motor_collection()
+        try:
+            await collection.update_one(query, update, upsert=True)
+            return True
+        except DuplicateKeyError:
+            # Lost an insert race for a new slot (the winner's document now
+            # exists), or the slot holds a later log_seq and didn't match
+            result = await collection.update_one(query, update)
+            return result.matched_count == 1
@@ -0,0 +1,35 @@
+"""Collaboration update log model."""
+
+from datetime import datetime
+from typing import List
+
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+
+class CollaborationUpdate(Document):
+    """One flushed batch of incremental Yjs updates for a collaborative resource.
+
+    A room's state is its latest ``CollaborationSnapshot`` plus every batch
+    with a higher ``seq``, applied in order. Compaction folds the tail into a
+    new snapshot and deletes the batches it covers.
+    """
+
+    resource_id: str
+    snapshot_type: str = "whiteboard"  # whiteboard, document, inquiry
+    seq: int  # Increases per resource; a snapshot's log_seq covers batches up to it
+    updates: List[bytes]  # Raw Yjs updates in the order they were applied
+    size: int = 0  # Total bytes of updates
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        """Beanie settings."""
+
+        name = "collaboration_updates"
+        indexes = [
+            IndexModel(
+                [("resource_id", ASCENDING), ("snapshot_type", ASCENDING), ("seq", ASCENDING)],
+                name="resource_type_seq_index",
+            ),
+        ]
@@ -7,6 +7,8 @@ from beanie import Document as BeanieDocument
 from pydantic import Field
 from pymongo import IndexModel
 
+from app.core.utils.snapshot_codec import decode_snapshot, encode_snapshot
+
 
 class Document(BeanieDocument):
     """Document document model."""
@@ -36,7 +38,8 @@ class DocumentVersion(BeanieDocument):
     """Document version snapshot for history."""
 
     document_id: str = Field(..., index=True)
-    content_state: bytes  # Y.js ProseMirror state snapshot
+    content_state: bytes  # Y.js ProseMirror state snapshot, compressed with content_codec
+    content_codec: str = Field(default="none")  # none, zlib, zstd (see snapshot_codec)
     version_number: int = Field(..., index=True)
     created_by: str = Field(..., index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -51,3 +54,11 @@ class DocumentVersion(BeanieDocument):
             IndexModel([("created_at", 1)], expireAfterSeconds=2592000),
         ]
 
+    def set_state(self, state: bytes, codec: str = "none") -> None:
+        """Store a Yjs state compressed with ``codec``."""
+        self.content_state, self.content_codec = encode_snapshot(state, codec)
+
+    def get_state(self) -> bytes:
+        """Decompress the stored Yjs state."""
+        return decode_snapshot(self.content_state, self.content_codec)
+
@@ -0,0 +1,29 @@
+"""Embedding cache model for RAG."""
+
+from datetime import datetime
+from typing import List
+
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+
+class EmbeddingCacheEntry(Document):
+    """Embedding vector shared by every chunk with the same normalized text."""
+
+    model: str
+    content_hash: str  # sha256 of the normalized chunk text
+    vector: List[float]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        """Beanie settings."""
+
+        name = "embedding_cache"
+        indexes = [
+            IndexModel(
+                [("model", ASCENDING), ("content_hash", ASCENDING)],
+                name="model_content_hash_index",
+                unique=True,
+            ),
+        ]
@@ -1,9 +1,14 @@
 """Inquiry space snapshot model."""
 
 from datetime import datetime
+from typing import Optional
+
 from beanie import Document
 from pydantic import Field
 
+from app.core.utils.snapshot_codec import decode_snapshot, encode_snapshot
+
+
 class InquirySnapshot(Document):
     """Deep inquiry space snapshot document model."""
 
@@ -13,6 +18,7 @@ class InquirySnapshot(Document):
     snapshot_version: int = Field(default=1)
     snapshot_type: str = Field(default="inquiry")
     compressed: bool = Field(default=False)
+    codec: Optional[str] = None  # none, zlib, zstd; legacy rows only set compressed (zlib)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
@@ -23,3 +29,12 @@ class InquirySnapshot(Document):
             [("project_id", 1), ("snapshot_version", -1)],
             [("created_at", 1)],
         ]
+
+    def set_state(self, state: bytes, codec: str = "none") -> None:
+        """Store a Yjs state compressed with ``codec`` (see snapshot_codec)."""
+        self.data, self.codec = encode_snapshot(state, codec)
+        self.compressed = self.codec != "none"
+
+    def get_state(self) -> bytes:
+        """Decompress the stored Yjs state."""
+        return decode_snapshot(self.data, self.codec or ("zlib" if self.compressed else "none"))
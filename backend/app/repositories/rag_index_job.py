@@ -0,0 +1,41 @@
+"""RAG indexing job model."""
+
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+
+
+class RAGIndexJob(Document):
+    """Queued or finished RAG indexing of one resource.
+
+    There is at most one job per resource: resubmitting an active resource is
+    a no-op, and resubmitting a finished one resets its job to ``queued``.
+    """
+
+    resource_id: str
+    project_id: Optional[str] = None
+    status: str = "queued"  # queued, extracting, embedding, done, failed
+    max_tokens: Optional[int] = None  # None uses RAG_CHUNK_TOKENS
+    overlap_tokens: Optional[int] = None
+    attempts: int = 0
+    chunks_done: int = 0
+    error: Optional[str] = None
+    worker_id: Optional[str] = None
+    queued_at: datetime = Field(default_factory=datetime.utcnow)
+    run_after: datetime = Field(default_factory=datetime.utcnow)  # Retry backoff
+    lease_until: Optional[datetime] = None  # Reclaimed after this if the worker dies
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        """Beanie settings."""
+
+        name = "rag_index_jobs"
+        indexes = [
+            IndexModel([("resource_id", ASCENDING)], name="resource_id_unique", unique=True),
+            IndexModel([("status", ASCENDING), ("run_after", ASCENDING)], name="status_run_after_index"),
+            IndexModel([("status", ASCENDING), ("finished_at", ASCENDING)], name="status_finished_at_index"),
+        ]
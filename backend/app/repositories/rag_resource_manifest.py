@@ -0,0 +1,42 @@
+"""RAG resource manifest model."""
+
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+
+class RAGResourceManifest(Document):
+    """Per-resource summary of what is indexed in ``resource_embeddings``.
+
+    Maintained by the indexer as chunks are written and removed, so the RAG
+    admin endpoints never scan the embeddings collection. Resource fields are
+    copied in because uploaded resources are immutable.
+    """
+
+    resource_id: str
+    project_id: Optional[str] = None
+    filename: str = ""
+    mime_type: Optional[str] = None
+    size: int = 0  # Uploaded file size in bytes
+    uploaded_at: Optional[datetime] = None
+    chunk_count: int = 0
+    bytes: int = 0  # Stored chunk text plus vector payload
+    model: str = ""
+    vector_storage: str = "list"
+    indexed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        """Beanie settings."""
+
+        name = "rag_resource_manifests"
+        indexes = [
+            IndexModel([("resource_id", ASCENDING)], name="resource_id_unique", unique=True),
+            IndexModel([("indexed_at", DESCENDING)], name="indexed_at_index"),
+            IndexModel(
+                [("project_id", ASCENDING), ("indexed_at", DESCENDING)],
+                name="project_indexed_at_index",
+            ),
+        ]
@@ -1,22 +1,36 @@
 """Resource embedding model for RAG."""
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
+import numpy as np
 from beanie import Document, Link
 from pydantic import Field
 from pymongo import IndexModel, ASCENDING
 
+from app.core.utils.vector_codec import decode_vector, encode_vector
 from app.repositories.resource import Resource
 
 
 class ResourceEmbedding(Document):
-    """Resource embedding document model."""
+    """Resource embedding document model.
+
+    Project documents and chat messages are embedded into the same
+    collection; their ``resource_id`` is a source key such as
+    ``document:<id>`` (see ``app.services.rag.incremental``).
+    """
 
     resource_id: str = Field(..., index=True)
+    source_type: str = "resource"  # resource, document, chat
+    project_id: Optional[str] = None  # Set for documents and chats
     chunk_index: int = Field(..., ge=0)
     content: str
-    vector: List[float]
+    # Legacy storage: one BSON double per element
+    vector: Optional[List[float]] = None
+    # Compact storage: packed float32/float16/int8 bytes (see vector_codec)
+    vector_data: Optional[bytes] = None
+    vector_dtype: Optional[str] = None
+    vector_scale: Optional[float] = None
     metadata: Optional[dict] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -27,7 +41,24 @@ class ResourceEmbedding(Document):
         indexes = [
             IndexModel([("resource_id", ASCENDING)], name="resource_id_index"),
             IndexModel([("resource_id", ASCENDING), ("chunk_index", ASCENDING)], name="resource_chunk_index"),
+            IndexModel([("project_id", ASCENDING)], name="project_id_index", sparse=True),
         ]
         
         # Note: Vector search index is typically created manually in MongoDB Atlas
         # or via a specific command, as standard indexes don't support vector search yet.
+
+    def set_vector(self, vector: Sequence[float], storage: str = "list") -> None:
+        """Store a vector as a float list (``list``) or packed bytes."""
+        if storage == "list":
+            self.vector = list(vector)
+            self.vector_data = self.vector_dtype = self.vector_scale = None
+        else:
+            self.vector_data, self.vector_scale = encode_vector(vector, storage)
+            self.vector_dtype = storage
+            self.vector = None
+
+    def get_vector(self) -> np.ndarray:
+        """Return the vector as float32, whichever storage mode was used."""
+        if self.vector_data is not None:
+            return decode_vector(self.vector_data, self.vector_dtype, self.vector_scale)
+        return np.asarray(self.vector or [], dtype=np.float32)
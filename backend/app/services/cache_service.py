@@ -18,6 +18,9 @@ class CacheService:
     PROJECT_TTL = 180  # 3 minutes
     PROJECT_MEMBERS_TTL = 120  # 2 minutes
     PERMISSIONS_TTL = 60  # 1 minute
+    ROOM_ACCESS_TTL = 30  # 30 seconds
+    USER_PROFILE_TTL = 300  # 5 minutes
+    DOCUMENT_PROJECT_TTL = 3600  # 1 hour; a document never changes project
 
     @classmethod
     async def get_cached_user(cls, user_id: str) -> Optional[User]:
@@ -98,6 +101,64 @@ class CacheService:
         """Invalidate all permissions cache for a project."""
         await delete_cache_pattern(f"perm:project:{project_id}:*")
 
+    @classmethod
+    async def get_cached_room_access(cls, user_id: str, project_id: str, room_id: str) -> Optional[bool]:
+        """Get a cached realtime room access decision, or None if not cached."""
+        cache_key = f"perm:project:{project_id}:room:{room_id}:user:{user_id}"
+        return await get_cache(cache_key)
+
+    @classmethod
+    async def set_cached_room_access(cls, user_id: str, project_id: str, room_id: str, allowed: bool) -> None:
+        """Cache a realtime room access decision (allowed or denied)."""
+        cache_key = f"perm:project:{project_id}:room:{room_id}:user:{user_id}"
+        await set_cache(cache_key, allowed, cls.ROOM_ACCESS_TTL)
+
+    @classmethod
+    async def invalidate_room_access_cache(cls, project_id: str, user_id: Optional[str] = None) -> None:
+        """Invalidate room access decisions for one user, or everyone, in a project.
+
+        Called after membership changes. Failures are logged rather than
+        raised: the change is already saved and entries expire on their own.
+        """
+        pattern = f"perm:project:{project_id}:room:*:user:{user_id or '*'}"
+        try:
+            await delete_cache_pattern(pattern)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate room access cache {pattern}: {e}")
+
+    @classmethod
+    async def get_cached_document_project(cls, document_id: str) -> Optional[str]:
+        """Get the project a document belongs to from cache."""
+        cache_key = CACHE_KEYS["document"].format(doc_id=document_id) + ":project"
+        return await get_cache(cache_key)
+
+    @classmethod
+    async def set_cached_document_project(cls, document_id: str, project_id: str) -> None:
+        """Cache the project a document belongs to."""
+        cache_key = CACHE_KEYS["document"].format(doc_id=document_id) + ":project"
+        await set_cache(cache_key, project_id, cls.DOCUMENT_PROJECT_TTL)
+
+    @classmethod
+    async def get_cached_user_profile(cls, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's public profile (username, avatar) from cache."""
+        cache_key = CACHE_KEYS["user"].format(user_id=user_id) + ":profile"
+        return await get_cache(cache_key)
+
+    @classmethod
+    async def set_cached_user_profile(cls, user_id: str, profile: Dict[str, Any]) -> None:
+        """Cache a user's public profile."""
+        cache_key = CACHE_KEYS["user"].format(user_id=user_id) + ":profile"
+        await set_cache(cache_key, profile, cls.USER_PROFILE_TTL)
+
+    @classmethod
+    async def invalidate_user_profile_cache(cls, user_id: str) -> None:
+        """Invalidate a user's cached profile."""
+        cache_key = CACHE_KEYS["user"].format(user_id=user_id) + ":profile"
+        try:
+            await delete_cache(cache_key)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate profile cache of {user_id}: {e}")
+
     @classmethod
     async def clear_all_cache(cls) -> None:
         """Clear all application caches (use with caution)."""
@@ -0,0 +1,215 @@
+"""Cross-worker replication of collaborative rooms over Redis pub/sub.
+
+Every worker holding a room subscribes to the room's channel
+(``collab:room:<name>``). Frames are one kind byte, the 16-byte id of the
+publishing worker, then the payload; a worker ignores its own frames.
+
+- ``UPDATE``: a Yjs update made by a client of the publishing worker. Only
+  that worker logs it (see ``update_log``); the others apply it to their
+  YDoc, which broadcasts it to their own clients.
+- ``AWARENESS``: a client's awareness message, relayed as is.
+- ``SYNC_REQUEST``: a worker's state vector, published whenever it
+  (re)subscribes to a room. Peers answer with an ``UPDATE`` holding what it
+  is missing - updates published before it subscribed but not yet flushed to
+  the log, or anything dropped while its connection was down.
+
+Frames are published from one queue in order. Pub/sub is at-most-once, and
+Yjs updates are idempotent and commutative, so the sync handshake is what
+repairs gaps rather than delivery guarantees.
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPDATE = 0
+AWARENESS = 1
+SYNC_REQUEST = 2
+
+CHANNEL_PREFIX = "collab:room:"
+_WORKER_ID_BYTES = 16
+
+Handler = Callable[[int, bytes], None]
+
+
+class RoomReplicator:
+    """Publishes local room traffic and dispatches remote frames to room handlers.
+
+    ``client_factory()`` returns a Redis client that doesn't decode responses.
+    ``join(name, handler, on_resubscribed)`` routes the room's remote frames to
+    ``handler(kind, payload)`` and calls ``on_resubscribed()`` after the
+    subscription is restored following a lost connection, so the room can ask
+    its peers for what it missed.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Awaitable[Any]],
+        enabled: bool = True,
+        reconnect_delay: float = 1.0,
+    ):
+        self._client_factory = client_factory
+        self.enabled = enabled
+        self.reconnect_delay = reconnect_delay
+        self.worker_id = uuid.uuid4().bytes
+        self._rooms: Dict[str, Tuple[Handler, Optional[Callable[[], None]]]] = {}
+        self._client = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._publisher: Optional[asyncio.Task] = None
+        self._queue: "asyncio.Queue[Tuple[str, bytes]]" = asyncio.Queue()
+
+        self.stats = {
+            "published": 0,
+            "received": 0,
+            "publish_errors": 0,
+            "handler_errors": 0,
+            "reconnects": 0,
+        }
+
+    @staticmethod
+    def channel(name: str) -> str:
+        return f"{CHANNEL_PREFIX}{name}"
+
+    async def _connect(self) -> None:
+        if self._pubsub is None:
+            self._client = await self._client_factory()
+            self._pubsub = self._client.pubsub()
+
+    async def join(self, name: str, handler: Handler, on_resubscribed: Optional[Callable[[], None]] = None) -> None:
+        """Subscribe to a room's channel."""
+        if not self.enabled:
+            return
+        self._rooms[name] = (handler, on_resubscribed)
+        try:
+            await self._connect()
+            await self._pubsub.subscribe(self.channel(name))
+        except Exception as e:
+            # The reader resubscribes every joined room once Redis is back
+            logger.error(f"Failed to subscribe to room {name}: {e}")
+            await self._drop_connection()
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def leave(self, name: str) -> None:
+        """Unsubscribe from a room's channel."""
+        if self._rooms.pop(name, None) is None or self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(self.channel(name))
+        except Exception as e:
+            logger.warning(f"Failed to unsubscribe from room {name}: {e}")
+
+    def publish(self, name: str, kind: int, payload: bytes) -> None:
+        """Queue a frame for the room's peers; frames go out in call order."""
+        if not self.enabled or name not in self._rooms:
+            return
+        self._queue.put_nowait((self.channel(name), bytes([kind]) + self.worker_id + payload))
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.create_task(self._publish())
+
+    async def _publish(self) -> None:
+        while not self._queue.empty():
+            channel, frame = await self._queue.get()
+            try:
+                await self._connect()
+                await self._client.publish(channel, frame)
+                self.stats["published"] += 1
+            except Exception as e:
+                # Peers recover the update from the log or the next sync request
+                self.stats["publish_errors"] += 1
+                logger.error(f"Failed to publish to {channel}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _resubscribed(self, name: str) -> None:
+        _, on_resubscribed = self._rooms.get(name, (None, None))
+        if on_resubscribed:
+            try:
+                on_resubscribed()
+            except Exception as e:
+                logger.error(f"Resync failed for room {name}: {e}")
+
+    async def _read(self) -> None:
+        while self._rooms:
+            try:
+                if self._pubsub is None:
+                    await self._resubscribe()
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Room replication connection lost: {e}")
+                await self._drop_connection()
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            if message and message.get("type") == "message":
+                self._dispatch(message["channel"], message["data"])
+
+    async def _resubscribe(self) -> None:
+        await self._connect()
+        names = list(self._rooms)
+        if names:
+            await self._pubsub.subscribe(*[self.channel(name) for name in names])
+        self.stats["reconnects"] += 1
+        for name in names:
+            self._resubscribed(name)
+
+    async def _drop_connection(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    def _dispatch(self, channel, frame: bytes) -> None:
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        if len(frame) <= _WORKER_ID_BYTES or frame[1:_WORKER_ID_BYTES + 1] == self.worker_id:
+            return
+        name = channel[len(CHANNEL_PREFIX):]
+        handler, _ = self._rooms.get(name, (None, None))
+        if handler is None:
+            return
+        self.stats["received"] += 1
+        try:
+            handler(frame[0], frame[_WORKER_ID_BYTES + 1:])
+        except Exception as e:
+            self.stats["handler_errors"] += 1
+            logger.error(f"Failed to apply replicated frame for room {name}: {e}")
+
+    async def stop(self) -> None:
+        """Send queued frames and close the subscription (called on shutdown)."""
+        if self._publisher is not None and not self._publisher.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropped {self._queue.qsize()} unpublished replication frames on shutdown")
+        self._rooms.clear()
+        for task in (self._reader, self._publisher):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self._drop_connection()
+
+    def summary(self) -> dict:
+        """Replication counters and subscribed rooms for this worker."""
+        return {"enabled": self.enabled, "rooms": len(self._rooms), **self.stats}
+
+
+async def _binary_client():
+    from app.core.cache import get_binary_redis_client
+
+    return await get_binary_redis_client()
+
+
+replicator = RoomReplicator(_binary_client, enabled=settings.COLLAB_REPLICATION)
@@ -0,0 +1,192 @@
+"""Retention for collaborative snapshots.
+
+Saves are upserted into one document per resource, type and hour (see
+``CollaborationSnapshot.save_in_bucket``), so history is already hourly on
+the hot path. This module thins that history in the background: for each
+resource it keeps the newest snapshot, the newest per hour for
+``hourly_hours``, the newest per day for ``daily_days``, and deletes the rest.
+Legacy documents written once per save are thinned the same way.
+
+Each pass visits at most ``batch_size`` resources with more than one snapshot,
+resuming after the last one visited, so a sweep over a large collection is
+spread across passes. Deleted documents are reported with their BSON size.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.repositories.collaboration_snapshot import snapshot_bucket
+
+logger = logging.getLogger(__name__)
+
+
+def select_expired(
+    versions: List[Dict[str, Any]], now: datetime, hourly_hours: int, daily_days: int
+) -> List[Dict[str, Any]]:
+    """Versions of one resource to delete, given ``{"_id", "updated_at", "size"}`` rows."""
+    hourly_until = now - timedelta(hours=hourly_hours)
+    daily_until = now - timedelta(days=daily_days)
+    ordered = sorted(versions, key=lambda v: v["updated_at"], reverse=True)
+
+    expired, kept_slots = [], set()
+    for index, version in enumerate(ordered):
+        updated_at = version["updated_at"]
+        if updated_at >= hourly_until:
+            slot = ("hour", snapshot_bucket(updated_at))
+        elif updated_at >= daily_until:
+            slot = ("day", updated_at.date())
+        else:
+            slot = None
+        # The newest snapshot is always kept, however old
+        if index == 0 or (slot is not None and slot not in kept_slots):
+            kept_slots.add(slot)
+            continue
+        expired.append(version)
+    return expired
+
+
+def _key_order(key: dict) -> tuple:
+    """Sort key matching Mongo's order of (project_id, snapshot_type); null types first."""
+    snapshot_type = key.get("snapshot_type")
+    return key["project_id"], snapshot_type is not None, snapshot_type or ""
+
+
+class MongoSnapshotStore:
+    """Queries over ``collaboration_snapshots`` used by retention passes."""
+
+    @staticmethod
+    def _collection():
+        from app.repositories.collaboration_snapshot import CollaborationSnapshot
+
+        return CollaborationSnapshot.get_motor_collection()
+
+    @classmethod
+    async def resources(cls, after: Optional[dict], limit: int) -> List[dict]:
+        """(project_id, snapshot_type) keys with more than one snapshot, in key order.
+
+        Walks ``project_type_updated_index`` from the cursor and stops once
+        ``limit`` keys are found, so a pass reads only the index entries of
+        the resources it visits rather than grouping the whole collection.
+        """
+        query = {"project_id": {"$gte": after["project_id"]}} if after is not None else {}
+        rows = (
+            cls._collection()
+            .find(query, {"_id": 0, "project_id": 1, "snapshot_type": 1})
+            .sort([("project_id", 1), ("snapshot_type", 1)])
+            .hint("project_type_updated_index")
+        )
+        keys: List[dict] = []
+        current, count = None, 0
+        async for row in rows:
+            key = {"project_id": row["project_id"], "snapshot_type": row.get("snapshot_type")}
+            if after is not None and _key_order(key) <= _key_order(after):
+                continue
+            if key != current:
+                if count > 1:
+                    keys.append(current)
+                    if len(keys) == limit:
+                        return keys
+                current, count = key, 0
+            count += 1
+        if count > 1:
+            keys.append(current)
+        return keys
+
+    @classmethod
+    async def versions(cls, project_id: str, snapshot_type: Optional[str]) -> List[dict]:
+        pipeline = [
+            {"$match": {"project_id": project_id, "snapshot_type": snapshot_type}},
+            {"$project": {"updated_at": 1, "size": {"$bsonSize": "$$ROOT"}}},
+        ]
+        return [row async for row in cls._collection().aggregate(pipeline)]
+
+    @classmethod
+    async def delete(cls, ids: List[Any]) -> int:
+        result = await cls._collection().delete_many({"_id": {"$in": ids}})
+        return result.deleted_count
+
+
+class SnapshotRetention:
+    """Incremental background thinning of snapshot history."""
+
+    def __init__(self, store, hourly_hours: int = 24, daily_days: int = 30, batch_size: int = 200):
+        self.store = store
+        self.hourly_hours = hourly_hours
+        self.daily_days = daily_days
+        self.batch_size = batch_size
+        self._cursor: Optional[dict] = None
+
+        self.stats = {
+            "passes": 0,
+            "sweeps": 0,
+            "resources_scanned": 0,
+            "snapshots_deleted": 0,
+            "bytes_reclaimed": 0,
+            "last_run_at": None,
+        }
+
+    async def run_pass(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Thin the next batch of resources; returns what this pass reclaimed."""
+        now = now or datetime.utcnow()
+        report = {"resources": 0, "deleted": 0, "bytes_reclaimed": 0, "sweep_done": False}
+        keys = await self.store.resources(self._cursor, self.batch_size)
+
+        for key in keys:
+            expired = select_expired(
+                await self.store.versions(key["project_id"], key.get("snapshot_type")),
+                now,
+                self.hourly_hours,
+                self.daily_days,
+            )
+            if expired:
+                report["deleted"] += await self.store.delete([v["_id"] for v in expired])
+                report["bytes_reclaimed"] += sum(v.get("size", 0) for v in expired)
+            report["resources"] += 1
+
+        # A short page means the sweep reached the end; start over next pass
+        self._cursor = keys[-1] if len(keys) == self.batch_size else None
+        report["sweep_done"] = self._cursor is None
+
+        self.stats["passes"] += 1
+        self.stats["sweeps"] += int(report["sweep_done"])
+        self.stats["resources_scanned"] += report["resources"]
+        self.stats["snapshots_deleted"] += report["deleted"]
+        self.stats["bytes_reclaimed"] += report["bytes_reclaimed"]
+        self.stats["last_run_at"] = now
+        return report
+
+    async def run_sweep(self) -> Dict[str, int]:
+        """Thin every resource (used by the one-off migration)."""
+        self._cursor = None
+        total = {"resources": 0, "deleted": 0, "bytes_reclaimed": 0}
+        while True:
+            report = await self.run_pass()
+            for field in total:
+                total[field] += report[field]
+            if report["sweep_done"]:
+                return total
+
+    async def run_forever(self, interval: float) -> None:
+        """Background loop started from the application lifespan."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                report = await self.run_pass()
+                if report["deleted"]:
+                    logger.info(
+                        f"Snapshot retention deleted {report['deleted']} snapshots "
+                        f"({report['bytes_reclaimed']} bytes) across {report['resources']} resources"
+                    )
+            except Exception as e:
+                logger.error(f"Snapshot retention pass failed: {e}")
+
+
+snapshot_retention = SnapshotRetention(
+    MongoSnapshotStore(),
+    hourly_hours=settings.COLLAB_SNAPSHOT_HOURLY_RETENTION,
+    daily_days=settings.COLLAB_SNAPSHOT_DAILY_RETENTION,
+    batch_size=settings.COLLAB_SNAPSHOT_COMPACT_BATCH,
+)
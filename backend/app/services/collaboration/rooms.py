@@ -0,0 +1,193 @@
+"""Reference-counted lifecycle for in-memory collaborative rooms.
+
+Each websocket session holds a reference to its room. When the last one is
+released the room stays resident for ``idle_timeout`` seconds (a page
+refresh reconnects to the warm room), then it is closed - which flushes and
+compacts its update log - and dropped. Independently, at most ``max_rooms``
+rooms stay resident: opening one more evicts the least recently used idle
+rooms first. Rooms with connected clients are never evicted.
+
+Sizes are the bytes of Yjs state loaded into a room plus the updates applied
+since, re-measured whenever the room's state is encoded for compaction.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.monitoring import monitor
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """A resident room and its bookkeeping."""
+
+    def __init__(self, room: Any):
+        self.room = room
+        self.refs = 0
+        self.bytes = 0
+        self.opened_at = time.monotonic()
+        self.last_active = self.opened_at
+        self.timer: Optional[asyncio.Task] = None
+
+
+class RoomRegistry:
+    """Resident rooms keyed by room name, in least-recently-used order.
+
+    ``open_room(name)`` returns the loaded room and its size in bytes;
+    ``close_room(name, room)`` persists it before it is dropped.
+    """
+
+    def __init__(
+        self,
+        open_room: Callable[[str], Awaitable[Tuple[Any, int]]],
+        close_room: Callable[[str, Any], Awaitable[None]],
+        idle_timeout: float = 300.0,
+        max_rooms: int = 500,
+    ):
+        self._open_room = open_room
+        self._close_room = close_room
+        self.idle_timeout = idle_timeout
+        self.max_rooms = max_rooms
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}  # name -> (lock, holders and waiters)
+        self.evictions = {"idle": 0, "lru": 0, "shutdown": 0}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def get(self, name: str) -> Optional[Any]:
+        entry = self._entries.get(name)
+        return entry.room if entry else None
+
+    @asynccontextmanager
+    async def _lock(self, name: str):
+        """Serialize opening and closing one room; the lock is dropped when unused."""
+        lock, users = self._locks.get(name, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[name] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[name]
+            if users == 1:
+                del self._locks[name]
+            else:
+                self._locks[name] = (lock, users - 1)
+
+    async def acquire(self, name: str) -> Any:
+        """Return the named room, opening it if needed, and take a reference."""
+        async with self._lock(name):
+            entry = self._entries.get(name)
+            if entry is None:
+                room, size = await self._open_room(name)
+                entry = _Entry(room)
+                entry.bytes = size
+                self._entries[name] = entry
+                logger.info(f"Opened room {name} ({len(self._entries)} resident)")
+            if entry.timer:
+                entry.timer.cancel()
+                entry.timer = None
+            entry.refs += 1
+            entry.last_active = time.monotonic()
+            self._entries.move_to_end(name)
+        await self._enforce_cap()
+        await self._report()
+        return entry.room
+
+    async def release(self, name: str) -> None:
+        """Drop a reference; the last one starts the idle countdown."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return
+        entry.refs = max(entry.refs - 1, 0)
+        entry.last_active = time.monotonic()
+        if entry.refs == 0 and entry.timer is None:
+            entry.timer = asyncio.create_task(self._evict_when_idle(name))
+
+    def track_bytes(self, name: str, size: int, absolute: bool = False) -> None:
+        """Count update bytes applied to a room, or set its measured size."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry.bytes = size if absolute else entry.bytes + size
+
+    async def _evict_when_idle(self, name: str) -> None:
+        try:
+            await asyncio.sleep(self.idle_timeout)
+        except asyncio.CancelledError:
+            return
+        entry = self._entries.get(name)
+        if entry is not None and entry.timer is asyncio.current_task():
+            entry.timer = None
+        await self.evict(name, "idle")
+
+    async def evict(self, name: str, reason: str) -> bool:
+        """Close and drop a room with no clients."""
+        async with self._lock(name):
+            entry = self._entries.get(name)
+            if entry is None or entry.refs > 0:
+                return False
+            if entry.timer:
+                entry.timer.cancel()
+                entry.timer = None
+            try:
+                await self._close_room(name, entry.room)
+            except Exception as e:
+                if reason != "shutdown":
+                    # Unflushed updates live only in this room; retry after another idle period
+                    logger.error(f"Failed to close room {name}; keeping it resident: {e}")
+                    entry.timer = asyncio.create_task(self._evict_when_idle(name))
+                    return False
+                logger.error(f"Failed to close room {name} on shutdown: {e}")
+            del self._entries[name]
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        await monitor.track_room_eviction(reason)
+        await self._report()
+        logger.info(f"Evicted room {name} ({reason}, {entry.bytes} bytes)")
+        return True
+
+    async def _enforce_cap(self) -> None:
+        excess = len(self._entries) - self.max_rooms
+        if excess <= 0:
+            return
+        idle = [name for name, entry in self._entries.items() if entry.refs == 0][:excess]
+        for name in idle:
+            await self.evict(name, "lru")
+        if len(self._entries) > self.max_rooms:
+            logger.warning(f"{len(self._entries)} rooms resident with clients; cap is {self.max_rooms}")
+
+    async def _report(self) -> None:
+        await monitor.update_collab_rooms(len(self._entries), sum(e.bytes for e in self._entries.values()))
+
+    async def stop(self) -> None:
+        """Close every resident room (called on shutdown)."""
+        for name, entry in list(self._entries.items()):
+            entry.refs = 0
+            await self.evict(name, "shutdown")
+
+    def stats(self) -> dict:
+        """Resident rooms (most recently used first), sizes and eviction counts."""
+        now = time.monotonic()
+        rooms = [
+            {
+                "name": name,
+                "clients": entry.refs,
+                "bytes": entry.bytes,
+                "idle_seconds": round(now - entry.last_active, 1) if entry.refs == 0 else 0.0,
+                "resident_seconds": round(now - entry.opened_at, 1),
+            }
+            for name, entry in reversed(self._entries.items())
+        ]
+        return {
+            "resident_rooms": len(rooms),
+            "resident_bytes": sum(r["bytes"] for r in rooms),
+            "max_rooms": self.max_rooms,
+            "idle_timeout": self.idle_timeout,
+            "evictions": dict(self.evictions),
+            "rooms": rooms,
+        }
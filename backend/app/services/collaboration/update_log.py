@@ -0,0 +1,306 @@
+"""Append-only persistence for collaborative Yjs rooms.
+
+Instead of re-encoding the whole document on every change, each room's
+incremental updates are buffered and appended to ``collaboration_updates``
+in batches: a batch is written ``flush_interval`` seconds after its first
+update, or as soon as it holds ``flush_bytes``. Once the log tail behind the
+latest snapshot grows past ``compact_bytes`` (or ``compact_batches`` batches),
+a background compaction encodes the room's full state once, saves it as a
+snapshot covering everything flushed so far, and deletes the covered batches.
+
+A room loads as its latest snapshot plus the batches after it. Yjs updates
+are idempotent, so a crash between saving a snapshot and trimming the log
+only leaves batches that replay as no-ops. For the same reason a compaction
+merges the persisted snapshot and batches it is about to fold into the
+state it encodes: a worker that missed another worker's update (replication
+off, or a pub/sub outage) still snapshots it before its batch is deleted.
+
+Batch sequence numbers are millisecond timestamps (kept strictly increasing
+per room), so workers sharing a replicated room write comparable sequences.
+A compaction only folds batches older than ``compact_grace_ms`` before its
+last one: a recent batch from another worker may hold updates that haven't
+reached this worker's state yet, so it stays in the log and replays.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]  # (resource id, snapshot type)
+StateFn = Callable[[], bytes]
+MergeFn = Callable[[List[bytes]], bytes]
+
+
+def merge_updates(updates: List[bytes]) -> bytes:
+    """Combine Yjs updates into a single state update."""
+    import y_py as Y
+
+    doc = Y.YDoc()
+    for update in updates:
+        Y.apply_update(doc, update)
+    return Y.encode_state_as_update(doc)
+
+
+class MongoUpdateStore:
+    """Reads and writes the update log and its snapshots."""
+
+    @staticmethod
+    async def append(resource_id: str, snapshot_type: str, seq: int, updates: List[bytes]) -> None:
+        from app.repositories.collaboration_update import CollaborationUpdate
+
+        await CollaborationUpdate(
+            resource_id=resource_id,
+            snapshot_type=snapshot_type,
+            seq=seq,
+            updates=updates,
+            size=sum(len(u) for u in updates),
+        ).insert()
+
+    @staticmethod
+    async def load(resource_id: str, snapshot_type: str) -> Tuple[Optional[bytes], List[bytes], int, int]:
+        """Latest snapshot, the updates after it, the last seq and the tail size."""
+        from app.repositories.collaboration_snapshot import CollaborationSnapshot
+        from app.repositories.collaboration_update import CollaborationUpdate
+
+        snapshot = await CollaborationSnapshot.get_latest(resource_id, snapshot_type)
+        state = snapshot.get_state() if snapshot else None
+        seq = snapshot.log_seq if snapshot else 0
+
+        tail, tail_bytes = [], 0
+        batches = CollaborationUpdate.find(
+            {"resource_id": resource_id, "snapshot_type": snapshot_type, "seq": {"$gt": seq}},
+            sort=[("seq", 1), ("_id", 1)],
+        )
+        async for batch in batches:
+            tail.extend(batch.updates)
+            tail_bytes += batch.size
+            seq = max(seq, batch.seq)
+        return state, tail, seq, tail_bytes
+
+    @staticmethod
+    async def read(resource_id: str, snapshot_type: str, upto: int) -> List[bytes]:
+        """Latest snapshot and the logged updates after it, up to seq ``upto``."""
+        from app.repositories.collaboration_snapshot import CollaborationSnapshot
+        from app.repositories.collaboration_update import CollaborationUpdate
+
+        snapshot = await CollaborationSnapshot.get_latest(resource_id, snapshot_type)
+        updates = [snapshot.get_state()] if snapshot else []
+        seq = snapshot.log_seq if snapshot else 0
+        batches = CollaborationUpdate.find(
+            {"resource_id": resource_id, "snapshot_type": snapshot_type, "seq": {"$gt": seq, "$lte": upto}},
+            sort=[("seq", 1), ("_id", 1)],
+        )
+        async for batch in batches:
+            updates.extend(batch.updates)
+        return updates
+
+    @staticmethod
+    async def save_snapshot(resource_id: str, snapshot_type: str, state: bytes, seq: int) -> bool:
+        """Save a compacted state; False if a snapshot of a later seq is already stored."""
+        from app.services.collaboration_service import collaboration_service
+
+        return await collaboration_service.save_snapshot(resource_id, state, snapshot_type, log_seq=seq)
+
+    @staticmethod
+    async def truncate(resource_id: str, snapshot_type: str, seq: int) -> None:
+        """Delete batches folded into a snapshot."""
+        from app.repositories.collaboration_update import CollaborationUpdate
+
+        await CollaborationUpdate.find(
+            {"resource_id": resource_id, "snapshot_type": snapshot_type, "seq": {"$lte": seq}}
+        ).delete()
+
+
+class _RoomLog:
+    """Buffer and counters for one open room."""
+
+    def __init__(self, seq: int, tail_bytes: int, state_fn: Optional[StateFn]):
+        self.seq = seq
+        self.tail_bytes = tail_bytes
+        self.tail_batches = 0
+        self.state_fn = state_fn
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.timer: Optional[asyncio.Task] = None
+        self.compaction: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+
+class UpdateLog:
+    """Batched update-log writer with background compaction."""
+
+    def __init__(
+        self,
+        store,
+        flush_interval: float = 0.25,
+        flush_bytes: int = 64 * 1024,
+        compact_bytes: int = 1024 * 1024,
+        compact_batches: int = 200,
+        compact_grace_ms: int = 0,
+        clock: Optional[Callable[[], int]] = None,
+        merge: Optional[MergeFn] = None,
+    ):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.compact_bytes = compact_bytes
+        self.compact_batches = compact_batches
+        self.compact_grace_ms = compact_grace_ms
+        self._clock = clock or (lambda: int(time.time() * 1000))
+        # Folds persisted updates into a compacted state; None trusts this worker's state alone
+        self._merge = merge
+        self._rooms: Dict[Key, _RoomLog] = {}
+
+        self.stats = {
+            "updates_logged": 0,
+            "bytes_logged": 0,
+            "flushes": 0,
+            "compactions": 0,
+            "bytes_compacted": 0,
+        }
+
+    async def open(self, resource_id: str, snapshot_type: str, state_fn: Optional[StateFn] = None) -> Tuple[Optional[bytes], List[bytes]]:
+        """Load a room for serving: returns its snapshot and the updates to replay after it.
+
+        ``state_fn`` encodes the room's full state and is used for compaction.
+        """
+        state, tail, seq, tail_bytes = await self.store.load(resource_id, snapshot_type)
+        self._rooms[(resource_id, snapshot_type)] = _RoomLog(seq, tail_bytes, state_fn)
+        return state, tail
+
+    def append(self, resource_id: str, snapshot_type: str, update: bytes) -> None:
+        """Buffer one incremental update for the next batch."""
+        room = self._rooms.get((resource_id, snapshot_type))
+        if room is None:
+            room = self._rooms[(resource_id, snapshot_type)] = _RoomLog(0, 0, None)
+            logger.warning(f"Update for unopened room {snapshot_type}:{resource_id}; logging without compaction")
+        room.pending.append(update)
+        room.pending_bytes += len(update)
+        self.stats["updates_logged"] += 1
+        self.stats["bytes_logged"] += len(update)
+
+        if room.pending_bytes >= self.flush_bytes:
+            if room.timer:
+                room.timer.cancel()
+            room.timer = asyncio.create_task(self._flush_after(resource_id, snapshot_type, 0))
+        elif room.timer is None:
+            room.timer = asyncio.create_task(self._flush_after(resource_id, snapshot_type, self.flush_interval))
+
+    async def _flush_after(self, resource_id: str, snapshot_type: str, delay: float) -> None:
+        key = (resource_id, snapshot_type)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        room = self._rooms.get(key)
+        if room is not None and room.timer is asyncio.current_task():
+            room.timer = None
+        await self.flush(resource_id, snapshot_type)
+
+    async def flush(self, resource_id: str, snapshot_type: str) -> None:
+        """Write buffered updates now."""
+        room = self._rooms.get((resource_id, snapshot_type))
+        if room is None:
+            return
+        async with room.lock:
+            await self._flush_locked(resource_id, snapshot_type, room)
+        if room.tail_bytes >= self.compact_bytes or room.tail_batches >= self.compact_batches:
+            self._schedule_compaction(resource_id, snapshot_type, room)
+
+    async def _flush_locked(self, resource_id: str, snapshot_type: str, room: _RoomLog) -> None:
+        if not room.pending:
+            return
+        batch, size = room.pending, room.pending_bytes
+        room.pending, room.pending_bytes = [], 0
+        seq = max(room.seq + 1, self._clock())
+        try:
+            await self.store.append(resource_id, snapshot_type, seq, batch)
+        except Exception as e:
+            # Keep the batch in front of anything buffered meanwhile; retried on the next flush
+            room.pending[:0] = batch
+            room.pending_bytes += size
+            logger.error(f"Failed to flush {len(batch)} updates for {snapshot_type}:{resource_id}: {e}")
+            return
+        room.seq = seq
+        room.tail_bytes += size
+        room.tail_batches += 1
+        self.stats["flushes"] += 1
+
+    def _schedule_compaction(self, resource_id: str, snapshot_type: str, room: _RoomLog) -> None:
+        if room.state_fn is None or (room.compaction and not room.compaction.done()):
+            return
+        room.compaction = asyncio.create_task(self.compact(resource_id, snapshot_type))
+
+    async def compact(self, resource_id: str, snapshot_type: str) -> bool:
+        """Fold the flushed tail into a snapshot of the room's current state."""
+        room = self._rooms.get((resource_id, snapshot_type))
+        if room is None or room.state_fn is None:
+            return False
+        async with room.lock:
+            await self._flush_locked(resource_id, snapshot_type, room)
+            if room.pending or not (room.tail_batches or room.tail_bytes):
+                return False
+            try:
+                # Encoded after the flush: everything this worker logged up to room.seq is in
+                # this state; only batches older than the grace period are folded
+                state = room.state_fn()
+                seq = room.seq - self.compact_grace_ms
+                if self._merge is not None:
+                    # The log may hold other workers' updates this state never received
+                    persisted = await self.store.read(resource_id, snapshot_type, seq)
+                    if persisted:
+                        state = self._merge(persisted + [state])
+                saved = await self.store.save_snapshot(resource_id, snapshot_type, state, seq)
+                if saved:
+                    await self.store.truncate(resource_id, snapshot_type, seq)
+            except Exception as e:
+                logger.error(f"Failed to compact update log for {snapshot_type}:{resource_id}: {e}")
+                return False
+            if not saved:
+                # Another worker already snapshotted past seq; its compaction trims the log
+                room.tail_bytes = room.tail_batches = 0
+                logger.info(f"Skipped compacting {snapshot_type}:{resource_id} at seq {seq}: a newer snapshot exists")
+                return False
+            self.stats["compactions"] += 1
+            self.stats["bytes_compacted"] += room.tail_bytes
+            room.tail_bytes = room.tail_batches = 0
+            logger.info(f"Compacted {snapshot_type}:{resource_id} at seq {seq} ({len(state)} bytes)")
+            return True
+
+    async def close(self, resource_id: str, snapshot_type: str, compact: bool = True) -> None:
+        """Flush a room (and compact it) before it is dropped from memory."""
+        key = (resource_id, snapshot_type)
+        room = self._rooms.get(key)
+        if room is None:
+            return
+        if room.timer:
+            room.timer.cancel()
+            room.timer = None
+        if compact:
+            await self.compact(resource_id, snapshot_type)
+        await self.flush(resource_id, snapshot_type)
+        if room.compaction:
+            await asyncio.gather(room.compaction, return_exceptions=True)
+        if not room.pending:
+            self._rooms.pop(key, None)
+
+    async def stop(self) -> None:
+        """Flush every open room (called on shutdown)."""
+        for resource_id, snapshot_type in list(self._rooms):
+            await self.close(resource_id, snapshot_type, compact=False)
+
+
+update_log = UpdateLog(
+    MongoUpdateStore(),
+    flush_interval=settings.COLLAB_LOG_FLUSH_MS / 1000,
+    flush_bytes=settings.COLLAB_LOG_FLUSH_BYTES,
+    compact_bytes=settings.COLLAB_COMPACT_BYTES,
+    compact_batches=settings.COLLAB_COMPACT_BATCHES,
+    compact_grace_ms=settings.COLLAB_LOG_COMPACT_GRACE_MS,
+    merge=merge_updates,
+)
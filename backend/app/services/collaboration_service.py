@@ -4,6 +4,8 @@ import asyncio
 import logging
 from typing import Optional, Dict
 
+from app.core.config import settings
+from app.core.utils.snapshot_codec import encode_snapshot
 from app.repositories.collaboration_snapshot import CollaborationSnapshot
 
 logger = logging.getLogger(__name__)
@@ -19,20 +21,25 @@ class CollaborationService:
         """
         logger.info(f"Loading snapshot for {resource_id} ({snapshot_type})")
         
-        snapshot = await CollaborationSnapshot.get_latest(resource_id)
+        snapshot = await CollaborationSnapshot.get_latest(resource_id, snapshot_type)
         if snapshot and snapshot.snapshot_data:
-            return snapshot.snapshot_data.get("data")
+            return snapshot.get_state()
         return None
 
-    async def save_snapshot(self, resource_id: str, state: bytes, snapshot_type: str = "whiteboard"):
-        """Save a snapshot for a specific resource (project, doc, etc)."""
-        logger.info(f"Saving snapshot for {resource_id} ({snapshot_type}, {len(state)} bytes)")
+    async def save_snapshot(self, resource_id: str, state: bytes, snapshot_type: str = "whiteboard", log_seq: int = 0) -> bool:
+        """Save a snapshot for a specific resource (project, doc, etc).
+
+        log_seq: last update-log batch included in the state (see services/collaboration/update_log.py)
+
+        Returns False if a snapshot covering a later log_seq already holds the slot.
+        """
+        payload, codec = encode_snapshot(state, settings.COLLAB_SNAPSHOT_CODEC)
+        logger.info(f"Saving snapshot for {resource_id} ({snapshot_type}, {len(state)} bytes, {codec} {len(payload)} bytes)")
         
-        snapshot = CollaborationSnapshot(
-            project_id=resource_id, # Reusing this field as generic resource ID
-            snapshot_data={"data": state}
+        # Reusing project_id as generic resource ID; saves within an hour overwrite one document
+        return await CollaborationSnapshot.save_in_bucket(
+            resource_id, snapshot_type, {"data": payload, "codec": codec}, log_seq
         )
-        await snapshot.save()
 
     async def debounced_save(self, resource_id: str, state: bytes, snapshot_type: str = "whiteboard", wait: float = 2.0):
         """Debounce save operations."""
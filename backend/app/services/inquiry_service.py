@@ -1,11 +1,11 @@
 """Inquiry service for snapshot management."""
 
-import zlib
 import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 
+from app.core.config import settings
 from app.repositories.inquiry_snapshot import InquirySnapshot
 
 logger = logging.getLogger(__name__)
@@ -33,18 +33,6 @@ class InquiryService:
         if not snapshot_data:
             raise ValueError("snapshot_data cannot be empty")
 
-        data_to_save = snapshot_data
-        is_compressed = False
-        
-        if compress:
-            try:
-                compressed_data = zlib.compress(snapshot_data)
-                if len(compressed_data) < len(snapshot_data):
-                    data_to_save = compressed_data
-                    is_compressed = True
-            except Exception as e:
-                logger.warning(f"Compression failed: {e}")
-
         try:
             latest_snapshots = (
                 await InquirySnapshot.find({"project_id": project_id})
@@ -57,14 +45,18 @@ class InquiryService:
 
             snapshot = InquirySnapshot(
                 project_id=project_id,
-                data=data_to_save,
+                data=b"",
                 snapshot_version=next_version,
-                compressed=is_compressed,
             )
+            try:
+                snapshot.set_state(snapshot_data, settings.COLLAB_SNAPSHOT_CODEC if compress else "none")
+            except Exception as e:
+                logger.warning(f"Compression failed: {e}")
+                snapshot.set_state(snapshot_data)
             await snapshot.insert()
             
             cls._last_snapshot[project_id] = datetime.utcnow()
-            logger.info(f"Saved inquiry snapshot for project {project_id} (version {next_version}, compressed={is_compressed})")
+            logger.info(f"Saved inquiry snapshot for project {project_id} (version {next_version}, codec={snapshot.codec})")
             return str(snapshot.id)
         except Exception as e:
             logger.error(f"Failed to save inquiry snapshot: {str(e)}")
@@ -83,14 +75,12 @@ class InquiryService:
             snapshot = snapshots[0] if snapshots else None
 
             if snapshot:
-                data = snapshot.data
-                if getattr(snapshot, "compressed", False):
-                    try:
-                        data = zlib.decompress(data)
-                    except Exception as e:
-                        logger.error(f"Failed to decompress inquiry snapshot: {e}")
-                        raise
-                return data
+                try:
+                    # Stored compressed; only decoded here, when the state is needed
+                    return snapshot.get_state()
+                except Exception as e:
+                    logger.error(f"Failed to decompress inquiry snapshot: {e}")
+                    raise
             return None
         except Exception as e:
             logger.error(f"Failed to load inquiry snapshot: {str(e)}")
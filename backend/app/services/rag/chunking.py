@@ -0,0 +1,447 @@
+"""Structure-preserving, token-aware chunking for RAG ingestion.
+
+Text is parsed into headings, paragraphs and sentences, and sentences are
+packed greedily into chunks sized by embedding-model tokens. Chunks never cut
+a sentence unless that sentence alone exceeds the budget, prefer to end at
+section boundaries, and carry their page range and heading path as metadata.
+Headers and footers repeated across pages are dropped before chunking.
+
+Character windows sized for English overflow MiniLM's 256-token input on
+Chinese text (one token per character), so most of every Chinese chunk used
+to be truncated away by the model; sizing by tokens fixes that too.
+"""
+
+import asyncio
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_CJK = "㐀-䶿一-鿿぀-ヿ가-힯"
+_SENTENCE = re.compile(r"\S.*?(?:[。！？；]+[”’」』）)]*|[.!?;]+[\"'”’)\]]*(?=\s|$)|$)", re.S)
+_TERMINATED = re.compile(r"[.!?;。！？；][\"'”’」』）)\]]*$")
+_MD_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+_NUMBERED_HEADING = re.compile(r"^(\d{1,2}(?:\.\d{1,2})*)\s+[^\W\d_]")
+_CJK_HEADING = re.compile(r"^第[一二三四五六七八九十百零\d]+([章节部篇])")
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?[-–—\s]*\d+(?:\s*(?:/|of)\s*\d+)?[-–—\s]*$|^第\s*\d+\s*页", re.I)
+_TOKEN_UNIT = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+|[^\w\s]", re.UNICODE)
+
+# Longest single line treated as a heading by the numbering heuristics
+MAX_HEADING_CHARS = 80
+# Buffered paragraph text flushed at the next sentence end, for PDFs without blank lines
+SOFT_FLUSH_CHARS = 2000
+
+
+@dataclass
+class TextSegment:
+    """A piece of extracted text; ``page`` is 1-based for paginated formats."""
+
+    text: str
+    page: Optional[int] = None
+
+
+@dataclass
+class Chunk:
+    """A chunk ready to embed."""
+
+    text: str
+    token_count: int
+    metadata: dict = field(default_factory=dict)
+
+
+class TokenCounter:
+    """Estimate WordPiece token counts without a tokenizer.
+
+    CJK characters are one token each; Latin words are one token per ~6
+    characters; punctuation is one token.
+    """
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [self._count(text) for text in texts]
+
+    def _count(self, text: str) -> int:
+        return sum(self._unit_tokens(unit) for unit in _TOKEN_UNIT.findall(text))
+
+    @staticmethod
+    def _unit_tokens(unit: str) -> int:
+        return max(1, math.ceil(len(unit) / 6))
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Cut text into pieces of at most ``max_tokens`` tokens."""
+        pieces, start, used = [], 0, 0
+        for match in _TOKEN_UNIT.finditer(text):
+            tokens = self._unit_tokens(match.group())
+            if used + tokens > max_tokens and used:
+                pieces.append(text[start : match.start()].strip())
+                start, used = match.start(), 0
+            used += tokens
+        pieces.append(text[start:].strip())
+        return [p for p in pieces if p]
+
+
+class HFTokenCounter(TokenCounter):
+    """Exact token counts from the embedding model's fast tokenizer."""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        offsets = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )["offset_mapping"]
+        pieces = []
+        for start in range(0, len(offsets), max_tokens):
+            window = offsets[start : start + max_tokens]
+            end = offsets[start + max_tokens][0] if start + max_tokens < len(offsets) else len(text)
+            pieces.append(text[window[0][0] : end].strip())
+        return [p for p in pieces if p]
+
+
+def token_counter_for(model) -> TokenCounter:
+    """Build a counter from a loaded HuggingFaceEmbeddings/SentenceTransformer."""
+    tokenizer = getattr(getattr(model, "client", model), "tokenizer", None)
+    if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+        logger.warning("No fast tokenizer on the embedding model; estimating chunk tokens")
+        return TokenCounter()
+    return HFTokenCounter(tokenizer)
+
+
+class BoilerplateFilter:
+    """Drop running headers, footers and page numbers from paginated text.
+
+    A page's first and last ``edge_lines`` lines are compared across pages
+    with digits masked, so "Page 3 of 10" and "Page 4 of 10" match. A line
+    seen at the edge of ``min_repeats`` pages is boilerplate. The first
+    ``warmup_pages`` pages are buffered so repeats can be learnt before any
+    page is released; after that pages pass through one at a time.
+    """
+
+    def __init__(self, edge_lines: int = 2, min_repeats: int = 3, warmup_pages: int = 6):
+        self.edge_lines = edge_lines
+        self.min_repeats = min_repeats
+        self.warmup_pages = warmup_pages
+        self._counts: Counter = Counter()
+        self._buffer: List[TextSegment] = []
+        self._warm = False
+        self.lines_dropped = 0
+
+    @staticmethod
+    def _key(line: str) -> str:
+        return re.sub(r"\d+", "#", " ".join(line.lower().split()))
+
+    def _edges(self, lines: List[str]) -> List[int]:
+        filled = [i for i, line in enumerate(lines) if line.strip()]
+        # Short pages only contribute their first and last line
+        n = self.edge_lines if len(filled) > 2 * self.edge_lines else 1
+        return sorted(set(filled[:n] + filled[-n:]))
+
+    def feed(self, segment: TextSegment) -> List[TextSegment]:
+        lines = segment.text.split("\n")
+        for key in {self._key(lines[i]) for i in self._edges(lines)}:
+            self._counts[key] += 1
+
+        if self._warm:
+            return [self._clean(segment)]
+        self._buffer.append(segment)
+        if len(self._buffer) < self.warmup_pages:
+            return []
+        return self.flush()
+
+    def flush(self) -> List[TextSegment]:
+        self._warm = True
+        released = [self._clean(s) for s in self._buffer]
+        self._buffer = []
+        return released
+
+    def _clean(self, segment: TextSegment) -> TextSegment:
+        lines = segment.text.split("\n")
+        drop = {
+            i
+            for i in self._edges(lines)
+            if _PAGE_NUMBER.match(lines[i].strip())
+            or self._counts[self._key(lines[i])] >= self.min_repeats
+        }
+        self.lines_dropped += len(drop)
+        kept = [line for i, line in enumerate(lines) if i not in drop]
+        return TextSegment("\n".join(kept), segment.page)
+
+
+def _joiner(left: str, right: str) -> str:
+    """Whitespace between two runs of text; none between CJK characters."""
+    if not left or not right:
+        return ""
+    if re.match(rf"[{_CJK}，。！？；：、）」』]", left[-1]) and re.match(rf"[{_CJK}（「『]", right[0]):
+        return ""
+    return " "
+
+
+def _heading(line: str) -> Optional[Tuple[int, str]]:
+    """Return (level, text) if a line looks like a heading."""
+    match = _MD_HEADING.match(line)
+    if match:
+        return len(match.group(1)), match.group(2).strip()
+    if len(line) > MAX_HEADING_CHARS or _TERMINATED.search(line):
+        return None
+    match = _NUMBERED_HEADING.match(line)
+    if match:
+        return match.group(1).count(".") + 1, line
+    match = _CJK_HEADING.match(line)
+    if match:
+        return (1 if match.group(1) in "章部篇" else 2), line
+    return None
+
+
+class StructuredChunker:
+    """Incrementally turn text segments into token-bounded chunks.
+
+    Feed segments in order with :meth:`feed` and call :meth:`finish` at the
+    end; both return the chunks completed so far. Only the open paragraph and
+    the chunk being packed are held in memory.
+    """
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        max_tokens: int = 254,
+        overlap_tokens: int = 32,
+        min_tokens: int = 64,
+        dedupe_boilerplate: bool = True,
+    ):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.counter = counter or TokenCounter()
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = min_tokens
+        # Only paginated segments (page set) go through the filter
+        self.boilerplate = BoilerplateFilter() if dedupe_boilerplate else None
+
+        self._partial = ""  # Unterminated trailing line of the last segment
+        self._partial_page: Optional[int] = None
+        self._para: List[Tuple[str, Optional[int]]] = []  # Open paragraph lines
+        self._para_chars = 0
+        self._para_continues = False  # Open paragraph was soft-flushed
+        self._headings: List[Tuple[int, str]] = []
+
+        # Chunk being packed: (text, tokens, page, starts_paragraph)
+        self._units: List[Tuple[str, int, Optional[int], bool]] = []
+        self._tokens = 0
+        self._carried = 0  # Leading units repeated from the previous chunk
+        self._chunk_headings: Optional[List[str]] = None
+        self._out: List[Chunk] = []
+
+    # -- input ---------------------------------------------------------------
+
+    def feed(self, segment: Union[TextSegment, str]) -> List[Chunk]:
+        if isinstance(segment, str):
+            segment = TextSegment(segment)
+        if segment.page is None:
+            self._feed_text(segment)
+        elif self.boilerplate is not None:
+            for page in self.boilerplate.feed(segment):
+                self._feed_page(page)
+        else:
+            self._feed_page(segment)
+        return self._drain()
+
+    def finish(self) -> List[Chunk]:
+        if self.boilerplate is not None:
+            for page in self.boilerplate.flush():
+                self._feed_page(page)
+        if self._partial:
+            self._line(self._partial, self._partial_page)
+            self._partial = ""
+        self._end_paragraph()
+        self._emit()
+        return self._drain()
+
+    def _drain(self) -> List[Chunk]:
+        out, self._out = self._out, []
+        return out
+
+    def _feed_page(self, page: TextSegment) -> None:
+        # A page always ends on a whole line; the paragraph may continue
+        for line in page.text.split("\n"):
+            self._line(line, page.page)
+
+    def _feed_text(self, segment: TextSegment) -> None:
+        text = self._partial + segment.text
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        self._partial_page = segment.page
+        for line in lines:
+            self._line(line, segment.page)
+
+    def _line(self, line: str, page: Optional[int]) -> None:
+        line = line.strip()
+        if not line:
+            self._end_paragraph()
+            return
+
+        if _MD_HEADING.match(line):
+            self._end_paragraph()
+            self._start_section(*_heading(line), page)
+            return
+
+        self._para.append((line, page))
+        self._para_chars += len(line)
+        if self._para_chars >= SOFT_FLUSH_CHARS and _TERMINATED.search(line):
+            self._end_paragraph(soft=True)
+
+    # -- paragraphs and sentences --------------------------------------------
+
+    def _end_paragraph(self, soft: bool = False) -> None:
+        if not self._para:
+            self._para_continues = False
+            return
+
+        # A numbered line standing alone as a paragraph is a heading
+        if len(self._para) == 1 and not self._para_continues:
+            line, page = self._para[0]
+            heading = _heading(line)
+            if heading:
+                self._para = []
+                self._para_chars = 0
+                self._start_section(*heading, page)
+                return
+
+        # Unwrap lines, remembering which page each offset came from
+        text = ""
+        starts: List[Tuple[int, Optional[int]]] = []
+        for line, page in self._para:
+            if text.endswith("-") and line[:1].islower():
+                text = text[:-1]
+            else:
+                text += _joiner(text, line)
+            starts.append((len(text), page))
+            text += line
+
+        matches = [m for m in _SENTENCE.finditer(text) if m.group().strip()]
+        sentences = [m.group().strip() for m in matches]
+        pages = []
+        for m in matches:
+            page = starts[0][1]
+            for offset, line_page in starts:
+                if offset > m.start():
+                    break
+                page = line_page
+            pages.append(page)
+
+        first = not self._para_continues
+        for i, (sentence, tokens) in enumerate(zip(sentences, self.counter.count_many(sentences))):
+            self._add(sentence, tokens, pages[i], first and i == 0)
+
+        self._para = []
+        self._para_chars = 0
+        self._para_continues = soft
+
+    def _start_section(self, level: int, title: str, page: Optional[int]) -> None:
+        # Close a chunk that already has enough content so it doesn't span
+        # sections; overlap carried from the previous section is dropped
+        if len(self._units) == self._carried:
+            self._units, self._tokens, self._carried = [], 0, 0
+        elif self._tokens >= self.min_tokens:
+            self._emit()
+        self._headings = [h for h in self._headings if h[0] < level] + [(level, title)]
+        tokens = self.counter.count_many([title])[0]
+        self._add(title, tokens, page, True)
+
+    # -- packing -------------------------------------------------------------
+
+    def _add(self, text: str, tokens: int, page: Optional[int], paragraph: bool) -> None:
+        if tokens > self.max_tokens:
+            self._emit()
+            pieces = self.counter.split(text, self.max_tokens)
+            for piece, piece_tokens in zip(pieces, self.counter.count_many(pieces)):
+                self._add(piece, min(piece_tokens, self.max_tokens), page, paragraph)
+                paragraph = False
+            return
+
+        if self._units and self._tokens + tokens > self.max_tokens:
+            carry = self._overlap(self.max_tokens - tokens)
+            self._emit()
+            for unit in carry:
+                self._push(*unit)
+            self._carried = len(carry)
+        self._push(text, tokens, page, paragraph)
+
+    def _push(self, text: str, tokens: int, page: Optional[int], paragraph: bool) -> None:
+        if not self._units:
+            self._chunk_headings = [title for _, title in self._headings]
+        self._units.append((text, tokens, page, paragraph))
+        self._tokens += tokens
+
+    def _overlap(self, room: int) -> List[Tuple[str, int, Optional[int], bool]]:
+        """Trailing sentences of the current chunk to repeat in the next one."""
+        budget = min(self.overlap_tokens, room)
+        carry: List[Tuple[str, int, Optional[int], bool]] = []
+        used = 0
+        for unit in reversed(self._units[1:]):
+            if used + unit[1] > budget:
+                break
+            carry.insert(0, unit)
+            used += unit[1]
+        return carry
+
+    def _emit(self) -> None:
+        if not self._units:
+            return
+        text = ""
+        for unit_text, _, _, paragraph in self._units:
+            if text:
+                text += "\n" if paragraph else _joiner(text, unit_text)
+            text += unit_text
+
+        pages = [page for _, _, page, _ in self._units if page is not None]
+        metadata = {"token_count": self._tokens, "char_count": len(text)}
+        if pages:
+            metadata["page_start"] = min(pages)
+            metadata["page_end"] = max(pages)
+        if self._chunk_headings:
+            metadata["headings"] = self._chunk_headings
+
+        self._out.append(Chunk(text, self._tokens, metadata))
+        self._units = []
+        self._tokens = 0
+        self._carried = 0
+        self._chunk_headings = None
+
+
+async def _as_async(
+    pieces: Union[str, Iterable, AsyncIterable],
+) -> AsyncIterator[Union[TextSegment, str]]:
+    if isinstance(pieces, str):
+        yield pieces
+    elif hasattr(pieces, "__aiter__"):
+        async for piece in pieces:
+            yield piece
+    else:
+        for piece in pieces:
+            yield piece
+
+
+async def chunk_stream(
+    pieces: Union[str, Iterable, AsyncIterable],
+    counter: Optional[TokenCounter] = None,
+    max_tokens: int = 254,
+    overlap_tokens: int = 32,
+    min_tokens: int = 64,
+    dedupe_boilerplate: bool = True,
+) -> AsyncIterator[Chunk]:
+    """Chunk streamed text, parsing each segment off the event loop."""
+    chunker = StructuredChunker(counter, max_tokens, overlap_tokens, min_tokens, dedupe_boilerplate)
+    async for piece in _as_async(pieces):
+        for chunk in await asyncio.to_thread(chunker.feed, piece):
+            yield chunk
+    for chunk in chunker.finish():
+        yield chunk
@@ -0,0 +1,161 @@
+"""Pluggable CPU inference backends for the RAG embedding model.
+
+Every backend exposes the LangChain ``Embeddings`` surface the rest of RAG
+uses (``embed_documents``/``embed_query``) plus the model's ``tokenizer`` for
+token-aware chunking:
+
+- ``hf``: LangChain ``HuggingFaceEmbeddings`` over sentence-transformers
+  (the reference implementation)
+- ``int8``: the same sentence-transformers model with its Linear layers
+  dynamically quantized to int8 by torch
+- ``onnx``: the model exported to ONNX and run by onnxruntime, with the
+  mean pooling and normalization sentence-transformers would apply
+
+The int8 and ONNX backends need ``torch`` and ``optimum[onnxruntime]``
+respectively; both are optional and only imported when selected. Their
+vectors differ slightly from the reference, so they are cached and reported
+under their own model id (see ``embedding_model_id``).
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("hf", "int8", "onnx")
+
+# sentence-transformers' max_seq_length for all-MiniLM-L6-v2
+MAX_SEQ_LENGTH = 256
+
+
+def embedding_model_id(model_name: str, backend: str) -> str:
+    """Identity of the vectors a backend produces, for caches and manifests.
+
+    The reference backend keeps the bare model name so existing cached
+    vectors stay valid.
+    """
+    return model_name if backend == "hf" else f"{model_name}#{backend}"
+
+
+def mean_pool(hidden: np.ndarray, mask: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """Average token embeddings over the attention mask, then L2-normalize."""
+    mask = mask[..., None].astype(hidden.dtype)
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled
+
+
+class SentenceTransformerBackend:
+    """sentence-transformers model, optionally int8 dynamically quantized."""
+
+    def __init__(self, model_name: str, batch_size: int = 64, quantize: bool = False):
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_name, device="cpu")
+        if quantize:
+            import torch
+
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.client = model
+        self.tokenizer = model.tokenizer
+        self.encode_kwargs: Dict[str, Any] = {"batch_size": batch_size}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.encode(list(texts), convert_to_numpy=True, **self.encode_kwargs).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OnnxBackend:
+    """ONNX export of the model run by onnxruntime on CPU.
+
+    ``model_dir`` may point at a previous export; otherwise the model is
+    exported on first load and saved there for the next start.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 64,
+        model_dir: Optional[str] = None,
+        max_length: int = MAX_SEQ_LENGTH,
+    ):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        exported = bool(model_dir) and os.path.exists(os.path.join(model_dir, "model.onnx"))
+        source = model_dir if exported else model_name
+        self.model = ORTModelForFeatureExtraction.from_pretrained(source, export=not exported)
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+        if model_dir and not exported:
+            self.model.save_pretrained(model_dir)
+            self.tokenizer.save_pretrained(model_dir)
+            logger.info(f"Exported {model_name} to ONNX at {model_dir}")
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        outputs = self.model(**inputs)
+        return mean_pool(np.asarray(outputs.last_hidden_state), inputs["attention_mask"])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        vectors = [
+            self._embed_batch(texts[i : i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def set_batch_size(model: Any, batch_size: int) -> bool:
+    """Set how many texts ``model`` encodes per forward pass.
+
+    Covers every backend ``load_embedding_model`` returns: the
+    sentence-transformers ones read ``encode_kwargs``, the ONNX one its own
+    ``batch_size``. Returns False if ``model`` has neither.
+    """
+    if isinstance(getattr(model, "encode_kwargs", None), dict):
+        model.encode_kwargs["batch_size"] = batch_size
+        return True
+    if hasattr(model, "batch_size"):
+        model.batch_size = batch_size
+        return True
+    return False
+
+
+def load_embedding_model(
+    backend: str,
+    model_name: str,
+    batch_size: int = 64,
+    onnx_dir: Optional[str] = None,
+):
+    """Load ``model_name`` on the named backend.
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "hf":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            encode_kwargs={"batch_size": batch_size},
+        )
+    if backend == "int8":
+        return SentenceTransformerBackend(model_name, batch_size, quantize=True)
+    if backend == "onnx":
+        return OnnxBackend(model_name, batch_size, model_dir=onnx_dir)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(BACKENDS)}")
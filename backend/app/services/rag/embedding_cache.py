@@ -0,0 +1,158 @@
+"""Content-hash embedding cache shared across resources and projects.
+
+Vectors are keyed by ``(model name, sha256(normalized chunk text))`` so the
+same syllabus uploaded into twenty projects, or a resource re-indexed after a
+settings change, is embedded once. An in-process LRU sits in front of the
+Mongo-backed ``embedding_cache`` collection.
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.core.monitoring import monitor
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Monitoring labels (see CACHE_HITS / CACHE_MISSES in app/core/monitoring.py)
+MEMORY_HIT = "embedding_memory"
+STORE_HIT = "embedding_store"
+MISS = "embedding"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so cosmetic differences share one cache entry."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class MongoEmbeddingStore:
+    """Persistent tier backed by the ``embedding_cache`` collection."""
+
+    async def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        from app.repositories.embedding_cache import EmbeddingCacheEntry
+
+        entries = await EmbeddingCacheEntry.find(
+            {"model": model, "content_hash": {"$in": list(hashes)}}
+        ).to_list()
+        return {e.content_hash: e.vector for e in entries}
+
+    async def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        from pymongo.errors import BulkWriteError
+
+        from app.repositories.embedding_cache import EmbeddingCacheEntry
+
+        entries = [
+            EmbeddingCacheEntry(model=model, content_hash=h, vector=v)
+            for h, v in vectors.items()
+        ]
+        try:
+            # Unordered so a concurrent writer's duplicate doesn't abort the rest
+            await EmbeddingCacheEntry.insert_many(entries, ordered=False)
+        except BulkWriteError:
+            pass
+
+
+class EmbeddingCache:
+    """Two-tier (LRU + store) cache wrapped around an embedding function."""
+
+    def __init__(
+        self,
+        model_name: str,
+        store: Optional[MongoEmbeddingStore] = None,
+        max_entries: int = 50000,
+    ):
+        self.model_name = model_name
+        self.store = store
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def embed_documents(
+        self,
+        texts: Sequence[str],
+        embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        persist: bool = True,
+    ) -> List[List[float]]:
+        """Return vectors for ``texts``, computing only the unseen ones."""
+        keys = [content_hash(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+
+        for key in keys:
+            if key in self._lru and key not in found:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+        memory_hits = len(found)
+
+        pending = list(dict.fromkeys(k for k in keys if k not in found))
+        store_hits = 0
+        if pending and self.store is not None:
+            try:
+                stored = await self.store.get_many(self.model_name, pending)
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                stored = {}
+            for key, vector in stored.items():
+                found[key] = vector
+                self._remember(key, vector)
+            store_hits = len(stored)
+
+        # Embed each distinct unseen text once, even if repeated in the batch
+        first_text = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in first_text:
+                first_text[key] = text
+        if first_text:
+            computed = await embed_fn(list(first_text.values()))
+            fresh = dict(zip(first_text.keys(), computed))
+            for key, vector in fresh.items():
+                found[key] = vector
+                self._remember(key, vector)
+            if persist and self.store is not None:
+                try:
+                    await self.store.put_many(self.model_name, fresh)
+                except Exception as e:
+                    logger.warning(f"Embedding cache write failed: {e}")
+
+        if memory_hits:
+            await monitor.track_cache_hit(MEMORY_HIT, memory_hits)
+        if store_hits:
+            await monitor.track_cache_hit(STORE_HIT, store_hits)
+        if first_text:
+            await monitor.track_cache_miss(MISS, len(first_text))
+
+        return [found[k] for k in keys]
+
+    async def embed_query(
+        self,
+        text: str,
+        embed_fn: Callable[[str], Awaitable[List[float]]],
+    ) -> List[float]:
+        """Cached single-query embedding.
+
+        Query vectors are kept in the LRU only; writing every ad-hoc question
+        to Mongo would crowd out the chunk vectors the store is for.
+        """
+
+        async def embed_many(batch: List[str]) -> List[List[float]]:
+            return [await embed_fn(t) for t in batch]
+
+        return (await self.embed_documents([text], embed_many, persist=False))[0]
+
+    async def hit_rate(self) -> float:
+        """Fraction of lookups served from either cache tier."""
+        return await monitor.get_hit_rate([MEMORY_HIT, STORE_HIT], MISS)
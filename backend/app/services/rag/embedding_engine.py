@@ -0,0 +1,65 @@
+"""Batched embedding engine that keeps model inference off the event loop."""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingEngine:
+    """Run ``embed_documents`` in batches on a dedicated thread pool.
+
+    The sentence-transformers forward pass releases the GIL inside torch, so a
+    small pool gives real parallelism without starving request handlers on the
+    event loop. A semaphore shared by all callers bounds how many batches are
+    in flight, so a large upload queues behind the pool instead of flooding it.
+    """
+
+    def __init__(
+        self,
+        model_loader: Callable[[], Any],
+        batch_size: int = 64,
+        max_workers: int = 2,
+    ):
+        self._model_loader = model_loader
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="rag-embed"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _slots(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    async def _run(self, fn: Callable, *args):
+        async with self._slots():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self._model_loader().embed_documents(texts)
+
+    def _embed_one(self, text: str) -> List[float]:
+        return self._model_loader().embed_query(text)
+
+    async def embed_documents(
+        self, texts: Sequence[str], batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Embed texts in batches, preserving input order."""
+        size = batch_size or self.batch_size
+        batches = [list(texts[i : i + size]) for i in range(0, len(texts), size)]
+        results = await asyncio.gather(*(self._run(self._embed_batch, b) for b in batches))
+        return [vector for batch in results for vector in batch]
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return await self._run(self._embed_one, text)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
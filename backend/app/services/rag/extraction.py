@@ -0,0 +1,239 @@
+"""Streaming text extraction for RAG ingestion.
+
+Objects are read from MinIO in fixed-size chunks and parsed on a dedicated
+thread pool, so neither the download nor PyMuPDF/python-docx parsing runs on
+the event loop. Text is yielded incrementally (per read for plain text, per
+page for PDFs) so callers can chunk and embed while the file is still being
+read, and a large upload never has to sit in memory as one ``bytes`` or
+``str``. Formats whose parsers need random access are spooled to a temp file
+instead of being buffered in memory.
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.rag.chunking import TextSegment
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PLAIN_TEXT_TYPES = ("text/plain", "text/markdown", "text/csv")
+PDF_TYPE = "application/pdf"
+WORD_TYPES = (
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+)
+HTML_TYPE = "text/html"
+
+# Word paragraphs handed to the chunker per yield
+PARAGRAPHS_PER_YIELD = 200
+
+_DONE = object()
+
+
+class TextExtractor:
+    """Extract text from stored objects without blocking the event loop."""
+
+    def __init__(
+        self,
+        client_loader: Callable[[], object],
+        bucket: str,
+        max_workers: int = 2,
+        read_size: int = 1024 * 1024,
+    ):
+        self._client_loader = client_loader
+        self.bucket = bucket
+        self.read_size = read_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="rag-extract"
+        )
+
+    async def _call(self, fn: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def _iterate(self, iterable: Iterable[T]) -> AsyncIterator[T]:
+        """Drive a blocking iterator on the pool, one item at a time."""
+        iterator = iter(iterable)
+        while True:
+            item = await self._call(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+
+    def _open(self, file_key: str):
+        client = self._client_loader()
+        if client is None:
+            raise ValueError("Storage client not initialized")
+        return client.get_object(self.bucket, file_key)
+
+    async def stream_bytes(self, file_key: str) -> AsyncIterator[bytes]:
+        """Yield the object's bytes in ``read_size`` chunks."""
+        response = await self._call(self._open, file_key)
+        try:
+            async for data in self._iterate(response.stream(self.read_size)):
+                yield data
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def _spool(self, file_key: str, suffix: str) -> str:
+        """Stream the object into a temp file and return its path."""
+        fd, path = tempfile.mkstemp(prefix="rag-", suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                async for data in self.stream_bytes(file_key):
+                    await self._call(handle.write, data)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+
+    async def stream_segments(self, file_key: str, mime_type: str) -> AsyncIterator[TextSegment]:
+        """Yield the text of a stored file incrementally.
+
+        PDF segments are whole pages and carry their page number; Word and
+        HTML headings are rendered as Markdown ``#`` lines so the chunker can
+        track sections.
+
+        Raises:
+            ValueError: If the file can't be read or parsed
+        """
+        try:
+            if mime_type == PDF_TYPE:
+                pieces = self._stream_spooled(file_key, ".pdf", _pdf_pages)
+            elif mime_type in WORD_TYPES:
+                pieces = self._stream_spooled(file_key, ".docx", _docx_paragraph_groups)
+            elif mime_type == HTML_TYPE:
+                pieces = self._stream_spooled(file_key, ".html", _html_text)
+            else:
+                # Plain text and unknown types are decoded as UTF-8
+                pieces = self._stream_decoded(file_key)
+
+            async for segment in pieces:
+                if segment.text:
+                    yield segment
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to extract text: {str(e)}")
+
+    async def stream_text(self, file_key: str, mime_type: str) -> AsyncIterator[str]:
+        """Yield the text of a stored file incrementally, without page numbers."""
+        async for segment in self.stream_segments(file_key, mime_type):
+            yield segment.text
+
+    async def _stream_decoded(self, file_key: str) -> AsyncIterator[TextSegment]:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        async for data in self.stream_bytes(file_key):
+            yield TextSegment(decoder.decode(data))
+        yield TextSegment(decoder.decode(b"", final=True))
+
+    async def _stream_spooled(
+        self, file_key: str, suffix: str, parse: Callable[[str], Iterator[TextSegment]]
+    ) -> AsyncIterator[TextSegment]:
+        path = await self._spool(file_key, suffix)
+        try:
+            async for text in self._iterate(parse(path)):
+                yield text
+        finally:
+            os.unlink(path)
+
+    async def extract_text(self, file_key: str, mime_type: str) -> str:
+        """Return the full text of a stored file."""
+        return "".join([text async for text in self.stream_text(file_key, mime_type)])
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _pdf_pages(path: str) -> Iterator[TextSegment]:
+    """Yield PDF text one page at a time, paragraphs separated by blank lines."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+
+    if fitz is not None:
+        pdf = fitz.open(path)
+        try:
+            for number, page in enumerate(pdf, start=1):
+                # Text blocks are PyMuPDF's layout paragraphs; type 1 is an image
+                blocks = page.get_text("blocks", sort=True)
+                text = "\n\n".join(b[4].strip() for b in blocks if b[6] == 0)
+                yield TextSegment(text, number)
+        finally:
+            pdf.close()
+        return
+
+    try:
+        import pdfplumber
+    except ImportError:
+        raise ValueError("PDF parsing library not installed. Install PyMuPDF or pdfplumber.")
+
+    with pdfplumber.open(path) as pdf:
+        for number, page in enumerate(pdf.pages, start=1):
+            yield TextSegment(page.extract_text() or "", number)
+            page.flush_cache()
+
+
+def _docx_paragraph_groups(path: str) -> Iterator[TextSegment]:
+    """Yield Word text in groups of paragraphs, headings as Markdown."""
+    try:
+        from docx import Document
+    except ImportError:
+        raise ValueError("python-docx not installed for Word document parsing.")
+
+    group: List[str] = []
+    for para in Document(path).paragraphs:
+        style = para.style.name if para.style is not None else ""
+        level = _docx_heading_level(style)
+        group.append(f"{'#' * level} {para.text}" if level and para.text.strip() else para.text)
+        if len(group) >= PARAGRAPHS_PER_YIELD:
+            yield TextSegment("\n\n".join(group) + "\n\n")
+            group = []
+    if group:
+        yield TextSegment("\n\n".join(group))
+
+
+def _docx_heading_level(style: str) -> int:
+    if style == "Title":
+        return 1
+    if style.startswith("Heading "):
+        level = style.rsplit(" ", 1)[-1]
+        return min(int(level), 6) if level.isdigit() else 0
+    return 0
+
+
+def _html_text(path: str) -> Iterator[TextSegment]:
+    """Yield the visible text of an HTML file, headings as Markdown."""
+    from bs4 import BeautifulSoup
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as handle:
+        soup = BeautifulSoup(handle, "html.parser")
+    for level in range(1, 7):
+        for tag in soup.find_all(f"h{level}"):
+            tag.string = "#" * level + " " + tag.get_text(" ", strip=True)
+    yield TextSegment(soup.get_text(separator="\n\n", strip=True))
+
+
+def _storage_client() -> Optional[object]:
+    from app.services.storage_service import storage_service
+
+    return storage_service.client
+
+
+text_extractor = TextExtractor(
+    _storage_client,
+    settings.MINIO_BUCKET_NAME,
+    max_workers=settings.RAG_EXTRACT_WORKERS,
+    read_size=settings.RAG_EXTRACT_READ_SIZE,
+)
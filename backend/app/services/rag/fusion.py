@@ -0,0 +1,49 @@
+"""Rank fusion for hybrid RAG retrieval."""
+
+from typing import Dict, List
+
+# Standard RRF damping constant (Cormack et al.); larger values flatten ranks
+RRF_K = 60
+
+
+def result_key(result: dict) -> str:
+    """Identity of a retrieved item across strategies."""
+    key = f"{result['type']}:{result['id']}"
+    if result.get("chunk_index") is not None:
+        key = f"{key}:{result['chunk_index']}"
+    return key
+
+
+def reciprocal_rank_fusion(
+    ranked: Dict[str, List[dict]],
+    weights: Dict[str, float],
+    k: int = RRF_K,
+) -> List[dict]:
+    """Fuse per-strategy rankings with weighted reciprocal-rank fusion.
+
+    Each item scores ``sum(weight_s / (k + rank_s))`` over the strategies that
+    returned it, so an item found by several strategies rises and no strategy
+    wins just by being listed first. The raw per-strategy ``score`` of the best
+    occurrence is kept; the fused value is added as ``fused_score``.
+
+    Args:
+        ranked: Strategy name -> results ordered best first
+        weights: Strategy name -> weight
+        k: RRF damping constant
+
+    Returns:
+        Deduplicated results ordered by fused score
+    """
+    fused: Dict[str, float] = {}
+    best: Dict[str, dict] = {}
+
+    for strategy, results in ranked.items():
+        weight = weights.get(strategy, 1.0)
+        for rank, result in enumerate(results, start=1):
+            key = result_key(result)
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+            if key not in best or result.get("score", 0) > best[key].get("score", 0):
+                best[key] = result
+
+    ordered = sorted(fused, key=lambda key: fused[key], reverse=True)
+    return [{**best[key], "fused_score": fused[key]} for key in ordered]
@@ -0,0 +1,339 @@
+"""Incremental embedding of project documents and chat into the vector store.
+
+Uploaded resources are indexed through the job queue; this module keeps the
+project's own writing retrievable as it changes:
+
+- Documents are re-embedded once edits go quiet for ``debounce`` seconds
+  (or at least every ``max_delay`` seconds while editing continues), and
+  only when the hash of their normalized text changed since the last
+  embedding. Unchanged chunks of a changed document are served by the
+  content-hash embedding cache, so a small edit embeds only what changed.
+- Chat messages are buffered and embedded in micro-batches of up to
+  ``batch_size`` messages, or every ``batch_interval`` seconds.
+
+Both land in ``resource_embeddings`` and the project's vector index under a
+source key (``document:<id>``, ``chat:<id>``) in place of a resource id.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.services.rag.embedding_cache import content_hash, normalize_text
+from app.services.rag.lexical_index import strip_html
+
+logger = logging.getLogger(__name__)
+
+SOURCE_TYPES = ("resource", "document", "chat")
+
+
+def source_key(source_type: str, source_id: str) -> str:
+    """Vector-store owner key for an embedded document or chat message."""
+    return f"{source_type}:{source_id}"
+
+
+def parse_source_key(key: str) -> Tuple[str, str]:
+    """Split an owner key into (source type, id); resource ids have no prefix."""
+    source_type, sep, source_id = key.partition(":")
+    if sep and source_type in SOURCE_TYPES:
+        return source_type, source_id
+    return "resource", key
+
+
+def document_text(document) -> str:
+    """Plain text of a collaborative document, as embedded."""
+    return normalize_text(f"{document.title}\n\n{strip_html(document.content or '')}")
+
+
+class MongoContextStore:
+    """Persists document and chat embeddings and keeps the vector index in step."""
+
+    @staticmethod
+    async def stored_hash(key: str) -> Optional[str]:
+        from app.repositories.resource_embedding import ResourceEmbedding
+
+        chunk = await ResourceEmbedding.find_one(ResourceEmbedding.resource_id == key)
+        return (chunk.metadata or {}).get("content_hash") if chunk else None
+
+    @staticmethod
+    async def replace(
+        project_id: str,
+        key: str,
+        source_type: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadata: Sequence[dict],
+    ) -> None:
+        """Swap one source's chunks for a new set."""
+        await MongoContextStore.remove(project_id, key)
+        if texts:
+            await MongoContextStore.insert(project_id, [(key, source_type, texts, vectors, metadata)])
+
+    @staticmethod
+    async def insert(project_id: str, items: List[tuple]) -> None:
+        """Store chunks for several sources of one project.
+
+        Each item is ``(key, source_type, texts, vectors, metadata)``.
+        """
+        from app.repositories.resource_embedding import ResourceEmbedding
+        from app.services.rag.vector_index import vector_index_registry
+
+        docs, owners, all_vectors, chunk_indices = [], [], [], []
+        for key, source_type, texts, vectors, metadata in items:
+            for index, (text, vector, meta) in enumerate(zip(texts, vectors, metadata)):
+                owners.append(key)
+                all_vectors.append(vector)
+                chunk_indices.append(index)
+                doc = ResourceEmbedding(
+                    resource_id=key,
+                    source_type=source_type,
+                    project_id=project_id,
+                    chunk_index=index,
+                    content=text,
+                    metadata=meta,
+                )
+                doc.set_vector(vector, settings.RAG_VECTOR_STORAGE)
+                docs.append(doc)
+        if not docs:
+            return
+        result = await ResourceEmbedding.insert_many(docs)
+
+        # One index update for the whole batch
+        await vector_index_registry.add_chunks(
+            project_id, owners, [str(i) for i in result.inserted_ids], all_vectors, chunk_indices
+        )
+
+    @staticmethod
+    async def remove(project_id: str, key: str) -> None:
+        from app.repositories.resource_embedding import ResourceEmbedding
+        from app.services.rag.vector_index import vector_index_registry
+
+        result = await ResourceEmbedding.find(ResourceEmbedding.resource_id == key).delete()
+        if result and result.deleted_count:
+            await vector_index_registry.remove_resource(project_id, key)
+
+
+Embed = Callable[[List[str]], Awaitable[List[List[float]]]]
+Chunker = Callable[[str], Awaitable[List[Any]]]
+
+
+class IncrementalIndexer:
+    """Debounced document and micro-batched chat embedding."""
+
+    def __init__(
+        self,
+        store,
+        embed: Embed,
+        chunk: Chunker,
+        debounce: float = 30.0,
+        max_delay: float = 300.0,
+        batch_size: int = 32,
+        batch_interval: float = 2.0,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self._embed = embed
+        self._chunk = chunk
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.enabled = enabled
+
+        # document id -> (project id, latest text); timers hold the due time
+        self._latest: Dict[str, Tuple[str, str]] = {}
+        self._first_seen: Dict[str, float] = {}
+        self._due: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._hashes: Dict[str, str] = {}
+        self._document_lock = asyncio.Lock()
+        # Embeds under way per document, and documents deleted while one was
+        self._embedding: Dict[str, int] = {}
+        self._deleted: Set[str] = set()
+
+        self._chats: List[Tuple[str, str, str]] = []
+        self._chat_timer: Optional[asyncio.Task] = None
+        self._chat_lock = asyncio.Lock()
+
+        self.stats = {
+            "documents_embedded": 0,
+            "documents_unchanged": 0,
+            "chats_embedded": 0,
+            "chat_batches": 0,
+        }
+
+    # Documents
+
+    def document_changed(self, document) -> None:
+        """Schedule a (debounced) re-embed of a created or edited document."""
+        if not self.enabled:
+            return
+        doc_id = str(document.id)
+        now = time.monotonic()
+        self._latest[doc_id] = (document.project_id, document_text(document))
+        first = self._first_seen.setdefault(doc_id, now)
+        self._due[doc_id] = min(now + self.debounce, first + self.max_delay)
+        if doc_id not in self._timers:
+            self._timers[doc_id] = asyncio.create_task(self._debounced(doc_id))
+
+    async def document_deleted(self, project_id: str, document_id: str) -> None:
+        """Cancel pending work for a document and drop its embeddings."""
+        if not self.enabled:
+            return
+        timer = self._timers.pop(document_id, None)
+        if timer:
+            timer.cancel()
+        if document_id in self._embedding:
+            # Its timer already fired; the embed must not store chunks after this
+            self._deleted.add(document_id)
+        self._forget(document_id)
+        self._hashes.pop(document_id, None)
+        async with self._document_lock:
+            await self.store.remove(project_id, source_key("document", document_id))
+
+    async def embed_document_now(self, document) -> bool:
+        """Embed a document immediately if its text changed (used for backfills)."""
+        return await self._embed_document(str(document.id), document.project_id, document_text(document))
+
+    def _forget(self, doc_id: str) -> None:
+        self._latest.pop(doc_id, None)
+        self._first_seen.pop(doc_id, None)
+        self._due.pop(doc_id, None)
+
+    async def _debounced(self, doc_id: str) -> None:
+        try:
+            # Each edit pushes the due time back, up to max_delay after the first
+            while (delay := self._due.get(doc_id, 0) - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+        finally:
+            self._timers.pop(doc_id, None)
+        pending = self._latest.get(doc_id)
+        self._forget(doc_id)
+        if pending:
+            await self._embed_document(doc_id, *pending)
+
+    async def _embed_document(self, doc_id: str, project_id: str, text: str) -> bool:
+        key = source_key("document", doc_id)
+        digest = content_hash(text)
+        # Counted before waiting on the lock, so a delete from here on is seen
+        self._embedding[doc_id] = self._embedding.get(doc_id, 0) + 1
+        try:
+            async with self._document_lock:
+                if doc_id in self._deleted:
+                    return False
+                try:
+                    if doc_id not in self._hashes:
+                        stored = await self.store.stored_hash(key)
+                        if stored:
+                            self._hashes[doc_id] = stored
+                    if self._hashes.get(doc_id) == digest:
+                        self.stats["documents_unchanged"] += 1
+                        return False
+
+                    chunks = await self._chunk(text)
+                    vectors = await self._embed([c.text for c in chunks]) if chunks else []
+                    if doc_id in self._deleted:
+                        # Deleted while embedding; storing now would orphan the chunks
+                        return False
+                    await self.store.replace(
+                        project_id,
+                        key,
+                        "document",
+                        [c.text for c in chunks],
+                        vectors,
+                        [{**c.metadata, "content_hash": digest} for c in chunks],
+                    )
+                    self._hashes[doc_id] = digest
+                    self.stats["documents_embedded"] += 1
+                    return True
+                except Exception as e:
+                    logger.error(f"Failed to embed document {doc_id}: {e}")
+                    return False
+        finally:
+            self._embedding[doc_id] -= 1
+            if not self._embedding[doc_id]:
+                del self._embedding[doc_id]
+                self._deleted.discard(doc_id)
+
+    # Chat
+
+    def add_chat(self, chat) -> None:
+        """Buffer a chat message for the next micro-batch."""
+        if not self.enabled or getattr(chat, "message_type", "text") == "system":
+            return
+        if not (chat.content or "").strip():
+            return
+        self._chats.append((chat.project_id, str(chat.id), chat.content))
+        if len(self._chats) >= self.batch_size:
+            asyncio.create_task(self.flush_chats())
+        elif self._chat_timer is None:
+            self._chat_timer = asyncio.create_task(self._chat_tick())
+
+    async def _chat_tick(self) -> None:
+        try:
+            await asyncio.sleep(self.batch_interval)
+        finally:
+            self._chat_timer = None
+        await self.flush_chats()
+
+    async def flush_chats(self) -> int:
+        """Embed every buffered chat message; returns how many were stored."""
+        async with self._chat_lock:
+            batch, self._chats = self._chats, []
+            if not batch:
+                return 0
+            try:
+                vectors = await self._embed([text for _, _, text in batch])
+                by_project: Dict[str, list] = {}
+                for (project_id, chat_id, text), vector in zip(batch, vectors):
+                    by_project.setdefault(project_id, []).append(
+                        (source_key("chat", chat_id), "chat", [text], [vector], [{}])
+                    )
+                for project_id, items in by_project.items():
+                    await self.store.insert(project_id, items)
+            except Exception as e:
+                logger.error(f"Failed to embed {len(batch)} chat messages: {e}")
+                return 0
+            self.stats["chats_embedded"] += len(batch)
+            self.stats["chat_batches"] += 1
+            return len(batch)
+
+    async def stop(self) -> None:
+        """Embed everything still pending (called on shutdown)."""
+        for doc_id, timer in list(self._timers.items()):
+            timer.cancel()
+        pending = list(self._latest.items())
+        self._timers.clear()
+        for doc_id, (project_id, text) in pending:
+            self._forget(doc_id)
+            await self._embed_document(doc_id, project_id, text)
+        if self._chat_timer:
+            self._chat_timer.cancel()
+            self._chat_timer = None
+        await self.flush_chats()
+
+
+async def _embed(texts: List[str]) -> List[List[float]]:
+    from app.services.rag_service import rag_service
+
+    return await rag_service.generate_embeddings(texts)
+
+
+async def _chunk(text: str) -> List[Any]:
+    from app.services.rag_service import rag_service
+
+    return await rag_service.chunk_text(text)
+
+
+incremental_indexer = IncrementalIndexer(
+    MongoContextStore(),
+    embed=_embed,
+    chunk=_chunk,
+    debounce=settings.RAG_DOCUMENT_DEBOUNCE,
+    max_delay=settings.RAG_DOCUMENT_MAX_DELAY,
+    batch_size=settings.RAG_CHAT_BATCH_SIZE,
+    batch_interval=settings.RAG_CHAT_BATCH_INTERVAL,
+    enabled=settings.RAG_INCREMENTAL_INDEXING,
+)
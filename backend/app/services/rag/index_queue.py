@@ -0,0 +1,367 @@
+"""Durable RAG indexing queue with a bounded worker pool.
+
+Jobs live in the ``rag_index_jobs`` collection, so a restart loses nothing:
+workers claim queued jobs atomically, hold a lease they renew on a timer
+while the job runs, and a job whose lease expires (its worker died) is
+claimed again, until it has used up its attempts and is marked failed.
+Every API process can run workers against the same collection. A worker that finds its job reclaimed stops it before storing
+another page, so two workers never both insert a resource's chunks.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+EXTRACTING = "extracting"
+EMBEDDING = "embedding"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE_STATES = (QUEUED, EXTRACTING, EMBEDDING)
+RUNNING_STATES = (EXTRACTING, EMBEDDING)
+JOB_STATES = (QUEUED, EXTRACTING, EMBEDDING, DONE, FAILED)
+
+# handler(job, report) -> chunks indexed; report(status, chunks_done) records
+# progress and cancels the handler if the job was reclaimed by another worker
+Report = Callable[[str, int], Awaitable[None]]
+Handler = Callable[[Any, Report], Awaitable[int]]
+
+
+class MongoJobStore:
+    """Job persistence backed by the ``rag_index_jobs`` collection."""
+
+    @staticmethod
+    def _collection():
+        from app.repositories.rag_index_job import RAGIndexJob
+
+        return RAGIndexJob.get_motor_collection()
+
+    @staticmethod
+    def _parse(raw: Optional[dict]):
+        from app.repositories.rag_index_job import RAGIndexJob
+
+        return RAGIndexJob.model_validate(raw) if raw else None
+
+    async def submit(
+        self,
+        resource_id: str,
+        project_id: Optional[str],
+        max_tokens: Optional[int],
+        overlap_tokens: Optional[int],
+    ) -> Tuple[Any, bool]:
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.utcnow()
+        try:
+            # Matches only a finished job; an active one makes the upsert
+            # collide on the unique resource_id index instead
+            await self._collection().update_one(
+                {"resource_id": resource_id, "status": {"$in": [DONE, FAILED]}},
+                {
+                    "$set": {
+                        "project_id": project_id,
+                        "status": QUEUED,
+                        "max_tokens": max_tokens,
+                        "overlap_tokens": overlap_tokens,
+                        "attempts": 0,
+                        "chunks_done": 0,
+                        "error": None,
+                        "worker_id": None,
+                        "queued_at": now,
+                        "run_after": now,
+                        "lease_until": None,
+                        "started_at": None,
+                        "finished_at": None,
+                    }
+                },
+                upsert=True,
+            )
+            created = True
+        except DuplicateKeyError:
+            created = False
+        raw = await self._collection().find_one({"resource_id": resource_id})
+        return self._parse(raw), created
+
+    async def claim(self, worker_id: str, lease_seconds: float, max_attempts: int):
+        from pymongo import ReturnDocument
+
+        now = datetime.utcnow()
+        raw = await self._collection().find_one_and_update(
+            {
+                "$or": [
+                    {"status": QUEUED, "run_after": {"$lte": now}},
+                    {
+                        "status": {"$in": list(RUNNING_STATES)},
+                        "lease_until": {"$lt": now},
+                        "attempts": {"$lt": max_attempts},
+                    },
+                ]
+            },
+            {
+                "$set": {
+                    "status": EXTRACTING,
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "chunks_done": 0,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._parse(raw)
+
+    async def fail_expired(self, max_attempts: int, error: str) -> int:
+        # Jobs whose worker died or hung on every attempt; claim won't take them again
+        now = datetime.utcnow()
+        result = await self._collection().update_many(
+            {
+                "status": {"$in": list(RUNNING_STATES)},
+                "lease_until": {"$lt": now},
+                "attempts": {"$gte": max_attempts},
+            },
+            {"$set": {"status": FAILED, "error": error, "worker_id": None, "finished_at": now}},
+        )
+        return result.modified_count
+
+    async def update(self, job_id, owner: str, lease_seconds: float, **fields) -> bool:
+        # Only the worker holding the lease may write, so a reclaimed job
+        # isn't overwritten by its previous owner; False if it lost the job
+        fields["lease_until"] = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        result = await self._collection().update_one(
+            {"_id": job_id, "worker_id": owner}, {"$set": fields}
+        )
+        return result.matched_count == 1
+
+    async def get_many(self, resource_ids: Iterable[str]) -> Dict[str, Any]:
+        cursor = self._collection().find({"resource_id": {"$in": list(resource_ids)}})
+        return {raw["resource_id"]: self._parse(raw) async for raw in cursor}
+
+    async def counts(self) -> Dict[str, int]:
+        cursor = self._collection().aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+        return {row["_id"]: row["count"] async for row in cursor}
+
+    async def finished_since(self, since: datetime) -> Tuple[int, int]:
+        cursor = self._collection().aggregate([
+            {"$match": {"status": DONE, "finished_at": {"$gte": since}}},
+            {"$group": {"_id": None, "jobs": {"$sum": 1}, "chunks": {"$sum": "$chunks_done"}}},
+        ])
+        rows = [row async for row in cursor]
+        return (rows[0]["jobs"], rows[0]["chunks"]) if rows else (0, 0)
+
+
+class IndexJobQueue:
+    """Submit RAG indexing jobs and run them on a fixed-size worker pool."""
+
+    def __init__(
+        self,
+        store,
+        handler: Optional[Handler] = None,
+        workers: int = 2,
+        poll_interval: float = 2.0,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 30.0,
+        throughput_window: float = 3600.0,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.throughput_window = throughput_window
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    async def submit(
+        self,
+        resource_id: str,
+        project_id: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+    ) -> Tuple[Any, bool]:
+        """Queue a resource for indexing.
+
+        Returns:
+            Tuple of (job, created). ``created`` is False when the resource
+            already had an active job, which is returned unchanged.
+        """
+        job, created = await self.store.submit(resource_id, project_id, max_tokens, overlap_tokens)
+        if created:
+            self._event().set()
+        return job, created
+
+    async def get_jobs(self, resource_ids: Iterable[str]) -> Dict[str, Any]:
+        """Return the jobs for the given resources, keyed by resource_id."""
+        return await self.store.get_many(resource_ids)
+
+    def start(self) -> None:
+        """Start the worker pool in the running event loop."""
+        if self._tasks or self.handler is None:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self._worker_prefix}:{n}"))
+            for n in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} RAG indexing workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs are reclaimed once their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _worker(self, worker_id: str) -> None:
+        wakeup = self._event()
+        while True:
+            wakeup.clear()
+            try:
+                await self._fail_expired()
+                job = await self.store.claim(worker_id, self.lease_seconds, self.max_attempts)
+            except Exception as e:
+                logger.error(f"RAG queue claim failed: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"RAG queue failed to record job {job.resource_id}: {e}")
+
+    async def _fail_expired(self) -> None:
+        """Fail jobs whose lease expired on their last attempt instead of rerunning them."""
+        failed = await self.store.fail_expired(
+            self.max_attempts,
+            f"Worker stopped before finishing on all {self.max_attempts} attempts",
+        )
+        if failed:
+            logger.warning(f"Failed {failed} RAG jobs whose workers died on every attempt")
+
+    async def _run(self, job, worker_id: str) -> None:
+        async def report(status: str, chunks_done: int) -> None:
+            owned = await self.store.update(
+                job.id, worker_id, self.lease_seconds, status=status, chunks_done=chunks_done
+            )
+            if not owned:
+                # Unwinds the handler like a cancellation, skipping its
+                # failure cleanup, which would delete the new owner's chunks
+                raise asyncio.CancelledError()
+
+        handler = asyncio.create_task(self.handler(job, report))
+        keeper = asyncio.create_task(self._keep_lease(job, worker_id, handler))
+        try:
+            await asyncio.wait({handler})
+        except asyncio.CancelledError:
+            handler.cancel()
+            raise
+        finally:
+            keeper.cancel()
+
+        if handler.cancelled():
+            logger.warning(f"RAG job {job.resource_id} was reclaimed by another worker; abandoned it")
+            return
+        try:
+            chunks = handler.result()
+        except Exception as e:
+            logger.warning(f"RAG indexing of {job.resource_id} failed (attempt {job.attempts}): {e}")
+            if job.attempts < self.max_attempts:
+                delay = self.retry_backoff * 2 ** (job.attempts - 1)
+                await self.store.update(
+                    job.id, worker_id, self.lease_seconds,
+                    status=QUEUED, error=str(e), worker_id=None,
+                    run_after=datetime.utcnow() + timedelta(seconds=delay),
+                )
+            else:
+                await self.store.update(
+                    job.id, worker_id, self.lease_seconds,
+                    status=FAILED, error=str(e), finished_at=datetime.utcnow(),
+                )
+            return
+
+        await self.store.update(
+            job.id, worker_id, self.lease_seconds,
+            status=DONE, chunks_done=chunks, error=None, finished_at=datetime.utcnow(),
+        )
+
+    async def _keep_lease(self, job, worker_id: str, handler: asyncio.Task) -> None:
+        """Renew the lease while the handler runs; stop it if the job was reclaimed."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                owned = await self.store.update(job.id, worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Failed to renew lease on RAG job {job.resource_id}: {e}")
+                continue
+            if not owned:
+                handler.cancel()
+                return
+
+    async def stats(self) -> dict:
+        """Queue depth by state and recent throughput."""
+        counts = await self.store.counts()
+        window = self.throughput_window
+        jobs, chunks = await self.store.finished_since(
+            datetime.utcnow() - timedelta(seconds=window)
+        )
+        return {
+            "depth": sum(counts.get(s, 0) for s in ACTIVE_STATES),
+            "by_status": {s: counts.get(s, 0) for s in JOB_STATES},
+            "workers": len(self._tasks),
+            "throughput": {
+                "window_seconds": window,
+                "jobs_per_minute": round(jobs / (window / 60), 3),
+                "chunks_per_second": round(chunks / window, 3),
+            },
+        }
+
+
+async def _index_job(job, report: Report) -> int:
+    from app.services.rag_service import rag_service
+
+    async def on_progress(chunks_done: int) -> None:
+        await report(EMBEDDING, chunks_done)
+
+    return await rag_service.index_resource(
+        job.resource_id, job.max_tokens, job.overlap_tokens, on_progress=on_progress
+    )
+
+
+index_queue = IndexJobQueue(
+    MongoJobStore(),
+    handler=_index_job,
+    workers=settings.RAG_QUEUE_WORKERS,
+    poll_interval=settings.RAG_QUEUE_POLL_INTERVAL,
+    lease_seconds=settings.RAG_QUEUE_LEASE_SECONDS,
+    max_attempts=settings.RAG_QUEUE_MAX_ATTEMPTS,
+    throughput_window=settings.RAG_QUEUE_THROUGHPUT_WINDOW,
+)
@@ -0,0 +1,241 @@
+"""Incremental per-project BM25 index over documents and chat history.
+
+Replaces the recency-window substring scans in RAG lexical retrieval: every
+document and chat message of a project is searchable, multi-word queries are
+scored term by term, and Chinese text is tokenized into character bigrams so
+queries match without a word segmenter.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.rag.result_cache import retrieval_cache
+
+logger = logging.getLogger(__name__)
+
+# CJK Unified Ideographs (+ Ext A), Hiragana/Katakana and Hangul syllables
+_CJK = "㐀-䶿一-鿿぀-ヿ가-힯"
+_TOKEN = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+", re.UNICODE)
+_IS_CJK = re.compile(rf"[{_CJK}]")
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+SNIPPET_CHARS = 500
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens and CJK character bigrams."""
+    tokens: List[str] = []
+    for run in _TOKEN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if _IS_CJK.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def strip_html(html: str) -> str:
+    """Drop markup from editor HTML before indexing."""
+    return _HTML_TAG.sub(" ", html)
+
+
+@dataclass
+class LexicalHit:
+    """Single BM25 match."""
+
+    doc_id: str
+    score: float
+    snippet: str
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._snippets: Dict[str, str] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+
+    def upsert(self, doc_id: str, text: str, snippet: Optional[str] = None) -> None:
+        """Index (or re-index) a document."""
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        if not terms:
+            return
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        length = sum(terms.values())
+        self._terms[doc_id] = terms
+        self._lengths[doc_id] = length
+        self._snippets[doc_id] = (snippet if snippet is not None else text)[:SNIPPET_CHARS]
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document if present."""
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        self._snippets.pop(doc_id, None)
+
+    def search(self, query: str, k: int) -> List[LexicalHit]:
+        """Return the top-k documents for a query."""
+        n = len(self._lengths)
+        if n == 0 or k <= 0:
+            return []
+        avg_length = self._total_length / n
+
+        scores: Dict[str, float] = {}
+        for term, qtf in Counter(tokenize(query)).items():
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + qtf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [LexicalHit(doc_id, score, self._snippets[doc_id]) for doc_id, score in top]
+
+
+class LexicalIndexRegistry:
+    """Per-project BM25 indexes for the ``document`` and ``chat`` sources.
+
+    Like the vector indexes, every process holds its own copy, kept in step
+    through the result cache's per-source generations: local updates bump
+    the source's generation, and a lookup that finds it moved on elsewhere
+    rebuilds that source from Mongo.
+    """
+
+    SOURCES = ("document", "chat")
+
+    def __init__(self, generations: Optional[Any] = None):
+        self._indexes: Dict[Tuple[str, str], BM25Index] = {}
+        self._synced: Dict[Tuple[str, str], Optional[int]] = {}
+        self._builds: Dict[Tuple[str, str], asyncio.Task] = {}
+        # Updates that arrive while a source is being built, replayed after
+        self._pending: Dict[Tuple[str, str], List[Tuple[Callable[[BM25Index], None], Optional[int]]]] = {}
+        # Shared per-project generations (a RetrievalCache); None for a single process
+        self.generations = generations
+
+    async def get(self, project_id: str, source: str) -> BM25Index:
+        """Return a project's index for ``source``, building it on first use."""
+        key = (project_id, source)
+        if key in self._indexes:
+            current = await self._generation(key)
+            if current is None or current == self._synced.get(key):
+                return self._indexes[key]
+            logger.info(f"Lexical {source} index for project {project_id} changed in another process, rebuilding")
+            self._indexes.pop(key, None)
+        task = self._builds.get(key)
+        if task is None:
+            task = asyncio.create_task(self._build(key))
+            self._builds[key] = task
+        return await asyncio.shield(task)
+
+    async def _build(self, key: Tuple[str, str]) -> BM25Index:
+        from app.repositories.chat_log import ChatLog
+        from app.repositories.document import Document
+
+        project_id, source = key
+        try:
+            # Read before Mongo, so a change made during the build is caught next time
+            synced = await self._generation(key)
+            index = BM25Index()
+            if source == "document":
+                async for doc in Document.find(Document.project_id == project_id):
+                    index.upsert(str(doc.id), *self._document_text(doc))
+            else:
+                async for chat in ChatLog.find(ChatLog.project_id == project_id):
+                    index.upsert(str(chat.id), *self._chat_text(chat))
+
+            for update, generation in self._pending.pop(key, []):
+                update(index)
+                if synced is not None and generation == synced + 1:
+                    synced = generation
+            self._indexes[key] = index
+            self._synced[key] = synced
+            logger.info(f"Built lexical {source} index for project {project_id} ({len(index)} entries)")
+            return index
+        finally:
+            self._builds.pop(key, None)
+            self._pending.pop(key, None)
+
+    async def _generation(self, key: Tuple[str, str]) -> Optional[int]:
+        if self.generations is None:
+            return None
+        return await self.generations.generation(*key)
+
+    @staticmethod
+    def _document_text(doc) -> Tuple[str, str]:
+        body = strip_html(doc.content or "")
+        snippet = doc.preview_text or body
+        return f"{doc.title}\n{doc.preview_text or ''}\n{body}", snippet
+
+    @staticmethod
+    def _chat_text(chat) -> Tuple[str, str]:
+        return chat.content, f"{chat.user_id}: {chat.content}"
+
+    async def _apply(self, project_id: str, source: str, update: Callable[[BM25Index], None]) -> None:
+        """Apply a local change and publish it to other processes."""
+        key = (project_id, source)
+        generation = None
+        if self.generations is not None:
+            generation = await self.generations.invalidate(project_id, source)
+
+        index = self._indexes.get(key)
+        if index is not None:
+            update(index)
+            synced = self._synced.get(key)
+            # Still current unless another process changed the source meanwhile
+            if generation is not None and synced is not None and generation == synced + 1:
+                self._synced[key] = generation
+        elif key in self._builds:
+            self._pending.setdefault(key, []).append((update, generation))
+        # Otherwise the source isn't loaded; its first build reads from Mongo
+
+    async def add_chat(self, chat) -> None:
+        """Index a newly inserted chat message."""
+        text, snippet = self._chat_text(chat)
+        await self._apply(chat.project_id, "chat", lambda index: index.upsert(str(chat.id), text, snippet))
+
+    async def upsert_document(self, doc) -> None:
+        """Re-index a saved document."""
+        text, snippet = self._document_text(doc)
+        await self._apply(doc.project_id, "document", lambda index: index.upsert(str(doc.id), text, snippet))
+
+    async def remove_document(self, project_id: str, doc_id: str) -> None:
+        """Drop a deleted document."""
+        await self._apply(project_id, "document", lambda index: index.remove(doc_id))
+
+    async def search(self, project_id: str, source: str, query: str, k: int) -> List[LexicalHit]:
+        """Top-k BM25 search within one project and source."""
+        return (await self.get(project_id, source)).search(query, k)
+
+
+lexical_index_registry = LexicalIndexRegistry(generations=retrieval_cache)
@@ -0,0 +1,244 @@
+"""Per-resource index manifest for the RAG admin endpoints.
+
+``/rag/stats`` and ``/rag/documents`` used to derive everything from the
+embeddings collection: a ``distinct`` over every chunk, then a resource and
+project lookup and a chunk ``count`` per listed document. The manifest keeps
+one small document per indexed resource instead, updated by the indexer
+alongside each page of chunks, so both endpoints are a single aggregation
+over an index no larger than the number of resources.
+
+Chunk pages are counted with ``$inc`` right after they are inserted, and a
+resource's manifest is deleted before its chunks, so the manifest never
+reports chunks that don't exist.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.rag.embedding_backends import embedding_model_id
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_bytes(embedding) -> int:
+    """Stored size of a chunk: its text plus the vector payload."""
+    if embedding.vector_data is not None:
+        vector_bytes = len(embedding.vector_data)
+    else:
+        vector_bytes = 8 * len(embedding.vector or [])  # One BSON double each
+    return len(embedding.content.encode("utf-8")) + vector_bytes
+
+
+class ManifestStore:
+    """Manifest persistence backed by the ``rag_resource_manifests`` collection."""
+
+    @staticmethod
+    def _collection():
+        from app.repositories.rag_resource_manifest import RAGResourceManifest
+
+        return RAGResourceManifest.get_motor_collection()
+
+    async def record_page(
+        self, resource, resource_id: str, embeddings: Sequence[Any], model: str
+    ) -> None:
+        """Count a freshly inserted page of chunks towards its resource."""
+        await self._collection().update_one(
+            {"resource_id": resource_id},
+            {
+                "$inc": {
+                    "chunk_count": len(embeddings),
+                    "bytes": sum(chunk_bytes(e) for e in embeddings),
+                },
+                "$set": {
+                    "model": model,
+                    "vector_storage": settings.RAG_VECTOR_STORAGE,
+                    "indexed_at": datetime.utcnow(),
+                },
+                "$setOnInsert": {
+                    "project_id": resource.project_id if resource else None,
+                    "filename": resource.filename if resource else "",
+                    "mime_type": resource.mime_type if resource else None,
+                    "size": resource.size if resource else 0,
+                    "uploaded_at": resource.uploaded_at if resource else None,
+                },
+            },
+            upsert=True,
+        )
+
+    async def remove(self, resource_id: str) -> None:
+        await self._collection().delete_one({"resource_id": resource_id})
+
+    async def list_page(
+        self, project_id: Optional[str], skip: int, limit: int
+    ) -> Tuple[List[dict], int]:
+        """One page of manifests, newest first, with project names and the total."""
+        match = {"project_id": project_id} if project_id else {}
+        cursor = self._collection().aggregate([
+            {"$match": match},
+            {"$sort": {"indexed_at": -1}},
+            {
+                "$facet": {
+                    "items": [
+                        {"$skip": skip},
+                        {"$limit": limit},
+                        {
+                            "$lookup": {
+                                "from": "projects",
+                                "let": {
+                                    "pid": {
+                                        "$convert": {
+                                            "input": "$project_id",
+                                            "to": "objectId",
+                                            "onError": None,
+                                            "onNull": None,
+                                        }
+                                    }
+                                },
+                                "pipeline": [
+                                    {"$match": {"$expr": {"$eq": ["$_id", "$$pid"]}}},
+                                    {"$project": {"name": 1}},
+                                ],
+                                "as": "project",
+                            }
+                        },
+                    ],
+                    "total": [{"$count": "count"}],
+                }
+            },
+        ])
+        rows = [row async for row in cursor]
+        if not rows:
+            return [], 0
+        items = []
+        for item in rows[0]["items"]:
+            project = item.pop("project", [])
+            item["project_name"] = project[0].get("name") if project else None
+            items.append(item)
+        total = rows[0]["total"][0]["count"] if rows[0]["total"] else 0
+        return items, total
+
+    async def summary(self) -> Dict[str, Any]:
+        """Totals across every indexed resource."""
+        cursor = self._collection().aggregate([
+            {
+                "$group": {
+                    "_id": None,
+                    "documents": {"$sum": 1},
+                    "chunks": {"$sum": "$chunk_count"},
+                    "bytes": {"$sum": "$bytes"},
+                    "projects": {"$addToSet": "$project_id"},
+                    "last_updated": {"$max": "$indexed_at"},
+                }
+            },
+            {
+                "$project": {
+                    "documents": 1,
+                    "chunks": 1,
+                    "bytes": 1,
+                    "last_updated": 1,
+                    "projects": {
+                        "$size": {
+                            "$filter": {"input": "$projects", "cond": {"$ne": ["$$this", None]}}
+                        }
+                    },
+                }
+            },
+        ])
+        rows = [row async for row in cursor]
+        if not rows:
+            return {"documents": 0, "chunks": 0, "bytes": 0, "projects": 0, "last_updated": None}
+        rows[0].pop("_id", None)
+        return rows[0]
+
+    async def indexed_ids(self, resource_ids: Sequence[str]) -> set:
+        """Which of ``resource_ids`` have indexed chunks."""
+        cursor = self._collection().find(
+            {"resource_id": {"$in": list(resource_ids)}}, {"resource_id": 1}
+        )
+        return {row["resource_id"] async for row in cursor}
+
+    async def rebuild(self) -> int:
+        """Recompute every manifest from ``resource_embeddings``.
+
+        Used to backfill deployments indexed before manifests existed.
+        """
+        from pymongo import ReplaceOne
+
+        from app.repositories.resource import Resource
+        from app.repositories.resource_embedding import ResourceEmbedding
+
+        cursor = ResourceEmbedding.get_motor_collection().aggregate(
+            [
+                # Embedded documents and chats have no manifest
+                {"$match": {"source_type": {"$nin": ["document", "chat"]}}},
+                {
+                    "$group": {
+                        "_id": "$resource_id",
+                        "chunks": {"$sum": 1},
+                        "bytes": {
+                            "$sum": {
+                                "$add": [
+                                    {"$strLenBytes": "$content"},
+                                    {"$ifNull": [{"$binarySize": "$vector_data"}, 0]},
+                                    {"$multiply": [8, {"$size": {"$ifNull": ["$vector", []]}}]},
+                                ]
+                            }
+                        },
+                        "indexed_at": {"$max": "$created_at"},
+                    }
+                }
+            ],
+            allowDiskUse=True,
+        )
+        rows = [row async for row in cursor]
+        resources = {}
+        if rows:
+            from bson import ObjectId
+            from bson.errors import InvalidId
+
+            object_ids = []
+            for row in rows:
+                try:
+                    object_ids.append(ObjectId(row["_id"]))
+                except (InvalidId, TypeError):
+                    pass
+            resources = {
+                str(r.id): r for r in await Resource.find({"_id": {"$in": object_ids}}).to_list()
+            }
+
+        operations = []
+        for row in rows:
+            resource = resources.get(row["_id"])
+            operations.append(
+                ReplaceOne(
+                    {"resource_id": row["_id"]},
+                    {
+                        "resource_id": row["_id"],
+                        "project_id": resource.project_id if resource else None,
+                        "filename": resource.filename if resource else "",
+                        "mime_type": resource.mime_type if resource else None,
+                        "size": resource.size if resource else 0,
+                        "uploaded_at": resource.uploaded_at if resource else None,
+                        "chunk_count": row["chunks"],
+                        "bytes": row["bytes"],
+                        "model": embedding_model_id(
+                            settings.RAG_EMBEDDING_MODEL, settings.RAG_EMBEDDING_BACKEND
+                        ),
+                        "vector_storage": settings.RAG_VECTOR_STORAGE,
+                        "indexed_at": row["indexed_at"] or datetime.utcnow(),
+                    },
+                    upsert=True,
+                )
+            )
+
+        collection = self._collection()
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        # Drop manifests whose chunks are gone
+        await collection.delete_many({"resource_id": {"$nin": [row["_id"] for row in rows]}})
+        return len(operations)
+
+
+manifest_store = ManifestStore()
@@ -0,0 +1,116 @@
+"""Shared cache for RAG retrieval results with per-source invalidation.
+
+Each project keeps a generation counter per retrieval source (``vector`` for
+the project vector store, ``document``, ``chat``) in Redis. Cache keys embed
+the generations of the sources they were computed from, so invalidating a
+source is a single INCR: later lookups build new keys and the stale entries
+are never read again, expiring on their own. A new chat message therefore
+only invalidates chat retrieval; cached vector results for the same question
+survive it until the message itself is embedded.
+
+The TTL only bounds Redis memory; it plays no part in freshness.
+
+The same counters tell each process's in-memory vector and BM25 indexes that
+another process changed a source, so they are bumped even when result caching
+is disabled.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.core.monitoring import monitor
+from app.services.rag.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("vector", "document", "chat")
+
+# Monitoring labels
+CONTEXT_CACHE = "rag_context"
+STRATEGY_CACHE = "rag_strategy"
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different questions share a key."""
+    return normalize_text(query).casefold()
+
+
+class RetrievalCache:
+    """Generation-scoped Redis cache for ``retrieve_context`` results."""
+
+    def __init__(
+        self,
+        client_loader: Callable[[], Awaitable[Any]],
+        ttl: int = 3600,
+        prefix: str = "rag",
+    ):
+        self._client_loader = client_loader
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _generation_key(self, project_id: str, source: str) -> str:
+        return f"{self.prefix}:gen:{project_id}:{source}"
+
+    async def generations(self, project_id: str) -> Dict[str, int]:
+        """Current generation of every source for a project."""
+        client = await self._client_loader()
+        values = await client.mget([self._generation_key(project_id, s) for s in SOURCES])
+        return {source: int(value or 0) for source, value in zip(SOURCES, values)}
+
+    async def generation(self, project_id: str, source: str) -> Optional[int]:
+        """Current generation of one source, or None if Redis can't be reached."""
+        try:
+            client = await self._client_loader()
+            return int(await client.get(self._generation_key(project_id, source)) or 0)
+        except Exception as e:
+            logger.warning(f"RAG generation lookup failed for {project_id}/{source}: {e}")
+            return None
+
+    async def invalidate(self, project_id: str, source: str) -> Optional[int]:
+        """Retire every cached result computed from ``source`` for a project.
+
+        Returns the new generation, or None if it couldn't be bumped.
+        """
+        if not project_id:
+            return None
+        try:
+            client = await self._client_loader()
+            return await client.incr(self._generation_key(project_id, source))
+        except Exception as e:
+            logger.warning(f"RAG cache invalidation failed for {project_id}/{source}: {e}")
+            return None
+
+    def key(self, project_id: str, scope: str, generations: Sequence[int], query: str, **params) -> str:
+        """Cache key for a query under the given source generations."""
+        digest = hashlib.sha256(
+            json.dumps(
+                {"q": normalize_query(query), **params}, sort_keys=True, ensure_ascii=False
+            ).encode("utf-8")
+        ).hexdigest()
+        gens = ".".join(str(g) for g in generations)
+        return f"{self.prefix}:{scope}:{project_id}:{gens}:{digest}"
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        client = await self._client_loader()
+        return [json.loads(v) if v else None for v in await client.mget(keys)]
+
+    async def set(self, key: str, value: Any) -> None:
+        client = await self._client_loader()
+        await client.setex(key, self.ttl, json.dumps(value, default=str))
+
+    async def track(self, cache_type: str, hit: bool) -> None:
+        if hit:
+            await monitor.track_cache_hit(cache_type)
+        else:
+            await monitor.track_cache_miss(cache_type)
+
+
+retrieval_cache = RetrievalCache(get_redis_client, ttl=settings.RAG_RESULT_CACHE_TTL)
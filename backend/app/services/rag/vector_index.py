@@ -0,0 +1,590 @@
+"""In-process per-project vector index for RAG retrieval.
+
+Self-hosted MongoDB has no ``$vectorSearch`` stage, so the vector part of
+hybrid retrieval is served from an IVF-flat index held in memory for each
+project. Small projects are searched exhaustively (a single inverted list);
+once a project grows past ``ivf_min_vectors`` the rows are partitioned around
+k-means centroids and only the ``nprobe`` closest lists are scanned.
+
+Indexes are persisted per project as ``.npy`` files with rows grouped by
+inverted list, so a reload memory-maps the vectors instead of reading them.
+
+Every API process holds its own copy, so each index remembers the project's
+``vector`` generation (the result cache's counter in Redis) it reflects.
+Local changes bump the counter; a lookup that finds it moved on elsewhere
+drops the copy and reloads it, from disk if another process saved that
+generation, otherwise from Mongo.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.rag.result_cache import retrieval_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VectorHit:
+    """Single nearest-neighbour match."""
+
+    embedding_id: str
+    resource_id: str
+    chunk_index: int
+    score: float
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return L2-normalized float32 rows so dot product equals cosine."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+@contextmanager
+def _file_lock(path: str, exclusive: bool):
+    """Serialize index swaps and loads between processes sharing the index dir."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class _InvertedList:
+    """Vectors and row metadata assigned to one centroid.
+
+    Rows live in a buffer grown by doubling, so appending a chunk at a time
+    costs amortized O(1) copies instead of re-stacking the whole list.
+    """
+
+    __slots__ = ("_buffer", "embedding_ids", "resource_ids", "chunk_indices")
+
+    def __init__(self, dim: int):
+        self._buffer = np.empty((0, dim), dtype=np.float32)
+        self.embedding_ids: List[str] = []
+        self.resource_ids: List[str] = []
+        self.chunk_indices: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.embedding_ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._buffer[: len(self)]
+
+    @vectors.setter
+    def vectors(self, value: np.ndarray) -> None:
+        self._buffer = value
+
+    def extend(self, vectors: np.ndarray, embedding_ids, resource_ids, chunk_indices):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        size, needed = len(self), len(self) + len(vectors)
+        # Memory-mapped rows from a load are read-only; copy them on first write
+        if needed > len(self._buffer) or not self._buffer.flags.writeable:
+            capacity = max(needed, 2 * len(self._buffer), 64)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self._buffer[:size]
+            self._buffer = grown
+        self._buffer[size:needed] = vectors
+        self.embedding_ids.extend(embedding_ids)
+        self.resource_ids.extend(resource_ids)
+        self.chunk_indices.extend(chunk_indices)
+
+    def remove_resource(self, resource_id: str) -> int:
+        keep = [i for i, rid in enumerate(self.resource_ids) if rid != resource_id]
+        removed = len(self) - len(keep)
+        if removed:
+            self.vectors = self.vectors[keep]
+            self.embedding_ids = [self.embedding_ids[i] for i in keep]
+            self.resource_ids = [self.resource_ids[i] for i in keep]
+            self.chunk_indices = [self.chunk_indices[i] for i in keep]
+        return removed
+
+
+class ProjectVectorIndex:
+    """IVF-flat cosine index over the chunk embeddings of one project."""
+
+    def __init__(self, dim: int, ivf_min_vectors: int = 20000, nprobe: int = 8):
+        self.dim = dim
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[_InvertedList] = [_InvertedList(dim)]
+        self.trained_size = 0
+        self.dirty = False
+        # Project generation this index reflects (None if unknown)
+        self.generation: Optional[int] = None
+        self._ids: Set[str] = set()
+
+    def __len__(self) -> int:
+        return sum(len(lst) for lst in self.lists)
+
+    def add(
+        self,
+        vectors: Sequence[Sequence[float]],
+        embedding_ids: Sequence[str],
+        resource_ids: Sequence[str],
+        chunk_indices: Sequence[int],
+        retrain: bool = True,
+    ) -> None:
+        """Add chunk vectors, assigning each to its nearest inverted list.
+
+        Rows already in the index are skipped, so a chunk that a reload
+        picked up from Mongo can't be added twice. With ``retrain=False``
+        the k-means pass the add would trigger is left to the caller (see
+        ``needs_training``).
+        """
+        new = [i for i, embedding_id in enumerate(embedding_ids) if embedding_id not in self._ids]
+        if not new:
+            return
+        if len(new) < len(embedding_ids):
+            vectors = np.asarray(vectors, dtype=np.float32)[new]
+            embedding_ids = [embedding_ids[i] for i in new]
+            resource_ids = [resource_ids[i] for i in new]
+            chunk_indices = [chunk_indices[i] for i in new]
+        self._ids.update(embedding_ids)
+        matrix = _normalize(vectors)
+        if self.centroids is None:
+            self.lists[0].extend(matrix, embedding_ids, resource_ids, chunk_indices)
+        else:
+            assignment = np.argmax(matrix @ self.centroids.T, axis=1)
+            for list_id in np.unique(assignment):
+                rows = np.flatnonzero(assignment == list_id)
+                self.lists[list_id].extend(
+                    matrix[rows],
+                    [embedding_ids[i] for i in rows],
+                    [resource_ids[i] for i in rows],
+                    [chunk_indices[i] for i in rows],
+                )
+        self.dirty = True
+        if retrain and self.needs_training:
+            self.train()
+
+    @property
+    def needs_training(self) -> bool:
+        """Whether the index is big enough to partition, or has outgrown its centroids."""
+        if self.centroids is None:
+            return len(self) >= self.ivf_min_vectors
+        return len(self) >= 4 * self.trained_size
+
+    def remove_resource(self, resource_id: str) -> int:
+        """Drop every chunk belonging to a resource."""
+        removed = sum(lst.remove_resource(resource_id) for lst in self.lists)
+        if removed:
+            self._ids = {e for lst in self.lists for e in lst.embedding_ids}
+            self.dirty = True
+        return removed
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Partition all rows into sqrt(n) lists with spherical k-means."""
+        partition = self.partition(iterations, seed)
+        if partition is not None:
+            self.install(*partition)
+
+    def partition(
+        self, iterations: int = 10, seed: int = 0
+    ) -> Optional[Tuple[np.ndarray, List[_InvertedList]]]:
+        """Compute the centroids and inverted lists ``train`` would install.
+
+        Only reads the index, so it can run in a worker thread while
+        searches keep using the current lists; returns None if the index is
+        too small to partition.
+        """
+        vectors, embedding_ids, resource_ids, chunk_indices = self._all_rows()
+        n = len(embedding_ids)
+        nlist = max(1, int(np.sqrt(n)))
+        if n < self.ivf_min_vectors or nlist < 2:
+            return None
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, nlist * 64)
+        sample = vectors[rng.choice(n, size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        lists = [_InvertedList(self.dim) for _ in range(nlist)]
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for list_id in range(nlist):
+            rows = np.flatnonzero(assignment == list_id)
+            if len(rows):
+                lists[list_id].extend(
+                    vectors[rows],
+                    [embedding_ids[i] for i in rows],
+                    [resource_ids[i] for i in rows],
+                    [chunk_indices[i] for i in rows],
+                )
+        return centroids, lists
+
+    def install(self, centroids: np.ndarray, lists: List[_InvertedList]) -> None:
+        """Swap in a partition computed by :meth:`partition` from the current rows."""
+        self.centroids = centroids
+        self.lists = lists
+        self.trained_size = len(self)
+        self.dirty = True
+
+    def search(self, query: Sequence[float], k: int) -> List[VectorHit]:
+        """Return the top-k chunks by cosine similarity."""
+        if k <= 0 or len(self) == 0:
+            return []
+        q = _normalize(query)[0]
+
+        if self.centroids is None:
+            probe = [0]
+        else:
+            nprobe = min(self.nprobe, len(self.lists))
+            probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+
+        candidates: List[Tuple[float, _InvertedList, int]] = []
+        for list_id in probe:
+            lst = self.lists[list_id]
+            if not len(lst):
+                continue
+            scores = lst.vectors @ q
+            top = min(k, len(scores))
+            best = np.argpartition(-scores, top - 1)[:top]
+            candidates.extend((float(scores[i]), lst, int(i)) for i in best)
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [
+            VectorHit(
+                embedding_id=lst.embedding_ids[i],
+                resource_id=lst.resource_ids[i],
+                chunk_index=lst.chunk_indices[i],
+                score=score,
+            )
+            for score, lst, i in candidates[:k]
+        ]
+
+    def _all_rows(self):
+        vectors = np.vstack([lst.vectors for lst in self.lists if len(lst)] or [np.empty((0, self.dim), np.float32)])
+        embedding_ids = [e for lst in self.lists for e in lst.embedding_ids]
+        resource_ids = [r for lst in self.lists for r in lst.resource_ids]
+        chunk_indices = [c for lst in self.lists for c in lst.chunk_indices]
+        return vectors, embedding_ids, resource_ids, chunk_indices
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Write the index to ``path`` with rows grouped by inverted list."""
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        vectors, embedding_ids, resource_ids, chunk_indices = self._all_rows()
+        offsets = np.cumsum([0] + [len(lst) for lst in self.lists]).astype(np.int64)
+
+        np.save(os.path.join(tmp_path, "vectors.npy"), vectors)
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+        if self.centroids is not None:
+            np.save(os.path.join(tmp_path, "centroids.npy"), self.centroids)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dim": self.dim,
+                    "generation": self.generation,
+                    "embedding_ids": embedding_ids,
+                    "resource_ids": resource_ids,
+                    "chunk_indices": chunk_indices,
+                },
+                f,
+            )
+
+        with _file_lock(path, exclusive=True):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, ivf_min_vectors: int = 20000, nprobe: int = 8) -> "ProjectVectorIndex":
+        """Load an index saved by :meth:`save`, memory-mapping the vectors."""
+        with _file_lock(path, exclusive=False):
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+            offsets = np.load(os.path.join(path, "offsets.npy"))
+            centroids_path = os.path.join(path, "centroids.npy")
+            centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+
+        index = cls(meta["dim"], ivf_min_vectors=ivf_min_vectors, nprobe=nprobe)
+        index.generation = meta.get("generation")
+        index._ids = set(meta["embedding_ids"])
+        if centroids is not None:
+            index.centroids = centroids
+            index.trained_size = int(offsets[-1])
+
+        index.lists = []
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            lst = _InvertedList(index.dim)
+            lst.vectors = vectors[start:end]
+            lst.embedding_ids = meta["embedding_ids"][start:end]
+            lst.resource_ids = meta["resource_ids"][start:end]
+            lst.chunk_indices = meta["chunk_indices"][start:end]
+            index.lists.append(lst)
+        return index
+
+
+class VectorIndexRegistry:
+    """Process-wide registry of per-project vector indexes."""
+
+    def __init__(
+        self,
+        index_dir: str,
+        ivf_min_vectors: int = 20000,
+        nprobe: int = 8,
+        save_delay: float = 5.0,
+        generations: Optional[Any] = None,
+    ):
+        self.index_dir = index_dir
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.save_delay = save_delay
+        # Shared per-project generations (a RetrievalCache); None for a single process
+        self.generations = generations
+        self._indexes: Dict[str, ProjectVectorIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._save_tasks: Dict[str, asyncio.Task] = {}
+        self._builds: Dict[str, asyncio.Task] = {}
+
+    def _path(self, project_id: str) -> str:
+        return os.path.join(self.index_dir, project_id)
+
+    def _lock(self, project_id: str) -> asyncio.Lock:
+        if project_id not in self._locks:
+            self._locks[project_id] = asyncio.Lock()
+        return self._locks[project_id]
+
+    async def get(self, project_id: str) -> ProjectVectorIndex:
+        """Return the project's index, loading or building it on first use.
+
+        The build runs as its own task and callers wait on it through
+        ``asyncio.shield``, so a retrieval that gives up on its deadline does
+        not cancel a half-finished build for the next caller.
+        """
+        index = self._indexes.get(project_id)
+        if index is not None:
+            if not await self._changed_elsewhere(project_id, index):
+                return index
+            logger.info(f"Vector index for project {project_id} changed in another process, reloading")
+            if self._indexes.get(project_id) is index:
+                del self._indexes[project_id]
+        task = self._builds.get(project_id)
+        if task is None:
+            task = asyncio.create_task(self._build_and_register(project_id))
+            self._builds[project_id] = task
+        return await asyncio.shield(task)
+
+    async def _build_and_register(self, project_id: str) -> ProjectVectorIndex:
+        try:
+            async with self._lock(project_id):
+                # Read before Mongo, so a change made during the build is caught next time
+                generation = await self._generation(project_id)
+                index = await self._load_or_build(project_id, generation)
+                self._indexes[project_id] = index
+                return index
+        finally:
+            self._builds.pop(project_id, None)
+
+    async def _generation(self, project_id: str) -> Optional[int]:
+        if self.generations is None:
+            return None
+        return await self.generations.generation(project_id, "vector")
+
+    async def _changed_elsewhere(self, project_id: str, index: ProjectVectorIndex) -> bool:
+        """Whether another process changed the project since ``index`` was synced."""
+        current = await self._generation(project_id)
+        return current is not None and current != index.generation
+
+    async def _bump(self, project_id: str) -> None:
+        """Publish a local change, keeping this copy current if nothing else changed."""
+        if self.generations is None:
+            return
+        generation = await self.generations.invalidate(project_id, "vector")
+        index = self._indexes.get(project_id)
+        if (
+            index is not None
+            and generation is not None
+            and index.generation is not None
+            and generation == index.generation + 1
+        ):
+            index.generation = generation
+
+    async def _load_or_build(self, project_id: str, generation: Optional[int]) -> ProjectVectorIndex:
+        from app.repositories.resource import Resource
+        from app.repositories.resource_embedding import ResourceEmbedding
+
+        resources = await Resource.find(Resource.project_id == project_id).to_list()
+        resource_ids = [str(r.id) for r in resources]
+        # Resource chunks, plus the project's embedded documents and chats
+        query = {"$or": [{"resource_id": {"$in": resource_ids}}, {"project_id": project_id}]}
+
+        path = self._path(project_id)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            try:
+                index = await asyncio.to_thread(
+                    ProjectVectorIndex.load, path, self.ivf_min_vectors, self.nprobe
+                )
+                if generation is not None:
+                    fresh = index.generation == generation
+                else:
+                    # No shared generation to compare; fall back to the row count
+                    fresh = len(index) == await ResourceEmbedding.find(query).count()
+                if fresh:
+                    logger.info(f"Loaded vector index for project {project_id} ({len(index)} vectors)")
+                    return index
+                logger.info(f"Vector index for project {project_id} is stale, rebuilding")
+            except Exception as e:
+                logger.warning(f"Failed to load vector index for project {project_id}: {e}")
+
+        index: Optional[ProjectVectorIndex] = None
+        embedding_ids, owners, chunk_indices, vectors = [], [], [], []
+        async for emb in ResourceEmbedding.find(query):
+            embedding_ids.append(str(emb.id))
+            owners.append(emb.resource_id)
+            chunk_indices.append(emb.chunk_index)
+            vectors.append(emb.get_vector())
+        if vectors:
+            index = ProjectVectorIndex(len(vectors[0]), self.ivf_min_vectors, self.nprobe)
+            # Not registered yet, so the whole build (k-means included) can leave the loop
+            await asyncio.to_thread(index.add, vectors, embedding_ids, owners, chunk_indices)
+            logger.info(f"Built vector index for project {project_id} ({len(index)} vectors)")
+        if index is None:
+            index = ProjectVectorIndex(0, self.ivf_min_vectors, self.nprobe)
+        index.generation = generation
+        await self._save(project_id, index)
+        return index
+
+    async def add_chunks(
+        self,
+        project_id: str,
+        resource_ids: Sequence[str],
+        embedding_ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        chunk_indices: Sequence[int],
+    ) -> None:
+        """Incrementally add freshly inserted chunks (of one or more owners) to a project index."""
+        if not embedding_ids:
+            return
+        index = await self.get(project_id)
+        async with self._lock(project_id):
+            index = self._indexes.get(project_id, index)
+            if len(index) == 0 and index.dim != len(vectors[0]):
+                generation = index.generation
+                index = ProjectVectorIndex(len(vectors[0]), self.ivf_min_vectors, self.nprobe)
+                index.generation = generation
+                self._indexes[project_id] = index
+            index.add(vectors, list(embedding_ids), list(resource_ids), list(chunk_indices), retrain=False)
+            if index.needs_training:
+                # k-means over the whole project takes seconds; run it off the
+                # loop and swap the lists in while the lock keeps writers out
+                partition = await asyncio.to_thread(index.partition)
+                if partition is not None:
+                    index.install(*partition)
+        await self._bump(project_id)
+        self._schedule_save(project_id)
+
+    async def remove_resource(self, project_id: str, resource_id: str) -> int:
+        """Drop a resource's chunks (already deleted from Mongo) from a project index."""
+        index = await self.get(project_id)
+        async with self._lock(project_id):
+            removed = self._indexes.get(project_id, index).remove_resource(resource_id)
+        # Other processes may still hold the chunks even if this copy didn't
+        await self._bump(project_id)
+        if removed:
+            self._schedule_save(project_id)
+        return removed
+
+    async def search(self, project_id: str, query_vector: Sequence[float], k: int) -> List[VectorHit]:
+        """Top-k cosine search within one project."""
+        index = await self.get(project_id)
+        if len(index) == 0:
+            return []
+        return index.search(query_vector, k)
+
+    async def _save(self, project_id: str, index: ProjectVectorIndex) -> None:
+        """Save an index to disk off the event loop (caller holds the lock)."""
+        try:
+            await asyncio.to_thread(index.save, self._path(project_id))
+        except Exception as e:
+            logger.error(f"Failed to persist vector index for project {project_id}: {e}")
+
+    def _schedule_save(self, project_id: str) -> None:
+        """Coalesce bursts of updates (e.g. paged inserts) into one write."""
+        if project_id in self._save_tasks:
+            return
+
+        async def delayed_save():
+            try:
+                await asyncio.sleep(self.save_delay)
+            finally:
+                self._save_tasks.pop(project_id, None)
+            index = self._indexes.get(project_id)
+            if index is not None and index.dirty:
+                async with self._lock(project_id):
+                    await self._save(project_id, index)
+
+        self._save_tasks[project_id] = asyncio.create_task(delayed_save())
+
+    async def flush(self) -> None:
+        """Write every dirty index to disk (called on shutdown)."""
+        for task in list(self._save_tasks.values()):
+            task.cancel()
+        self._save_tasks.clear()
+        for project_id, index in list(self._indexes.items()):
+            if index.dirty:
+                async with self._lock(project_id):
+                    await self._save(project_id, index)
+
+    def drop(self, project_id: str) -> None:
+        """Forget a project's in-memory index (it is rebuilt on next use)."""
+        self._indexes.pop(project_id, None)
+
+    async def warm_start(self) -> None:
+        """Load every persisted project index so the first query is fast."""
+        if not os.path.isdir(self.index_dir):
+            return
+        for project_id in os.listdir(self.index_dir):
+            if ".tmp" in project_id or not os.path.isdir(self._path(project_id)):
+                continue
+            try:
+                await self.get(project_id)
+            except Exception as e:
+                logger.warning(f"Failed to warm vector index for project {project_id}: {e}")
+
+
+vector_index_registry = VectorIndexRegistry(
+    settings.RAG_INDEX_DIR,
+    ivf_min_vectors=settings.RAG_IVF_MIN_VECTORS,
+    nprobe=settings.RAG_IVF_NPROBE,
+    generations=retrieval_cache,
+)
@@ -1,6 +1,10 @@
 """RAG (Retrieval-Augmented Generation) service."""
 
-from typing import List, Optional
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 from motor.motor_asyncio import AsyncIOMotorClient
 
@@ -8,13 +12,31 @@ from app.core.config import settings
 
 
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from app.core.config import settings
 
 from app.repositories.resource_embedding import ResourceEmbedding
 from app.repositories.chat_log import ChatLog
 from app.repositories.document import Document
 from app.repositories.resource import Resource
+from app.core.monitoring import monitor
+from app.services.rag.chunking import Chunk, TextSegment, TokenCounter, chunk_stream, token_counter_for
+from app.services.rag.embedding_backends import embedding_model_id, load_embedding_model
+from app.services.rag.embedding_cache import EmbeddingCache, MongoEmbeddingStore
+from app.services.rag.embedding_engine import EmbeddingEngine
+from app.services.rag.extraction import text_extractor
+from app.services.rag.fusion import reciprocal_rank_fusion
+from app.services.rag.incremental import incremental_indexer, parse_source_key
+from app.services.rag.lexical_index import lexical_index_registry
+from app.services.rag.manifest import manifest_store
+from app.services.rag.result_cache import (
+    CONTEXT_CACHE,
+    SOURCES as RESULT_SOURCES,
+    STRATEGY_CACHE,
+    retrieval_cache,
+)
+from app.services.rag.vector_index import vector_index_registry
+
+logger = logging.getLogger(__name__)
 
 class RAGService:
     """Service for RAG retrieval and generation."""
@@ -23,57 +45,250 @@ class RAGService:
     VECTOR_WEIGHT = 0.4
     SLIDING_WINDOW_WEIGHT = 0.3
     REALTIME_WEIGHT = 0.3
+
+    # Retrieval strategy -> source whose changes invalidate its cached results
+    STRATEGY_SOURCES = {"vector": "vector", "sliding_window": "document", "realtime": "chat"}
+
+    # BM25 score that maps to 0.5 after squashing (roughly one strong term match)
+    BM25_SCORE_PIVOT = 5.0
     
     _embedding_model = None
+    _model_lock = threading.Lock()
+    _embedding_engine = None
+    _embedding_cache = None
+    _token_counter = None
 
     @classmethod
     def get_embedding_model(cls):
-        """Lazy load the embedding model."""
+        """Lazy load the embedding model on the configured backend."""
         if cls._embedding_model is None:
-            # Set HF_HOME to a writable directory within the container
-            import os
-            os.environ["HF_HOME"] = "/app/data/hf_cache"
-            
-            # Use a lightweight, high-performance open source model
-            cls._embedding_model = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2"
-            )
+            # The lifespan warmup and an early request may both get here
+            with cls._model_lock:
+                if cls._embedding_model is None:
+                    # Set HF_HOME to a writable directory within the container
+                    import os
+                    os.environ["HF_HOME"] = "/app/data/hf_cache"
+
+                    # Use a lightweight, high-performance open source model
+                    start = time.perf_counter()
+                    cls._embedding_model = load_embedding_model(
+                        settings.RAG_EMBEDDING_BACKEND,
+                        settings.RAG_EMBEDDING_MODEL,
+                        batch_size=settings.RAG_EMBED_BATCH_SIZE,
+                        onnx_dir=settings.RAG_EMBEDDING_ONNX_DIR,
+                    )
+                    logger.info(
+                        f"Loaded embedding model {settings.RAG_EMBEDDING_MODEL} "
+                        f"({settings.RAG_EMBEDDING_BACKEND}) in {time.perf_counter() - start:.1f}s"
+                    )
         return cls._embedding_model
 
+    @staticmethod
+    def embedding_model_id() -> str:
+        """Identity of the stored vectors: the model and, if not the reference, its backend."""
+        return embedding_model_id(settings.RAG_EMBEDDING_MODEL, settings.RAG_EMBEDDING_BACKEND)
+
+    @classmethod
+    async def warm_up(cls) -> None:
+        """Load the model and run one forward pass so the first chat doesn't pay for it."""
+        start = time.perf_counter()
+        try:
+            await cls.get_embedding_engine().embed_query("warm up")
+            await cls.get_token_counter()
+        except Exception as e:
+            logger.error(f"Embedding model warmup failed: {e}")
+            return
+        logger.info(f"Embedding model warm in {time.perf_counter() - start:.1f}s")
+
+    @classmethod
+    def get_embedding_engine(cls) -> EmbeddingEngine:
+        """Lazy create the batched embedding engine."""
+        if cls._embedding_engine is None:
+            cls._embedding_engine = EmbeddingEngine(
+                cls.get_embedding_model,
+                batch_size=settings.RAG_EMBED_BATCH_SIZE,
+                max_workers=settings.RAG_EMBED_WORKERS,
+            )
+        return cls._embedding_engine
+
+    @classmethod
+    def get_embedding_cache(cls) -> EmbeddingCache:
+        """Lazy create the content-hash embedding cache."""
+        if cls._embedding_cache is None:
+            cls._embedding_cache = EmbeddingCache(
+                cls.embedding_model_id(),
+                store=MongoEmbeddingStore(),
+                max_entries=settings.RAG_EMBEDDING_CACHE_SIZE,
+            )
+        return cls._embedding_cache
+
     @staticmethod
     async def generate_embedding(text: str) -> List[float]:
         """Generate embedding for text using HuggingFace."""
-        model = RAGService.get_embedding_model()
-        # Use async embedding generation
-        return await model.aembed_query(text)
+        # Runs on the embedding pool so the forward pass never blocks the event loop
+        engine = RAGService.get_embedding_engine()
+        return await RAGService.get_embedding_cache().embed_query(text, engine.embed_query)
 
     @staticmethod
-    async def process_resource(resource_id: str, content: str, chunk_size: int = 1000, overlap: int = 100):
-        """Process a resource text into chunks and save embeddings."""
-        chunks = []
-        for i in range(0, len(content), chunk_size - overlap):
-            chunk = content[i : i + chunk_size]
-            if len(chunk) < 50:  # Skip very small final chunks
-                continue
-            chunks.append(chunk)
+    async def generate_embeddings(texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for many chunks, reusing cached vectors."""
+        engine = RAGService.get_embedding_engine()
+        return await RAGService.get_embedding_cache().embed_documents(texts, engine.embed_documents)
 
-        # Generate embeddings batch
-        # Note: HuggingFaceEmbeddings.embed_documents is synchronous by default but fast enough for local.
-        # For true async batching we could use run_in_executor, or just loop for now.
-        
+    @classmethod
+    async def get_token_counter(cls) -> TokenCounter:
+        """Lazy create a token counter backed by the embedding model's tokenizer."""
+        if cls._token_counter is None:
+            model = await asyncio.to_thread(cls.get_embedding_model)
+            cls._token_counter = token_counter_for(model)
+        return cls._token_counter
+
+    @staticmethod
+    async def process_resource(
+        resource_id: str,
+        content: Union[str, AsyncIterable[Union[str, TextSegment]]],
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> int:
+        """Chunk, embed and store a resource's text.
+
+        ``content`` may be the full text or an async stream of text segments;
+        streamed text is chunked as it arrives, and chunks are embedded and
+        inserted page by page so memory stays bounded and earlier pages become
+        searchable while the rest of a large file is still being read.
+
+        ``on_progress`` is awaited with the number of chunks stored so far
+        before each page is stored, after it is embedded; it may raise to
+        stop before the insert.
+
+        Returns:
+            Number of chunks stored
+        """
+        resource = await Resource.get(resource_id)
+        page_size = settings.RAG_INSERT_PAGE_SIZE
+        chunks = chunk_stream(
+            content,
+            await RAGService.get_token_counter(),
+            max_tokens=max_tokens or settings.RAG_CHUNK_TOKENS,
+            overlap_tokens=settings.RAG_CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens,
+            min_tokens=settings.RAG_CHUNK_MIN_TOKENS,
+        )
+
+        page: List[Chunk] = []
+        stored = 0
+        async for chunk in chunks:
+            page.append(chunk)
+            if len(page) >= page_size:
+                await RAGService._index_page(resource, resource_id, stored, page, on_progress)
+                stored += len(page)
+                page = []
+        if page:
+            await RAGService._index_page(resource, resource_id, stored, page, on_progress)
+            stored += len(page)
+        return stored
+
+    @staticmethod
+    async def chunk_text(text: str) -> List[Chunk]:
+        """Chunk a short in-memory text (a document) with the default sizes."""
+        chunks = chunk_stream(
+            text,
+            await RAGService.get_token_counter(),
+            max_tokens=settings.RAG_CHUNK_TOKENS,
+            overlap_tokens=settings.RAG_CHUNK_OVERLAP_TOKENS,
+            min_tokens=settings.RAG_CHUNK_MIN_TOKENS,
+        )
+        return [chunk async for chunk in chunks]
+
+    @staticmethod
+    async def index_resource(
+        resource_id: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> int:
+        """(Re-)index a stored resource, streaming its text from object storage.
+
+        Raises:
+            ValueError: If the resource is missing or its text can't be extracted
+        """
+        resource = await Resource.get(resource_id)
+        if not resource:
+            raise ValueError(f"Resource not found: {resource_id}")
+
+        await RAGService.remove_resource(resource_id, resource.project_id)
+        try:
+            chunk_count = await RAGService.process_resource(
+                resource_id,
+                text_extractor.stream_segments(resource.file_key, resource.mime_type),
+                max_tokens,
+                overlap_tokens,
+                on_progress=on_progress,
+            )
+        except Exception:
+            # Drop pages indexed before the failure
+            await RAGService.remove_resource(resource_id, resource.project_id)
+            raise
+
+        if chunk_count == 0:
+            logger.info(f"Insufficient text content in {resource.filename}")
+        return chunk_count
+
+    @staticmethod
+    async def _index_page(
+        resource: Optional[Resource],
+        resource_id: str,
+        start: int,
+        page: List[Chunk],
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> None:
+        vectors = await RAGService.generate_embeddings([chunk.text for chunk in page])
+        if on_progress:
+            await on_progress(start)
         embeddings_docs = []
-        for index, chunk in enumerate(chunks):
-            vector = await RAGService.generate_embedding(chunk)
+        for offset, (chunk, vector) in enumerate(zip(page, vectors)):
             doc = ResourceEmbedding(
                 resource_id=resource_id,
-                chunk_index=index,
-                content=chunk,
-                vector=vector
+                chunk_index=start + offset,
+                content=chunk.text,
+                metadata=chunk.metadata,
             )
+            doc.set_vector(vector, settings.RAG_VECTOR_STORAGE)
             embeddings_docs.append(doc)
-            
-        if embeddings_docs:
-            await ResourceEmbedding.insert_many(embeddings_docs)
+        result = await ResourceEmbedding.insert_many(embeddings_docs)
+        await manifest_store.record_page(
+            resource, resource_id, embeddings_docs, RAGService.embedding_model_id()
+        )
+
+        # Keep the project's in-memory vector index in step with Mongo
+        if resource:
+            await vector_index_registry.add_chunks(
+                resource.project_id,
+                [resource_id] * len(embeddings_docs),
+                [str(i) for i in result.inserted_ids],
+                vectors,
+                [d.chunk_index for d in embeddings_docs],
+            )
+
+    @staticmethod
+    async def remove_resource(resource_id: str, project_id: Optional[str] = None) -> int:
+        """Delete a resource's embeddings and drop them from the vector index."""
+        # Manifest first, so it never lists chunks that are already gone
+        await manifest_store.remove(resource_id)
+        delete_result = await ResourceEmbedding.find(
+            ResourceEmbedding.resource_id == resource_id
+        ).delete()
+        deleted = delete_result.deleted_count if delete_result else 0
+        if not deleted:
+            return 0
+
+        if project_id is None:
+            resource = await Resource.get(resource_id)
+            project_id = resource.project_id if resource else None
+        if project_id:
+            await vector_index_registry.remove_resource(project_id, resource_id)
+
+        return deleted
             
     @staticmethod
     async def retrieve_context(
@@ -81,132 +296,235 @@ class RAGService:
         query: str,
         max_results: int = 5,
     ) -> dict:
-        """Retrieve context using hybrid retrieval strategy."""
-        
-        # Calculate limits for each strategy
-        vector_limit = max(1, int(max_results * RAGService.VECTOR_WEIGHT))
-        sliding_limit = max(1, int(max_results * RAGService.SLIDING_WINDOW_WEIGHT))
-        realtime_limit = max(1, int(max_results * RAGService.REALTIME_WEIGHT))
-
-        # Run strategies concurrently (simulated with await sequential)
-        # 1. Vector Search
-        vector_results = await RAGService._vector_retrieve(project_id, query, vector_limit)
-        
-        # 2. Sliding Window (Recent Documents)
-        sliding_results = await RAGService._sliding_window_retrieve(project_id, query, sliding_limit)
-        
-        # 3. Realtime (Chat Logs)
-        realtime_results = await RAGService._realtime_retrieve(project_id, query, realtime_limit)
-        
-        # Merge and deduplicate
-        all_results = vector_results + sliding_results + realtime_results
-        
-        unique_results = []
-        seen_ids = set()
-        
-        for res in all_results:
-            # Create a unique key for deduplication
-            key = f"{res['type']}:{res['id']}"
-            if key not in seen_ids:
-                unique_results.append(res)
-                seen_ids.add(key)
-        
-        final_results = unique_results[:max_results]
+        """Retrieve context using hybrid retrieval strategy.
+
+        Fused results and each strategy's candidates are cached per project
+        and normalized query, and invalidated by the source they came from
+        (see ``result_cache``), so a repeated question skips the embedding
+        forward pass and the searches entirely.
+        """
+        weights = {
+            "vector": RAGService.VECTOR_WEIGHT,
+            "sliding_window": RAGService.SLIDING_WINDOW_WEIGHT,
+            "realtime": RAGService.REALTIME_WEIGHT,
+        }
+        keys = await RAGService._cache_keys(project_id, query, max_results, weights)
+        cached = await RAGService._cache_get(keys)
+        if cached.get("context") is not None:
+            await retrieval_cache.track(CONTEXT_CACHE, True)
+            return {**cached["context"], "cached": True}
+        if keys:
+            await retrieval_cache.track(CONTEXT_CACHE, False)
+
+        timeout = settings.RAG_STRATEGY_TIMEOUT
+        strategies = {
+            "vector": RAGService._vector_retrieve,
+            "sliding_window": RAGService._sliding_window_retrieve,
+            "realtime": RAGService._realtime_retrieve,
+        }
+
+        async def run(name: str, retrieve) -> Tuple[List[dict], float, bool]:
+            if cached.get(name) is not None:
+                await retrieval_cache.track(STRATEGY_CACHE, True)
+                return cached[name], 0.0, True
+            if keys:
+                await retrieval_cache.track(STRATEGY_CACHE, False)
+            # Each strategy proposes max_results candidates; fusion picks the final set
+            return await RAGService._timed(name, retrieve(project_id, query, max_results), timeout)
+
+        outcomes = dict(zip(
+            strategies,
+            await asyncio.gather(*(run(name, retrieve) for name, retrieve in strategies.items())),
+        ))
+        ranked = {name: results for name, (results, _, _) in outcomes.items()}
+        timings = {name: elapsed for name, (_, elapsed, _) in outcomes.items()}
+
+        final_results = reciprocal_rank_fusion(ranked, weights)[:max_results]
         
-        return {
+        result = {
             "content": "\n\n".join([f"[{r['type'].upper()}]: {r['content']}" for r in final_results]),
             "citations": [
                 {
                     "resource_id": r["id"], 
                     "resource_type": r["type"],
-                    "score": r.get("score", 0)
+                    "score": r.get("score", 0),
+                    "fused_score": r["fused_score"],
                 }
                 for r in final_results
             ],
+            "timings": timings,
         }
 
+        if keys:
+            # Never cache a degraded answer from a timed-out or failed strategy
+            fresh = {
+                name: results
+                for name, (results, _, ok) in outcomes.items()
+                if ok and cached.get(name) is None
+            }
+            if all(ok for _, _, ok in outcomes.values()):
+                fresh["context"] = result
+            await RAGService._cache_put(keys, fresh)
+
+        return result
+
     @staticmethod
-    async def _vector_retrieve(project_id: str, query: str, limit: int) -> List[dict]:
-        """Vector retrieval using generated embeddings."""
+    async def _cache_keys(
+        project_id: str, query: str, max_results: int, weights: Dict[str, float]
+    ) -> Dict[str, str]:
+        """Result-cache keys for the fused context and each strategy."""
+        if not retrieval_cache.enabled:
+            return {}
         try:
-            query_vector = await RAGService.generate_embedding(query)
-            
-            # Note: This is a simplistic in-memory vector search for demonstration.
-            # In production, use MongoDB Atlas Vector Search ($vectorSearch stage).
-            # We first filter candidates by project indirectly (via resources)
-            
-            # Step 1: Get resource IDs for this project
-            resources = await Resource.find(Resource.project_id == project_id).to_list()
-            resource_ids = [str(r.id) for r in resources]
-            
-            if not resource_ids:
-                return []
-                
-            # Step 2: Since we can't easily do cosine sim in standard Mongo query without Atlas Search index,
-            # we might need to rely on a different approach or fetch candidates.
-            # HERE WE ARE MOCKING THE ATLAS SEARCH BEHAVIOR for now.
-            # Real implementation would look like:
-            # pipeline = [
-            #     {
-            #       '$vectorSearch': {
-            #         'index': 'vector_index',
-            #         'path': 'vector',
-            #         'queryVector': query_vector,
-            #         'numCandidates': 100,
-            #         'limit': limit,
-            #         'filter': { 'resource_id': { '$in': resource_ids } }
-            #       }
-            #     }
-            # ]
-            # results = await ResourceEmbedding.aggregate(pipeline).to_list()
-
-            # Fallback: Text Search if Vector Search not available
-            # We return empty for now to push for Atlas configuration
-            return []
-            
+            generations = await retrieval_cache.generations(project_id)
         except Exception as e:
-            print(f"Vector retrieval error: {e}")
-            return []
+            logger.warning(f"RAG result cache unavailable: {e}")
+            return {}
+
+        keys = {
+            "context": retrieval_cache.key(
+                project_id, "context", [generations[s] for s in RESULT_SOURCES],
+                query, weights=weights, k=max_results,
+            )
+        }
+        for strategy, source in RAGService.STRATEGY_SOURCES.items():
+            keys[strategy] = retrieval_cache.key(
+                project_id, strategy, [generations[source]], query, k=max_results
+            )
+        return keys
 
     @staticmethod
-    async def _sliding_window_retrieve(project_id: str, query: str, limit: int) -> List[dict]:
-        """Retrieve recent document content."""
+    async def _cache_get(keys: Dict[str, str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            values = await retrieval_cache.get_many(list(keys.values()))
+        except Exception as e:
+            logger.warning(f"RAG result cache lookup failed: {e}")
+            return {}
+        return dict(zip(keys, values))
+
+    @staticmethod
+    async def _cache_put(keys: Dict[str, str], values: Dict[str, Any]) -> None:
+        try:
+            for name, value in values.items():
+                await retrieval_cache.set(keys[name], value)
+        except Exception as e:
+            logger.warning(f"RAG result cache write failed: {e}")
+
+    @staticmethod
+    async def _timed(strategy: str, coro, timeout: float) -> Tuple[List[dict], float, bool]:
+        """Run one strategy with a deadline, recording its latency."""
+        start = time.perf_counter()
+        status = "success"
+        try:
+            results = await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"RAG {strategy} retrieval timed out after {timeout}s")
+            results, status = [], "timeout"
+        except Exception as e:
+            logger.error(f"RAG {strategy} retrieval error: {e}")
+            results, status = [], "error"
+        elapsed = time.perf_counter() - start
+        await monitor.track_rag_strategy(strategy, elapsed, status)
+        return results, elapsed, status == "success"
+
+    @staticmethod
+    async def _vector_retrieve(project_id: str, query: str, limit: int) -> List[dict]:
+        """Vector retrieval against the project's in-process ANN index."""
+        query_vector = await RAGService.generate_embedding(query)
+
+        hits = await vector_index_registry.search(project_id, query_vector, limit)
+        if not hits:
+            return []
+
+        content_by_id = await RAGService._chunk_contents([h.embedding_id for h in hits])
+
         results = []
-        # Find documents updated recently
-        docs = await Document.find(
-            Document.project_id == project_id
-        ).sort("-updated_at").limit(limit).to_list()
-        
-        for doc in docs:
-            # Simple keyword matching within preview text
-            if doc.preview_text and query.lower() in doc.preview_text.lower():
+        seen = set()
+        for hit in hits:
+            if hit.embedding_id not in content_by_id:
+                continue
+            source_type, source_id = parse_source_key(hit.resource_id)
+            if source_type == "resource":
+                results.append({
+                    "id": source_id,
+                    "type": "resource",
+                    "content": content_by_id[hit.embedding_id],
+                    "score": hit.score,
+                    "chunk_index": hit.chunk_index,
+                })
+            elif (source_type, source_id) not in seen:
+                # Best chunk per document or chat, keyed like the lexical
+                # strategies' results so fusion merges the two
+                seen.add((source_type, source_id))
                 results.append({
-                    "id": str(doc.id),
-                    "type": "document",
-                    "content": doc.preview_text[:500],
-                    "score": 0.85 # High score for keyword match in docs
+                    "id": source_id,
+                    "type": source_type,
+                    "content": content_by_id[hit.embedding_id],
+                    "score": hit.score,
                 })
         return results
 
+    @staticmethod
+    async def _chunk_contents(embedding_ids: List[str]) -> Dict[str, str]:
+        """Text of the given chunks; the vector index only holds vectors."""
+        from bson import ObjectId
+        chunks = await ResourceEmbedding.find(
+            {"_id": {"$in": [ObjectId(i) for i in embedding_ids]}}
+        ).to_list()
+        return {str(c.id): c.content for c in chunks}
+
+    @staticmethod
+    async def _sliding_window_retrieve(project_id: str, query: str, limit: int) -> List[dict]:
+        """Retrieve document content with BM25 over the project's full history."""
+        hits = await lexical_index_registry.search(project_id, "document", query, limit)
+        return [
+            {
+                "id": hit.doc_id,
+                "type": "document",
+                "content": hit.snippet,
+                "score": RAGService._squash_bm25(hit.score),
+            }
+            for hit in hits
+        ]
+
     @staticmethod
     async def _realtime_retrieve(project_id: str, query: str, limit: int) -> List[dict]:
-        """Retrieve recent chat context."""
-        results = []
-        chats = await ChatLog.find(
-            ChatLog.project_id == project_id
-        ).sort("-created_at").limit(limit * 2).to_list()
-        
-        for chat in chats:
-            if query.lower() in chat.content.lower():
-                results.append({
-                    "id": str(chat.id),
-                    "type": "chat",
-                    "content": f"{chat.user_id}: {chat.content}",
-                    "score": 0.75 # Good score for chat match
-                })
-                if len(results) >= limit:
-                    break
-        return results
+        """Retrieve chat context with BM25 over the project's full history."""
+        hits = await lexical_index_registry.search(project_id, "chat", query, limit)
+        return [
+            {
+                "id": hit.doc_id,
+                "type": "chat",
+                "content": hit.snippet,
+                "score": RAGService._squash_bm25(hit.score),
+            }
+            for hit in hits
+        ]
+
+    @staticmethod
+    def _squash_bm25(score: float) -> float:
+        """Map an unbounded BM25 score into 0..1 so it is comparable to cosine."""
+        return score / (score + RAGService.BM25_SCORE_PIVOT)
+
+    @staticmethod
+    async def on_chat_message(chat: ChatLog) -> None:
+        """Keep retrieval indexes current after a chat message is inserted."""
+        await lexical_index_registry.add_chat(chat)
+        incremental_indexer.add_chat(chat)
+
+    @staticmethod
+    async def on_document_saved(document: Document) -> None:
+        """Keep retrieval indexes current after a document is created or updated."""
+        await lexical_index_registry.upsert_document(document)
+        incremental_indexer.document_changed(document)
+
+    @staticmethod
+    async def on_document_deleted(project_id: str, document_id: str) -> None:
+        """Drop a deleted document from retrieval indexes."""
+        await lexical_index_registry.remove_document(project_id, document_id)
+        await incremental_indexer.document_deleted(project_id, document_id)
 
 rag_service = RAGService()
 
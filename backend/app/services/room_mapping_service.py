@@ -10,6 +10,7 @@ from typing import Dict, List, Optional
 from app.repositories.project import Project
 from app.repositories.document import Document
 from app.repositories.user import User
+from app.services.cache_service import cache_service
 
 logger = logging.getLogger(__name__)
 
@@ -97,9 +98,49 @@ def parse_room_id(room_id: str) -> Dict[str, Optional[str]]:
         }
 
 
+async def _cached(getter, *args):
+    """Read from the cache, treating an unavailable cache as a miss."""
+    try:
+        return await getter(*args)
+    except Exception as e:
+        logger.debug(f"Access cache read failed: {e}")
+        return None
+
+
+async def _cache(setter, *args) -> None:
+    try:
+        await setter(*args)
+    except Exception as e:
+        logger.debug(f"Access cache write failed: {e}")
+
+
+async def _resolve_project_id(parsed: Dict[str, Optional[str]]) -> Optional[str]:
+    """Project a room belongs to; document rooms are resolved through the document."""
+    if parsed["type"] != "yjs_document":
+        return parsed["project_id"]
+
+    document_id = parsed["resource_id"]
+    if not document_id:
+        return None
+    project_id = await _cached(cache_service.get_cached_document_project, document_id)
+    if project_id:
+        return project_id
+
+    document = await Document.get(document_id)
+    if not document:
+        logger.warning(f"Document not found: {document_id}")
+        return None
+    await _cache(cache_service.set_cached_document_project, document_id, document.project_id)
+    return document.project_id
+
+
 async def validate_room_access(room_id: str, user_id: str) -> bool:
     """Validate if a user has access to a room.
 
+    Decisions are cached per (user, room) for ``CacheService.ROOM_ACCESS_TTL``
+    seconds so reconnect storms don't turn into a burst of Mongo reads;
+    membership changes invalidate them.
+
     Args:
         room_id: The room ID to validate
         user_id: The user ID to check
@@ -114,6 +155,15 @@ async def validate_room_access(room_id: str, user_id: str) -> bool:
             logger.warning(f"Unknown room type for room_id: {room_id}")
             return False
 
+        project_id = await _resolve_project_id(parsed)
+        if not project_id:
+            logger.warning(f"No project_id found for room: {room_id}")
+            return False
+
+        cached = await _cached(cache_service.get_cached_room_access, user_id, project_id, room_id)
+        if cached is not None:
+            return cached
+
         # Get user
         user = await User.get(user_id)
         if not user:
@@ -123,15 +173,9 @@ async def validate_room_access(room_id: str, user_id: str) -> bool:
         # Admin and teacher have access to all rooms
         if user.role in ["admin", "teacher"]:
             logger.debug(f"Admin/Teacher access granted for user {user_id} to room {room_id}")
-            return True
-
-        # For Socket.IO and Y.js whiteboard rooms, check project membership
-        if parsed["type"] in ["socketio", "yjs_whiteboard", "yjs_inquiry"]:
-            project_id = parsed["project_id"]
-            if not project_id:
-                logger.warning(f"No project_id found for room: {room_id}")
-                return False
-
+            has_access = True
+        else:
+            # Project, whiteboard, inquiry and document rooms all need project membership
             project = await Project.get(project_id)
             if not project:
                 logger.warning(f"Project not found: {project_id}")
@@ -140,40 +184,12 @@ async def validate_room_access(room_id: str, user_id: str) -> bool:
             from app.core.permissions import check_project_member_permission
             has_access = await check_project_member_permission(user, project)
             if has_access:
-                logger.debug(f"Access granted for user {user_id} to project room {room_id}")
+                logger.debug(f"Access granted for user {user_id} to room {room_id} (project {project_id})")
             else:
-                logger.warning(f"Access denied for user {user_id} to project room {room_id}")
-            return has_access
-
-        # For Y.js document rooms, check document access
-        elif parsed["type"] == "yjs_document":
-            document_id = parsed["resource_id"]
-            if not document_id:
-                logger.warning(f"No document_id found for room: {room_id}")
-                return False
+                logger.warning(f"Access denied for user {user_id} to room {room_id}")
 
-            # Check document access
-            document = await Document.get(document_id)
-            if not document:
-                logger.warning(f"Document not found: {document_id}")
-                return False
-
-            # Check project access
-            project = await Project.get(document.project_id)
-            if not project:
-                logger.warning(f"Project not found for document: {document.project_id}")
-                return False
-
-            from app.core.permissions import check_project_member_permission
-            has_access = await check_project_member_permission(user, project)
-            if has_access:
-                logger.debug(f"Access granted for user {user_id} to document {document_id} (project {document.project_id})")
-            else:
-                logger.warning(f"Access denied for user {user_id} to document {document_id}")
-            return has_access
-
-        logger.warning(f"Unhandled room type: {parsed['type']}")
-        return False
+        await _cache(cache_service.set_cached_room_access, user_id, project_id, room_id, has_access)
+        return has_access
 
     except Exception as e:
         logger.error(f"Error validating room access for user {user_id} to room {room_id}: {str(e)}")
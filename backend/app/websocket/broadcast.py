@@ -0,0 +1,105 @@
+"""Batched broadcast of collaboration operations.
+
+While several people draw or type, every pointer move is an operation, and
+emitting each one separately floods every client in the room with tiny
+frames. Operations are buffered per room for ``window`` seconds (or until
+``max_ops`` are waiting) and then sent as one ``batch-operations`` frame per
+sender, which the client's SyncService already unpacks. A lone operation
+still goes out as a plain ``operation`` event.
+
+Batches are per sender so each can skip its own sender, and one drain task
+per room sends them in arrival order, so a sender's operations stay ordered.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.monitoring import monitor
+
+logger = logging.getLogger(__name__)
+
+
+class _RoomBuffer:
+    """Operations waiting to be broadcast to one room."""
+
+    def __init__(self, sio: Any):
+        self.sio = sio
+        self.pending: Dict[str, List[dict]] = {}  # sender sid -> ops, in arrival order
+        self.count = 0
+        self.full = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class BroadcastCoalescer:
+    """Per-room outbound operation batching."""
+
+    def __init__(self, window: float = 0.025, max_ops: int = 64):
+        self.window = window
+        self.max_ops = max_ops
+        self._rooms: Dict[str, _RoomBuffer] = {}
+
+        self.stats = {
+            "ops": 0,
+            "frames": 0,
+            "frames_saved": 0,
+        }
+
+    async def add(self, sio: Any, room_id: str, sid: str, op: dict) -> None:
+        """Queue an operation from ``sid`` for everyone else in the room."""
+        if self.window <= 0:
+            await self._emit(sio, room_id, sid, [op])
+            return
+        buffer = self._rooms.get(room_id)
+        if buffer is None:
+            buffer = self._rooms[room_id] = _RoomBuffer(sio)
+        buffer.pending.setdefault(sid, []).append(op)
+        buffer.count += 1
+        if buffer.count >= self.max_ops:
+            buffer.full.set()
+        if buffer.task is None:
+            buffer.task = asyncio.create_task(self._drain(room_id, buffer))
+
+    async def _drain(self, room_id: str, buffer: _RoomBuffer) -> None:
+        try:
+            while buffer.count:
+                try:
+                    await asyncio.wait_for(buffer.full.wait(), timeout=self.window)
+                except asyncio.TimeoutError:
+                    pass
+                pending, buffer.pending, buffer.count = buffer.pending, {}, 0
+                buffer.full.clear()
+                for sender, ops in pending.items():
+                    await self._emit(buffer.sio, room_id, sender, ops)
+        finally:
+            buffer.task = None
+            if not buffer.count and self._rooms.get(room_id) is buffer:
+                del self._rooms[room_id]
+
+    async def _emit(self, sio: Any, room_id: str, sender: str, ops: List[dict]) -> None:
+        try:
+            if len(ops) == 1:
+                await sio.emit("operation", ops[0], room=room_id, skip_sid=sender)
+            else:
+                await sio.emit("batch-operations", {"operations": ops}, room=room_id, skip_sid=sender)
+        except Exception as e:
+            logger.error(f"Failed to broadcast {len(ops)} operations to {room_id}: {e}")
+            return
+        self.stats["ops"] += len(ops)
+        self.stats["frames"] += 1
+        self.stats["frames_saved"] += len(ops) - 1
+        await monitor.track_broadcast_batch(len(ops))
+
+    async def stop(self) -> None:
+        """Send everything still buffered (called on shutdown)."""
+        tasks = [buffer.task for buffer in self._rooms.values() if buffer.task]
+        for buffer in self._rooms.values():
+            buffer.full.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+coalescer = BroadcastCoalescer(
+    window=settings.COLLAB_BROADCAST_WINDOW_MS / 1000,
+    max_ops=settings.COLLAB_BROADCAST_MAX_OPS,
+)
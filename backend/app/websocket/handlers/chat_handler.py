@@ -13,6 +13,7 @@ async def _process_ai_reply(sio, room_id, project_id, user_content, session_id):
         from app.services.agents.agent_service import agent_service
         from app.repositories.chat_log import ChatLog
         from app.services.activity_service import activity_service
+        from app.services.rag_service import rag_service
         
         # Emit typing event
         await sio.emit('typing', {
@@ -53,6 +54,7 @@ async def _process_ai_reply(sio, room_id, project_id, user_content, session_id):
             mentions=[]
         )
         await chat_log.insert()
+        await rag_service.on_chat_message(chat_log)
         
         # Log activity
         await activity_service.log_activity(
@@ -136,6 +138,10 @@ async def handle_chat_op(sio, sid, data, user_id):
                 mentions=op_payload.get("mentions", [])
             )
             await chat_log.insert()
+
+            # Make the message searchable for RAG right away
+            from app.services.rag_service import rag_service
+            await rag_service.on_chat_message(chat_log)
             
             # Log as activity for dashboard/dynamics
             from app.services.activity_service import activity_service
@@ -8,6 +8,13 @@ from app.core.db.mongodb import mongodb
 from app.services.inquiry_service import inquiry_service
 from app.repositories.document import Document
 from app.repositories.collaboration_snapshot import CollaborationSnapshot
+from app.core.monitoring import monitor
+from app.websocket.broadcast import coalescer
+
+try:
+    import y_py as Y
+except ImportError:
+    Y = None
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +26,37 @@ async def unload_resources(room_id: str):
     # Placeholder for potential memory cleanup or final sync check
     pass
 
-async def sync_yjs_state(sio, sid, room_id: str, module: str):
+def missing_update(state: bytes, state_vector: Optional[bytes]) -> bytes:
+    """The part of a Yjs state a client holding ``state_vector`` doesn't have yet.
+
+    Returns the full state when there is no state vector or it can't be used.
+    """
+    if not state_vector or Y is None:
+        return state
+    try:
+        doc = Y.YDoc()
+        Y.apply_update(doc, state)
+        return Y.encode_state_as_update(doc, state_vector)
+    except Exception as e:
+        logger.warning(f"Ignoring unusable state vector ({len(state_vector)} bytes): {e}")
+        return state
+
+
+def _as_bytes(value: Any) -> Optional[bytes]:
+    """State vectors arrive as binary attachments, or base64 from older clients."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, str) and value:
+        return base64.b64decode(value)
+    return None
+
+
+async def sync_yjs_state(sio, sid, room_id: str, module: str, state_vector: Any = None, binary: bool = False):
     """
     Trigger synchronization of Yjs state for a joining user.
+
+    A client that sends its Yjs state vector gets only the update it is
+    missing, as a binary attachment; other clients get the full state in base64.
     """
     logger.info(f"Syncing Yjs state for user {sid} in room {room_id} (module: {module})")
     
@@ -40,15 +75,24 @@ async def sync_yjs_state(sio, sid, room_id: str, module: str):
             state_data = doc.content_state if doc else None
         
         if state_data:
-            # Base64 encode for transmission
-            encoded_state = base64.b64encode(state_data).decode("utf-8")
+            vector = _as_bytes(state_vector)
+            if vector is not None or binary:
+                update = missing_update(state_data, vector)
+                payload = update
+            else:
+                # Base64 encode for transmission
+                update = state_data
+                payload = base64.b64encode(state_data).decode("utf-8")
             await sio.emit('room-state', {
                 'roomId': room_id,
                 'module': module,
-                'state': encoded_state,
-                'isInitial': True
+                'state': payload,
+                'isInitial': True,
+                'isDiff': update is not state_data,
             }, room=sid)
-            logger.info(f"[Sync] Sent authoritative state to {sid} for room {room_id}")
+            # What the base64 full-state handshake would have sent
+            await monitor.track_join_sync(module, 4 * ((len(state_data) + 2) // 3), len(payload))
+            logger.info(f"[Sync] Sent {len(payload)} of {len(state_data)} state bytes to {sid} for room {room_id}")
         else:
             # Fallback for new empty rooms
             await sio.emit('sync_ready', {'room_id': room_id, 'module': module}, room=sid)
@@ -77,21 +121,9 @@ async def handle_collaboration_op(sio, sid, data: Dict[str, Any], user_id: str,
     elif (module == "whiteboard" or module == "collaboration") and not room_id.startswith("project:"):
         room_id = f"project:{room_id}"
 
-    # Get members for debugging
-    try:
-        # In python-socketio async server, rooms are managed in the manager
-        # This is a bit internal but useful for debugging
-        participants = sio.manager.get_participants("/", room_id)
-        participant_count = 0
-        for _ in participants:
-            participant_count += 1
-        
-        logger.info(f"Op from {user_id} (sid: {sid}) in {room_id} (module: {module}). Room participants: {participant_count}")
-    except Exception:
-        logger.info(f"Op from {user_id} in {room_id} (module: {module})")
-    
     # CRITICAL: Ensure data.roomId matches the prefixed room_id for frontend matching
     data["roomId"] = room_id
     
-    # Broadcast as a unified operation to support SyncService on the frontend
-    await sio.emit("operation", data, room=room_id, skip_sid=sid)
+    # Broadcast as a unified operation to support SyncService on the frontend;
+    # ops arriving within a few milliseconds share one batch-operations frame
+    await coalescer.add(sio, room_id, sid, data)
@@ -11,7 +11,7 @@ async def dispatch_operation(sio, sid, data, user_id):
     module = data.get("module")
     room_id = data.get("roomId") or data.get("room_id")
     
-    logger.info(f"Dispatching {data.get('type')} op from {user_id} in {room_id} (module: {module})")
+    logger.debug(f"Dispatching {data.get('type')} op from {user_id} in {room_id} (module: {module})")
     
     if module in ["whiteboard", "collaboration", "document", "inquiry"]:
         await handle_collaboration_op(sio, sid, data, user_id, module=module)
@@ -0,0 +1,266 @@
+"""Socket.IO presence: which users are connected, and which sids are in which rooms.
+
+``MemoryPresence`` keeps it in this process, which is only correct with one
+worker. ``RedisPresence`` shares it across workers and nodes:
+
+- ``presence:room:<room_id>``: hash of sid -> ``<user_id>|<expires_ms>``
+- ``presence:user:<user_id>``: hash of sid -> ``<expires_ms>``
+
+Each worker refreshes the entries of its own sids every ``heartbeat``
+seconds. Entries of a worker that dies stop being refreshed: readers ignore
+them once expired and delete them, and a key nobody refreshes expires after
+``ttl`` seconds.
+
+A user can be connected from several tabs, so members are reported as
+``{user_id: [sid, ...]}``.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Members = Dict[str, List[str]]
+
+
+class Departure(NamedTuple):
+    """What removing a sid from a room changed."""
+
+    user_gone: bool  # the sid was the user's last connection in the room
+    room_empty: bool
+
+
+class MemoryPresence:
+    """Presence for a single worker.
+
+    Every structure is indexed both ways so joining, leaving and
+    disconnecting cost the same whatever the number of rooms, and leaving
+    doesn't scan the room's other members either.
+    """
+
+    def __init__(self):
+        # Sids connected to this worker: sid -> (user_id, rooms)
+        self._local: Dict[str, Tuple[str, Set[str]]] = {}
+        self._rooms: Dict[str, Dict[str, str]] = {}  # room_id -> {sid: user_id}
+        self._tabs: Dict[str, Dict[str, int]] = {}  # room_id -> {user_id: sids in the room}
+        self._users: Dict[str, Set[str]] = {}  # user_id -> sids
+
+    def rooms_of(self, sid: str) -> List[str]:
+        """Rooms a sid connected to this worker has joined."""
+        return sorted(self._local.get(sid, ("", set()))[1])
+
+    async def connect(self, sid: str, user_id: str) -> None:
+        self._local[sid] = (user_id, set())
+        self._users.setdefault(user_id, set()).add(sid)
+
+    async def disconnect(self, sid: str) -> None:
+        """Forget a connection; leave its rooms with :meth:`leave` first."""
+        user_id, _ = self._local.pop(sid, (None, None))
+        sids = self._users.get(user_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._users[user_id]
+
+    async def join(self, room_id: str, sid: str, user_id: str) -> None:
+        """Add a sid to a room."""
+        if sid in self._local:
+            self._local[sid][1].add(room_id)
+        members = self._rooms.setdefault(room_id, {})
+        if sid not in members:
+            members[sid] = user_id
+            tabs = self._tabs.setdefault(room_id, {})
+            tabs[user_id] = tabs.get(user_id, 0) + 1
+
+    async def leave(self, room_id: str, sid: str) -> Optional[Departure]:
+        """Remove a sid from a room; None if it wasn't in it."""
+        if sid in self._local:
+            self._local[sid][1].discard(room_id)
+        members = self._rooms.get(room_id)
+        if not members or sid not in members:
+            return None
+        user_id = members.pop(sid)
+        tabs = self._tabs[room_id]
+        tabs[user_id] -= 1
+        user_gone = not tabs[user_id]
+        if user_gone:
+            del tabs[user_id]
+        if not members:
+            del self._rooms[room_id]
+            del self._tabs[room_id]
+        return Departure(user_gone, not members)
+
+    async def members(self, room_id: str) -> Members:
+        result: Members = {}
+        for sid, user_id in self._rooms.get(room_id, {}).items():
+            result.setdefault(user_id, []).append(sid)
+        return result
+
+    async def user_sids(self, user_id: str) -> List[str]:
+        """Connections of a user."""
+        return sorted(self._users.get(user_id, ()))
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class RedisPresence(MemoryPresence):
+    """Presence shared through Redis hashes with heartbeat expiry."""
+
+    ROOM_KEY = "presence:room:"
+    USER_KEY = "presence:user:"
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Awaitable[Any]],
+        ttl: int = 60,
+        heartbeat: float = 20.0,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__()
+        self._client_factory = client_factory
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self._clock = clock or time.time
+        self._task: Optional[asyncio.Task] = None
+
+    def _expires(self) -> str:
+        return str(int((self._clock() + self.ttl) * 1000))
+
+    def _live(self, expires: str) -> bool:
+        return int(expires) > self._clock() * 1000
+
+    async def connect(self, sid: str, user_id: str) -> None:
+        self._local[sid] = (user_id, set())
+        client = await self._client_factory()
+        key = self.USER_KEY + user_id
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, sid, self._expires())
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        self.start()
+
+    async def disconnect(self, sid: str) -> None:
+        user_id, _ = self._local.pop(sid, (None, None))
+        if user_id is not None:
+            client = await self._client_factory()
+            await client.hdel(self.USER_KEY + user_id, sid)
+
+    async def join(self, room_id: str, sid: str, user_id: str) -> None:
+        if sid in self._local:
+            self._local[sid][1].add(room_id)
+        client = await self._client_factory()
+        key = self.ROOM_KEY + room_id
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, sid, f"{user_id}|{self._expires()}")
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def leave(self, room_id: str, sid: str) -> Optional[Departure]:
+        user_id = None
+        if sid in self._local:
+            user_id, rooms = self._local[sid]
+            rooms.discard(room_id)
+        client = await self._client_factory()
+        # Delete and read in one transaction so two last members leaving on
+        # different workers can't both see the other still present. Unlike
+        # MemoryPresence this reads the whole hash, since other workers' sids
+        # and their expiry only live there.
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hdel(self.ROOM_KEY + room_id, sid)
+            pipe.hgetall(self.ROOM_KEY + room_id)
+            removed, entries = await pipe.execute()
+        if not removed:
+            return None
+        members = await self._members_from(client, room_id, entries)
+        return Departure(user_id not in members, not members)
+
+    async def members(self, room_id: str) -> Members:
+        client = await self._client_factory()
+        return await self._members_from(client, room_id, await client.hgetall(self.ROOM_KEY + room_id))
+
+    async def _members_from(self, client, room_id: str, entries: Dict[str, str]) -> Members:
+        result: Members = {}
+        expired = []
+        for sid, value in entries.items():
+            user_id, _, expires = value.rpartition("|")
+            if self._live(expires):
+                result.setdefault(user_id, []).append(sid)
+            else:
+                expired.append(sid)
+        if expired:
+            await client.hdel(self.ROOM_KEY + room_id, *expired)
+        return result
+
+    async def user_sids(self, user_id: str) -> List[str]:
+        client = await self._client_factory()
+        entries = await client.hgetall(self.USER_KEY + user_id)
+        return sorted(sid for sid, expires in entries.items() if self._live(expires))
+
+    async def beat(self) -> None:
+        """Refresh every entry owned by this worker."""
+        if not self._local:
+            return
+        client = await self._client_factory()
+        expires = self._expires()
+        async with client.pipeline(transaction=False) as pipe:
+            for sid, (user_id, rooms) in list(self._local.items()):
+                pipe.hset(self.USER_KEY + user_id, sid, expires)
+                pipe.expire(self.USER_KEY + user_id, self.ttl)
+                for room_id in rooms:
+                    pipe.hset(self.ROOM_KEY + room_id, sid, f"{user_id}|{expires}")
+                    pipe.expire(self.ROOM_KEY + room_id, self.ttl)
+            await pipe.execute()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                await self.beat()
+            except Exception as e:
+                logger.error(f"Presence heartbeat failed: {e}")
+
+    def start(self) -> None:
+        """Start the heartbeat (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and drop this worker's entries (called on shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sid in list(self._local):
+            try:
+                for room_id in self.rooms_of(sid):
+                    await self.leave(room_id, sid)
+                await self.disconnect(sid)
+            except Exception as e:
+                logger.warning(f"Failed to clear presence of {sid}: {e}")
+                break
+
+
+def _create_presence() -> MemoryPresence:
+    if settings.SOCKETIO_REDIS:
+        from app.core.cache import get_redis_client
+
+        return RedisPresence(
+            get_redis_client,
+            ttl=settings.SOCKETIO_PRESENCE_TTL,
+            heartbeat=settings.SOCKETIO_PRESENCE_HEARTBEAT,
+        )
+    return MemoryPresence()
+
+
+presence = _create_presence()
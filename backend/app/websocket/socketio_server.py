@@ -1,28 +1,49 @@
 import logging
-from typing import Dict, Optional, Any
+from typing import Optional
 
-from socketio import AsyncServer, ASGIApp
+from socketio import AsyncRedisManager, AsyncServer, ASGIApp
 from socketio.exceptions import ConnectionRefusedError
 
 from app.core.config import settings
 from app.services.auth_service import verify_token
+from app.services.cache_service import cache_service
 from app.websocket.handlers.collaboration_handler import unload_resources
+from app.websocket.presence import presence
 
-# Create Socket.IO server
+# Create Socket.IO server; with several workers, emits go through Redis so
+# they reach clients connected to any of them
 sio = AsyncServer(
     cors_allowed_origins=settings.CORS_ORIGINS,
     async_mode="asgi",
     ping_timeout=60,
     ping_interval=25,
     compression=True,
+    client_manager=AsyncRedisManager(settings.REDIS_URL) if settings.SOCKETIO_REDIS else None,
 )
 
 logger = logging.getLogger(__name__)
 
-# Store user connections: {user_id: [sid1, sid2, ...]}
-user_connections: Dict[str, list] = {}
-# Store room members: {room_id: {user_id: sid}}
-room_members: Dict[str, Dict[str, str]] = {}
+
+async def get_user_profile(user_id: str) -> Optional[dict]:
+    """Username and avatar announced when a user joins a room, cached across joins."""
+    try:
+        profile = await cache_service.get_cached_user_profile(user_id)
+        if profile:
+            return profile
+    except Exception as e:
+        logger.debug(f"Profile cache read failed for {user_id}: {e}")
+
+    from app.repositories.user import User
+
+    user = await User.get(user_id)
+    if not user:
+        return None
+    profile = {"username": user.username, "avatar_url": user.avatar_url}
+    try:
+        await cache_service.set_cached_user_profile(user_id, profile)
+    except Exception as e:
+        logger.debug(f"Profile cache write failed for {user_id}: {e}")
+    return profile
 
 
 async def authenticate_socket(auth: Optional[dict]) -> Optional[str]:
@@ -47,9 +68,7 @@ async def connect(sid, environ, auth):
         raise ConnectionRefusedError("Authentication failed")
 
     # Store connection
-    if user_id not in user_connections:
-        user_connections[user_id] = []
-    user_connections[user_id].append(sid)
+    await presence.connect(sid, user_id)
 
     # Store user info in session
     await sio.save_session(sid, {"user_id": user_id})
@@ -63,36 +82,13 @@ async def disconnect(sid, *args):
     user_id = session.get("user_id")
 
     if user_id:
+        # Leave all rooms this connection joined
+        for room_id in presence.rooms_of(sid):
+            logger.info(f"User {user_id} removed from room {room_id}")
+            await _leave_presence(room_id, sid, user_id)
+
         # Remove from user connections
-        if user_id in user_connections:
-            if sid in user_connections[user_id]:
-                user_connections[user_id].remove(sid)
-            if not user_connections[user_id]:
-                del user_connections[user_id]
-
-        # Remove from all rooms
-        # Leave all rooms and clean up room_members
-        for room_id, members in list(room_members.items()):
-            if user_id in members and members[user_id] == sid:
-                # Remove user from room
-                del members[user_id]
-                logger.info(f"User {user_id} removed from room {room_id}")
-
-                # Notify others
-                await sio.emit(
-                    "user_left",
-                    {"roomId": room_id, "user_id": user_id},
-                    room=room_id,
-                )
-
-                # If room is empty, remove it from the index
-                if not members:
-                    # Use pop to avoid KeyError in async race conditions
-                    room_members.pop(room_id, None)
-                    logger.info(f"Room {room_id} closed as it is now empty")
-                    # Unload heavy resources
-                    from app.websocket.handlers.collaboration_handler import unload_resources
-                    await unload_resources(room_id)
+        await presence.disconnect(sid)
 
     logger.info(f"Client disconnected: {sid}, user_id: {user_id}")
 
@@ -128,23 +124,18 @@ async def join_room(sid, data):
     await sio.enter_room(sid, room_id)
     logger.info(f"[join_room] User {user_id} joined room {room_id}")
 
-    # Track room members
-    if room_id not in room_members:
-        room_members[room_id] = {}
-    room_members[room_id][user_id] = sid
+    # Track room members across workers
+    await presence.join(room_id, sid, user_id)
 
-    # Get user info
-    from app.repositories.user import User
-
-    user = await User.get(user_id)
-    if user:
+    profile = await get_user_profile(user_id)
+    if profile:
         # Notify room members
         await sio.emit(
             "user_joined",
             {
                 "user_id": user_id,
-                "username": user.username,
-                "avatar_url": user.avatar_url,
+                "username": profile["username"],
+                "avatar_url": profile["avatar_url"],
                 "roomId": room_id,
             },
             room=room_id,
@@ -157,7 +148,11 @@ async def join_room(sid, data):
     module = data.get("module")
     if module in ["whiteboard", "collaboration", "document", "inquiry"]:
         from app.websocket.handlers.collaboration_handler import sync_yjs_state
-        await sync_yjs_state(sio, sid, room_id, module)
+        await sync_yjs_state(
+            sio, sid, room_id, module,
+            state_vector=data.get("stateVector"),
+            binary=bool(data.get("binary")),
+        )
 
 
 @sio.event
@@ -178,17 +173,25 @@ async def leave_room(sid, data):
     await sio.leave_room(sid, room_id)
 
     # Remove from room members
-    if room_id in room_members and user_id in room_members[room_id]:
-        del room_members[room_id][user_id]
-        if not room_members[room_id]:
-            del room_members[room_id]
-            # Unload room data
-            from app.websocket.handlers.collaboration_handler import unload_resources
-            await unload_resources(room_id)
+    await _leave_presence(room_id, sid, user_id)
 
     await sio.emit("room_left", {"room": room_id}, room=sid)
 
 
+async def _leave_presence(room_id: str, sid: str, user_id: str) -> None:
+    """Remove a connection from a room's members, notifying the room when the user is gone."""
+    departure = await presence.leave(room_id, sid)
+    if departure is None:
+        return
+    # The same user may still be in the room from another tab
+    if departure.user_gone:
+        await sio.emit("user_left", {"roomId": room_id, "user_id": user_id}, room=room_id)
+    if departure.room_empty:
+        logger.info(f"Room {room_id} closed as it is now empty")
+        # Unload heavy resources
+        await unload_resources(room_id)
+
+
 @sio.event
 async def operation(sid, data):
     """Handle unified sync operations."""
@@ -2,12 +2,16 @@
 
 import logging
 import asyncio
-from typing import Dict, Tuple
+from typing import Dict, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect, Query, status
 
 from app.services.auth_service import verify_token
 from app.services.room_mapping_service import validate_room_access
-from app.services.collaboration_service import collaboration_service
+from app.core.config import settings
+from app.services.collaboration import replication
+from app.services.collaboration.replication import replicator
+from app.services.collaboration.rooms import RoomRegistry
+from app.services.collaboration.update_log import update_log
 
 # ypy-websocket integration
 try:
@@ -47,10 +51,6 @@ class FastAPIWebsocketAdapter:
         return {}
 
 
-# Store active YRooms
-rooms: Dict[str, YRoom] = {}
-
-
 def parse_room_name(room_name: str) -> Tuple[str, str]:
     """Parse room name to get snapshot type and project ID."""
     if room_name.startswith("wb:"):
@@ -63,46 +63,134 @@ def parse_room_name(room_name: str) -> Tuple[str, str]:
         return "whiteboard", room_name
 
 
-async def load_room_data(room: YRoom, room_name: str):
-    """Load initial room data from database."""
+def apply_updates(room: YRoom, updates) -> None:
+    """Apply Yjs updates to the room's document in order."""
+    # y_py's apply_update opens its own transaction on the YDoc
+    for update in updates:
+        Y.apply_update(room.ydoc, update)
+
+
+async def load_room_data(room: YRoom, room_name: str) -> int:
+    """Load initial room data: the latest snapshot plus the update log after it.
+
+    Returns the number of bytes applied.
+    """
     snapshot_type, project_id = parse_room_name(room_name)
 
+    def encode_state() -> bytes:
+        # Compaction encodes the full state anyway; use it to re-measure the room
+        state = Y.encode_state_as_update(room.ydoc)
+        rooms.track_bytes(room_name, len(state), absolute=True)
+        return state
+
     try:
-        data = await collaboration_service.load_latest_snapshot(project_id, snapshot_type)
-        if data:
-            logger.info(f"Loaded snapshot for {room_name} ({len(data)} bytes)")
-            try:
-                # Apply update to YDoc using transaction
-                with room.ydoc.begin_transaction() as t:
-                    Y.apply_update(t, data)
-            except Exception as e:
-                # Try simple apply if transaction/signature differs
-                Y.apply_update(room.ydoc, data)
+        data, tail = await update_log.open(project_id, snapshot_type, state_fn=encode_state)
+        updates = ([data] if data else []) + tail
+        if updates:
+            apply_updates(room, updates)
+            logger.info(f"Loaded {room_name}: snapshot {len(data or b'')} bytes + {len(tail)} logged updates")
+        return sum(len(u) for u in updates)
     except Exception as e:
         logger.error(f"Failed to load snapshot for {room_name}: {e}")
+        return 0
+
+
+# Rooms applying an update from another worker; the origin worker logs and publishes it
+applying_remote: Set[str] = set()
 
 
 def setup_persistence(room: YRoom, room_name: str):
-    """Setup persistence listener for the room."""
+    """Append each incremental update to the room's update log and publish it to other workers."""
     snapshot_type, project_id = parse_room_name(room_name)
 
     def on_update(event):
         try:
-            state = Y.encode_state_as_update(room.ydoc)
-            if state and len(state) > 0:
-                asyncio.create_task(
-                    collaboration_service.debounced_save(project_id, state, snapshot_type)
-                )
-                logger.debug(f"Queued persistence for {room_name} ({len(state)} bytes)")
-            else:
-                logger.warning(f"Empty state update for {room_name}, skipping persistence")
+            update = event.get_update()
+            # An empty transaction encodes as b"\x00\x00"
+            if update and len(update) > 2:
+                rooms.track_bytes(room_name, len(update))
+                if room_name not in applying_remote:
+                    update_log.append(project_id, snapshot_type, update)
+                    replicator.publish(room_name, replication.UPDATE, update)
         except Exception as e:
             logger.error(f"Persistence error for {room_name}: {str(e)}")
 
-    room.ydoc.observe_update(on_update)
+    room.ydoc.observe_after_transaction(on_update)
     logger.info(f"Persistence setup completed for room: {room_name}")
 
 
+def setup_replication(room: YRoom, room_name: str):
+    """Relay the room's updates and awareness to and from other workers."""
+
+    def on_message(message: bytes) -> bool:
+        # Awareness from a local client; YRoom still relays it to local clients
+        if message and message[0] == 1:
+            replicator.publish(room_name, replication.AWARENESS, message)
+        return False
+
+    def on_remote(kind: int, payload: bytes) -> None:
+        if kind == replication.UPDATE:
+            # Applying it broadcasts it to this worker's clients through the room
+            applying_remote.add(room_name)
+            try:
+                Y.apply_update(room.ydoc, payload)
+            finally:
+                applying_remote.discard(room_name)
+        elif kind == replication.AWARENESS:
+            for client in list(room.clients):
+                asyncio.create_task(client.send(payload))
+        elif kind == replication.SYNC_REQUEST:
+            missing = Y.encode_state_as_update(room.ydoc, payload)
+            if len(missing) > 2:
+                replicator.publish(room_name, replication.UPDATE, missing)
+
+    def request_sync() -> None:
+        if replicator.enabled:
+            replicator.publish(room_name, replication.SYNC_REQUEST, Y.encode_state_vector(room.ydoc))
+
+    room.on_message = on_message
+    return on_remote, request_sync
+
+
+# Running YRoom tasks; a room only broadcasts updates to its clients while started
+room_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def open_room(room_name: str) -> Tuple[YRoom, int]:
+    """Create and start a YRoom with its persisted state, update logging and replication."""
+    room = YRoom()
+    on_remote, request_sync = setup_replication(room, room_name)
+    # Subscribe before loading so no update published meanwhile is missed; the
+    # sync request sent once loaded fetches updates peers haven't flushed yet
+    await replicator.join(room_name, on_remote, on_resubscribed=request_sync)
+    size = await load_room_data(room, room_name)
+    setup_persistence(room, room_name)
+    request_sync()
+    room_tasks[room_name] = asyncio.create_task(room.start())
+    await room.started.wait()
+    return room, size
+
+
+async def close_room(room_name: str, room: YRoom) -> None:
+    """Persist an evicted room: flush its update log and fold it into a snapshot."""
+    snapshot_type, project_id = parse_room_name(room_name)
+    await replicator.leave(room_name)
+    await update_log.close(project_id, snapshot_type)
+    task = room_tasks.pop(room_name, None)
+    if task and not task.done():
+        room.stop()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+# Active YRooms, evicted once idle (see services/collaboration/rooms.py)
+rooms = RoomRegistry(
+    open_room,
+    close_room,
+    idle_timeout=settings.COLLAB_ROOM_IDLE_TIMEOUT,
+    max_rooms=settings.COLLAB_MAX_ROOMS,
+)
+
+
 async def websocket_endpoint(websocket: WebSocket, room_name: str, token: str = Query(None)):
     """Y.js WebSocket endpoint with authentication and persistence."""
 
@@ -157,14 +245,8 @@ async def websocket_endpoint(websocket: WebSocket, room_name: str, token: str =
         logger.error("Failed to accept WebSocket connection for user %s in room %s: %s", user_id, room_name, str(e))
         return
 
-    # Get or create YRoom
-    if room_name not in rooms:
-        rooms[room_name] = YRoom()
-        logger.info(f"Created new YRoom: {room_name}")
-        await load_room_data(rooms[room_name], room_name)
-        setup_persistence(rooms[room_name], room_name)
-    
-    room = rooms[room_name]
+    # Get or create YRoom; the reference is released when this session ends
+    room = await rooms.acquire(room_name)
     snapshot_type, project_id = parse_room_name(room_name)
     
     adapter = FastAPIWebsocketAdapter(websocket)
@@ -174,11 +256,11 @@ async def websocket_endpoint(websocket: WebSocket, room_name: str, token: str =
         if not isinstance(e, StopAsyncIteration):
             logger.warning(f"WebSocket session ended for room {room_name}: {e}")
     finally:
-        # Save state on disconnect to ensure data is captured immediately
-        # Bypassing debounce to prevent data loss on page refresh
+        # Flush on disconnect so a page refresh never waits on the batch timer;
+        # the room is compacted when it is evicted after its last client leaves
         try:
-            state = Y.encode_state_as_update(room.ydoc)
-            await collaboration_service.save_snapshot(project_id, state, snapshot_type)
-            logger.info(f"Saved immediate snapshot on disconnect for {room_name}")
+            await update_log.flush(project_id, snapshot_type)
+            logger.info(f"Flushed update log on disconnect for {room_name}")
         except Exception as e:
-            logger.error(f"Failed to save snapshot on disconnect for {room_name}: {e}")
+            logger.error(f"Failed to flush update log on disconnect for {room_name}: {e}")
+        await rooms.release(room_name)
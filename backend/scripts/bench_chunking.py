@@ -0,0 +1,172 @@
+"""Compare legacy character-window chunking with the structured token chunker.
+
+Reports, per corpus and chunker: chunk count, tokens sent to the embedding
+model, tokens the model silently truncates (beyond its 256-token input),
+characters dropped, and mean chunk fill. Fewer chunks means fewer embedding
+calls and a smaller index; truncated tokens are content that was stored but
+never embedded.
+
+Usage:
+    python scripts/bench_chunking.py [--corpus DIR] [--estimate]
+
+``--corpus`` reads every .txt/.md file in DIR (form feeds split pages);
+without it a built-in sample of English, Chinese and paginated text is used.
+``--estimate`` uses the heuristic counter instead of loading the model.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.rag.chunking import StructuredChunker, TextSegment, TokenCounter
+
+MODEL_MAX_TOKENS = 256
+
+EN_WORDS = (
+    "students inquiry evidence claim photosynthesis light energy group question "
+    "experiment data observe plant growth measure result compare explain model"
+).split()
+ZH_SENTENCES = [
+    "学生们围绕光合作用提出了探究问题。",
+    "小组成员分工收集实验数据并记录观察结果。",
+    "老师引导大家比较不同光照条件下植物的生长情况。",
+    "我们需要用证据支持自己的结论。",
+    "讨论中每个人都提出了不同的解释模型。",
+]
+
+
+def sample_corpus(seed: int = 7) -> dict:
+    """Build a small mixed corpus: markdown notes, Chinese prose, a paginated reader."""
+    rng = random.Random(seed)
+
+    def en_paragraph(n):
+        return " ".join(
+            " ".join(rng.choice(EN_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(n)
+        )
+
+    notes = "\n\n".join(
+        f"## Section {i}\n\n" + "\n\n".join(en_paragraph(rng.randint(2, 6)) for _ in range(4))
+        for i in range(1, 30)
+    )
+    chinese = "\n\n".join(
+        "".join(rng.choice(ZH_SENTENCES) for _ in range(rng.randint(3, 10))) for _ in range(120)
+    )
+    reader = [
+        TextSegment(
+            f"Inquiry Science Reader - Unit 2\n\n{en_paragraph(6)}\n\n"
+            + "".join(rng.choice(ZH_SENTENCES) for _ in range(4))
+            + f"\n\n{en_paragraph(4)}\n\nPage {page} of 60",
+            page,
+        )
+        for page in range(1, 61)
+    ]
+    return {"notes.md": [notes], "chinese.txt": [chinese], "reader.pdf": reader}
+
+
+def load_corpus(directory: Path) -> dict:
+    corpus = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix not in (".txt", ".md"):
+            continue
+        pages = path.read_text(encoding="utf-8", errors="ignore").split("\f")
+        if len(pages) > 1:
+            corpus[path.name] = [TextSegment(text, n) for n, text in enumerate(pages, start=1)]
+        else:
+            corpus[path.name] = pages
+    return corpus
+
+
+def legacy_chunks(text: str, chunk_size: int = 1000, overlap: int = 100) -> list:
+    """The previous process_resource chunking."""
+    chunks = []
+    for i in range(0, len(text), chunk_size - overlap):
+        chunk = text[i : i + chunk_size]
+        if len(chunk) < 50:
+            continue
+        chunks.append(chunk)
+    return chunks
+
+
+def summarize(chunks: list, counter, source_chars: int, budget: int) -> dict:
+    tokens = counter.count_many(chunks)
+    limit = MODEL_MAX_TOKENS - 2
+    kept_chars = sum(len(c) for c in chunks)
+    return {
+        "chunks": len(chunks),
+        "tokens_embedded": sum(min(t, limit) for t in tokens),
+        "tokens_truncated": sum(max(0, t - limit) for t in tokens),
+        "chunks_truncated": sum(t > limit for t in tokens),
+        "chars_stored": kept_chars,
+        "source_chars": source_chars,
+        "mean_fill": round(sum(min(t, limit) for t in tokens) / (len(chunks) * budget), 3) if chunks else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path)
+    parser.add_argument("--estimate", action="store_true")
+    args = parser.parse_args()
+
+    if args.estimate:
+        counter = TokenCounter()
+    else:
+        from app.services.rag_service import RAGService
+
+        counter = asyncio.run(RAGService.get_token_counter())
+
+    corpus = load_corpus(args.corpus) if args.corpus else sample_corpus()
+    budget = settings.RAG_CHUNK_TOKENS
+    report = {}
+
+    for name, segments in corpus.items():
+        texts = [s.text if isinstance(s, TextSegment) else s for s in segments]
+        whole = "".join(texts)
+
+        chunker = StructuredChunker(
+            counter,
+            max_tokens=budget,
+            overlap_tokens=settings.RAG_CHUNK_OVERLAP_TOKENS,
+            min_tokens=settings.RAG_CHUNK_MIN_TOKENS,
+        )
+        structured = []
+        for segment in segments:
+            structured.extend(chunker.feed(segment))
+        structured.extend(chunker.finish())
+
+        report[name] = {
+            "legacy": summarize(legacy_chunks(whole), counter, len(whole), budget),
+            "structured": summarize([c.text for c in structured], counter, len(whole), budget),
+            "boilerplate_lines_dropped": chunker.boilerplate.lines_dropped,
+        }
+
+    totals = {}
+    for mode in ("legacy", "structured"):
+        totals[mode] = {
+            key: sum(r[mode][key] for r in report.values())
+            for key in ("chunks", "tokens_embedded", "tokens_truncated", "chunks_truncated")
+        }
+    report["total"] = totals
+
+    print(f"{'file':<16}{'mode':<12}{'chunks':>8}{'embedded':>10}{'truncated':>11}{'fill':>7}")
+    print("-" * 64)
+    for name, row in report.items():
+        if name == "total":
+            continue
+        for mode in ("legacy", "structured"):
+            r = row[mode]
+            print(f"{name:<16}{mode:<12}{r['chunks']:>8}{r['tokens_embedded']:>10}"
+                  f"{r['tokens_truncated']:>11}{r['mean_fill']:>7}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Compare RAG embedding backends on CPU: cold start, throughput and agreement.
+
+For each backend reports load time, first-call latency, chunks/sec over the
+sample, single-query latency, and cosine agreement with the reference ``hf``
+backend (mean and worst case over the sample). Top-k overlap checks that the
+faster backend would retrieve the same chunks for the same queries.
+
+Usage:
+    python scripts/bench_embedding_backends.py [--backends hf int8 onnx] [--chunks 512] [--k 5]
+
+The ``onnx`` backend needs ``pip install optimum[onnxruntime]``; backends
+that fail to load are reported with their error and skipped.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.rag.embedding_backends import BACKENDS, load_embedding_model
+
+SENTENCES = [
+    "Plants convert light energy into chemical energy through photosynthesis.",
+    "Students compared plant growth under red, blue and white light.",
+    "The group recorded leaf area every two days for three weeks.",
+    "Evidence should support each claim in the final inquiry report.",
+    "学生们围绕光合作用提出了探究问题。",
+    "小组成员分工收集实验数据并记录观察结果。",
+    "Water temperature affected how quickly the seeds germinated.",
+    "Our model explains why shaded leaves grew larger but thinner.",
+]
+QUERIES = [
+    "How does light colour change plant growth?",
+    "光合作用的探究问题是什么？",
+    "What evidence supports the claim?",
+    "seed germination and temperature",
+]
+
+
+def make_chunks(count: int) -> list:
+    """Distinct multi-sentence chunks of roughly chunk size."""
+    rng = np.random.default_rng(7)
+    return [
+        f"[{i}] " + " ".join(SENTENCES[j] for j in rng.integers(0, len(SENTENCES), 8))
+        for i in range(count)
+    ]
+
+
+def bench_backend(backend: str, chunks: list, onnx_dir: str) -> dict:
+    start = time.perf_counter()
+    model = load_embedding_model(
+        backend, settings.RAG_EMBEDDING_MODEL, settings.RAG_EMBED_BATCH_SIZE, onnx_dir
+    )
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.embed_query("warm up")
+    first_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(chunks), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+
+    query_times = []
+    query_vectors = []
+    for query in QUERIES * 5:
+        start = time.perf_counter()
+        query_vectors.append(model.embed_query(query))
+        query_times.append(time.perf_counter() - start)
+
+    return {
+        "stats": {
+            "load_seconds": round(load_seconds, 2),
+            "first_call_ms": round(first_call * 1000, 1),
+            "chunks_per_sec": round(len(chunks) / elapsed, 1),
+            "query_ms_p50": round(statistics.median(query_times) * 1000, 2),
+        },
+        "vectors": vectors,
+        "queries": np.asarray(query_vectors[: len(QUERIES)], dtype=np.float32),
+    }
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def agreement(reference: dict, candidate: dict, k: int) -> dict:
+    """Cosine agreement with the reference and top-k retrieval overlap."""
+    cosines = (normalize(reference["vectors"]) * normalize(candidate["vectors"])).sum(axis=1)
+
+    def top_k(run):
+        scores = normalize(run["queries"]) @ normalize(run["vectors"]).T
+        return [set(np.argsort(-row)[:k]) for row in scores]
+
+    overlap = [len(a & b) / k for a, b in zip(top_k(reference), top_k(candidate))]
+    return {
+        "cosine_mean": round(float(cosines.mean()), 5),
+        "cosine_min": round(float(cosines.min()), 5),
+        f"top{k}_overlap": round(float(np.mean(overlap)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    runs = {}
+    report = {"model": settings.RAG_EMBEDDING_MODEL, "chunks": len(chunks), "backends": {}}
+
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        for backend in dict.fromkeys(["hf", *args.backends]):
+            try:
+                runs[backend] = bench_backend(backend, chunks, onnx_dir)
+            except Exception as e:
+                report["backends"][backend] = {"error": f"{type(e).__name__}: {e}"}
+                continue
+            report["backends"][backend] = runs[backend]["stats"]
+
+    if "hf" in runs:
+        for backend, run in runs.items():
+            if backend != "hf":
+                report["backends"][backend].update(agreement(runs["hf"], run, args.k))
+
+    print(f"{'backend':<8}{'load s':>8}{'chunks/s':>10}{'query ms':>10}{'cos mean':>10}{'cos min':>9}")
+    print("-" * 55)
+    for backend, row in report["backends"].items():
+        if "error" in row:
+            print(f"{backend:<8}  {row['error']}")
+            continue
+        print(f"{backend:<8}{row['load_seconds']:>8}{row['chunks_per_sec']:>10}{row['query_ms_p50']:>10}"
+              f"{row.get('cosine_mean', 1.0):>10}{row.get('cosine_min', 1.0):>9}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
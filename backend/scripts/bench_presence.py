@@ -0,0 +1,169 @@
+"""Compare Socket.IO membership bookkeeping as the number of rooms grows.
+
+``legacy`` is the index ``socketio_server`` used to keep: a global
+``room_id -> {user_id: sid}`` dict that ``disconnect`` scanned in full to find
+the rooms of the leaving user. ``presence`` is ``MemoryPresence``, indexed
+room -> sids, sid -> rooms and user -> sids.
+
+For each room count, rooms are filled with connections (some users open
+several tabs), then a sample of connections joins one more room, leaves it,
+and disconnects. Reports the mean time per join, leave and disconnect (which
+leaves every room of the connection, as the server does), and how many tabs
+the legacy index lost because a user's second tab overwrote the first.
+
+Usage:
+    python scripts/bench_presence.py [--rooms 100 1000 10000] [--per-room 4] [--samples 2000] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.websocket.presence import MemoryPresence
+
+
+class LegacyIndex:
+    """The membership dicts socketio_server kept before ``presence``."""
+
+    def __init__(self):
+        self.user_connections: Dict[str, list] = {}
+        self.room_members: Dict[str, Dict[str, str]] = {}
+
+    async def connect(self, sid: str, user_id: str) -> None:
+        self.user_connections.setdefault(user_id, []).append(sid)
+
+    async def join(self, room_id: str, sid: str, user_id: str) -> None:
+        self.room_members.setdefault(room_id, {})[user_id] = sid
+
+    async def leave(self, room_id: str, sid: str, user_id: str) -> None:
+        if room_id in self.room_members and user_id in self.room_members[room_id]:
+            del self.room_members[room_id][user_id]
+            if not self.room_members[room_id]:
+                del self.room_members[room_id]
+
+    async def disconnect(self, sid: str, user_id: str) -> None:
+        if sid in self.user_connections.get(user_id, []):
+            self.user_connections[user_id].remove(sid)
+            if not self.user_connections[user_id]:
+                del self.user_connections[user_id]
+        for room_id, members in list(self.room_members.items()):
+            if user_id in members:
+                del members[user_id]
+                if not members:
+                    self.room_members.pop(room_id, None)
+
+
+class PresenceIndex:
+    """``MemoryPresence`` driven the way socketio_server drives it."""
+
+    def __init__(self):
+        self.presence = MemoryPresence()
+
+    async def connect(self, sid: str, user_id: str) -> None:
+        await self.presence.connect(sid, user_id)
+
+    async def join(self, room_id: str, sid: str, user_id: str) -> None:
+        await self.presence.join(room_id, sid, user_id)
+
+    async def leave(self, room_id: str, sid: str, user_id: str) -> None:
+        await self.presence.leave(room_id, sid)
+
+    async def disconnect(self, sid: str, user_id: str) -> None:
+        for room_id in self.presence.rooms_of(sid):
+            await self.presence.leave(room_id, sid)
+        await self.presence.disconnect(sid)
+
+
+def population(rooms: int, per_room: int, seed: int) -> List[Tuple[str, str, str]]:
+    """(room_id, sid, user_id) memberships; about a third of users have a second tab in the room."""
+    rng = random.Random(seed)
+    entries = []
+    for r in range(rooms):
+        room_id = f"project:{r}"
+        for m in range(per_room):
+            user_id = f"user-{r}-{m}"
+            entries.append((room_id, f"sid-{r}-{m}-0", user_id))
+            if rng.random() < 0.33:
+                entries.append((room_id, f"sid-{r}-{m}-1", user_id))
+    return entries
+
+
+async def measure(index_cls, entries: List[Tuple[str, str, str]], samples: int, seed: int) -> Dict[str, float]:
+    index = index_cls()
+    for room_id, sid, user_id in entries:
+        await index.connect(sid, user_id)
+        await index.join(room_id, sid, user_id)
+
+    sample = random.Random(seed).sample(entries, min(samples, len(entries)))
+    timings = {}
+
+    start = time.perf_counter()
+    for i, (_, sid, user_id) in enumerate(sample):
+        await index.join(f"doc:{i}", sid, user_id)
+    timings["join_us"] = (time.perf_counter() - start) / len(sample) * 1e6
+
+    start = time.perf_counter()
+    for i, (_, sid, user_id) in enumerate(sample):
+        await index.leave(f"doc:{i}", sid, user_id)
+    timings["leave_us"] = (time.perf_counter() - start) / len(sample) * 1e6
+
+    start = time.perf_counter()
+    for _, sid, user_id in sample:
+        await index.disconnect(sid, user_id)
+    timings["disconnect_us"] = (time.perf_counter() - start) / len(sample) * 1e6
+
+    return {name: round(value, 2) for name, value in timings.items()}
+
+
+async def run(room_counts: List[int], per_room: int, samples: int, seed: int) -> dict:
+    report = {"per_room": per_room, "samples": samples, "results": []}
+    for rooms in room_counts:
+        entries = population(rooms, per_room, seed)
+        legacy = LegacyIndex()
+        for room_id, sid, user_id in entries:
+            await legacy.join(room_id, sid, user_id)
+        tracked = sum(len(members) for members in legacy.room_members.values())
+        report["results"].append({
+            "rooms": rooms,
+            "connections": len(entries),
+            "legacy": await measure(LegacyIndex, entries, samples, seed),
+            "presence": await measure(PresenceIndex, entries, samples, seed),
+            "legacy_lost_tabs": len(entries) - tracked,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--per-room", type=int, default=4, help="users per room")
+    parser.add_argument("--samples", type=int, default=2000, help="connections that join, leave and disconnect")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.rooms, args.per_room, args.samples, args.seed))
+
+    print(f"{'rooms':>7}{'conns':>8}  {'index':<10}{'join us':>9}{'leave us':>10}{'disconn us':>12}")
+    print("-" * 56)
+    for row in report["results"]:
+        for name in ("legacy", "presence"):
+            t = row[name]
+            print(f"{row['rooms']:>7}{row['connections']:>8}  {name:<10}{t['join_us']:>9}{t['leave_us']:>10}{t['disconnect_us']:>12}")
+        print(f"{'':>17}legacy index lost {row['legacy_lost_tabs']} of {row['connections']} tabs")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
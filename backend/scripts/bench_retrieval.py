@@ -0,0 +1,434 @@
+"""Retrieval quality and latency benchmark for RAGService.
+
+Runs ``RAGService.retrieve_context`` and each of its strategies over a
+labelled corpus of resources, documents and chats, and reports per strategy
+and for the fused result:
+
+- recall@k: share of a query's relevant items found in the top k
+- MRR: mean reciprocal rank of the first relevant item
+- p50/p95/p99 latency in milliseconds
+
+Each strategy is scored only against relevant items of the sources it
+searches (vector: resources, plus documents and chats when incremental
+indexing is on; sliding_window: documents; realtime: chats); the fused
+result is scored against all of them. The JSON report is stable
+across runs with the same corpus and settings, so it can be diffed between
+commits to tell whether a change made retrieval better or only faster.
+
+Modes:
+    memory (default)  indexes are built in-process and chunk text is served
+                      from memory; nothing touches Mongo or Redis
+    mongo             the corpus is written to a scratch database (--db),
+                      indexed through RAGService.process_resource, queried,
+                      and the database dropped afterwards
+
+Usage:
+    python scripts/bench_retrieval.py [--mode memory|mongo] [--embedder model|hashing]
+        [--fixture corpus.json] [--dump-fixture corpus.json] [--k 5]
+        [--repeats 5] [--output report.json]
+
+``--embedder hashing`` swaps the embedding model for a deterministic
+feature-hashing embedder, for a quick run without downloading the model
+(vector quality numbers are then meaningless). A fixture file has the shape::
+
+    {"resources": [{"id", "title", "text"}], "documents": [{"id", "title", "content"}],
+     "chats": [{"id", "user_id", "content"}], "queries": [{"query", "relevant": [ids]}]}
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.rag.chunking import StructuredChunker, TokenCounter
+from app.services.rag.embedding_cache import EmbeddingCache
+from app.services.rag.embedding_engine import EmbeddingEngine
+from app.services.rag.incremental import document_text, incremental_indexer, source_key
+from app.services.rag.lexical_index import BM25Index, lexical_index_registry, tokenize
+from app.services.rag.result_cache import retrieval_cache
+from app.services.rag.vector_index import ProjectVectorIndex, vector_index_registry
+from app.services.rag_service import RAGService
+
+PROJECT_ID = "rag-bench"
+
+STRATEGY_TYPES = {
+    # With incremental indexing the vector store also holds documents and chats
+    "vector": ("resource", "document", "chat") if settings.RAG_INCREMENTAL_INDEXING else ("resource",),
+    "sliding_window": ("document",),
+    "realtime": ("chat",),
+}
+STRATEGIES = {
+    "vector": RAGService._vector_retrieve,
+    "sliding_window": RAGService._sliding_window_retrieve,
+    "realtime": RAGService._realtime_retrieve,
+}
+
+TOPICS = {
+    "photosynthesis": (
+        "photosynthesis chlorophyll light energy glucose leaves carbon dioxide oxygen",
+        "光合作用 叶绿素 光能 叶片",
+        ["How do plants turn light into energy?", "光合作用需要哪些条件？"],
+    ),
+    "germination": (
+        "seeds germination temperature water soil sprout radicle moisture",
+        "种子 发芽 温度 水分",
+        ["What makes seeds sprout faster?", "温度如何影响种子发芽？"],
+    ),
+    "circuits": (
+        "circuit battery resistor current voltage bulb series parallel wire",
+        "电路 电池 电流 电压",
+        ["Why does the bulb dim in a series circuit?", "串联电路中电流怎样变化？"],
+    ),
+    "erosion": (
+        "erosion river sediment rainfall slope vegetation runoff soil loss",
+        "侵蚀 河流 泥沙 降雨",
+        ["How does vegetation reduce soil loss on slopes?", "降雨对河流泥沙有什么影响？"],
+    ),
+    "fermentation": (
+        "yeast fermentation sugar carbon dioxide bubbles dough temperature ethanol",
+        "酵母 发酵 糖 气泡",
+        ["Why does dough rise with yeast?", "发酵产生的气泡是什么气体？"],
+    ),
+    "magnetism": (
+        "magnet poles attract repel compass field iron filings electromagnet",
+        "磁铁 磁极 吸引 排斥",
+        ["How can we map a magnetic field?", "磁铁的两极有什么特点？"],
+    ),
+}
+FILLER = (
+    "students group discuss evidence claim observe record data question report "
+    "teacher inquiry plan experiment measure compare explain result share"
+).split()
+
+
+def generate_corpus(seed: int = 7) -> dict:
+    """A labelled corpus where each topic has resources, documents, chats and queries."""
+    rng = random.Random(seed)
+
+    def sentence(words: List[str], topical: int) -> str:
+        picked = rng.sample(words, min(topical, len(words))) + rng.sample(FILLER, 6)
+        rng.shuffle(picked)
+        return " ".join(picked).capitalize() + "."
+
+    corpus = {"resources": [], "documents": [], "chats": [], "queries": []}
+    for name, (english, chinese, queries) in TOPICS.items():
+        words = english.split()
+        relevant = []
+        for i in range(2):
+            rid = f"res-{name}-{i}"
+            paragraphs = [
+                " ".join(sentence(words, 3) for _ in range(5)) + " " + chinese
+                for _ in range(rng.randint(4, 8))
+            ]
+            corpus["resources"].append({"id": rid, "title": f"{name} reader {i}", "text": "\n\n".join(paragraphs)})
+            relevant.append(rid)
+        for i in range(3):
+            did = f"doc-{name}-{i}"
+            corpus["documents"].append({
+                "id": did,
+                "title": f"Our {name} notes {i}",
+                "content": "<p>" + " ".join(sentence(words, 2) for _ in range(4)) + "</p>",
+            })
+            relevant.append(did)
+        for i in range(6):
+            cid = f"chat-{name}-{i}"
+            corpus["chats"].append({
+                "id": cid,
+                "user_id": f"student-{rng.randint(1, 5)}",
+                "content": sentence(words, 2) + " " + rng.choice(chinese.split()),
+            })
+            relevant.append(cid)
+        for query in queries:
+            corpus["queries"].append({"query": query, "relevant": relevant})
+
+    # Off-topic chatter every retrieval has to rank below the topical items
+    for i in range(40):
+        corpus["chats"].append({"id": f"chat-noise-{i}", "user_id": "student-0", "content": sentence(FILLER, 0)})
+    return corpus
+
+
+class HashingEmbeddings:
+    """Deterministic feature-hashing stand-in for the embedding model."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def use_hashing_embedder() -> None:
+    model = HashingEmbeddings()
+    RAGService._embedding_engine = EmbeddingEngine(lambda: model, batch_size=settings.RAG_EMBED_BATCH_SIZE)
+    RAGService._embedding_cache = EmbeddingCache("hashing")
+    RAGService._token_counter = TokenCounter()
+
+
+async def load_memory(corpus: dict) -> Dict[str, str]:
+    """Build the project's vector and BM25 indexes in-process.
+
+    Chunk text is served from memory in place of the ``resource_embeddings``
+    lookup, so retrieval runs end to end without Mongo.
+    """
+    if RAGService._embedding_cache is None:
+        # Keep the embedding cache in-process too
+        RAGService._embedding_cache = EmbeddingCache(RAGService.embedding_model_id())
+
+    counter = await RAGService.get_token_counter()
+    contents: Dict[str, str] = {}
+    index = None
+    for resource in corpus["resources"]:
+        chunker = StructuredChunker(
+            counter,
+            max_tokens=settings.RAG_CHUNK_TOKENS,
+            overlap_tokens=settings.RAG_CHUNK_OVERLAP_TOKENS,
+            min_tokens=settings.RAG_CHUNK_MIN_TOKENS,
+        )
+        chunks = chunker.feed(resource["text"]) + chunker.finish()
+        vectors = await RAGService.generate_embeddings([c.text for c in chunks])
+        if index is None:
+            index = ProjectVectorIndex(len(vectors[0]), settings.RAG_IVF_MIN_VECTORS, settings.RAG_IVF_NPROBE)
+        ids = [f"{resource['id']}:{i}" for i in range(len(chunks))]
+        index.add(vectors, ids, [resource["id"]] * len(ids), list(range(len(ids))))
+        contents.update(zip(ids, (c.text for c in chunks)))
+
+    if settings.RAG_INCREMENTAL_INDEXING:
+        # Documents and chats share the vector store, as incremental indexing does
+        context = [
+            (source_key("document", doc["id"]), document_text(SimpleNamespace(**doc)))
+            for doc in corpus["documents"]
+        ] + [(source_key("chat", chat["id"]), chat["content"]) for chat in corpus["chats"]]
+        for key, text in context:
+            texts = [c.text for c in await RAGService.chunk_text(text)] if key.startswith("document") else [text]
+            if not texts:
+                continue
+            vectors = await RAGService.generate_embeddings(texts)
+            if index is None:
+                index = ProjectVectorIndex(len(vectors[0]), settings.RAG_IVF_MIN_VECTORS, settings.RAG_IVF_NPROBE)
+            ids = [f"{key}:{i}" for i in range(len(texts))]
+            index.add(vectors, ids, [key] * len(ids), list(range(len(ids))))
+            contents.update(zip(ids, texts))
+    # Single process without Redis: no generations to keep in step with
+    vector_index_registry.generations = None
+    lexical_index_registry.generations = None
+    vector_index_registry._indexes[PROJECT_ID] = index
+
+    documents = BM25Index()
+    for doc in corpus["documents"]:
+        stand_in = SimpleNamespace(title=doc["title"], content=doc["content"], preview_text=None)
+        documents.upsert(doc["id"], *lexical_index_registry._document_text(stand_in))
+    chats = BM25Index()
+    for chat in corpus["chats"]:
+        chats.upsert(chat["id"], *lexical_index_registry._chat_text(SimpleNamespace(**chat)))
+    lexical_index_registry._indexes[(PROJECT_ID, "document")] = documents
+    lexical_index_registry._indexes[(PROJECT_ID, "chat")] = chats
+
+    async def chunk_contents(embedding_ids):
+        return {i: contents[i] for i in embedding_ids if i in contents}
+
+    RAGService._chunk_contents = staticmethod(chunk_contents)
+    return {}
+
+
+async def load_mongo(corpus: dict, db_name: str) -> Dict[str, str]:
+    """Write the corpus to a scratch database and index it the production way.
+
+    Returns the map from database ids back to fixture ids.
+    """
+    from app.core.db.mongodb import mongodb
+    from app.repositories.chat_log import ChatLog
+    from app.repositories.document import Document
+    from app.repositories.resource import Resource
+
+    settings.MONGODB_DB_NAME = db_name
+    await mongodb.connect()
+
+    id_map = {}
+    for item in corpus["resources"]:
+        resource = Resource(
+            project_id=PROJECT_ID, filename=item["title"], file_key=f"bench/{item['id']}",
+            url="", size=len(item["text"]), mime_type="text/plain", uploaded_by="rag-bench",
+        )
+        await resource.insert()
+        id_map[str(resource.id)] = item["id"]
+        await RAGService.process_resource(str(resource.id), item["text"])
+    for item in corpus["documents"]:
+        document = Document(
+            project_id=PROJECT_ID, title=item["title"], content=item["content"], last_modified_by="rag-bench"
+        )
+        await document.insert()
+        id_map[str(document.id)] = item["id"]
+    for item in corpus["chats"]:
+        chat = ChatLog(project_id=PROJECT_ID, user_id=item["user_id"], content=item["content"])
+        await chat.insert()
+        id_map[str(chat.id)] = item["id"]
+        incremental_indexer.add_chat(chat)
+    if settings.RAG_INCREMENTAL_INDEXING:
+        async for document in Document.find(Document.project_id == PROJECT_ID):
+            await incremental_indexer.embed_document_now(document)
+    await incremental_indexer.stop()
+    return id_map
+
+
+def ranked_ids(results: List[dict], id_map: Dict[str, str]) -> List[str]:
+    """Result ids in rank order, one entry per source item."""
+    return list(dict.fromkeys(id_map.get(r["id"], r["id"]) for r in results))
+
+
+def score(ranking: List[str], relevant: set, k: int) -> tuple:
+    top = ranking[:k]
+    recall = len(relevant.intersection(top)) / len(relevant)
+    rank = next((i for i, item in enumerate(ranking, start=1) if item in relevant), None)
+    return recall, 1.0 / rank if rank else 0.0
+
+
+def percentiles(samples: List[float]) -> dict:
+    ms = np.asarray(samples) * 1000
+    return {f"p{p}": round(float(np.percentile(ms, p)), 3) for p in (50, 95, 99)}
+
+
+async def evaluate(corpus: dict, id_map: Dict[str, str], k: int, repeats: int) -> dict:
+    types = {}
+    for source, items in (("resource", "resources"), ("document", "documents"), ("chat", "chats")):
+        types.update({item["id"]: source for item in corpus[items]})
+
+    names = [*STRATEGIES, "fused"]
+    quality = {name: {"recall": [], "mrr": []} for name in names}
+    latency = {name: [] for name in names}
+
+    for labelled in corpus["queries"]:
+        query, relevant = labelled["query"], set(labelled["relevant"])
+        for attempt in range(repeats):
+            for name, retrieve in STRATEGIES.items():
+                start = time.perf_counter()
+                results = await retrieve(PROJECT_ID, query, k)
+                latency[name].append(time.perf_counter() - start)
+                in_source = {r for r in relevant if types.get(r) in STRATEGY_TYPES[name]}
+                if attempt == 0 and in_source:
+                    recall, rr = score(ranked_ids(results, id_map), in_source, k)
+                    quality[name]["recall"].append(recall)
+                    quality[name]["mrr"].append(rr)
+
+            start = time.perf_counter()
+            context = await RAGService.retrieve_context(PROJECT_ID, query, k)
+            latency["fused"].append(time.perf_counter() - start)
+            if attempt == 0:
+                ranking = ranked_ids(
+                    [{"id": c["resource_id"]} for c in context["citations"]], id_map
+                )
+                recall, rr = score(ranking, relevant, k)
+                quality["fused"]["recall"].append(recall)
+                quality["fused"]["mrr"].append(rr)
+
+    return {
+        name: {
+            "queries": len(quality[name]["recall"]),
+            f"recall@{k}": round(float(np.mean(quality[name]["recall"])), 4) if quality[name]["recall"] else None,
+            "mrr": round(float(np.mean(quality[name]["mrr"])), 4) if quality[name]["mrr"] else None,
+            "latency_ms": percentiles(latency[name]),
+        }
+        for name in names
+    }
+
+
+async def run(args) -> dict:
+    corpus = json.loads(args.fixture.read_text(encoding="utf-8")) if args.fixture else generate_corpus()
+    if args.dump_fixture:
+        args.dump_fixture.write_text(json.dumps(corpus, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # Measure retrieval, not the result cache
+    retrieval_cache.ttl = 0
+    if args.embedder == "hashing":
+        use_hashing_embedder()
+
+    if args.mode == "mongo":
+        id_map = await load_mongo(corpus, args.db)
+    else:
+        id_map = await load_memory(corpus)
+
+    try:
+        # One untimed pass so lazy index builds and model warmup aren't measured
+        for labelled in corpus["queries"]:
+            await RAGService.retrieve_context(PROJECT_ID, labelled["query"], args.k)
+        results = await evaluate(corpus, id_map, args.k, args.repeats)
+    finally:
+        if args.mode == "mongo":
+            from app.core.db.mongodb import mongodb
+
+            if not args.keep:
+                await mongodb.client.drop_database(args.db)
+            await mongodb.disconnect()
+
+    return {
+        "config": {
+            "mode": args.mode,
+            "embedder": args.embedder if args.embedder == "hashing" else RAGService.embedding_model_id(),
+            "k": args.k,
+            "repeats": args.repeats,
+            "weights": {
+                "vector": RAGService.VECTOR_WEIGHT,
+                "sliding_window": RAGService.SLIDING_WINDOW_WEIGHT,
+                "realtime": RAGService.REALTIME_WEIGHT,
+            },
+            "chunk_tokens": settings.RAG_CHUNK_TOKENS,
+            "corpus": {key: len(corpus[key]) for key in ("resources", "documents", "chats", "queries")},
+        },
+        "strategies": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("memory", "mongo"), default="memory")
+    parser.add_argument("--embedder", choices=("model", "hashing"), default="model")
+    parser.add_argument("--fixture", type=Path)
+    parser.add_argument("--dump-fixture", type=Path)
+    parser.add_argument("--db", default=f"{settings.MONGODB_DB_NAME}_rag_bench")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database (mongo mode)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    k = args.k
+    print(f"{'strategy':<16}{'queries':>8}{f'recall@{k}':>11}{'mrr':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    print("-" * 70)
+    for name, row in report["strategies"].items():
+        lat = row["latency_ms"]
+        print(f"{name:<16}{row['queries']:>8}{str(row[f'recall@{k}']):>11}{str(row['mrr']):>8}"
+              f"{lat['p50']:>9}{lat['p95']:>9}{lat['p99']:>9}")
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
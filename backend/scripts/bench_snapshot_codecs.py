@@ -0,0 +1,186 @@
+"""Compare snapshot codecs on whiteboard, document and inquiry Yjs states.
+
+For each kind of state and each codec reports the compression ratio, encode
+and decode throughput, and median per-snapshot encode/decode time. The
+``zstd+dict`` row uses a dictionary trained on every other sample and is
+measured on the remaining ones, so it doesn't score samples it was trained on.
+
+States come from MongoDB (``--source mongo``, the latest snapshots and
+document versions) or are generated with y_py (``--source synthetic``):
+whiteboards as maps of shapes drawn by several clients and then moved, and
+documents as text typed, deleted and formatted over many edits.
+
+Usage:
+    python scripts/bench_snapshot_codecs.py [--source mongo|synthetic] [--limit 500] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.utils.snapshot_codec import decode_snapshot, dictionaries, encode_snapshot, train_dictionary
+
+COLORS = ["#1e1e1e", "#e03131", "#2f9e44", "#1971c2", "#f08c00"]
+WORDS = (
+    "light plants growth experiment evidence claim leaf area water temperature "
+    "seeds germination shaded group recorded data hypothesis 光合作用 探究 实验 数据"
+).split()
+
+
+def synthetic_whiteboard(rng: random.Random, shapes: int) -> bytes:
+    import y_py as Y
+
+    docs = [Y.YDoc(client_id=rng.randrange(1, 2**31)) for _ in range(3)]
+    elements = docs[0].get_map("elements")
+    for i in range(shapes):
+        doc = docs[i % len(docs)]
+        with doc.begin_transaction() as t:
+            doc.get_map("elements").set(t, f"shape-{i}-{rng.randrange(10**6)}", {
+                "type": rng.choice(["freedraw", "rectangle", "ellipse", "arrow", "text"]),
+                "x": rng.uniform(0, 2000), "y": rng.uniform(0, 1200),
+                "strokeColor": rng.choice(COLORS), "strokeWidth": rng.choice([1, 2, 4]),
+                "points": [[round(rng.uniform(-50, 50), 2), round(rng.uniform(-50, 50), 2)] for _ in range(rng.randrange(2, 40))],
+                "text": " ".join(rng.choices(WORDS, k=rng.randrange(0, 6))),
+            })
+        # Everyone syncs with everyone, as connected clients would
+        update = Y.encode_state_as_update(doc)
+        for other in docs:
+            if other is not doc:
+                Y.apply_update(other, update)
+    keys = list(elements.keys())
+    for _ in range(shapes // 2):
+        with docs[0].begin_transaction() as t:
+            key = rng.choice(keys)
+            moved = dict(elements[key])
+            moved["x"] += rng.uniform(-20, 20)
+            elements.set(t, key, moved)
+    return Y.encode_state_as_update(docs[0])
+
+
+def synthetic_document(rng: random.Random, edits: int) -> bytes:
+    import y_py as Y
+
+    doc = Y.YDoc(client_id=rng.randrange(1, 2**31))
+    text = doc.get_text("prosemirror")
+    # y_py offsets count UTF-8 bytes; ASCII words keep str() lengths valid offsets
+    words_ascii = [w for w in WORDS if w.isascii()]
+    for _ in range(edits):
+        with doc.begin_transaction() as t:
+            length = len(str(text))
+            if length > 40 and rng.random() < 0.2:
+                start = rng.randrange(length - 10)
+                text.delete_range(t, start, rng.randrange(1, 10))
+            elif length > 40 and rng.random() < 0.1:
+                text.format(t, rng.randrange(length - 20), 15, {"bold": True})
+            else:
+                words = " ".join(rng.choices(words_ascii, k=rng.randrange(1, 8))) + " "
+                text.insert(t, rng.randrange(length + 1), words)
+    return Y.encode_state_as_update(doc)
+
+
+def synthetic_samples(count: int) -> Dict[str, List[bytes]]:
+    rng = random.Random(7)
+    return {
+        "whiteboard": [synthetic_whiteboard(rng, rng.randrange(20, 200)) for _ in range(count)],
+        "document": [synthetic_document(rng, rng.randrange(50, 600)) for _ in range(count)],
+    }
+
+
+async def mongo_samples(limit: int) -> Dict[str, List[bytes]]:
+    from train_snapshot_dictionary import collect_samples
+
+    from app.core.db.mongodb import mongodb
+
+    await mongodb.connect()
+    try:
+        return await collect_samples(limit)
+    finally:
+        await mongodb.disconnect()
+
+
+def measure(states: List[bytes], codec: str) -> dict:
+    encoded, encode_times, decode_times = [], [], []
+    for state in states:
+        start = time.perf_counter()
+        payload, used = encode_snapshot(state, codec)
+        encode_times.append(time.perf_counter() - start)
+        encoded.append((payload, used))
+    for (payload, used), state in zip(encoded, states):
+        start = time.perf_counter()
+        decoded = decode_snapshot(payload, used)
+        decode_times.append(time.perf_counter() - start)
+        assert decoded == state
+
+    raw = sum(map(len, states))
+    stored = sum(len(p) for p, _ in encoded)
+    return {
+        "ratio": round(raw / stored, 2),
+        "stored_kb": round(stored / 1024, 1),
+        "encode_mb_s": round(raw / 1024 / 1024 / max(sum(encode_times), 1e-9), 1),
+        "decode_mb_s": round(raw / 1024 / 1024 / max(sum(decode_times), 1e-9), 1),
+        "encode_ms_p50": round(statistics.median(encode_times) * 1000, 3),
+        "decode_ms_p50": round(statistics.median(decode_times) * 1000, 3),
+    }
+
+
+def bench_kind(states: List[bytes], dict_size: int) -> dict:
+    train, test = states[::2], states[1::2]
+    rows = {"samples": len(test), "raw_kb": round(sum(map(len, test)) / 1024, 1), "codecs": {}}
+    dictionaries.active_id = 0
+    for codec in ("none", "zlib", "zstd"):
+        rows["codecs"][codec] = measure(test, codec)
+    try:
+        dictionaries.activate(train_dictionary(train, dict_size))
+        rows["codecs"]["zstd+dict"] = measure(test, "zstd")
+    except Exception as e:
+        rows["codecs"]["zstd+dict"] = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        dictionaries.active_id = 0
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["mongo", "synthetic"], default="mongo")
+    parser.add_argument("--limit", type=int, default=500, help="Samples per kind")
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    if args.source == "mongo":
+        samples = asyncio.run(mongo_samples(args.limit))
+    else:
+        samples = synthetic_samples(args.limit)
+
+    report = {"source": args.source, "kinds": {}}
+    for kind, states in samples.items():
+        if len(states) < 4:
+            continue
+        report["kinds"][kind] = bench_kind(states, args.dict_size)
+
+    print(f"{'kind':<12}{'codec':<11}{'ratio':>7}{'enc MB/s':>10}{'dec MB/s':>10}{'enc ms':>9}{'dec ms':>9}")
+    print("-" * 68)
+    for kind, rows in report["kinds"].items():
+        for codec, row in rows["codecs"].items():
+            if "error" in row:
+                print(f"{kind:<12}{codec:<11}  {row['error']}")
+                continue
+            print(f"{kind:<12}{codec:<11}{row['ratio']:>7}{row['encode_mb_s']:>10}{row['decode_mb_s']:>10}"
+                  f"{row['encode_ms_p50']:>9}{row['decode_ms_p50']:>9}")
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,599 @@
+"""Load test the collaboration websockets: Yjs (``/ysocket``) and Socket.IO operations.
+
+Simulates ``--clients`` authenticated users in each of ``--rooms`` rooms. Like
+the frontend, every user holds a Yjs websocket and a Socket.IO connection:
+
+- ``yjs_update``: whiteboard shapes written to a Y.Map, sent as Yjs updates
+- ``yjs_awareness``: cursor awareness messages
+- ``sio_op``: whiteboard ``operation`` events (batched by the server)
+- ``sio_chat``: chat ``message`` operations
+
+Every payload carries its send time, so each receiver measures fan-out
+latency. Expected deliveries are sends times the other users in the room;
+what hasn't arrived ``--drain`` seconds after sending stops counts as
+dropped. Server CPU and RSS are sampled throughout. The report (printed,
+and written as JSON with ``--output``) is meant to be compared release to
+release.
+
+By default the script starts ``--workers`` local server processes with
+in-memory stand-ins: room access is granted, users are stubs, the Yjs
+update log is kept in memory and chat messages are broadcast without being
+stored. More than one worker needs a local Redis (``REDIS_URL``) and turns
+on Socket.IO and Yjs replication through it. ``--target`` runs against an
+app you started (local Mongo and Redis); give it projects and member user
+ids to mint tokens for.
+
+Usage:
+    python scripts/load_test_websockets.py [--rooms 10] [--clients 5] [--duration 30] [--rate 10] [--workers 1] [--output report.json]
+    python scripts/load_test_websockets.py --target http://localhost:8000 --projects P1 P2 --users U1 U2 U3
+
+The Socket.IO client needs ``aiohttp`` and the Yjs client ``websockets``
+(part of ``uvicorn[standard]``); a path whose client is missing is skipped.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+BACKEND_DIR = Path(__file__).parent.parent
+PATHS = ("yjs_update", "yjs_awareness", "sio_op", "sio_chat")
+
+
+# --- Local server with in-memory stand-ins ---------------------------------
+
+
+class MemoryUpdateStore:
+    """The Yjs update log and snapshots of one server process."""
+
+    def __init__(self):
+        self.snapshots: Dict[tuple, tuple] = {}
+        self.batches: Dict[tuple, list] = defaultdict(list)
+
+    async def append(self, resource_id, snapshot_type, seq, updates):
+        self.batches[(resource_id, snapshot_type)].append((seq, list(updates)))
+
+    async def load(self, resource_id, snapshot_type):
+        key = (resource_id, snapshot_type)
+        state, snapshot_seq = self.snapshots.get(key, (None, 0))
+        tail = [b for b in sorted(self.batches[key]) if b[0] > snapshot_seq]
+        updates = [u for _, batch in tail for u in batch]
+        seq = max([snapshot_seq] + [s for s, _ in tail])
+        return state, updates, seq, sum(map(len, updates))
+
+    async def read(self, resource_id, snapshot_type, upto):
+        key = (resource_id, snapshot_type)
+        state, snapshot_seq = self.snapshots.get(key, (None, 0))
+        tail = [b for b in sorted(self.batches[key]) if snapshot_seq < b[0] <= upto]
+        return ([state] if state else []) + [u for _, batch in tail for u in batch]
+
+    async def save_snapshot(self, resource_id, snapshot_type, state, seq):
+        key = (resource_id, snapshot_type)
+        if self.snapshots.get(key, (None, 0))[1] > seq:
+            return False
+        self.snapshots[key] = (state, seq)
+        return True
+
+    async def truncate(self, resource_id, snapshot_type, seq):
+        key = (resource_id, snapshot_type)
+        self.batches[key] = [b for b in self.batches[key] if b[0] > seq]
+
+
+def serve(port: int) -> None:
+    """Run the collaboration endpoints with in-memory stand-ins for Mongo."""
+    from types import SimpleNamespace
+
+    import uvicorn
+    from fastapi import FastAPI, Query, WebSocket
+
+    from app.repositories.user import User
+    from app.services.collaboration.update_log import update_log
+    from app.websocket import operation_dispatcher, yjs_server
+    from app.websocket.socketio_server import socketio_app
+
+    async def grant_access(room_name, user_id):
+        return True
+
+    async def get_user(user_id):
+        return SimpleNamespace(username=user_id, avatar_url=None)
+
+    async def broadcast_chat(sio, sid, data, user_id):
+        # The real handler stores the message and indexes it for RAG first
+        await sio.emit("operation", data, room=data.get("roomId"), skip_sid=sid)
+
+    yjs_server.validate_room_access = grant_access
+    User.get = get_user
+    update_log.store = MemoryUpdateStore()
+    operation_dispatcher.handle_chat_op = broadcast_chat
+
+    app = FastAPI()
+
+    @app.websocket("/ysocket/{room_name:path}")
+    async def ysocket_route(websocket: WebSocket, room_name: str, token: str = Query(None)):
+        await yjs_server.websocket_endpoint(websocket, room_name, token)
+
+    app.mount("/socket.io", socketio_app)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_workers(count: int) -> List[subprocess.Popen]:
+    env = dict(os.environ)
+    if count > 1:
+        env.update({"SOCKETIO_REDIS": "true", "COLLAB_REPLICATION": "true"})
+    processes = []
+    for _ in range(count):
+        port = _free_port()
+        process = subprocess.Popen(
+            [sys.executable, __file__, "--serve", str(port)], cwd=BACKEND_DIR, env=env
+        )
+        process.port = port
+        processes.append(process)
+    deadline = time.monotonic() + 60
+    for process in processes:
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", process.port), timeout=0.2):
+                    break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Server on port {process.port} did not start")
+                time.sleep(0.2)
+    return processes
+
+
+# --- Measurements -----------------------------------------------------------
+
+
+class Stats:
+    """Sends, deliveries and latencies per path."""
+
+    def __init__(self):
+        self.sent = defaultdict(int)
+        self.expected = defaultdict(int)
+        self.received = defaultdict(int)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.connect_ms: List[float] = []
+        self.connect_failures = 0
+        self.errors = defaultdict(int)
+
+    def send(self, path: str, peers: int) -> None:
+        self.sent[path] += 1
+        self.expected[path] += peers
+
+    def receive(self, path: str, sent_at: float) -> None:
+        self.received[path] += 1
+        self.latencies[path].append((time.time() - sent_at) * 1000)
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 2)
+
+
+class ResourceSampler:
+    """CPU and RSS of the server processes, sampled in the background."""
+
+    def __init__(self, pids: List[int], interval: float = 0.5):
+        self.pids = pids
+        self.interval = interval
+        self.cpu: List[float] = []
+        self.rss: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _read(pid: int):
+        """(cpu seconds, rss bytes) of a process."""
+        try:
+            import psutil
+
+            process = psutil.Process(pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss
+        except ImportError:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            with open(f"/proc/{pid}/statm") as f:
+                pages = int(f.read().split()[1])
+            return (int(fields[11]) + int(fields[12])) / ticks, pages * os.sysconf("SC_PAGE_SIZE")
+
+    async def _run(self) -> None:
+        last = {pid: self._read(pid)[0] for pid in self.pids}
+        last_time = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            cpu, rss = 0.0, 0
+            for pid in self.pids:
+                seconds, size = self._read(pid)
+                cpu += (seconds - last[pid]) / (now - last_time) * 100
+                rss += size
+                last[pid] = seconds
+            last_time = now
+            self.cpu.append(cpu)
+            self.rss.append(rss)
+
+    def start(self) -> None:
+        if self.pids:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                # A server that exited mid-sample ends sampling early
+                pass
+        if not self.cpu:
+            return {}
+        return {
+            "processes": len(self.pids),
+            "cpu_percent_avg": round(statistics.mean(self.cpu), 1),
+            "cpu_percent_max": round(max(self.cpu), 1),
+            "rss_mb_max": round(max(self.rss) / 1024 / 1024, 1),
+        }
+
+
+# --- Clients ----------------------------------------------------------------
+
+
+class YjsClient:
+    """A Yjs websocket client drawing shapes and moving its cursor."""
+
+    def __init__(self, url: str, user_id: str, peers: int, stats: Stats):
+        import y_py as Y
+
+        self.Y = Y
+        self.url = url
+        self.user_id = user_id
+        self.peers = peers
+        self.stats = stats
+        self.doc = Y.YDoc()
+        self.shapes = self.doc.get_map("shapes")
+        self.shapes.observe(self._on_shapes)
+        self.ws = None
+        self.seq = 0
+
+    async def connect(self) -> None:
+        import websockets
+
+        self.ws = await websockets.connect(self.url, max_size=None)
+        self._reader = asyncio.create_task(self._read())
+
+    def _on_shapes(self, event) -> None:
+        for change in event.keys.values():
+            value = change.get("newValue")
+            if isinstance(value, dict) and value.get("by") != self.user_id and "sent" in value:
+                self.stats.receive("yjs_update", value["sent"])
+
+    async def _read(self) -> None:
+        from ypy_websocket.yutils import Decoder, create_sync_step2_message, read_message
+
+        try:
+            async for message in self.ws:
+                if message[0] == 0:  # Sync
+                    payload = read_message(message[2:])
+                    if message[1] == 0:
+                        await self.ws.send(create_sync_step2_message(self.Y.encode_state_as_update(self.doc, payload)))
+                    elif payload != b"\x00\x00":
+                        self.Y.apply_update(self.doc, payload)
+                elif message[0] == 1:  # Awareness
+                    decoder = Decoder(read_message(message[1:]))
+                    for _ in range(decoder.read_var_uint()):
+                        decoder.read_var_uint()  # client id
+                        decoder.read_var_uint()  # clock
+                        state = json.loads(decoder.read_var_string() or "null") or {}
+                        if state.get("user") != self.user_id and "sent" in state:
+                            self.stats.receive("yjs_awareness", state["sent"])
+        except Exception as e:
+            self.stats.errors[f"yjs: {type(e).__name__}"] += 1
+
+    async def draw(self) -> None:
+        from ypy_websocket.yutils import create_update_message
+
+        before = self.Y.encode_state_vector(self.doc)
+        self.seq += 1
+        with self.doc.begin_transaction() as t:
+            self.shapes.set(t, f"{self.user_id}-{self.seq}", {
+                "by": self.user_id,
+                "sent": time.time(),
+                "type": "freedraw",
+                "points": [[round(random.uniform(-50, 50), 1), round(random.uniform(-50, 50), 1)] for _ in range(20)],
+            })
+        await self.ws.send(create_update_message(self.Y.encode_state_as_update(self.doc, before)))
+        self.stats.send("yjs_update", self.peers)
+
+    async def move_cursor(self) -> None:
+        from ypy_websocket.yutils import write_var_uint
+
+        self.seq += 1
+        state = json.dumps({"user": self.user_id, "sent": time.time(), "cursor": [random.random(), random.random()]}).encode()
+        update = write_var_uint(1) + write_var_uint(self.doc.client_id) + write_var_uint(self.seq) + write_var_uint(len(state)) + state
+        await self.ws.send(bytes([1]) + write_var_uint(len(update)) + update)
+        self.stats.send("yjs_awareness", self.peers)
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+
+
+class SioClient:
+    """A Socket.IO client sending whiteboard and chat operations."""
+
+    def __init__(self, url: str, token: str, user_id: str, room_id: str, peers: int, stats: Stats):
+        import socketio
+
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.url = url
+        self.token = token
+        self.user_id = user_id
+        self.room_id = room_id
+        self.peers = peers
+        self.stats = stats
+        self.sio.on("operation", self._on_op)
+        self.sio.on("batch-operations", lambda data: [self._on_op(op) for op in data.get("operations", [])])
+
+    def _on_op(self, op: dict) -> None:
+        data = op.get("data") or {}
+        if data.get("by") == self.user_id or "sent" not in data:
+            return
+        self.stats.receive("sio_chat" if op.get("module") == "chat" else "sio_op", data["sent"])
+
+    async def connect(self) -> None:
+        joined = asyncio.Event()
+        self.sio.on("room_joined", lambda data: joined.set())
+        await self.sio.connect(self.url, auth={"token": self.token}, transports=["websocket"])
+        await self.sio.emit("join_room", {"roomId": self.room_id, "module": "whiteboard"})
+        await asyncio.wait_for(joined.wait(), timeout=10)
+
+    async def draw(self) -> None:
+        await self.sio.emit("operation", {
+            "id": uuid.uuid4().hex,
+            "module": "whiteboard",
+            "roomId": self.room_id,
+            "type": "update",
+            "data": {"by": self.user_id, "sent": time.time(), "x": random.uniform(0, 2000), "y": random.uniform(0, 1200)},
+        })
+        self.stats.send("sio_op", self.peers)
+
+    async def chat(self) -> None:
+        await self.sio.emit("operation", {
+            "id": uuid.uuid4().hex,
+            "module": "chat",
+            "roomId": self.room_id,
+            "type": "message",
+            "data": {"by": self.user_id, "sent": time.time(), "messageId": uuid.uuid4().hex, "content": "load test", "mentions": []},
+        })
+        self.stats.send("sio_chat", self.peers)
+
+    async def close(self) -> None:
+        await self.sio.disconnect()
+
+
+# --- Run --------------------------------------------------------------------
+
+
+async def run_user(args, base_url: str, project_id: str, user_id: str, stats: Stats, stop: asyncio.Event) -> None:
+    from app.services.auth_service import create_access_token
+
+    token = create_access_token({"sub": user_id})
+    peers = args.clients - 1
+    clients = []
+    start = time.perf_counter()
+    try:
+        if "yjs" in args.paths:
+            ws_url = base_url.replace("http", "ws", 1) + f"/ysocket/wb:{project_id}?token={token}"
+            yjs = YjsClient(ws_url, user_id, peers, stats)
+            await yjs.connect()
+            clients.append(yjs)
+        if "sio" in args.paths or "chat" in args.paths:
+            sio = SioClient(base_url, token, user_id, f"project:{project_id}", peers, stats)
+            await sio.connect()
+            clients.append(sio)
+    except Exception as e:
+        stats.connect_failures += 1
+        stats.errors[f"connect: {type(e).__name__}: {e}"] += 1
+        for client in clients:
+            await client.close()
+        return
+    stats.connect_ms.append((time.perf_counter() - start) * 1000)
+
+    # Everyone starts sending together, with jittered intervals
+    await args.all_connected.wait()
+    ticks = 0
+    try:
+        while not stop.is_set():
+            await asyncio.sleep(random.expovariate(args.rate))
+            if stop.is_set():
+                break
+            ticks += 1
+            for client in clients:
+                if isinstance(client, YjsClient):
+                    await client.draw()
+                    if ticks % max(int(args.rate), 1) == 0 and "awareness" in args.paths:
+                        await client.move_cursor()
+                else:
+                    if "sio" in args.paths:
+                        await client.draw()
+                    if "chat" in args.paths and random.random() < args.chat_ratio:
+                        await client.chat()
+    except Exception as e:
+        stats.errors[f"send: {type(e).__name__}"] += 1
+    await asyncio.sleep(args.drain)
+    for client in clients:
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+async def run(args) -> dict:
+    processes: List[subprocess.Popen] = []
+    if args.target:
+        base_urls = [args.target.rstrip("/")]
+        projects = args.projects
+        users = args.users
+        if not projects or len(users) < args.clients:
+            raise SystemExit("--target needs --projects and at least --clients member --users")
+    else:
+        processes = start_workers(args.workers)
+        base_urls = [f"http://127.0.0.1:{p.port}" for p in processes]
+        projects = [f"load{i}-{uuid.uuid4().hex[:8]}" for i in range(args.rooms)]
+        users = [f"user{i}" for i in range(args.clients)]
+
+    stats = Stats()
+    sampler = ResourceSampler([p.pid for p in processes] + args.server_pids)
+    stop = asyncio.Event()
+    args.all_connected = asyncio.Event()
+    try:
+        sampler.start()
+        tasks = []
+        for r, project_id in enumerate(projects[: args.rooms]):
+            for c in range(args.clients):
+                # Spread a room's users over the workers, as a load balancer would
+                base_url = base_urls[(r + c) % len(base_urls)]
+                tasks.append(asyncio.create_task(run_user(args, base_url, project_id, users[c], stats, stop)))
+                await asyncio.sleep(args.ramp / max(args.rooms * args.clients, 1))
+        await asyncio.sleep(0.5)
+        args.all_connected.set()
+        started = time.monotonic()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        elapsed = time.monotonic() - started
+        await asyncio.gather(*tasks)
+        server = await sampler.stop()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    paths = {}
+    for path in PATHS:
+        if not stats.sent[path]:
+            continue
+        latencies = stats.latencies[path]
+        dropped = max(stats.expected[path] - stats.received[path], 0)
+        paths[path] = {
+            "sent": stats.sent[path],
+            "expected": stats.expected[path],
+            "received": stats.received[path],
+            "dropped": dropped,
+            "drop_rate": round(dropped / max(stats.expected[path], 1), 4),
+            "sent_per_s": round(stats.sent[path] / elapsed, 1),
+            "latency_ms": {
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+                "p99": _percentile(latencies, 0.99),
+                "max": round(max(latencies), 2) if latencies else None,
+            },
+        }
+    try:
+        version = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        version = ""
+    return {
+        "version": version,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "target": args.target or "local",
+            "workers": len(base_urls) if args.target else args.workers,
+            "rooms": min(args.rooms, len(projects)),
+            "clients_per_room": args.clients,
+            "rate_per_client": args.rate,
+            "duration": args.duration,
+            "paths": args.paths,
+        },
+        "connections": {
+            "ok": len(stats.connect_ms),
+            "failed": stats.connect_failures,
+            "connect_ms_p50": _percentile(stats.connect_ms, 0.5),
+            "connect_ms_p95": _percentile(stats.connect_ms, 0.95),
+        },
+        "paths": paths,
+        "server": server,
+        "errors": dict(stats.errors),
+    }
+
+
+def available_paths(requested: List[str]) -> List[str]:
+    paths = list(requested)
+    for module, needs in (("websockets", ("yjs", "awareness")), ("aiohttp", ("sio", "chat"))):
+        try:
+            __import__(module)
+        except ImportError:
+            skipped = [p for p in paths if p in needs]
+            if skipped:
+                print(f"Skipping {', '.join(skipped)}: {module} is not installed")
+            paths = [p for p in paths if p not in needs]
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=5, help="Users per room")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of sending")
+    parser.add_argument("--rate", type=float, default=10.0, help="Updates per second per user and path")
+    parser.add_argument("--chat-ratio", type=float, default=0.02, help="Chance a tick also sends a chat message")
+    parser.add_argument("--paths", nargs="+", default=["yjs", "awareness", "sio", "chat"],
+                        choices=["yjs", "awareness", "sio", "chat"])
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which users connect")
+    parser.add_argument("--drain", type=float, default=2.0, help="Seconds to wait for deliveries after sending")
+    parser.add_argument("--workers", type=int, default=1, help="Local server processes (ignored with --target)")
+    parser.add_argument("--target", help="Base URL of a running app")
+    parser.add_argument("--projects", nargs="*", default=[], help="Project ids to use as rooms with --target")
+    parser.add_argument("--users", nargs="*", default=[], help="Member user ids with --target")
+    parser.add_argument("--server-pids", nargs="*", type=int, default=[], help="Server processes to sample with --target")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    args.paths = available_paths(args.paths)
+    if not args.paths:
+        raise SystemExit("No path left to test")
+    report = asyncio.run(run(args))
+
+    print(f"\n{'path':<15}{'sent/s':>9}{'dropped':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    print("-" * 70)
+    for path, row in report["paths"].items():
+        latency = row["latency_ms"]
+        print(f"{path:<15}{row['sent_per_s']:>9}{row['drop_rate']:>9.2%}"
+              f"{latency['p50'] or '-':>9}{latency['p95'] or '-':>9}{latency['p99'] or '-':>9}{latency['max'] or '-':>9}")
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Train the zstd dictionary used to compress collaborative snapshots.
+
+Samples the latest Yjs states of whiteboards, documents and inquiry spaces
+from MongoDB, trains a dictionary on them and writes it to
+``COLLAB_ZSTD_DICT_DIR`` as ``<dict_id>.zdict``. New snapshots use the newest
+dictionary; keep older files so snapshots written with them stay readable.
+
+Usage:
+    python scripts/train_snapshot_dictionary.py [--limit 2000] [--size 65536] [--output-dir DIR]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Add backend directory to sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.db.mongodb import mongodb
+from app.core.utils.snapshot_codec import DICT_SUFFIX, train_dictionary
+
+
+async def collect_samples(limit: int) -> Dict[str, List[bytes]]:
+    """Most recent raw states per kind (whiteboard, document, inquiry)."""
+    from app.repositories.collaboration_snapshot import CollaborationSnapshot
+    from app.repositories.document import DocumentVersion
+    from app.repositories.inquiry_snapshot import InquirySnapshot
+
+    samples: Dict[str, List[bytes]] = {"whiteboard": [], "document": [], "inquiry": []}
+    async for snapshot in CollaborationSnapshot.find().sort("-updated_at").limit(limit):
+        state = snapshot.get_state()
+        if state:
+            samples.setdefault(snapshot.snapshot_type or "whiteboard", []).append(state)
+    async for version in DocumentVersion.find().sort("-created_at").limit(limit):
+        state = version.get_state()
+        if state:
+            samples["document"].append(state)
+    async for snapshot in InquirySnapshot.find().sort("-created_at").limit(limit):
+        samples["inquiry"].append(snapshot.get_state())
+    return {kind: states for kind, states in samples.items() if states}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=2000, help="Samples per source collection")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Dictionary size in bytes")
+    parser.add_argument("--output-dir", default=settings.COLLAB_ZSTD_DICT_DIR)
+    args = parser.parse_args()
+
+    await mongodb.connect()
+    try:
+        samples = await collect_samples(args.limit)
+    finally:
+        await mongodb.disconnect()
+
+    states = [state for kind in samples.values() for state in kind]
+    for kind, kind_states in samples.items():
+        print(f"{kind:<12}{len(kind_states):>6} samples {sum(map(len, kind_states)) / 1024:>10.1f} KB")
+    if len(states) < 10:
+        print("Not enough snapshots to train a dictionary")
+        sys.exit(1)
+
+    dictionary = train_dictionary(states, args.size)
+    import zstandard
+
+    dict_id = zstandard.ZstdCompressionDict(dictionary).dict_id()
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{dict_id}{DICT_SUFFIX}")
+    with open(path, "wb") as f:
+        f.write(dictionary)
+    print(f"\nWrote dictionary {dict_id} ({len(dictionary)} bytes) to {path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
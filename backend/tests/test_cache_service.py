@@ -158,3 +158,19 @@ class TestCacheService:
             mock_delete_pattern.assert_any_call("project:*")
             mock_delete_pattern.assert_any_call("perm:*")
 
+
+    @pytest.mark.asyncio
+    async def test_invalidate_room_access_cache(self, cache_service):
+        """Test invalidating room access decisions of one user or a whole project."""
+        with patch('app.services.cache_service.delete_cache_pattern') as mock_delete_pattern:
+            await cache_service.invalidate_room_access_cache("project_456", "user_123")
+            await cache_service.invalidate_room_access_cache("project_456")
+
+            assert mock_delete_pattern.call_args_list[0][0][0] == "perm:project:project_456:room:*:user:user_123"
+            assert mock_delete_pattern.call_args_list[1][0][0] == "perm:project:project_456:room:*:user:*"
+
+    @pytest.mark.asyncio
+    async def test_invalidate_room_access_cache_redis_down(self, cache_service):
+        """Test a failed invalidation doesn't fail the membership change."""
+        with patch('app.services.cache_service.delete_cache_pattern', side_effect=ConnectionError("down")):
+            await cache_service.invalidate_room_access_cache("project_456", "user_123")
@@ -0,0 +1,63 @@
+"""Tests for batched broadcast of collaboration operations."""
+
+import asyncio
+
+import pytest
+
+from app.websocket.broadcast import BroadcastCoalescer
+
+
+class FakeSio:
+    """Records emits."""
+
+    def __init__(self):
+        self.emits = []
+
+    async def emit(self, event, data, room=None, skip_sid=None):
+        self.emits.append((event, data, room, skip_sid))
+
+
+def op(sender, n):
+    return {"type": "update", "data": {"sender": sender, "n": n}}
+
+
+class TestBroadcastCoalescer:
+    """Test batching window, size cap and per-sender ordering."""
+
+    @pytest.mark.asyncio
+    async def test_window_batches_per_sender_in_order(self):
+        """Test ops within the window become one frame per sender, each skipping its sender."""
+        sio, coalescer = FakeSio(), BroadcastCoalescer(window=0.02, max_ops=100)
+        for n in range(3):
+            await coalescer.add(sio, "wb:p1", "s1", op("s1", n))
+            await coalescer.add(sio, "wb:p1", "s2", op("s2", n))
+        await coalescer.add(sio, "doc:d1", "s3", op("s3", 0))
+        assert sio.emits == []
+        await asyncio.sleep(0.05)
+
+        batches = {(room, skip): data for event, data, room, skip in sio.emits if event == "batch-operations"}
+        assert [o["data"]["n"] for o in batches[("wb:p1", "s1")]["operations"]] == [0, 1, 2]
+        assert [o["data"]["n"] for o in batches[("wb:p1", "s2")]["operations"]] == [0, 1, 2]
+        assert ("operation", op("s3", 0), "doc:d1", "s3") in sio.emits
+        assert coalescer.stats == {"ops": 7, "frames": 3, "frames_saved": 4}
+
+    @pytest.mark.asyncio
+    async def test_size_cap_flushes_early(self):
+        """Test a full buffer is sent before the window ends, and later ops follow it."""
+        sio, coalescer = FakeSio(), BroadcastCoalescer(window=10, max_ops=3)
+        for n in range(3):
+            await coalescer.add(sio, "wb:p1", "s1", op("s1", n))
+        await asyncio.sleep(0.01)
+        await coalescer.add(sio, "wb:p1", "s1", op("s1", 3))
+
+        assert [o["data"]["n"] for o in sio.emits[0][1]["operations"]] == [0, 1, 2]
+        await coalescer.stop()
+        assert sio.emits[1][:2] == ("operation", op("s1", 3))
+
+    @pytest.mark.asyncio
+    async def test_zero_window_emits_directly(self):
+        """Test batching can be turned off."""
+        sio, coalescer = FakeSio(), BroadcastCoalescer(window=0)
+        await coalescer.add(sio, "wb:p1", "s1", op("s1", 0))
+
+        assert sio.emits == [("operation", op("s1", 0), "wb:p1", "s1")]
@@ -0,0 +1,77 @@
+"""Tests for the room-state handshake on join."""
+
+import base64
+
+import pytest
+
+from app.websocket.handlers import collaboration_handler
+from app.websocket.handlers.collaboration_handler import missing_update, sync_yjs_state
+
+Y = pytest.importorskip("y_py")
+
+
+def _text_doc(*chunks):
+    doc = Y.YDoc()
+    text = doc.get_text("prosemirror")
+    for chunk in chunks:
+        with doc.begin_transaction() as t:
+            text.extend(t, chunk)
+    return doc
+
+
+class FakeSio:
+    """Records emits."""
+
+    def __init__(self):
+        self.emits = []
+
+    async def emit(self, event, data, room=None):
+        self.emits.append((event, data, room))
+
+
+class FakeDocument:
+    def __init__(self, state):
+        self.content_state = state
+
+
+class TestJoinSync:
+    """Test state-vector diffs, binary payloads and the base64 fallback."""
+
+    def test_missing_update_holds_only_new_edits(self):
+        """Test a client with older state receives just what it lacks."""
+        server = _text_doc("x" * 2000)
+        client = Y.YDoc()
+        Y.apply_update(client, Y.encode_state_as_update(server))
+        with server.begin_transaction() as t:
+            server.get_text("prosemirror").extend(t, "tail")
+
+        state = Y.encode_state_as_update(server)
+        update = missing_update(state, Y.encode_state_vector(client))
+        Y.apply_update(client, update)
+
+        assert len(update) < 100 < len(state)
+        assert str(client.get_text("prosemirror")) == "x" * 2000 + "tail"
+
+    def test_unusable_state_vector_falls_back_to_full_state(self):
+        """Test a malformed state vector still gets the full state."""
+        state = Y.encode_state_as_update(_text_doc("hello"))
+
+        assert missing_update(state, b"\xff\xff\xff") == state
+        assert missing_update(state, None) == state
+
+    @pytest.mark.asyncio
+    async def test_join_with_state_vector_gets_binary_diff(self, monkeypatch):
+        """Test a client sending its state vector gets raw bytes, and old clients base64."""
+        state = Y.encode_state_as_update(_text_doc("hello"))
+
+        async def get_document(doc_id):
+            return FakeDocument(state)
+
+        monkeypatch.setattr(collaboration_handler.Document, "get", get_document)
+        sio = FakeSio()
+        await sync_yjs_state(sio, "s1", "doc:d1", "document", state_vector=Y.encode_state_vector(Y.YDoc()))
+        await sync_yjs_state(sio, "s2", "doc:d1", "document")
+
+        (_, diff, _), (_, legacy, _) = sio.emits
+        assert isinstance(diff["state"], bytes) and diff["isDiff"]
+        assert base64.b64decode(legacy["state"]) == state and not legacy["isDiff"]
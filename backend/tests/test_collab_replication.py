@@ -0,0 +1,129 @@
+"""Tests for cross-worker room replication."""
+
+import asyncio
+
+import pytest
+
+from app.services.collaboration import replication
+from app.services.collaboration.replication import RoomReplicator
+
+
+class FakeBroker:
+    """In-memory Redis pub/sub shared by several workers."""
+
+    def __init__(self):
+        self.subscribers = []
+        self.down = False
+
+    async def client(self):
+        return FakeClient(self)
+
+
+class FakeClient:
+    def __init__(self, broker):
+        self.broker = broker
+
+    def pubsub(self):
+        pubsub = FakePubSub(self.broker)
+        self.broker.subscribers.append(pubsub)
+        return pubsub
+
+    async def publish(self, channel, frame):
+        if self.broker.down:
+            raise ConnectionError("redis down")
+        for pubsub in self.broker.subscribers:
+            if channel in pubsub.channels:
+                pubsub.inbox.put_nowait({"type": "message", "channel": channel.encode(), "data": frame})
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        if self.broker.down:
+            raise ConnectionError("redis down")
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout=min(timeout, 0.01))
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.broker.subscribers.remove(self)
+
+
+async def settle():
+    await asyncio.sleep(0.05)
+
+
+class TestRoomReplicator:
+    """Test routing, echo suppression and recovery."""
+
+    @pytest.mark.asyncio
+    async def test_frames_reach_other_workers_in_order(self):
+        """Test a worker's frames reach peers in the same room in order, but not itself."""
+        broker = FakeBroker()
+        a, b = RoomReplicator(broker.client), RoomReplicator(broker.client)
+        received_a, received_b, other_room = [], [], []
+        await a.join("wb:1", lambda kind, payload: received_a.append((kind, payload)))
+        await b.join("wb:1", lambda kind, payload: received_b.append((kind, payload)))
+        await b.join("wb:2", lambda kind, payload: other_room.append(payload))
+
+        for update in (b"u1", b"u2", b"u3"):
+            a.publish("wb:1", replication.UPDATE, update)
+        a.publish("wb:1", replication.AWARENESS, b"\x01cursor")
+        await settle()
+
+        assert received_b == [(0, b"u1"), (0, b"u2"), (0, b"u3"), (1, b"\x01cursor")]
+        assert received_a == [] and other_room == []
+        assert a.stats["published"] == 4 and b.stats["received"] == 4
+        await a.stop()
+        await b.stop()
+
+    @pytest.mark.asyncio
+    async def test_left_rooms_and_disabled_replicator_are_silent(self):
+        """Test nothing is published for rooms not joined, or when replication is off."""
+        broker = FakeBroker()
+        a, b = RoomReplicator(broker.client), RoomReplicator(broker.client)
+        off = RoomReplicator(broker.client, enabled=False)
+        received = []
+        await a.join("doc:1", lambda kind, payload: None)
+        await off.join("doc:1", lambda kind, payload: None)
+        await b.join("doc:1", lambda kind, payload: received.append(payload))
+
+        await a.leave("doc:1")
+        a.publish("doc:1", replication.UPDATE, b"after-leave")
+        off.publish("doc:1", replication.UPDATE, b"disabled")
+        await settle()
+
+        assert received == []
+        assert len(broker.subscribers) == 2  # The disabled replicator never connects
+        await a.stop()
+        await b.stop()
+
+    @pytest.mark.asyncio
+    async def test_reconnect_resubscribes_and_requests_sync(self):
+        """Test a lost connection resubscribes every room and asks peers to resync."""
+        broker = FakeBroker()
+        a = RoomReplicator(broker.client, reconnect_delay=0.01)
+        resynced = []
+        await a.join("wb:1", lambda kind, payload: None, on_resubscribed=lambda: resynced.append("wb:1"))
+
+        broker.down = True
+        a.publish("wb:1", replication.UPDATE, b"lost")
+        await settle()
+        broker.down = False
+        await settle()
+
+        assert a.stats["publish_errors"] == 1
+        assert resynced and a.stats["reconnects"] >= 1
+        assert [p.channels for p in broker.subscribers] == [{"collab:room:wb:1"}]
+        await a.stop()
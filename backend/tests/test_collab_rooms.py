@@ -0,0 +1,93 @@
+"""Tests for collaborative room lifecycle management."""
+
+import asyncio
+
+import pytest
+
+from app.services.collaboration.rooms import RoomRegistry
+
+
+def make_registry(**kwargs):
+    opened, closed = [], []
+
+    async def open_room(name):
+        opened.append(name)
+        return object(), 100
+
+    async def close_room(name, room):
+        closed.append(name)
+
+    options = {"idle_timeout": 0.02, "max_rooms": 10}
+    options.update(kwargs)
+    return RoomRegistry(open_room, close_room, **options), opened, closed
+
+
+class TestRoomRegistry:
+    """Test reference counting, idle eviction and the LRU cap."""
+
+    @pytest.mark.asyncio
+    async def test_room_shared_and_opened_once(self):
+        """Test concurrent sessions share one loaded room."""
+        rooms, opened, _ = make_registry()
+
+        first, second = await asyncio.gather(rooms.acquire("wb:p1"), rooms.acquire("wb:p1"))
+
+        assert first is second
+        assert opened == ["wb:p1"]
+        assert rooms.stats()["rooms"][0]["clients"] == 2
+
+    @pytest.mark.asyncio
+    async def test_evicted_after_idle_timeout(self):
+        """Test a room is closed only after its last client leaves and the timeout passes."""
+        rooms, _, closed = make_registry()
+        await rooms.acquire("wb:p1")
+        await rooms.acquire("wb:p1")
+
+        await rooms.release("wb:p1")
+        await asyncio.sleep(0.05)
+        assert closed == [] and "wb:p1" in rooms
+
+        await rooms.release("wb:p1")
+        await asyncio.sleep(0.05)
+        assert closed == ["wb:p1"] and "wb:p1" not in rooms
+        assert rooms.evictions["idle"] == 1
+
+    @pytest.mark.asyncio
+    async def test_reconnect_cancels_eviction(self):
+        """Test rejoining within the idle timeout keeps the warm room."""
+        rooms, opened, closed = make_registry(idle_timeout=0.05)
+        await rooms.acquire("doc:d1")
+        await rooms.release("doc:d1")
+
+        await asyncio.sleep(0.01)
+        await rooms.acquire("doc:d1")
+        await asyncio.sleep(0.08)
+
+        assert opened == ["doc:d1"] and closed == []
+
+    @pytest.mark.asyncio
+    async def test_lru_cap_evicts_idle_rooms_only(self):
+        """Test the cap evicts least recently used idle rooms, never active ones."""
+        rooms, _, closed = make_registry(idle_timeout=60, max_rooms=2)
+        await rooms.acquire("wb:active")
+        await rooms.acquire("wb:old")
+        await rooms.release("wb:old")
+
+        await rooms.acquire("wb:new")
+        await rooms.acquire("wb:newer")
+
+        assert closed == ["wb:old"]
+        assert rooms.evictions["lru"] == 1
+        assert {r["name"] for r in rooms.stats()["rooms"]} == {"wb:active", "wb:new", "wb:newer"}
+
+    @pytest.mark.asyncio
+    async def test_byte_accounting(self):
+        """Test sizes start at the loaded bytes and follow updates and re-measures."""
+        rooms, _, _ = make_registry()
+        await rooms.acquire("wb:p1")
+
+        rooms.track_bytes("wb:p1", 20)
+        assert rooms.stats()["resident_bytes"] == 120
+
+        rooms.track_bytes("wb:p1", 80, absolute=True)
+        assert rooms.stats()["rooms"][0]["bytes"] == 80
@@ -0,0 +1,139 @@
+"""Tests for collaborative snapshot retention."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.collaboration.retention import MongoSnapshotStore, SnapshotRetention, select_expired
+
+NOW = datetime(2024, 5, 31, 12, 30)
+
+
+def _version(id_, age, size=100):
+    return {"_id": id_, "updated_at": NOW - age, "size": size}
+
+
+class FakeStore:
+    """Snapshot versions per resource key, with key-ordered paging."""
+
+    def __init__(self, versions):
+        self.versions_by_key = versions
+        self.deleted = []
+
+    async def resources(self, after, limit):
+        keys = sorted(k for k, v in self.versions_by_key.items() if len(v) > 1)
+        if after is not None:
+            keys = [k for k in keys if k > (after["project_id"], after["snapshot_type"])]
+        return [{"project_id": p, "snapshot_type": t} for p, t in keys[:limit]]
+
+    async def versions(self, project_id, snapshot_type):
+        return self.versions_by_key[(project_id, snapshot_type)]
+
+    async def delete(self, ids):
+        self.deleted.extend(ids)
+        return len(ids)
+
+
+class FakeCursor:
+    """Index-ordered rows of the snapshots collection, counting how many are read."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.read = 0
+
+    def find(self, query, projection):
+        self.query = query
+        return self
+
+    def sort(self, keys):
+        return self
+
+    def hint(self, index):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        bound = self.query.get("project_id", {}).get("$gte", "")
+        while self.read < len(self.rows):
+            row = self.rows[self.read]
+            self.read += 1
+            if row["project_id"] >= bound:
+                return row
+        raise StopAsyncIteration
+
+
+class TestSnapshotRetention:
+    """Test thinning rules and incremental passes."""
+
+    def test_hourly_then_daily_then_expired(self):
+        """Test one snapshot survives per hour, then per day, and older ones go."""
+        versions = [
+            _version("latest", timedelta(minutes=1)),
+            _version("same-hour", timedelta(minutes=20)),
+            _version("prev-hour", timedelta(hours=1)),
+            _version("day-3a", timedelta(days=3)),
+            _version("day-3b", timedelta(days=3, minutes=5)),
+            _version("ancient", timedelta(days=40)),
+        ]
+
+        expired = {v["_id"] for v in select_expired(versions, NOW, hourly_hours=24, daily_days=30)}
+
+        assert expired == {"same-hour", "day-3b", "ancient"}
+
+    def test_latest_always_kept(self):
+        """Test a resource's only recent-enough snapshot is kept even past retention."""
+        versions = [_version("old", timedelta(days=90)), _version("older", timedelta(days=91))]
+
+        expired = select_expired(versions, NOW, hourly_hours=24, daily_days=30)
+
+        assert [v["_id"] for v in expired] == ["older"]
+
+    @pytest.mark.asyncio
+    async def test_passes_resume_and_report_bytes(self):
+        """Test passes page through resources and count reclaimed bytes."""
+        store = FakeStore({
+            ("p1", "whiteboard"): [_version("a1", timedelta(0)), _version("a2", timedelta(days=60), 300)],
+            ("p2", "document"): [_version("b1", timedelta(0)), _version("b2", timedelta(days=60), 200)],
+            ("p3", "inquiry"): [_version("c1", timedelta(0))],
+        })
+        retention = SnapshotRetention(store, batch_size=1)
+
+        first = await retention.run_pass(NOW)
+        second = await retention.run_pass(NOW)
+        third = await retention.run_pass(NOW)
+
+        assert store.deleted == ["a2", "b2"]
+        assert first["bytes_reclaimed"] == 300 and not first["sweep_done"]
+        assert second["bytes_reclaimed"] == 200
+        assert third["sweep_done"]
+        assert retention.stats["bytes_reclaimed"] == 500
+
+    @pytest.mark.asyncio
+    async def test_mongo_resources_stop_after_a_page(self, monkeypatch):
+        """Test the Mongo key scan resumes after the cursor and stops once the page is full."""
+        rows = [
+            {"project_id": "p1"},  # legacy row without a type
+            {"project_id": "p1", "snapshot_type": "document"},
+            {"project_id": "p1", "snapshot_type": "document"},
+            {"project_id": "p2", "snapshot_type": "whiteboard"},
+            {"project_id": "p3", "snapshot_type": "inquiry"},
+            {"project_id": "p3", "snapshot_type": "inquiry"},
+            {"project_id": "p4", "snapshot_type": "inquiry"},
+            {"project_id": "p4", "snapshot_type": "inquiry"},
+            {"project_id": "p5", "snapshot_type": "inquiry"},
+        ]
+        collection = FakeCursor(rows)
+        monkeypatch.setattr(MongoSnapshotStore, "_collection", staticmethod(lambda: collection))
+
+        first = await MongoSnapshotStore.resources(None, 2)
+        assert first == [
+            {"project_id": "p1", "snapshot_type": "document"},
+            {"project_id": "p3", "snapshot_type": "inquiry"},
+        ]
+        assert collection.read == 7  # stopped at the first row of p4
+
+        collection.read = 0
+        second = await MongoSnapshotStore.resources(first[-1], 2)
+        assert second == [{"project_id": "p4", "snapshot_type": "inquiry"}]
@@ -0,0 +1,180 @@
+"""Tests for the collaborative update log."""
+
+import asyncio
+
+import pytest
+
+from app.services.collaboration.update_log import UpdateLog
+
+
+class FakeStore:
+    """In-memory snapshot and log batches."""
+
+    def __init__(self, snapshot=None, snapshot_seq=0, batches=()):
+        self.snapshot = snapshot
+        self.snapshot_seq = snapshot_seq
+        self.batches = list(batches)  # (seq, updates)
+        self.snapshots = []
+
+    async def append(self, resource_id, snapshot_type, seq, updates):
+        self.batches.append((seq, list(updates)))
+
+    async def load(self, resource_id, snapshot_type):
+        tail = [b for b in sorted(self.batches) if b[0] > self.snapshot_seq]
+        updates = [u for _, batch in tail for u in batch]
+        seq = max([self.snapshot_seq] + [s for s, _ in tail])
+        return self.snapshot, updates, seq, sum(len(u) for u in updates)
+
+    async def read(self, resource_id, snapshot_type, upto):
+        tail = [b for b in sorted(self.batches) if self.snapshot_seq < b[0] <= upto]
+        return ([self.snapshot] if self.snapshot else []) + [u for _, batch in tail for u in batch]
+
+    async def save_snapshot(self, resource_id, snapshot_type, state, seq):
+        if seq < self.snapshot_seq:
+            return False
+        self.snapshot, self.snapshot_seq = state, seq
+        self.snapshots.append((state, seq))
+        return True
+
+    async def truncate(self, resource_id, snapshot_type, seq):
+        self.batches = [b for b in self.batches if b[0] > seq]
+
+
+def make_log(store, **kwargs):
+    # A stopped clock numbers batches 1, 2, 3...
+    options = {"flush_interval": 0.02, "flush_bytes": 1000, "compact_bytes": 10_000, "compact_batches": 100, "clock": lambda: 0}
+    options.update(kwargs)
+    return UpdateLog(store, **options)
+
+
+class TestUpdateLog:
+    """Test batching, load order and compaction."""
+
+    @pytest.mark.asyncio
+    async def test_updates_batched_by_time(self):
+        """Test updates within the flush interval land in one batch."""
+        store = FakeStore()
+        log = make_log(store)
+        await log.open("p1", "whiteboard")
+
+        for update in (b"aaa", b"bbb", b"ccc"):
+            log.append("p1", "whiteboard", update)
+        assert store.batches == []
+        await asyncio.sleep(0.05)
+
+        assert store.batches == [(1, [b"aaa", b"bbb", b"ccc"])]
+        assert log.stats["flushes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_on_size(self):
+        """Test a full buffer is written without waiting for the timer."""
+        store = FakeStore()
+        log = make_log(store, flush_interval=10, flush_bytes=8)
+        await log.open("p1", "whiteboard")
+
+        log.append("p1", "whiteboard", b"12345")
+        log.append("p1", "whiteboard", b"67890")
+        await asyncio.sleep(0.01)
+
+        assert store.batches == [(1, [b"12345", b"67890"])]
+
+    @pytest.mark.asyncio
+    async def test_load_replays_tail_after_snapshot(self):
+        """Test only batches newer than the snapshot are replayed, in seq order."""
+        store = FakeStore(snapshot=b"S", snapshot_seq=2, batches=[(4, [b"d"]), (2, [b"b"]), (3, [b"c"])])
+        log = make_log(store)
+
+        snapshot, tail = await log.open("p1", "whiteboard")
+        log.append("p1", "whiteboard", b"e")
+        await log.flush("p1", "whiteboard")
+
+        assert snapshot == b"S" and tail == [b"c", b"d"]
+        assert store.batches[-1] == (5, [b"e"])
+
+    @pytest.mark.asyncio
+    async def test_compaction_folds_tail(self):
+        """Test crossing the tail threshold snapshots the state and trims the log."""
+        store = FakeStore()
+        log = make_log(store, compact_batches=2)
+        await log.open("p1", "whiteboard", state_fn=lambda: b"FULL")
+
+        for update in (b"a", b"b"):
+            log.append("p1", "whiteboard", update)
+            await log.flush("p1", "whiteboard")
+        await asyncio.sleep(0.01)
+
+        assert store.snapshots == [(b"FULL", 2)]
+        assert store.batches == []
+        assert log.stats["compactions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_and_compacts(self):
+        """Test closing a room persists buffered updates and forgets the room."""
+        store = FakeStore()
+        log = make_log(store, flush_interval=10)
+        await log.open("p1", "document", state_fn=lambda: b"DOC")
+
+        log.append("p1", "document", b"x")
+        await log.close("p1", "document")
+
+        assert store.snapshots == [(b"DOC", 1)]
+        assert ("p1", "document") not in log._rooms
+
+    @pytest.mark.asyncio
+    async def test_seq_follows_clock_and_grace_keeps_recent_batches(self):
+        """Test batches are numbered by time and compaction leaves the grace window in the log."""
+        now = [1_000]
+        store = FakeStore(batches=[(900, [b"other-worker"])])
+        log = make_log(store, clock=lambda: now[0], compact_grace_ms=50)
+        await log.open("p1", "whiteboard", state_fn=lambda: b"FULL")
+
+        log.append("p1", "whiteboard", b"a")
+        await log.flush("p1", "whiteboard")
+        now[0] = 990  # Clock stepped back: numbering still increases
+        log.append("p1", "whiteboard", b"b")
+        await log.compact("p1", "whiteboard")
+
+        assert [seq for seq, _ in store.batches] == [1000, 1001]
+        assert store.snapshots == [(b"FULL", 951)]
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_updates_this_worker_missed(self):
+        """Test a compaction folds in another worker's logged update it never received."""
+        store = FakeStore()
+        now = [1_000]
+        # A state is the set of updates it holds; merging is their union
+        merge = lambda updates: b",".join(sorted({u for state in updates for u in state.split(b",") if u}))
+        docs = {"a": set(), "b": set()}
+        log_a = make_log(store, clock=lambda: now[0], merge=merge)
+        log_b = make_log(store, clock=lambda: now[0], merge=merge)
+        await log_a.open("p1", "whiteboard", state_fn=lambda: b",".join(sorted(docs["a"])))
+        await log_b.open("p1", "whiteboard", state_fn=lambda: b",".join(sorted(docs["b"])))
+
+        docs["a"].add(b"from-a")  # never replicated to worker b
+        log_a.append("p1", "whiteboard", b"from-a")
+        await log_a.flush("p1", "whiteboard")
+        now[0] = 1_010
+        docs["b"].add(b"from-b")
+        log_b.append("p1", "whiteboard", b"from-b")
+        await log_b.compact("p1", "whiteboard")
+
+        snapshot, tail = await make_log(store).open("p1", "whiteboard")
+        assert store.batches == []
+        assert snapshot == b"from-a,from-b" and tail == []
+
+    @pytest.mark.asyncio
+    async def test_late_compaction_does_not_replace_newer_snapshot(self):
+        """Test a compaction behind the stored snapshot keeps it and leaves the log alone."""
+        store = FakeStore()
+        log = make_log(store, clock=lambda: 1_000)
+        await log.open("p1", "whiteboard", state_fn=lambda: b"OLDER")
+        log.append("p1", "whiteboard", b"a")
+        await log.flush("p1", "whiteboard")
+        # Meanwhile another worker compacted further along the log
+        store.snapshot, store.snapshot_seq = b"NEWER", 5_000
+        store.batches.append((5_001, [b"x"]))
+
+        assert not await log.compact("p1", "whiteboard")
+
+        assert (store.snapshot, store.snapshot_seq) == (b"NEWER", 5_000)
+        assert [seq for seq, _ in store.batches] == [1_000, 5_001]
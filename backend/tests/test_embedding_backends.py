@@ -0,0 +1,52 @@
+"""Tests for RAG embedding backend selection and pooling."""
+
+import numpy as np
+import pytest
+
+from app.services.rag.embedding_backends import (
+    embedding_model_id,
+    load_embedding_model,
+    mean_pool,
+    set_batch_size,
+)
+
+
+class TestEmbeddingBackends:
+    """Test backend-independent helpers."""
+
+    def test_mean_pool_ignores_padding(self):
+        """Test padded positions don't contribute and output is unit length."""
+        hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+        mask = np.array([[1, 1, 0]])
+
+        pooled = mean_pool(hidden, mask)
+
+        np.testing.assert_allclose(pooled, [[1.0, 0.0]], atol=1e-6)
+        np.testing.assert_allclose(mean_pool(hidden, mask, normalize=False), [[2.0, 0.0]])
+
+    def test_model_id_distinguishes_backends(self):
+        """Test only non-reference backends get their own cache identity."""
+        assert embedding_model_id("mini", "hf") == "mini"
+        assert embedding_model_id("mini", "onnx") == "mini#onnx"
+        assert embedding_model_id("mini", "int8") != embedding_model_id("mini", "onnx")
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            load_embedding_model("tpu", "mini")
+
+    def test_set_batch_size_on_every_backend_shape(self):
+        """Test batch size reaches encode_kwargs or batch_size, and is reported missing otherwise."""
+        class SentenceTransformerLike:
+            encode_kwargs = {"batch_size": 64}
+
+        class OnnxLike:
+            batch_size = 64
+
+        st, onnx = SentenceTransformerLike(), OnnxLike()
+
+        assert set_batch_size(st, 16)
+        assert st.encode_kwargs["batch_size"] == 16
+        assert set_batch_size(onnx, 16)
+        assert onnx.batch_size == 16
+        assert not set_batch_size(object(), 16)
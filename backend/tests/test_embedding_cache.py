@@ -0,0 +1,106 @@
+"""Tests for the content-hash RAG embedding cache."""
+
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from app.services.rag.embedding_cache import EmbeddingCache, content_hash, normalize_text
+
+
+class FakeStore:
+    """In-memory stand-in for the Mongo embedding store."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get_many(self, model, hashes):
+        return {h: self.data[(model, h)] for h in hashes if (model, h) in self.data}
+
+    async def put_many(self, model, vectors):
+        for h, v in vectors.items():
+            self.data[(model, h)] = v
+
+
+class TestEmbeddingCache:
+    """Test cache lookups, tiering and metrics."""
+
+    @pytest.fixture
+    def embed_fn(self):
+        """Create an embedding function that records what it computed."""
+        calls = []
+
+        async def embed(texts):
+            calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        embed.calls = calls
+        return embed
+
+    def test_normalization(self):
+        """Test whitespace and width differences share a hash."""
+        assert normalize_text("  Hello\n\tworld  ") == "Hello world"
+        assert content_hash("ＡＢＣ  def") == content_hash("ABC def")
+        assert content_hash("abc") != content_hash("abd")
+
+    @pytest.mark.asyncio
+    async def test_only_unseen_text_is_embedded(self, embed_fn):
+        """Test repeated and previously seen chunks skip the model."""
+        cache = EmbeddingCache("m", store=FakeStore())
+
+        with patch("app.services.rag.embedding_cache.monitor") as mock_monitor:
+            mock_monitor.track_cache_hit = AsyncMock()
+            mock_monitor.track_cache_miss = AsyncMock()
+
+            first = await cache.embed_documents(["a", "bb", "a"], embed_fn)
+            second = await cache.embed_documents(["bb", "ccc"], embed_fn)
+
+        assert first == [[1.0], [2.0], [1.0]]
+        assert second == [[2.0], [3.0]]
+        assert embed_fn.calls == [["a", "bb"], ["ccc"]]
+        mock_monitor.track_cache_hit.assert_any_call("embedding_memory", 1)
+        mock_monitor.track_cache_miss.assert_any_call("embedding", 2)
+
+    @pytest.mark.asyncio
+    async def test_store_shared_across_processes(self, embed_fn):
+        """Test a cold LRU is filled from the shared store."""
+        store = FakeStore()
+        await EmbeddingCache("m", store=store).embed_documents(["syllabus"], embed_fn)
+
+        fresh = EmbeddingCache("m", store=store)
+        with patch("app.services.rag.embedding_cache.monitor") as mock_monitor:
+            mock_monitor.track_cache_hit = AsyncMock()
+            mock_monitor.track_cache_miss = AsyncMock()
+            result = await fresh.embed_documents(["syllabus"], embed_fn)
+
+        assert result == [[8.0]]
+        assert len(embed_fn.calls) == 1
+        mock_monitor.track_cache_hit.assert_called_once_with("embedding_store", 1)
+
+    @pytest.mark.asyncio
+    async def test_model_name_is_part_of_key(self, embed_fn):
+        """Test vectors from another model are not reused."""
+        store = FakeStore()
+        await EmbeddingCache("m1", store=store).embed_documents(["x"], embed_fn)
+        await EmbeddingCache("m2", store=store).embed_documents(["x"], embed_fn)
+
+        assert len(embed_fn.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_query_not_persisted(self):
+        """Test query embeddings stay in the LRU only."""
+        store = FakeStore()
+        cache = EmbeddingCache("m", store=store)
+
+        async def embed_one(text):
+            return [1.0]
+
+        await cache.embed_query("what is inquiry?", embed_one)
+
+        assert store.data == {}
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, embed_fn):
+        """Test the in-process tier is bounded."""
+        cache = EmbeddingCache("m", max_entries=2)
+        await cache.embed_documents(["a", "b", "c"], embed_fn)
+
+        assert len(cache._lru) == 2
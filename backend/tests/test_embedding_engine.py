@@ -0,0 +1,66 @@
+"""Tests for the batched RAG embedding engine."""
+
+import threading
+
+import pytest
+
+from app.services.rag.embedding_engine import EmbeddingEngine
+
+
+class FakeModel:
+    """Embeds text as [len(text)] and records batch sizes and threads."""
+
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        self.threads.add(threading.current_thread().name)
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        self.threads.add(threading.current_thread().name)
+        return [float(len(text))]
+
+
+class TestEmbeddingEngine:
+    """Test batching, ordering and threading of the engine."""
+
+    @pytest.fixture
+    def model(self):
+        """Create a fake embedding model."""
+        return FakeModel()
+
+    @pytest.mark.asyncio
+    async def test_embed_documents_batches_and_preserves_order(self, model):
+        """Test texts are split into batches and results stay in order."""
+        engine = EmbeddingEngine(lambda: model, batch_size=4, max_workers=2)
+        texts = ["x" * i for i in range(1, 11)]
+
+        vectors = await engine.embed_documents(texts)
+
+        assert vectors == [[float(i)] for i in range(1, 11)]
+        assert sorted(model.batches) == [2, 4, 4]
+        engine.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_inference_runs_off_event_loop(self, model):
+        """Test the model is only called from the engine's worker threads."""
+        engine = EmbeddingEngine(lambda: model, batch_size=8, max_workers=1)
+
+        await engine.embed_query("hello")
+        await engine.embed_documents(["a", "b"])
+
+        assert model.threads
+        assert all(name.startswith("rag-embed") for name in model.threads)
+        engine.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_empty_input(self, model):
+        """Test embedding nothing returns nothing."""
+        engine = EmbeddingEngine(lambda: model)
+
+        assert await engine.embed_documents([]) == []
+        assert model.batches == []
+        engine.shutdown()
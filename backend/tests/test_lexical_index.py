@@ -0,0 +1,156 @@
+"""Tests for the BM25 lexical index used by RAG retrieval."""
+
+import pytest
+from types import SimpleNamespace
+
+from app.services.rag.lexical_index import BM25Index, LexicalIndexRegistry, tokenize
+
+
+class TestTokenize:
+    """Test tokenization of Latin and CJK text."""
+
+    def test_latin_words(self):
+        """Test words are lowercased and punctuation is dropped."""
+        assert tokenize("Inquiry-Based LEARNING, 2024!") == ["inquiry", "based", "learning", "2024"]
+
+    def test_cjk_bigrams(self):
+        """Test Chinese runs become overlapping character bigrams."""
+        assert tokenize("探究学习") == ["探究", "究学", "学习"]
+        assert tokenize("学 data") == ["学", "data"]
+
+    def test_full_width_is_normalized(self):
+        """Test full-width characters match their ASCII forms."""
+        assert tokenize("ＡＢＣ") == ["abc"]
+
+
+class TestBM25Index:
+    """Test ranking and incremental updates."""
+
+    @pytest.fixture
+    def index(self):
+        index = BM25Index()
+        index.upsert("photo", "photosynthesis converts light into chemical energy")
+        index.upsert("cell", "the cell membrane controls transport")
+        index.upsert("both", "light reaches the cell and drives photosynthesis in the cell")
+        return index
+
+    def test_multi_word_query_ranks_by_coverage(self, index):
+        """Test documents matching more query terms rank higher."""
+        hits = index.search("cell photosynthesis", k=3)
+
+        assert hits[0].doc_id == "both"
+        assert {h.doc_id for h in hits} == {"photo", "cell", "both"}
+
+    def test_rare_terms_weigh_more(self, index):
+        """Test IDF favours documents with the rarer term."""
+        hits = index.search("membrane light", k=3)
+
+        assert hits[0].doc_id == "cell"
+
+    def test_no_match(self, index):
+        """Test unknown terms return nothing."""
+        assert index.search("volcano", k=5) == []
+
+    def test_upsert_replaces_and_remove_forgets(self, index):
+        """Test re-indexing drops stale terms and removal clears postings."""
+        index.upsert("photo", "volcano eruption")
+        assert [h.doc_id for h in index.search("volcano", k=5)] == ["photo"]
+        assert "photo" not in {h.doc_id for h in index.search("photosynthesis", k=5)}
+
+        index.remove("photo")
+        assert index.search("volcano", k=5) == []
+        assert len(index) == 2
+
+    def test_chinese_query(self):
+        """Test Chinese queries match without a word segmenter."""
+        index = BM25Index()
+        index.upsert("zh", "我们通过探究学习理解光合作用")
+        index.upsert("other", "今天的作业是阅读")
+
+        assert index.search("光合作用", k=2)[0].doc_id == "zh"
+
+    def test_snippet(self):
+        """Test the stored snippet is returned with hits."""
+        index = BM25Index()
+        index.upsert("c1", "hello world", snippet="alice: hello world")
+
+        assert index.search("hello", k=1)[0].snippet == "alice: hello world"
+
+
+class FakeGenerations:
+    """Stand-in for the Redis generation counters shared by processes."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def generation(self, project_id, source):
+        return self.values.get((project_id, source), 0)
+
+    async def invalidate(self, project_id, source):
+        key = (project_id, source)
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+class TestLexicalIndexRegistry:
+    """Test live updates against loaded and unloaded projects."""
+
+    @pytest.mark.asyncio
+    async def test_updates_apply_to_loaded_project(self):
+        """Test chat and document hooks update a built index in place."""
+        registry = LexicalIndexRegistry()
+        registry._indexes[("p1", "document")] = BM25Index()
+        registry._indexes[("p1", "chat")] = BM25Index()
+
+        await registry.add_chat(SimpleNamespace(id="c1", project_id="p1", user_id="u1", content="meeting at noon"))
+        await registry.upsert_document(
+            SimpleNamespace(id="d1", project_id="p1", title="Plan", preview_text=None, content="<p>noon agenda</p>")
+        )
+
+        chats = await registry.search("p1", "chat", "noon", 5)
+        docs = await registry.search("p1", "document", "agenda", 5)
+        assert chats[0].snippet == "u1: meeting at noon"
+        assert docs[0].doc_id == "d1"
+
+        await registry.remove_document("p1", "d1")
+        assert await registry.search("p1", "document", "agenda", 5) == []
+
+    @pytest.mark.asyncio
+    async def test_updates_for_unloaded_project_are_ignored(self):
+        """Test hooks do not create partial indexes for unloaded projects."""
+        registry = LexicalIndexRegistry()
+        await registry.add_chat(SimpleNamespace(id="c1", project_id="p2", user_id="u1", content="hi"))
+
+        assert registry._indexes == {}
+
+    @pytest.mark.asyncio
+    async def test_change_in_one_process_reaches_another(self):
+        """Test a worker rebuilds a source another worker changed, and only that source."""
+        from unittest.mock import patch
+
+        chats = [SimpleNamespace(id="c1", project_id="p1", user_id="u1", content="seeds need water")]
+        builds = []
+
+        async def build(registry, key):
+            builds.append(key)
+            synced = await registry._generation(key)
+            index = BM25Index()
+            for chat in chats:
+                index.upsert(str(chat.id), *registry._chat_text(chat))
+            registry._indexes[key], registry._synced[key] = index, synced
+            registry._builds.pop(key, None)
+            return index
+
+        generations = FakeGenerations()
+        worker_a, worker_b = LexicalIndexRegistry(generations), LexicalIndexRegistry(generations)
+        with patch.object(LexicalIndexRegistry, "_build", build):
+            await worker_a.search("p1", "chat", "water", 5)
+            await worker_b.search("p1", "chat", "water", 5)
+
+            chat = SimpleNamespace(id="c2", project_id="p1", user_id="u2", content="light matters too")
+            chats.append(chat)  # inserted into Mongo first
+            await worker_a.add_chat(chat)
+
+            assert (await worker_b.search("p1", "chat", "light", 5))[0].doc_id == "c2"
+            assert (await worker_a.search("p1", "chat", "light", 5))[0].doc_id == "c2"
+            assert builds == [("p1", "chat")] * 3
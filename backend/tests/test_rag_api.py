@@ -87,6 +87,35 @@ class TestRAGStatisticsResponse:
         assert "project1" in stats.by_project
 
 
+class TestRAGDocumentCreate:
+    """Test suite for chunk size validation on index requests."""
+
+    def test_overlap_checked_against_defaults(self):
+        """Test an overlap that isn't smaller than the resolved chunk size is rejected."""
+        from pydantic import ValidationError
+
+        from app.api.v1.rag import RAGDocumentCreate
+        from app.core.config import settings
+
+        with pytest.raises(ValidationError):
+            RAGDocumentCreate(resource_id="r1", max_tokens=settings.RAG_CHUNK_OVERLAP_TOKENS)
+        with pytest.raises(ValidationError):
+            RAGDocumentCreate(resource_id="r1", max_tokens=64, overlap_tokens=64)
+
+        assert RAGDocumentCreate(resource_id="r1", max_tokens=64, overlap_tokens=16).max_tokens == 64
+        assert RAGDocumentCreate(resource_id="r1").overlap_tokens is None
+
+    def test_chunks_capped_at_model_window(self):
+        """Test chunk sizes the embedding model would truncate are rejected."""
+        from pydantic import ValidationError
+
+        from app.api.v1.rag import RAGDocumentCreate
+        from app.core.config import settings
+
+        with pytest.raises(ValidationError):
+            RAGDocumentCreate(resource_id="r1", max_tokens=settings.RAG_CHUNK_TOKENS + 1)
+
+
 class TestRAGQueryResponse:
     """Test suite for RAG query response format."""
 
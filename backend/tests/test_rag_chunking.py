@@ -0,0 +1,146 @@
+"""Tests for structure-preserving, token-aware RAG chunking."""
+
+import pytest
+
+from app.services.rag.chunking import (
+    BoilerplateFilter,
+    StructuredChunker,
+    TextSegment,
+    TokenCounter,
+    chunk_stream,
+)
+
+
+def _sentences(n, prefix="Sentence"):
+    return " ".join(f"{prefix} number {i} talks about inquiry learning." for i in range(n))
+
+
+def _chunk(segments, **kwargs):
+    chunker = StructuredChunker(TokenCounter(), **kwargs)
+    chunks = []
+    for segment in segments:
+        chunks.extend(chunker.feed(segment))
+    return chunks + chunker.finish()
+
+
+class TestStructuredChunker:
+    """Test sentence packing, sections and metadata."""
+
+    def test_chunks_respect_token_budget_and_sentences(self):
+        """Test chunks stay under budget and end on sentence boundaries."""
+        chunks = _chunk([_sentences(40)], max_tokens=50, overlap_tokens=0)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.token_count <= 50
+            assert chunk.text.endswith(".")
+            assert chunk.text.startswith("Sentence")
+
+    def test_chinese_sentences_are_not_cut(self):
+        """Test Chinese text is split at 。 rather than mid-sentence."""
+        text = "".join(f"第{i}个学生提出了一个关于光合作用的问题。" for i in range(30))
+        chunks = _chunk([text], max_tokens=60, overlap_tokens=0)
+
+        assert all(chunk.text.endswith("。") for chunk in chunks)
+        assert "".join(chunk.text for chunk in chunks) == text
+
+    def test_overlap_repeats_trailing_sentences(self):
+        """Test the next chunk starts with the previous chunk's last sentence."""
+        chunks = _chunk([_sentences(20)], max_tokens=50, overlap_tokens=15)
+
+        last_sentence = chunks[0].text.split(". ")[-1]
+        assert chunks[1].text.startswith(last_sentence)
+
+    def test_headings_start_new_chunks(self):
+        """Test sections are not merged once a chunk has enough content."""
+        text = f"# Background\n\n{_sentences(5)}\n\n## Method\n\n{_sentences(3, 'Step')}"
+        chunks = _chunk([text], max_tokens=200, overlap_tokens=0, min_tokens=20)
+
+        assert [c.metadata["headings"] for c in chunks] == [["Background"], ["Background", "Method"]]
+        assert chunks[1].text.startswith("Method\nStep")
+
+    def test_numbered_heading_alone_on_a_line(self):
+        """Test a numbered line standing alone is a heading but a wrapped line is not."""
+        text = f"2.1 Data Sources\n\n{_sentences(2)}\n12 students joined\nthe trip."
+        chunks = _chunk([text], max_tokens=200)
+
+        assert chunks[0].metadata["headings"] == ["2.1 Data Sources"]
+        assert "12 students joined the trip." in chunks[0].text
+
+    def test_long_sentence_is_split(self):
+        """Test a sentence over budget is cut into budget-sized pieces."""
+        text = " ".join(["word"] * 130) + "."
+        chunks = _chunk([text], max_tokens=50, overlap_tokens=0)
+
+        assert len(chunks) == 3
+        assert all(chunk.token_count <= 50 for chunk in chunks)
+
+    def test_short_tail_is_kept(self):
+        """Test a short final chunk is no longer dropped."""
+        chunks = _chunk(["Tiny note."])
+
+        assert [c.text for c in chunks] == ["Tiny note."]
+
+    def test_streamed_text_split_mid_line(self):
+        """Test pieces cut mid-word chunk the same as the whole text."""
+        text = f"# Intro\n\n{_sentences(30)}\n\n# End\n\n{_sentences(5, 'Final')}"
+        pieces = [text[i : i + 37] for i in range(0, len(text), 37)]
+
+        whole = [c.text for c in _chunk([text], max_tokens=60)]
+        streamed = [c.text for c in _chunk(pieces, max_tokens=60)]
+
+        assert streamed == whole
+
+    def test_page_metadata_and_wrapped_lines(self):
+        """Test page ranges are recorded and wrapped lines are rejoined."""
+        pages = [
+            TextSegment("The experiment meas-\nured leaf growth over", 1),
+            TextSegment("three weeks. Results follow.", 2),
+        ]
+        chunks = _chunk(pages, dedupe_boilerplate=False)
+
+        assert chunks[0].text == "The experiment measured leaf growth over three weeks. Results follow."
+        assert chunks[0].metadata["page_start"] == 1
+        assert chunks[0].metadata["page_end"] == 2
+
+
+class TestBoilerplateFilter:
+    """Test header and footer removal."""
+
+    def test_repeated_headers_and_page_numbers_dropped(self):
+        """Test running headers and page footers are removed from every page."""
+        pages = [
+            TextSegment(
+                f"Biology Unit 3 Reader\n\nBody paragraph {n} about cells.\n\nMore on topic {n}.\n\nPage {n} of 8",
+                n,
+            )
+            for n in range(1, 9)
+        ]
+        chunks = _chunk(pages, max_tokens=500)
+        text = "\n".join(c.text for c in chunks)
+
+        assert "Biology Unit 3 Reader" not in text
+        assert "Page" not in text
+        assert "Body paragraph 8 about cells." in text
+
+    def test_unique_edge_lines_kept(self):
+        """Test edge lines seen only once are content."""
+        bp = BoilerplateFilter(warmup_pages=1)
+        page = bp.feed(TextSegment("Chapter opening line\n\nBody.\n\nClosing line", 1))[0]
+
+        assert page.text.startswith("Chapter opening line")
+
+
+class TestChunkStream:
+    """Test the async wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_async_stream(self):
+        """Test async segments are chunked incrementally."""
+        async def segments():
+            for n in range(3):
+                yield TextSegment(_sentences(5, ["Alpha", "Beta", "Gamma"][n]), n + 1)
+
+        chunks = [c async for c in chunk_stream(segments(), TokenCounter(), max_tokens=60)]
+
+        assert chunks and chunks[-1].metadata["page_end"] == 3
@@ -0,0 +1,76 @@
+"""Tests for streaming RAG text extraction."""
+
+import pytest
+
+from app.services.rag.extraction import TextExtractor
+
+
+class FakeResponse:
+    """Stand-in for a urllib3 response returned by MinIO get_object."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+        self.closed = False
+        self.released = False
+
+    def stream(self, amt):
+        for i in range(0, len(self.data), amt):
+            self.reads.append(amt)
+            yield self.data[i : i + amt]
+
+    def close(self):
+        self.closed = True
+
+    def release_conn(self):
+        self.released = True
+
+
+class FakeClient:
+    """Stand-in for the MinIO client."""
+
+    def __init__(self, data):
+        self.response = FakeResponse(data)
+
+    def get_object(self, bucket, key):
+        return self.response
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+class TestTextExtractor:
+    """Test streaming reads from object storage."""
+
+    @pytest.mark.asyncio
+    async def test_plain_text_streams_in_reads(self):
+        """Test text is decoded per read, including split multi-byte characters."""
+        text = "探究式学习 inquiry " * 100
+        client = FakeClient(text.encode("utf-8"))
+        extractor = TextExtractor(lambda: client, "bucket", read_size=64)
+
+        pieces = await _collect(extractor.stream_text("key", "text/plain"))
+
+        assert "".join(pieces) == text
+        assert len(pieces) > 1
+        assert client.response.closed and client.response.released
+
+    @pytest.mark.asyncio
+    async def test_html_is_spooled_and_parsed(self):
+        """Test HTML is reduced to visible text."""
+        pytest.importorskip("bs4")
+        client = FakeClient(b"<html><body><h1>Title</h1><p>Body text</p></body></html>")
+        extractor = TextExtractor(lambda: client, "bucket", read_size=8)
+
+        text = await extractor.extract_text("key", "text/html")
+
+        assert text == "# Title\n\nBody text"
+
+    @pytest.mark.asyncio
+    async def test_missing_client(self):
+        """Test a missing storage client surfaces as ValueError."""
+        extractor = TextExtractor(lambda: None, "bucket")
+
+        with pytest.raises(ValueError):
+            await extractor.extract_text("key", "text/plain")
@@ -0,0 +1,50 @@
+"""Tests for hybrid RAG rank fusion."""
+
+import pytest
+
+from app.services.rag.fusion import RRF_K, reciprocal_rank_fusion
+
+
+def _item(type_, id_, score, chunk_index=None):
+    item = {"type": type_, "id": id_, "content": f"{type_}-{id_}", "score": score}
+    if chunk_index is not None:
+        item["chunk_index"] = chunk_index
+    return item
+
+
+class TestReciprocalRankFusion:
+    """Test weighted reciprocal-rank fusion."""
+
+    def test_item_found_by_several_strategies_wins(self):
+        """Test agreement between strategies outranks a single first place."""
+        ranked = {
+            "vector": [_item("resource", "a", 0.9, 0), _item("document", "d", 0.5)],
+            "sliding_window": [_item("document", "d", 0.85)],
+            "realtime": [],
+        }
+        fused = reciprocal_rank_fusion(ranked, {"vector": 1, "sliding_window": 1, "realtime": 1})
+
+        assert [r["id"] for r in fused] == ["d", "a"]
+        assert fused[0]["score"] == 0.85  # best raw score is kept
+        assert fused[0]["fused_score"] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1))
+
+    def test_weights_break_ties(self):
+        """Test strategy weights decide between equally ranked items."""
+        ranked = {
+            "vector": [_item("resource", "a", 0.4, 0)],
+            "realtime": [_item("chat", "c", 0.75)],
+        }
+        fused = reciprocal_rank_fusion(ranked, {"vector": 0.4, "realtime": 0.3})
+
+        assert [r["id"] for r in fused] == ["a", "c"]
+
+    def test_chunks_of_same_resource_are_distinct(self):
+        """Test different chunks of one resource are not collapsed."""
+        ranked = {"vector": [_item("resource", "a", 0.9, 0), _item("resource", "a", 0.8, 1)]}
+        fused = reciprocal_rank_fusion(ranked, {"vector": 1})
+
+        assert len(fused) == 2
+
+    def test_empty(self):
+        """Test fusing nothing returns nothing."""
+        assert reciprocal_rank_fusion({"vector": []}, {}) == []
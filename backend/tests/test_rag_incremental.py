@@ -0,0 +1,147 @@
+"""Tests for incremental document and chat embedding."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.rag.incremental import IncrementalIndexer, parse_source_key, source_key
+
+
+class FakeStore:
+    """Records what the indexer would persist."""
+
+    def __init__(self, hashes=None):
+        self.hashes = hashes or {}
+        self.replaced = []
+        self.inserted = []
+        self.removed = []
+
+    async def stored_hash(self, key):
+        return self.hashes.get(key)
+
+    async def replace(self, project_id, key, source_type, texts, vectors, metadata):
+        self.replaced.append((key, list(texts)))
+
+    async def insert(self, project_id, items):
+        self.inserted.append((project_id, [item[0] for item in items]))
+
+    async def remove(self, project_id, key):
+        self.removed.append(key)
+
+
+def make_indexer(store, **kwargs):
+    embedded = []
+
+    async def embed(texts):
+        embedded.append(list(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+    async def chunk(text):
+        return [SimpleNamespace(text=text, metadata={})]
+
+    options = {"debounce": 0.05, "max_delay": 1.0, "batch_size": 3, "batch_interval": 0.05}
+    options.update(kwargs)
+    return IncrementalIndexer(store, embed, chunk, **options), embedded
+
+
+def _doc(content, doc_id="d1"):
+    return SimpleNamespace(id=doc_id, project_id="p1", title="Notes", content=content)
+
+
+def _chat(chat_id, content="light and plants"):
+    return SimpleNamespace(id=chat_id, project_id="p1", content=content)
+
+
+class TestIncrementalIndexer:
+    """Test debouncing, change detection and micro-batching."""
+
+    def test_source_keys(self):
+        """Test source keys round-trip and bare ids are resources."""
+        assert parse_source_key(source_key("document", "abc")) == ("document", "abc")
+        assert parse_source_key("65f0c0ffee") == ("resource", "65f0c0ffee")
+
+    @pytest.mark.asyncio
+    async def test_edits_are_debounced(self):
+        """Test a burst of saves embeds once, with the latest text."""
+        store = FakeStore()
+        indexer, embedded = make_indexer(store)
+
+        for text in ("<p>d</p>", "<p>dr</p>", "<p>draft</p>"):
+            indexer.document_changed(_doc(text))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        assert store.replaced == [("document:d1", ["Notes draft"])]
+        assert len(embedded) == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_content_is_skipped(self):
+        """Test a save that only changes markup does not re-embed."""
+        store = FakeStore()
+        indexer, _ = make_indexer(store)
+
+        indexer.document_changed(_doc("<p>Plants need light</p>"))
+        await asyncio.sleep(0.1)
+        indexer.document_changed(_doc("<p><b>Plants</b>  need light</p>"))
+        await asyncio.sleep(0.1)
+
+        assert len(store.replaced) == 1
+        assert indexer.stats["documents_unchanged"] == 1
+
+    @pytest.mark.asyncio
+    async def test_chats_are_micro_batched(self):
+        """Test chats embed together by batch size, and the rest on the interval."""
+        store = FakeStore()
+        indexer, embedded = make_indexer(store)
+
+        for i in range(3):
+            indexer.add_chat(_chat(f"c{i}"))
+        await asyncio.sleep(0.01)
+        assert [len(batch) for batch in embedded] == [3]
+
+        indexer.add_chat(_chat("c3"))
+        await asyncio.sleep(0.1)
+
+        assert [len(batch) for batch in embedded] == [3, 1]
+        assert store.inserted[0] == ("p1", ["chat:c0", "chat:c1", "chat:c2"])
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_work(self):
+        """Test shutdown embeds documents and chats still waiting."""
+        store = FakeStore()
+        indexer, _ = make_indexer(store, debounce=60, batch_interval=60)
+
+        indexer.document_changed(_doc("<p>Unsaved thoughts</p>"))
+        indexer.add_chat(_chat("c1"))
+        await indexer.stop()
+
+        assert [key for key, _ in store.replaced] == ["document:d1"]
+        assert store.inserted == [("p1", ["chat:c1"])]
+
+    @pytest.mark.asyncio
+    async def test_delete_after_debounce_fired_stores_nothing(self):
+        """Test a document deleted once its embed has started never gets chunks stored."""
+        store = FakeStore()
+        release = asyncio.Event()
+
+        async def embed(texts):
+            await release.wait()  # a slow model; d2 holds the lock meanwhile
+            return [[1.0, 0.0] for _ in texts]
+
+        async def chunk(text):
+            return [SimpleNamespace(text=text, metadata={})]
+
+        indexer = IncrementalIndexer(store, embed, chunk, debounce=0.01, max_delay=1.0)
+        indexer.document_changed(_doc("<p>other</p>", doc_id="d2"))
+        indexer.document_changed(_doc("<p>draft</p>"))
+        await asyncio.sleep(0.05)  # both timers fired; d1 waits behind d2
+
+        deleting = asyncio.create_task(indexer.document_deleted("p1", "d1"))
+        await asyncio.sleep(0.01)
+        release.set()
+        await deleting
+        await asyncio.sleep(0.01)
+
+        assert [key for key, _ in store.replaced] == ["document:d2"]
+        assert store.removed == ["document:d1"]
@@ -0,0 +1,289 @@
+"""Tests for the durable RAG indexing queue."""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.rag.index_queue import (
+    ACTIVE_STATES,
+    DONE,
+    EMBEDDING,
+    EXTRACTING,
+    FAILED,
+    QUEUED,
+    RUNNING_STATES,
+    IndexJobQueue,
+)
+
+
+class FakeJobStore:
+    """In-memory stand-in for the Mongo job store."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.history = []
+
+    async def submit(self, resource_id, project_id, max_tokens, overlap_tokens):
+        job = self.jobs.get(resource_id)
+        if job and job.status in ACTIVE_STATES:
+            return job, False
+        now = datetime.utcnow()
+        job = SimpleNamespace(
+            id=resource_id, resource_id=resource_id, project_id=project_id,
+            status=QUEUED, max_tokens=max_tokens, overlap_tokens=overlap_tokens, attempts=0,
+            chunks_done=0, error=None, worker_id=None, queued_at=now, run_after=now,
+            lease_until=None, started_at=None, finished_at=None,
+        )
+        self.jobs[resource_id] = job
+        return job, True
+
+    async def claim(self, worker_id, lease_seconds, max_attempts):
+        now = datetime.utcnow()
+        for job in sorted(self.jobs.values(), key=lambda j: j.run_after):
+            ready = job.status == QUEUED and job.run_after <= now
+            expired = (
+                job.status in RUNNING_STATES and job.lease_until < now and job.attempts < max_attempts
+            )
+            if ready or expired:
+                job.status = EXTRACTING
+                job.worker_id = worker_id
+                job.attempts += 1
+                job.lease_until = now + timedelta(seconds=lease_seconds)
+                return SimpleNamespace(**vars(job))
+        return None
+
+    async def fail_expired(self, max_attempts, error):
+        now = datetime.utcnow()
+        failed = 0
+        for job in self.jobs.values():
+            if job.status in RUNNING_STATES and job.lease_until < now and job.attempts >= max_attempts:
+                job.status, job.error, job.worker_id, job.finished_at = FAILED, error, None, now
+                failed += 1
+        return failed
+
+    async def update(self, job_id, owner, lease_seconds, **fields):
+        job = self.jobs[job_id]
+        if job.worker_id != owner:
+            return False
+        fields["lease_until"] = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        for key, value in fields.items():
+            setattr(job, key, value)
+        if "status" in fields:
+            self.history.append((job_id, fields["status"]))
+        return True
+
+    async def get_many(self, resource_ids):
+        return {r: self.jobs[r] for r in resource_ids if r in self.jobs}
+
+    async def counts(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    async def finished_since(self, since):
+        done = [j for j in self.jobs.values() if j.status == DONE and j.finished_at >= since]
+        return len(done), sum(j.chunks_done for j in done)
+
+
+async def _drain(queue, store, timeout=2.0):
+    """Wait until no job is active."""
+    async def idle():
+        while any(j.status in ACTIVE_STATES for j in store.jobs.values()):
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(idle(), timeout)
+
+
+class TestIndexJobQueue:
+    """Test job lifecycle, dedupe, concurrency and stats."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_through_states(self):
+        """Test a job reports progress and finishes with its chunk count."""
+        store = FakeJobStore()
+
+        async def handler(job, report):
+            await report(EMBEDDING, 0)
+            await report(EMBEDDING, 256)
+            return 300
+
+        queue = IndexJobQueue(store, handler, workers=1, poll_interval=0.01)
+        await queue.submit("r1", "p1")
+        queue.start()
+        try:
+            await _drain(queue, store)
+        finally:
+            await queue.stop()
+
+        job = store.jobs["r1"]
+        assert job.status == DONE
+        assert job.chunks_done == 300
+        assert [s for _, s in store.history] == [EMBEDDING, EMBEDDING, DONE]
+
+    @pytest.mark.asyncio
+    async def test_resubmission_is_deduplicated(self):
+        """Test an active resource is not queued twice."""
+        queue = IndexJobQueue(FakeJobStore())
+
+        _, first = await queue.submit("r1")
+        _, second = await queue.submit("r1")
+
+        assert (first, second) == (True, False)
+
+    @pytest.mark.asyncio
+    async def test_finished_job_can_be_resubmitted(self):
+        """Test a done job is reset to queued on resubmission."""
+        store = FakeJobStore()
+        queue = IndexJobQueue(store)
+        await queue.submit("r1")
+        store.jobs["r1"].status = DONE
+
+        job, created = await queue.submit("r1")
+
+        assert created and job.status == QUEUED
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_bounds_concurrency(self):
+        """Test no more than ``workers`` jobs run at once."""
+        store = FakeJobStore()
+        running = 0
+        peak = 0
+
+        async def handler(job, report):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return 1
+
+        queue = IndexJobQueue(store, handler, workers=2, poll_interval=0.01)
+        for n in range(6):
+            await queue.submit(f"r{n}")
+        queue.start()
+        try:
+            await _drain(queue, store)
+        finally:
+            await queue.stop()
+
+        assert peak == 2
+        assert all(j.status == DONE for j in store.jobs.values())
+
+    @pytest.mark.asyncio
+    async def test_failures_retry_then_fail(self):
+        """Test a failing job is retried up to max_attempts."""
+        store = FakeJobStore()
+
+        async def handler(job, report):
+            raise ValueError("corrupt pdf")
+
+        queue = IndexJobQueue(
+            store, handler, workers=1, poll_interval=0.01, max_attempts=3, retry_backoff=0
+        )
+        await queue.submit("r1")
+        queue.start()
+        try:
+            await _drain(queue, store)
+        finally:
+            await queue.stop()
+
+        job = store.jobs["r1"]
+        assert job.status == FAILED
+        assert job.attempts == 3
+        assert job.error == "corrupt pdf"
+
+    @pytest.mark.asyncio
+    async def test_slow_job_keeps_its_lease(self):
+        """Test a job running past its lease isn't reclaimed while its worker is alive."""
+        store = FakeJobStore()
+        runs = []
+
+        async def handler(job, report):
+            runs.append(job.resource_id)
+            await asyncio.sleep(0.3)  # e.g. a cold model load
+            await report(EMBEDDING, 0)
+            return 10
+
+        queue = IndexJobQueue(store, handler, workers=2, poll_interval=0.01, lease_seconds=0.06)
+        await queue.submit("r1")
+        queue.start()
+        try:
+            await _drain(queue, store)
+        finally:
+            await queue.stop()
+
+        assert runs == ["r1"]
+        assert store.jobs["r1"].status == DONE
+
+    @pytest.mark.asyncio
+    async def test_reclaimed_job_stops_before_storing(self):
+        """Test a worker that lost its job stops at the next page without touching it."""
+        store = FakeJobStore()
+        stored = []
+
+        async def handler(job, report):
+            await report(EMBEDDING, 0)
+            stored.append("page 1")
+            store.jobs[job.resource_id].worker_id = "another-worker"  # lease expired and reclaimed
+            await report(EMBEDDING, 1)
+            stored.append("page 2")
+            return 2
+
+        queue = IndexJobQueue(store, handler, workers=1, poll_interval=0.01)
+        await queue.submit("r1")
+        queue.start()
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            await queue.stop()
+
+        assert stored == ["page 1"]
+        assert store.jobs["r1"].status == EMBEDDING
+        assert [s for _, s in store.history] == [EMBEDDING]
+
+    @pytest.mark.asyncio
+    async def test_job_that_kills_its_worker_fails_after_max_attempts(self):
+        """Test a job whose lease expires on every attempt is failed, not rerun forever."""
+        store = FakeJobStore()
+        runs = []
+
+        async def handler(job, report):
+            runs.append(job.attempts)
+            await asyncio.sleep(3600)  # e.g. the parser hangs or OOMs the process
+
+        await IndexJobQueue(store).submit("r1")
+        for _ in range(4):
+            # Each worker dies mid-job, leaving its lease to expire
+            queue = IndexJobQueue(
+                store, handler, workers=1, poll_interval=0.01, lease_seconds=0.05, max_attempts=3
+            )
+            queue.start()
+            await asyncio.sleep(0.03)
+            await queue.stop()
+            await asyncio.sleep(0.06)
+
+        job = store.jobs["r1"]
+        assert runs == [1, 2, 3]
+        assert job.status == FAILED
+        assert "all 3 attempts" in job.error
+
+    @pytest.mark.asyncio
+    async def test_stats(self):
+        """Test depth and throughput are reported."""
+        store = FakeJobStore()
+        queue = IndexJobQueue(store, throughput_window=60)
+        await queue.submit("r1")
+        await queue.submit("r2")
+        store.jobs["r2"].status = DONE
+        store.jobs["r2"].chunks_done = 120
+        store.jobs["r2"].finished_at = datetime.utcnow()
+
+        stats = await queue.stats()
+
+        assert stats["depth"] == 1
+        assert stats["by_status"][QUEUED] == 1
+        assert stats["throughput"]["jobs_per_minute"] == 1
+        assert stats["throughput"]["chunks_per_second"] == 2
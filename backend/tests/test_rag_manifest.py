@@ -0,0 +1,101 @@
+"""Tests for the RAG resource manifest."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.rag.manifest import ManifestStore, chunk_bytes
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeCollection:
+    """Records writes and returns canned aggregation rows."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.updates = []
+        self.pipelines = []
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update, upsert))
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.rows)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(ManifestStore, "_collection", staticmethod(lambda: collection))
+    return ManifestStore(), collection
+
+
+def _chunk(content, data=None, vector=None):
+    return SimpleNamespace(content=content, vector_data=data, vector=vector)
+
+
+class TestManifestStore:
+    """Test manifest bookkeeping and endpoint queries."""
+
+    def test_chunk_bytes(self):
+        """Test packed and legacy vectors are both counted."""
+        assert chunk_bytes(_chunk("光合", data=b"\0" * 16)) == 6 + 16
+        assert chunk_bytes(_chunk("abc", vector=[0.1, 0.2])) == 3 + 16
+
+    @pytest.mark.asyncio
+    async def test_record_page_increments(self, store):
+        """Test each page upserts and increments counts for its resource."""
+        manifests, collection = store
+        resource = SimpleNamespace(
+            project_id="p1", filename="a.pdf", mime_type="application/pdf",
+            size=10, uploaded_at=datetime(2024, 1, 1),
+        )
+
+        await manifests.record_page(resource, "r1", [_chunk("ab", data=b"1234")] * 3, "m")
+
+        query, update, upsert = collection.updates[0]
+        assert query == {"resource_id": "r1"} and upsert
+        assert update["$inc"] == {"chunk_count": 3, "bytes": 18}
+        assert update["$setOnInsert"]["project_id"] == "p1"
+
+    @pytest.mark.asyncio
+    async def test_list_page_single_aggregation(self, store):
+        """Test a page and its total come back from one aggregation."""
+        manifests, collection = store
+        now = datetime.utcnow()
+        collection.rows = [{
+            "items": [
+                {"resource_id": "r1", "chunk_count": 4, "indexed_at": now, "project": [{"name": "Plants"}]},
+                {"resource_id": "r2", "chunk_count": 2, "indexed_at": now, "project": []},
+            ],
+            "total": [{"count": 7}],
+        }]
+
+        items, total = await manifests.list_page("p1", 0, 2)
+
+        assert total == 7
+        assert [i["project_name"] for i in items] == ["Plants", None]
+        assert len(collection.pipelines) == 1
+        assert collection.pipelines[0][0] == {"$match": {"project_id": "p1"}}
+
+    @pytest.mark.asyncio
+    async def test_summary_empty(self, store):
+        """Test an empty manifest reports zeros."""
+        manifests, _ = store
+
+        summary = await manifests.summary()
+
+        assert summary["documents"] == 0 and summary["last_updated"] is None
@@ -0,0 +1,132 @@
+"""Tests for the RAG retrieval result cache."""
+
+import pytest
+
+import app.services.rag_service as rag_service_module
+from app.services.rag.result_cache import RetrievalCache, normalize_query
+from app.services.rag_service import RAGService
+
+
+class FakeRedis:
+    """In-memory stand-in for the async Redis client."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    redis = FakeRedis()
+
+    async def loader():
+        return redis
+
+    cache = RetrievalCache(loader, ttl=60)
+    monkeypatch.setattr(rag_service_module, "retrieval_cache", cache)
+
+    async def track(cache_type, hit):
+        return None
+
+    monkeypatch.setattr(cache, "track", track)
+    return cache
+
+
+@pytest.fixture
+def strategies(monkeypatch):
+    """Replace the three strategies with counting stubs."""
+    calls = {"vector": 0, "sliding_window": 0, "realtime": 0}
+
+    def stub(name):
+        async def retrieve(project_id, query, limit):
+            calls[name] += 1
+            return [{"id": f"{name}-1", "type": "resource", "content": name, "score": 1.0}]
+
+        return staticmethod(retrieve)
+
+    monkeypatch.setattr(RAGService, "_vector_retrieve", stub("vector"))
+    monkeypatch.setattr(RAGService, "_sliding_window_retrieve", stub("sliding_window"))
+    monkeypatch.setattr(RAGService, "_realtime_retrieve", stub("realtime"))
+
+    async def timed(strategy, coro, timeout):
+        return await coro, 0.0, True
+
+    monkeypatch.setattr(RAGService, "_timed", staticmethod(timed))
+    return calls
+
+
+class TestRetrievalCache:
+    """Test key construction and generation-based invalidation."""
+
+    def test_query_normalization(self, cache):
+        """Test whitespace and case differences share a key."""
+        assert normalize_query("  What IS\n photosynthesis? ") == "what is photosynthesis?"
+        assert cache.key("p1", "context", [0, 0, 0], "What is  light?", k=5) == cache.key(
+            "p1", "context", [0, 0, 0], "what is light?", k=5
+        )
+        assert cache.key("p1", "context", [0, 0, 0], "light", k=5) != cache.key(
+            "p1", "context", [0, 0, 0], "light", k=3
+        )
+
+    @pytest.mark.asyncio
+    async def test_invalidate_bumps_one_source(self, cache):
+        """Test invalidation only advances the named source's generation."""
+        await cache.invalidate("p1", "chat")
+        await cache.invalidate("p1", "chat")
+
+        assert await cache.generations("p1") == {"vector": 0, "document": 0, "chat": 2}
+        assert await cache.generations("p2") == {"vector": 0, "document": 0, "chat": 0}
+
+
+class TestCachedRetrieval:
+    """Test retrieve_context reuses and invalidates cached results."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_query_is_served_from_cache(self, cache, strategies):
+        """Test an identical normalized query skips every strategy."""
+        first = await RAGService.retrieve_context("p1", "Light energy", 5)
+        second = await RAGService.retrieve_context("p1", "  light ENERGY ", 5)
+
+        assert second["cached"] is True
+        assert second["citations"] == first["citations"]
+        assert strategies == {"vector": 1, "sliding_window": 1, "realtime": 1}
+
+    @pytest.mark.asyncio
+    async def test_chat_invalidation_keeps_other_strategies(self, cache, strategies):
+        """Test a new chat message only reruns the chat strategy."""
+        await RAGService.retrieve_context("p1", "light", 5)
+        await cache.invalidate("p1", "chat")
+        result = await RAGService.retrieve_context("p1", "light", 5)
+
+        assert "cached" not in result
+        assert strategies == {"vector": 1, "sliding_window": 1, "realtime": 2}
+
+    @pytest.mark.asyncio
+    async def test_failed_strategy_is_not_cached(self, cache, strategies, monkeypatch):
+        """Test a timed-out strategy is retried and the fused result not stored."""
+        attempts = []
+
+        async def timed(strategy, coro, timeout):
+            if strategy == "vector" and not attempts:
+                attempts.append(strategy)
+                coro.close()
+                return [], timeout, False
+            return await coro, 0.0, True
+
+        monkeypatch.setattr(RAGService, "_timed", staticmethod(timed))
+
+        await RAGService.retrieve_context("p1", "light", 5)
+        result = await RAGService.retrieve_context("p1", "light", 5)
+
+        assert "cached" not in result
+        assert strategies == {"vector": 1, "sliding_window": 1, "realtime": 1}
+        assert "vector-1" in [c["resource_id"] for c in result["citations"]]
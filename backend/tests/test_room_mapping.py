@@ -275,3 +275,79 @@ class TestRoomMapping:
         has_access = await validate_room_access(socketio_room, "invalid_user_id")
         assert has_access is False
 
+
+
+class TestRoomAccessCache:
+    """Test caching of room access decisions."""
+
+    @pytest.fixture
+    def cache(self):
+        """In-memory stand-in for the Redis cache."""
+        import fnmatch
+        from unittest.mock import patch
+
+        store = {}
+
+        async def get_cache(key):
+            return store.get(key)
+
+        async def set_cache(key, value, ttl=300):
+            store[key] = value
+
+        async def delete_cache_pattern(pattern):
+            for key in fnmatch.filter(list(store), pattern):
+                del store[key]
+
+        with patch("app.services.cache_service.get_cache", get_cache), \
+                patch("app.services.cache_service.set_cache", set_cache), \
+                patch("app.services.cache_service.delete_cache_pattern", delete_cache_pattern):
+            yield store
+
+    @pytest.fixture
+    def repos(self):
+        """Patched repositories counting point reads."""
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, patch
+
+        project = SimpleNamespace(owner_id="owner", members=[{"user_id": "alice", "role": "editor"}])
+        users = {name: SimpleNamespace(id=name, role="student") for name in ("owner", "alice", "bob")}
+        document = SimpleNamespace(project_id="p1")
+        with patch.object(User, "get", AsyncMock(side_effect=lambda user_id: users.get(user_id))) as user_get, \
+                patch.object(Project, "get", AsyncMock(return_value=project)) as project_get, \
+                patch("app.services.room_mapping_service.Document.get", AsyncMock(return_value=document)) as document_get:
+            yield SimpleNamespace(project=project, user_get=user_get, project_get=project_get, document_get=document_get)
+
+    @pytest.mark.asyncio
+    async def test_repeat_checks_hit_cache(self, cache, repos):
+        """Test reconnects reuse the decision instead of reading Mongo again."""
+        for _ in range(3):
+            assert await validate_room_access("wb:p1", "alice") is True
+            assert await validate_room_access("doc:d1", "alice") is True
+            assert await validate_room_access("wb:p1", "bob") is False
+
+        assert repos.user_get.await_count == 3
+        assert repos.project_get.await_count == 3
+        assert repos.document_get.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_membership_change_invalidates(self, cache, repos):
+        """Test adding and removing a member takes effect before the TTL."""
+        from app.services.cache_service import cache_service
+
+        assert await validate_room_access("doc:d1", "bob") is False
+        repos.project.members.append({"user_id": "bob", "role": "viewer"})
+        await cache_service.invalidate_room_access_cache("p1", "bob")
+        assert await validate_room_access("doc:d1", "bob") is True
+
+        repos.project.members = [m for m in repos.project.members if m["user_id"] != "bob"]
+        await cache_service.invalidate_room_access_cache("p1", "bob")
+        assert await validate_room_access("doc:d1", "bob") is False
+
+    @pytest.mark.asyncio
+    async def test_cache_unavailable_falls_back(self, repos):
+        """Test an unreachable cache doesn't deny access."""
+        from unittest.mock import patch
+
+        with patch("app.services.cache_service.get_cache", side_effect=ConnectionError("down")), \
+                patch("app.services.cache_service.set_cache", side_effect=ConnectionError("down")):
+            assert await validate_room_access("project:p1", "alice") is True
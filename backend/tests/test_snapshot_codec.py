@@ -0,0 +1,51 @@
+"""Tests for snapshot compression."""
+
+import os
+
+import pytest
+
+from app.core.utils.snapshot_codec import decode_snapshot, dictionaries, encode_snapshot
+
+STATE = b"\x01\x02\x9b\xe1\x91\x8c\x07\x00" + b'{"type":"rectangle","strokeColor":"#1e1e1e"}' * 50
+
+
+class TestSnapshotCodec:
+    """Test codec tagging and round trips."""
+
+    @pytest.mark.parametrize("codec", ["none", "zlib"])
+    def test_round_trip(self, codec):
+        """Test payloads decode to the original state under their tag."""
+        payload, used = encode_snapshot(STATE, codec)
+
+        assert used == codec
+        assert decode_snapshot(payload, used) == STATE
+
+    def test_incompressible_stored_raw(self):
+        """Test payloads that don't shrink are tagged none."""
+        noise = os.urandom(64)
+
+        assert encode_snapshot(noise, "zlib") == (noise, "none")
+
+    def test_legacy_untagged(self):
+        """Test untagged payloads are raw."""
+        assert decode_snapshot(b"abc", None) == b"abc"
+
+    def test_unknown_codec(self):
+        """Test unknown codecs are rejected."""
+        with pytest.raises(ValueError):
+            encode_snapshot(STATE, "lz4")
+
+    def test_zstd_with_dictionary(self):
+        """Test frames remember their dictionary after a newer one is activated."""
+        zstandard = pytest.importorskip("zstandard")
+        samples = [STATE + str(i).encode() * 20 for i in range(200)]
+        first = zstandard.train_dictionary(1024, samples).as_bytes()
+
+        dictionaries.activate(first)
+        payload, used = encode_snapshot(STATE, "zstd")
+        dictionaries.active_id = 0
+
+        assert used == "zstd"
+        assert zstandard.get_frame_parameters(payload).dict_id == zstandard.ZstdCompressionDict(first).dict_id()
+        assert decode_snapshot(payload, used) == STATE
+        assert decode_snapshot(encode_snapshot(STATE, "zstd")[0], "zstd") == STATE
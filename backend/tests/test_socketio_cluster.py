@@ -0,0 +1,132 @@
+"""Multi-process test of Socket.IO broadcasts and presence through Redis.
+
+Starts two Socket.IO workers with ``SOCKETIO_REDIS`` on, connects a client to
+each and checks that room events and presence cross workers. Needs a local
+Redis (``TEST_REDIS_URL``) and is skipped without one.
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Users come from MongoDB; the workers only need a name to announce
+WORKER = """
+import sys
+from types import SimpleNamespace
+
+import uvicorn
+
+from app.repositories.user import User
+
+async def get_user(user_id):
+    return SimpleNamespace(username=user_id, avatar_url=None)
+
+User.get = get_user
+uvicorn.run("app.websocket.socketio_server:socketio_app", host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Worker on port {port} did not start")
+
+
+@pytest.fixture
+def workers():
+    """Two worker processes sharing Redis; yields their ports."""
+    pytest.importorskip("aiohttp")  # socketio.AsyncClient
+    pytest.importorskip("uvicorn")
+    import redis
+
+    try:
+        redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except Exception:
+        pytest.skip(f"Redis not available at {REDIS_URL}")
+
+    env = {**os.environ, "SOCKETIO_REDIS": "true", "REDIS_URL": REDIS_URL, "SOCKETIO_PRESENCE_HEARTBEAT": "1"}
+    ports = [_free_port(), _free_port()]
+    processes = [
+        subprocess.Popen([sys.executable, "-c", WORKER, str(port)], cwd=BACKEND_DIR, env=env)
+        for port in ports
+    ]
+    try:
+        for port in ports:
+            _wait_for_port(port)
+        yield ports
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+async def _client(port: int, user_id: str):
+    import socketio
+
+    from app.services.auth_service import create_access_token
+
+    client = socketio.AsyncClient()
+    events = []
+    for name in ("user_joined", "user_left"):
+        client.on(name, lambda data, name=name: events.append((name, data)))
+    await client.connect(f"http://127.0.0.1:{port}", auth={"token": create_access_token({"sub": user_id})})
+    return client, events
+
+
+async def _until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for event")
+        await asyncio.sleep(0.05)
+
+
+class TestSocketIOCluster:
+    """Test room events and presence across worker processes."""
+
+    @pytest.mark.asyncio
+    async def test_events_and_presence_cross_workers(self, workers):
+        """Test joins and leaves on one worker reach a client on the other."""
+        room = f"project:{uuid.uuid4().hex}"
+        alice, alice_events = await _client(workers[0], "alice")
+        bob, _ = await _client(workers[1], "bob")
+        try:
+            await alice.emit("join_room", {"room_id": room})
+            await asyncio.sleep(0.3)
+            await bob.emit("join_room", {"room_id": room})
+            await _until(lambda: any(e == "user_joined" and d["user_id"] == "bob" for e, d in alice_events))
+
+            await bob.emit("leave_room", {"room_id": room})
+            await _until(lambda: any(e == "user_left" and d["user_id"] == "bob" for e, d in alice_events))
+
+            import redis.asyncio as redis
+
+            client = redis.from_url(REDIS_URL, decode_responses=True)
+            members = await client.hgetall(f"presence:room:{room}")
+            await client.aclose()
+            assert [value.split("|")[0] for value in members.values()] == ["alice"]
+        finally:
+            await alice.disconnect()
+            await bob.disconnect()
@@ -0,0 +1,122 @@
+"""Tests for Socket.IO presence."""
+
+import os
+import uuid
+
+import pytest
+
+from app.websocket.presence import Departure, MemoryPresence, RedisPresence
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+async def redis_client():
+    """A local Redis, or skip."""
+    import redis.asyncio as redis
+
+    client = redis.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=0.5)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip(f"Redis not available at {REDIS_URL}")
+    yield client
+    await client.aclose()
+
+
+def redis_presence(client, now, prefix):
+    async def factory():
+        return client
+
+    presence = RedisPresence(factory, ttl=60, clock=lambda: now[0])
+    presence.ROOM_KEY = f"{prefix}:room:"
+    presence.USER_KEY = f"{prefix}:user:"
+    return presence
+
+
+class TestMemoryPresence:
+    """Test membership bookkeeping for a single worker."""
+
+    @pytest.mark.asyncio
+    async def test_tabs_of_one_user(self):
+        """Test a user stays in a room until their last tab leaves."""
+        presence = MemoryPresence()
+        await presence.connect("s1", "alice")
+        await presence.connect("s2", "alice")
+        await presence.join("project:p1", "s1", "alice")
+        await presence.join("project:p1", "s2", "alice")
+
+        assert await presence.members("project:p1") == {"alice": ["s1", "s2"]}
+        assert await presence.leave("project:p1", "s1") == Departure(user_gone=False, room_empty=False)
+        assert await presence.members("project:p1") == {"alice": ["s2"]}
+        assert await presence.leave("project:p1", "s2") == Departure(user_gone=True, room_empty=True)
+        assert await presence.leave("project:p1", "s2") is None
+
+    @pytest.mark.asyncio
+    async def test_rejoin_counts_once(self):
+        """Test joining the same room twice from one tab needs one leave."""
+        presence = MemoryPresence()
+        await presence.connect("s1", "alice")
+        await presence.connect("s2", "bob")
+        await presence.join("doc:d1", "s1", "alice")
+        await presence.join("doc:d1", "s1", "alice")
+        await presence.join("doc:d1", "s2", "bob")
+
+        assert await presence.leave("doc:d1", "s1") == Departure(user_gone=True, room_empty=False)
+        assert await presence.members("doc:d1") == {"bob": ["s2"]}
+
+    @pytest.mark.asyncio
+    async def test_disconnect_forgets_connection(self):
+        """Test a disconnected sid no longer counts as a connection."""
+        presence = MemoryPresence()
+        await presence.connect("s1", "alice")
+        await presence.join("wb:p1", "s1", "alice")
+
+        assert presence.rooms_of("s1") == ["wb:p1"]
+        await presence.leave("wb:p1", "s1")
+        await presence.disconnect("s1")
+
+        assert presence.rooms_of("s1") == []
+        assert await presence.user_sids("alice") == []
+
+
+class TestRedisPresence:
+    """Test presence shared by workers through Redis."""
+
+    @pytest.mark.asyncio
+    async def test_workers_share_members(self, redis_client):
+        """Test members joined on one worker are seen, and left, from another."""
+        now, prefix = [1000.0], f"test-presence:{uuid.uuid4().hex}"
+        worker_a, worker_b = redis_presence(redis_client, now, prefix), redis_presence(redis_client, now, prefix)
+        await worker_a.connect("a1", "alice")
+        await worker_b.connect("b1", "bob")
+
+        await worker_a.join("project:p1", "a1", "alice")
+        await worker_b.join("project:p1", "b1", "bob")
+        assert await worker_b.members("project:p1") == {"alice": ["a1"], "bob": ["b1"]}
+
+        assert await worker_a.leave("project:p1", "a1") == Departure(user_gone=True, room_empty=False)
+        assert await worker_b.leave("project:p1", "b1") == Departure(user_gone=True, room_empty=True)
+        await worker_a.stop()
+        await worker_b.stop()
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_expires_and_heartbeat_keeps_alive(self, redis_client):
+        """Test entries of a worker that stops heartbeating expire, and live ones don't."""
+        now, prefix = [1000.0], f"test-presence:{uuid.uuid4().hex}"
+        live, dead = redis_presence(redis_client, now, prefix), redis_presence(redis_client, now, prefix)
+        await live.connect("l1", "alice")
+        await dead.connect("d1", "bob")
+        await live.join("doc:d1", "l1", "alice")
+        await dead.join("doc:d1", "d1", "bob")
+
+        now[0] += 45
+        await live.beat()
+        now[0] += 30  # bob's entry is 75s old, alice's 30s
+
+        assert await live.members("doc:d1") == {"alice": ["l1"]}
+        assert await redis_client.hkeys(f"{prefix}:room:doc:d1") == ["l1"]
+        assert await live.user_sids("bob") == []
+        await live.stop()
+        await dead.stop()
@@ -0,0 +1,58 @@
+"""Tests for binary embedding vector encoding."""
+
+import numpy as np
+import pytest
+
+from app.core.utils.vector_codec import decode_vector, encode_vector
+
+
+class TestVectorCodec:
+    """Test packing and unpacking of embedding vectors."""
+
+    @pytest.fixture
+    def vector(self):
+        """Create a MiniLM-sized vector."""
+        return np.random.default_rng(0).standard_normal(384).astype(np.float32).tolist()
+
+    def test_float32_round_trip_is_exact(self, vector):
+        """Test float32 packing is lossless and zero-copy."""
+        data, scale = encode_vector(vector, "float32")
+        decoded = decode_vector(data, "float32")
+
+        assert len(data) == 384 * 4
+        assert scale is None
+        assert np.array_equal(decoded, np.asarray(vector, dtype=np.float32))
+        assert not decoded.flags.owndata
+
+    def test_float16_round_trip(self, vector):
+        """Test float16 halves storage with small error."""
+        data, _ = encode_vector(vector, "float16")
+        decoded = decode_vector(data, "float16")
+
+        assert len(data) == 384 * 2
+        assert decoded.dtype == np.float32
+        assert np.allclose(decoded, vector, atol=1e-2)
+
+    def test_int8_quantization_preserves_direction(self, vector):
+        """Test int8 vectors keep cosine similarity close to 1."""
+        data, scale = encode_vector(vector, "int8")
+        decoded = decode_vector(data, "int8", scale)
+        original = np.asarray(vector, dtype=np.float32)
+
+        cosine = decoded @ original / (np.linalg.norm(decoded) * np.linalg.norm(original))
+        assert len(data) == 384
+        assert scale > 0
+        assert cosine > 0.999
+
+    def test_int8_zero_vector(self):
+        """Test an all-zero vector does not divide by zero."""
+        data, scale = encode_vector([0.0, 0.0], "int8")
+
+        assert decode_vector(data, "int8", scale).tolist() == [0.0, 0.0]
+
+    def test_unknown_dtype(self):
+        """Test unsupported dtypes are rejected."""
+        with pytest.raises(ValueError):
+            encode_vector([1.0], "bfloat16")
+        with pytest.raises(ValueError):
+            decode_vector(b"", "bfloat16")
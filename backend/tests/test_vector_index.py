@@ -0,0 +1,188 @@
+"""Tests for the in-process RAG vector index."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.rag.vector_index import ProjectVectorIndex, VectorIndexRegistry
+
+
+def _random_vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+class TestProjectVectorIndex:
+    """Test flat and IVF search, updates and persistence."""
+
+    @pytest.fixture
+    def vectors(self):
+        """Create a small random corpus."""
+        return _random_vectors(500)
+
+    @pytest.fixture
+    def index(self, vectors):
+        """Create a flat index over the corpus."""
+        idx = ProjectVectorIndex(dim=32)
+        idx.add(
+            vectors,
+            [f"e{i}" for i in range(len(vectors))],
+            [f"r{i % 5}" for i in range(len(vectors))],
+            list(range(len(vectors))),
+        )
+        return idx
+
+    def test_search_returns_exact_match_first(self, index, vectors):
+        """Test a stored vector is its own nearest neighbour."""
+        hits = index.search(vectors[42], k=3)
+
+        assert len(hits) == 3
+        assert hits[0].embedding_id == "e42"
+        assert hits[0].resource_id == "r2"
+        assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+        assert hits[0].score >= hits[1].score >= hits[2].score
+
+    def test_remove_resource(self, index, vectors):
+        """Test removing a resource drops all of its chunks."""
+        removed = index.remove_resource("r2")
+
+        assert removed == 100
+        assert len(index) == 400
+        assert all(h.resource_id != "r2" for h in index.search(vectors[42], k=10))
+
+    def test_ivf_search_matches_flat(self):
+        """Test IVF partitioning still finds the exact neighbour."""
+        vectors = _random_vectors(2000, seed=1)
+        idx = ProjectVectorIndex(dim=32, ivf_min_vectors=1000, nprobe=8)
+        idx.add(vectors, [str(i) for i in range(2000)], ["r"] * 2000, list(range(2000)))
+
+        assert idx.centroids is not None
+        assert len(idx) == 2000
+        assert idx.search(vectors[7], k=1)[0].embedding_id == "7"
+
+    def test_save_and_load(self, index, vectors, tmp_path):
+        """Test an index round-trips through its on-disk format."""
+        path = str(tmp_path / "project")
+        index.save(path)
+
+        loaded = ProjectVectorIndex.load(path)
+
+        assert len(loaded) == len(index)
+        assert loaded.search(vectors[3], k=1)[0].embedding_id == "e3"
+
+        loaded.add(vectors[:2], ["new0", "new1"], ["r9", "r9"], [0, 1])
+        assert len(loaded) == len(index) + 2
+
+    def test_save_keeps_generation(self, index, tmp_path):
+        """Test the generation an index reflects survives a save."""
+        path = str(tmp_path / "project")
+        index.generation = 7
+        index.save(path)
+
+        assert ProjectVectorIndex.load(path).generation == 7
+
+    def test_add_skips_existing_rows(self, index, vectors):
+        """Test re-adding chunks a reload already picked up is a no-op."""
+        index.add(vectors[:3], ["e0", "e1", "fresh"], ["r0", "r1", "r9"], [0, 1, 2])
+
+        assert len(index) == 501
+
+    def test_chunk_at_a_time_adds(self):
+        """Test many single-row adds keep every row searchable."""
+        vectors = _random_vectors(300, seed=2)
+        idx = ProjectVectorIndex(dim=32)
+        for i, vector in enumerate(vectors):
+            idx.add([vector], [f"e{i}"], ["r"], [i])
+
+        assert len(idx) == 300
+        assert idx.lists[0].vectors.shape == (300, 32)
+        assert idx.search(vectors[299], k=1)[0].embedding_id == "e299"
+
+    def test_empty_index(self):
+        """Test searching an empty index returns nothing."""
+        assert ProjectVectorIndex(dim=32).search(np.ones(32), k=5) == []
+
+
+class FakeGenerations:
+    """Stand-in for the Redis generation counters shared by processes."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def generation(self, project_id, source):
+        return self.values.get((project_id, source), 0)
+
+    async def invalidate(self, project_id, source):
+        key = (project_id, source)
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+class MemoryRegistry(VectorIndexRegistry):
+    """Registry that builds from a shared list of rows instead of Mongo."""
+
+    def __init__(self, rows, generations, index_dir):
+        super().__init__(index_dir, save_delay=60, generations=generations)
+        self.rows = rows
+        self.builds = 0
+
+    async def _load_or_build(self, project_id, generation):
+        self.builds += 1
+        index = ProjectVectorIndex(dim=32, ivf_min_vectors=self.ivf_min_vectors)
+        if self.rows:
+            ids, owners, chunks, vectors = zip(*self.rows)
+            index.add(np.array(vectors), list(ids), list(owners), list(chunks))
+        index.generation = generation
+        return index
+
+
+class TestVectorIndexRegistry:
+    """Test registries in several processes stay in step."""
+
+    @pytest.mark.asyncio
+    async def test_change_in_one_process_reaches_another(self, tmp_path):
+        """Test a worker reloads after another adds or removes chunks, and the writer doesn't."""
+        vectors = _random_vectors(3)
+        rows = [("e0", "r0", 0, vectors[0])]
+        generations = FakeGenerations()
+        worker_a = MemoryRegistry(rows, generations, str(tmp_path))
+        worker_b = MemoryRegistry(rows, generations, str(tmp_path))
+        assert len(await worker_a.get("p1")) == len(await worker_b.get("p1")) == 1
+
+        rows.append(("e1", "r1", 0, vectors[1]))  # inserted into Mongo first
+        await worker_a.add_chunks("p1", ["r1"], ["e1"], [vectors[1]], [0])
+
+        assert (await worker_b.search("p1", vectors[1], 1))[0].embedding_id == "e1"
+        assert (worker_a.builds, worker_b.builds) == (1, 2)
+
+        rows.pop()
+        await worker_b.remove_resource("p1", "r1")
+
+        assert [h.embedding_id for h in await worker_a.search("p1", vectors[1], 5)] == ["e0"]
+        assert (worker_a.builds, worker_b.builds) == (2, 2)
+        await worker_a.flush()
+        await worker_b.flush()
+
+    @pytest.mark.asyncio
+    async def test_training_runs_off_the_event_loop(self, tmp_path, monkeypatch):
+        """Test the k-means pass an add triggers runs in a worker thread and is swapped in."""
+        registry = MemoryRegistry([], FakeGenerations(), str(tmp_path))
+        registry.ivf_min_vectors = 100
+        threads = []
+        partition = ProjectVectorIndex.partition
+
+        def recording_partition(index, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return partition(index, *args, **kwargs)
+
+        monkeypatch.setattr(ProjectVectorIndex, "partition", recording_partition)
+        vectors = _random_vectors(200)
+        await registry.add_chunks(
+            "p1", ["r0"] * 200, [f"e{i}" for i in range(200)], vectors, list(range(200))
+        )
+
+        index = await registry.get("p1")
+        assert index.centroids is not None and index.trained_size == 200
+        assert threads and threading.main_thread() not in threads
+        assert (await registry.search("p1", vectors[7], 1))[0].embedding_id == "e7"
+        await registry.flush()
@@ -75,8 +75,8 @@ export const ragService = {
      */
     async addDocument(data: {
         resource_id: string;
-        chunk_size?: number;
-        overlap?: number;
+        max_tokens?: number;
+        overlap_tokens?: number;
     }): Promise<{
         message: string;
         resource_id: string;
@@ -12,6 +12,7 @@ import { tabManager } from '../TabManager';
 import { storageManager } from '../storage/StorageManager';
 import { ConnectionManager } from './ConnectionManager';
 import { OperationQueue } from './OperationQueue';
+import { fromUint8Array } from '../../utils/encoding';
 
 
 /**
@@ -66,6 +67,7 @@ export class SyncService extends EventEmitter {
     private operationQueue: OperationQueue;
     private initialized: boolean = false;
     private subscriptions: Map<string, Set<ModuleType>> = new Map(); // roomId -> Set<ModuleType>
+    private stateVectorSources: Map<string, () => Uint8Array> = new Map(); // roomId -> Yjs 状态向量
 
     private seenOperationIds: Set<string> = new Set(); // 用于去重
     private readonly MAX_SEEN_IDS = 1000;
@@ -195,7 +197,7 @@ export class SyncService extends EventEmitter {
         // 重新加入所有订阅的房间
         this.subscriptions.forEach((modules, roomId) => {
             modules.forEach(module => {
-                this.connectionManager.send('join_room', { roomId, module });
+                this.connectionManager.send('join_room', this.joinPayload(roomId, module));
                 console.log(`[SyncService] Re-joined room on connect: ${roomId} (${module})`);
             });
         });
@@ -216,7 +218,7 @@ export class SyncService extends EventEmitter {
     /**
      * 加入协作房间
      */
-    async joinRoom(roomId: string, module: ModuleType): Promise<void> {
+    async joinRoom(roomId: string, module: ModuleType, getStateVector?: () => Uint8Array): Promise<void> {
         // 更新Store
         useRoomStore.getState().joinRoom(roomId, module);
 
@@ -225,17 +227,31 @@ export class SyncService extends EventEmitter {
             this.subscriptions.set(roomId, new Set());
         }
         this.subscriptions.get(roomId)!.add(module);
+        if (getStateVector) {
+            this.stateVectorSources.set(roomId, getStateVector);
+        }
+
+        // 先加载本地数据（快照或草稿），加入时的状态向量才包含它，服务器只需发送缺失部分
+        await this.loadLocalData(roomId, module);
 
         // 如果已连接，发送加入消息
         if (this.connectionManager.isConnected()) {
-            this.connectionManager.send('join_room', { roomId, module });
+            this.connectionManager.send('join_room', this.joinPayload(roomId, module));
             console.log(`[SyncService] Joining room: ${roomId} (${module})`);
         } else {
             console.log(`[SyncService] Queued join room: ${roomId} (${module}) - waiting for connection`);
         }
+    }
 
-        // 尝试加载本地数据（快照或草稿）
-        await this.loadLocalData(roomId, module);
+    /**
+     * 加入消息：带状态向量时服务器以二进制附件回复缺失的更新
+     */
+    private joinPayload(roomId: string, module: ModuleType): Record<string, any> {
+        const getStateVector = this.stateVectorSources.get(roomId);
+        if (!getStateVector) {
+            return { roomId, module };
+        }
+        return { roomId, module, stateVector: getStateVector(), binary: true };
     }
 
     /**
@@ -251,6 +267,7 @@ export class SyncService extends EventEmitter {
             modules.delete(module);
             if (modules.size === 0) {
                 this.subscriptions.delete(roomId);
+                this.stateVectorSources.delete(roomId);
             }
         }
 
@@ -467,20 +484,25 @@ export class SyncService extends EventEmitter {
      * 处理房间状态全量同步
      */
     private async handleRoomStateSync(data: any): Promise<void> {
-        const { roomId, module, state } = data;
-        console.log(`[SyncService] Received full state for ${roomId} (${module})`);
-
-        // 保存快照
-        await storageManager.saveSnapshot({
-            roomId,
-            module,
-            data: typeof state === 'string' ? { update: state, format: 'yjs-update' } : state,
-            version: data.version || 0,
-            timestamp: Date.now()
-        });
+        const { roomId, module, isDiff } = data;
+        // 二进制附件以 ArrayBuffer 到达
+        const state = data.state instanceof ArrayBuffer ? new Uint8Array(data.state) : data.state;
+        console.log(`[SyncService] Received ${isDiff ? 'missing' : 'full'} state for ${roomId} (${module})`);
+
+        // 保存快照（差量更新不是完整状态，不覆盖快照）
+        if (!isDiff) {
+            const update = state instanceof Uint8Array ? fromUint8Array(state) : state;
+            await storageManager.saveSnapshot({
+                roomId,
+                module,
+                data: typeof update === 'string' ? { update, format: 'yjs-update' } : update,
+                version: data.version || 0,
+                timestamp: Date.now()
+            });
+        }
 
         // 通知UI
-        this.emit(`state:${module}`, { roomId, state });
+        this.emit(`state:${module}`, { roomId, state, isDiff });
     }
 
     /**
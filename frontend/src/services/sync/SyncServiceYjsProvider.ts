@@ -261,7 +261,7 @@ export class SyncServiceYjsProvider extends Observable {
     /**
      * 处理全量状态同步
      */
-    private handleStateSync(data: { roomId?: string; room_id?: string; state: any; isDraft?: boolean; isSnapshot?: boolean }) {
+    private handleStateSync(data: { roomId?: string; room_id?: string; state: any; isDraft?: boolean; isSnapshot?: boolean; isDiff?: boolean }) {
         // Inquiry 模块不由 Yjs 负责同步
         if (this.module === 'inquiry') {
             return;
@@ -276,16 +276,21 @@ export class SyncServiceYjsProvider extends Observable {
         if (data.state) {
             try {
                 let updateBlob: string | null = null;
+                let update: Uint8Array | null = null;
 
-                // 兼容不同格式
-                if (typeof data.state === 'string') {
+                // 兼容不同格式：二进制（加入握手）、base64 字符串或 { update }
+                if (data.state instanceof Uint8Array) {
+                    update = data.state;
+                } else if (typeof data.state === 'string') {
                     updateBlob = data.state;
                 } else if (data.state && typeof data.state === 'object' && (data.state as any).update) {
                     updateBlob = (data.state as any).update;
                 }
-
                 if (updateBlob) {
-                    const update = toUint8Array(updateBlob);
+                    update = toUint8Array(updateBlob);
+                }
+
+                if (update) {
                     Y.applyUpdate(this.doc, update, this);
                     this.markSynced();
                 } else {
@@ -320,7 +325,9 @@ export class SyncServiceYjsProvider extends Observable {
 
         try {
             // Join via sync service (triggers join_room on server)
-            await syncService.joinRoom(this.roomId, this.module);
+            // 附带状态向量，服务器只回复本地缺失的更新（inquiry 由服务器状态驱动，仍取全量）
+            const getStateVector = this.module === 'inquiry' ? undefined : () => Y.encodeStateVector(this.doc);
+            await syncService.joinRoom(this.roomId, this.module, getStateVector);
 
             console.log(`[SyncServiceYjsProvider] Joined ${this.roomId} via SyncService`);
             this.wsconnecting = false;